@@ -0,0 +1,589 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitura de áudio compartilhada pelos scripts Python do projeto.
+
+Todo arquivo é decodificado por um único pipe do ffmpeg direto para float32
+(PCM f32le), já na taxa de amostragem e no número de canais pedidos: a
+reamostragem acontece uma vez, dentro do ffmpeg. Arquivos que o libsndfile lê
+sem conversão (ex.: os WAVs gerados pelo separador) são lidos pelo soundfile,
+sem abrir um processo.
+
+Opcionalmente o PCM decodificado fica em um cache em disco (cache/decoded/),
+endereçado pelo conteúdo do arquivo de origem: as etapas do processamento (e
+as duas passadas da separação em janelas) decodificam cada upload uma vez só.
+O cache é ativado com AUDIO_DECODE_CACHE=1.
+
+O separador grava ao lado de vocals.wav um sidecar vocals.f32 (float32 cru
+com um cabeçalho JSON). Quando o sidecar existe e corresponde ao WAV atual,
+as leituras deste módulo usam o sidecar por memory map, sem decodificar.
+
+Uso:
+  python audio_io.py info musica.mp3
+  python audio_io.py decode musica.mp3 --sample-rate 44100 --channels 2
+  python audio_io.py stats
+  python audio_io.py prune --max-size 5G
+  python audio_io.py clear
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from pathlib import Path
+import io
+
+import numpy as np
+import soundfile as sf
+
+from disk_cache import DiskCache, parse_size
+
+
+# Amostras por bloco lido do pipe do ffmpeg (ou do arquivo de cache)
+READ_BLOCK_FRAMES = 262144
+
+# Pasta padrão: cache/decoded/ na raiz do projeto (pode ser trocada por AUDIO_DECODE_CACHE_DIR)
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / "cache" / "decoded"
+
+# Tamanho máximo padrão: 10 GB (pode ser trocado por AUDIO_DECODE_CACHE_MAX_GB)
+DEFAULT_MAX_GB = 10
+
+# Sidecar PCM: "PCMF" + tamanho do JSON (uint32 LE) + JSON, completados com
+# espaços até SIDECAR_HEADER_BYTES; depois float32 intercalado [amostras, canais]
+SIDECAR_SUFFIX = ".f32"
+SIDECAR_MAGIC = b"PCMF"
+SIDECAR_HEADER_BYTES = 4096
+
+
+def probe(path):
+    """
+    Taxa de amostragem, canais e duração do arquivo (soundfile ou ffprobe).
+
+    Returns:
+        dict: {"sample_rate", "channels", "frames" (None se desconhecido), "duration"}
+    """
+    sidecar = open_sidecar(path)
+    if sidecar is not None:
+        return {"sample_rate": sidecar.sample_rate, "channels": sidecar.channels,
+                "frames": sidecar.frames, "duration": sidecar.frames / sidecar.sample_rate}
+
+    try:
+        info = sf.info(str(path))
+        return {"sample_rate": info.samplerate, "channels": info.channels,
+                "frames": info.frames, "duration": info.frames / info.samplerate}
+    except RuntimeError:
+        pass
+
+    command = [
+        "ffprobe", "-v", "error", "-select_streams", "a:0",
+        "-show_entries", "stream=sample_rate,channels:format=duration",
+        "-of", "json", str(path),
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, check=True)
+    except FileNotFoundError:
+        raise RuntimeError("ffprobe não encontrado. Instale FFmpeg: https://ffmpeg.org/download.html")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"ffprobe falhou ao ler {path}: {e.stderr.decode('utf-8', errors='replace').strip()}")
+
+    data = json.loads(result.stdout or b"{}")
+    streams = data.get("streams") or []
+    if not streams:
+        raise RuntimeError(f"Nenhuma faixa de áudio em {path}")
+    duration = float((data.get("format") or {}).get("duration") or 0.0)
+    return {"sample_rate": int(streams[0]["sample_rate"]), "channels": int(streams[0]["channels"]),
+            "frames": None, "duration": duration}
+
+
+def _soundfile_blocks(path, info, channels, block_frames):
+    """
+    Blocos [canais, amostras] lidos pelo soundfile, com mixagem para mono
+    (média dos canais) ou duplicação de mono para mais canais.
+    """
+    for block in sf.blocks(str(path), blocksize=block_frames, dtype='float32', always_2d=True):
+        if channels == info["channels"]:
+            yield block.T
+        elif channels == 1:
+            yield block.mean(axis=1)[None, :]
+        else:
+            yield np.repeat(block.T, channels, axis=0)
+
+
+def _ffmpeg_blocks(path, sample_rate, channels, block_frames):
+    """
+    Decodifica com o ffmpeg e devolve blocos float32 [canais, amostras].
+    """
+    command = [
+        "ffmpeg", "-v", "error", "-nostdin", "-i", str(path),
+        "-map", "0:a:0", "-f", "f32le", "-acodec", "pcm_f32le",
+        "-ac", str(channels), "-ar", str(sample_rate), "-",
+    ]
+    try:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg não encontrado. Instale FFmpeg: https://ffmpeg.org/download.html")
+
+    frame_bytes = 4 * channels
+    finished = False
+    try:
+        while True:
+            data = process.stdout.read(block_frames * frame_bytes)
+            if not data:
+                break
+            usable = len(data) // frame_bytes * frame_bytes
+            yield np.frombuffer(data[:usable], dtype='<f4').reshape(-1, channels).T
+        finished = True
+    finally:
+        if not finished and process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        errors = process.stderr.read().decode("utf-8", errors="replace").strip()
+        process.stderr.close()
+        return_code = process.wait()
+
+    if return_code != 0:
+        raise RuntimeError(f"ffmpeg falhou ao decodificar {path}: {errors}")
+
+
+def _decode_blocks(path, info, sample_rate, channels, block_frames):
+    # Sem reamostragem e com canais compatíveis, o soundfile lê direto do arquivo
+    direct = (info["frames"] is not None and sample_rate == info["sample_rate"]
+              and (channels in (1, info["channels"]) or info["channels"] == 1))
+    if direct:
+        return _soundfile_blocks(path, info, channels, block_frames)
+    return _ffmpeg_blocks(path, sample_rate, channels, block_frames)
+
+
+def read_pcm_blocks(path, sample_rate=None, channels=None, block_frames=READ_BLOCK_FRAMES, cache=None):
+    """
+    Decodifica o arquivo em blocos float32 [canais, amostras].
+
+    Args:
+        sample_rate: taxa de saída (None mantém a original)
+        channels: canais de saída (None mantém os originais; 1 faz a média dos canais)
+        cache: DecodeCache, False para desativar ou None para o padrão (AUDIO_DECODE_CACHE)
+    """
+    sidecar = open_sidecar(path)
+    if sidecar is not None and sample_rate in (None, sidecar.sample_rate):
+        yield from sidecar.blocks(channels, block_frames)
+        return
+
+    if cache is None:
+        cache = default_cache()
+
+    info = None
+    if sample_rate is None or channels is None:
+        info = probe(path)
+        sample_rate = sample_rate or info["sample_rate"]
+        channels = channels or info["channels"]
+
+    key = None
+    if cache:
+        key = source_key(path)
+        cached = cache.open(key, sample_rate, channels)
+        if cached is not None:
+            yield from cached.blocks(block_frames)
+            return
+
+    if info is None:
+        info = probe(path)
+    blocks = _decode_blocks(path, info, sample_rate, channels, block_frames)
+    if not cache:
+        yield from blocks
+        return
+
+    with cache.writer(key, sample_rate, channels, source=Path(path).name) as writer:
+        for block in blocks:
+            writer.write(block)
+            yield block
+
+
+def load_audio(path, sample_rate=None, channels=None, cache=None):
+    """
+    Decodifica o arquivo inteiro.
+
+    Returns:
+        tuple: (array float32 [canais, amostras], taxa de amostragem)
+    """
+    if sample_rate is None or channels is None:
+        info = probe(path)
+        sample_rate = sample_rate or info["sample_rate"]
+        channels = channels or info["channels"]
+
+    blocks = list(read_pcm_blocks(path, sample_rate, channels, cache=cache))
+    if not blocks:
+        return np.zeros((channels, 0), dtype=np.float32), sample_rate
+    # Uma única cópia para um array contíguo (e gravável) [canais, amostras]
+    return np.concatenate(blocks, axis=1), sample_rate
+
+
+def source_key(path, chunk_size=1 << 20):
+    """
+    Hash do conteúdo do arquivo de origem (o mesmo upload em caminhos
+    diferentes, ex.: temp/ e music/<id>/original.mp3, tem a mesma chave).
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CachedPcm:
+    """
+    PCM de uma entrada do cache (float32 intercalado), lido por memory map.
+    """
+
+    def __init__(self, path, stored_channels, channels):
+        self.path = path
+        self.stored_channels = stored_channels
+        self.channels = channels
+
+    def blocks(self, block_frames=READ_BLOCK_FRAMES):
+        if self.path.stat().st_size == 0:
+            return
+        data = np.memmap(self.path, dtype='<f4', mode='r').reshape(-1, self.stored_channels)
+        yield from _memmap_blocks(data, self.channels, block_frames)
+
+
+def _memmap_blocks(data, channels, block_frames):
+    """
+    Blocos [canais, amostras] de um memmap intercalado [amostras, canais], com
+    mixagem para mono ou duplicação de mono, como _soundfile_blocks.
+    """
+    stored = data.shape[1]
+    for start in range(0, data.shape[0], block_frames):
+        block = np.asarray(data[start:start + block_frames]).T
+        if channels == stored:
+            yield block
+        elif channels == 1:
+            yield block.mean(axis=0, keepdims=True)
+        else:
+            yield np.repeat(block, channels, axis=0)
+
+
+def sidecar_path(path):
+    """
+    Caminho do sidecar de um arquivo de áudio (vocals.wav -> vocals.f32).
+    """
+    return Path(path).with_suffix(SIDECAR_SUFFIX)
+
+
+def read_sidecar_header(path):
+    """
+    Cabeçalho JSON de um sidecar .f32, ou None se o arquivo não é um sidecar.
+    """
+    try:
+        with open(path, 'rb') as f:
+            prefix = f.read(8)
+            if len(prefix) < 8 or prefix[:4] != SIDECAR_MAGIC:
+                return None
+            size = int.from_bytes(prefix[4:], "little")
+            return json.loads(f.read(size).decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+class PcmSidecar:
+    """
+    PCM float32 de um sidecar .f32, aberto por memory map (sem decodificar).
+    """
+
+    def __init__(self, path, header):
+        self.path = Path(path)
+        self.header = header
+        self.sample_rate = header["sample_rate"]
+        self.channels = header["channels"]
+        self.frames = header["frames"]
+
+    @property
+    def data(self):
+        """
+        Memory map somente leitura [amostras, canais] (sem cópia).
+        """
+        if self.frames == 0:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        return np.memmap(self.path, dtype='<f4', mode='r', offset=SIDECAR_HEADER_BYTES,
+                         shape=(self.frames, self.channels))
+
+    def blocks(self, channels=None, block_frames=READ_BLOCK_FRAMES):
+        yield from _memmap_blocks(self.data, channels or self.channels, block_frames)
+
+
+def open_sidecar(path):
+    """
+    Sidecar válido para o arquivo de áudio (ou o próprio .f32), ou None.
+
+    O sidecar só vale se o tamanho e a data de modificação do áudio forem os
+    gravados no cabeçalho: um WAV regravado (ou restaurado do cache) invalida
+    o sidecar antigo.
+    """
+    path = Path(path)
+    candidate = path if path.suffix == SIDECAR_SUFFIX else sidecar_path(path)
+    header = read_sidecar_header(candidate)
+    if header is None:
+        return None
+    if candidate != path:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        if (header.get("source_size"), header.get("source_mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+            return None
+    return PcmSidecar(candidate, header)
+
+
+class SidecarWriter:
+    """
+    Grava o sidecar .f32 de um arquivo de áudio em blocos [canais, amostras].
+
+    O cabeçalho (com o tamanho e a data do áudio) é escrito no close(), que
+    deve ser chamado depois que o áudio estiver completo; o arquivo só aparece
+    com o nome final nesse momento.
+    """
+
+    def __init__(self, audio_path, sample_rate, channels):
+        self.audio_path = Path(audio_path)
+        self.path = sidecar_path(audio_path)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames = 0
+        self.tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self._file = open(self.tmp, 'wb')
+        self._file.write(b"\0" * SIDECAR_HEADER_BYTES)
+
+    def write(self, block):
+        self._file.write(np.ascontiguousarray(np.asarray(block).T, dtype='<f4').tobytes())
+        self.frames += block.shape[1]
+
+    def close(self):
+        stat = self.audio_path.stat()
+        header = json.dumps({
+            "format": "f32le",
+            "layout": "interleaved",
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "frames": self.frames,
+            "source": self.audio_path.name,
+            "source_size": stat.st_size,
+            "source_mtime_ns": stat.st_mtime_ns,
+        }).encode("utf-8")
+        if len(header) > SIDECAR_HEADER_BYTES - 8:
+            raise ValueError("Cabeçalho do sidecar grande demais")
+        self._file.seek(0)
+        self._file.write(SIDECAR_MAGIC + len(header).to_bytes(4, "little")
+                         + header.ljust(SIDECAR_HEADER_BYTES - 8, b" "))
+        self._file.close()
+        os.replace(self.tmp, self.path)
+        return self.path
+
+    def abort(self):
+        if not self._file.closed:
+            self._file.close()
+        if self.tmp.exists():
+            self.tmp.unlink()
+
+
+def write_sidecar(audio_path, audio, sample_rate):
+    """
+    Grava o sidecar de um áudio já salvo a partir do array [canais, amostras].
+    """
+    writer = SidecarWriter(audio_path, sample_rate, audio.shape[0])
+    try:
+        writer.write(audio)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+def ensure_sidecar(audio_path):
+    """
+    Gera o sidecar a partir do áudio se ele não existe ou está desatualizado.
+
+    Returns:
+        Path: caminho do sidecar
+    """
+    if open_sidecar(audio_path) is not None:
+        return sidecar_path(audio_path)
+    info = probe(audio_path)
+    writer = SidecarWriter(audio_path, info["sample_rate"], info["channels"])
+    try:
+        for block in read_pcm_blocks(audio_path, cache=False):
+            writer.write(block)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+class _CacheWriter:
+    """
+    Grava o PCM decodificado em um arquivo temporário e só publica a entrada
+    quando o arquivo foi lido até o fim (leituras interrompidas são descartadas).
+    """
+
+    def __init__(self, cache, key, sample_rate, channels, source):
+        self.cache = cache
+        self.key = key
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.source = source
+        self.frames = 0
+        self.path = cache.entry_dir(key) / f"{sample_rate}_{channels}.f32"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self._file = open(self.tmp, 'wb')
+
+    def write(self, block):
+        # Intercalado amostra a amostra ([amostras, canais]), como o f32le do ffmpeg
+        self._file.write(np.ascontiguousarray(block.T, dtype='<f4').tobytes())
+        self.frames += block.shape[1]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is None:
+            os.replace(self.tmp, self.path)
+            self.cache.register(self.key, self.sample_rate, self.channels, self.frames, self.source)
+        elif self.tmp.exists():
+            self.tmp.unlink()
+        return False
+
+
+class DecodeCache(DiskCache):
+    """
+    Cache de PCM decodificado em disco, com limite de tamanho e remoção LRU.
+
+    Cada arquivo de origem tem uma pasta com um .f32 por formato pedido
+    (taxa e canais); um pedido mono é atendido pela versão estéreo já
+    decodificada na mesma taxa.
+    """
+
+    DATA_PATTERN = "*.f32"
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        if cache_dir is None:
+            cache_dir = os.environ.get("AUDIO_DECODE_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("AUDIO_DECODE_CACHE_MAX_GB", DEFAULT_MAX_GB)) * 1024 ** 3)
+        super().__init__(cache_dir, max_bytes)
+
+    def open(self, key, sample_rate, channels):
+        """
+        PCM em cache no formato pedido, ou None.
+        """
+        entry_dir = self.entry_dir(key)
+        meta = self._read_meta(entry_dir)
+        if meta is None:
+            return None
+
+        candidates = [channels] + ([2] if channels == 1 else [])
+        for stored in candidates:
+            path = entry_dir / f"{sample_rate}_{stored}.f32"
+            if f"{sample_rate}_{stored}" in meta.get("formats", {}) and path.exists():
+                meta["last_used"] = time.time()
+                meta["hits"] = meta.get("hits", 0) + 1
+                self._write_meta(entry_dir, meta)
+                return CachedPcm(path, stored, channels)
+        return None
+
+    def writer(self, key, sample_rate, channels, source=None):
+        return _CacheWriter(self, key, sample_rate, channels, source)
+
+    def register(self, key, sample_rate, channels, frames, source=None):
+        """
+        Registra um formato recém-gravado e aplica o limite de tamanho.
+        """
+        entry_dir = self.entry_dir(key)
+        meta = self._read_meta(entry_dir) or {
+            "key": key,
+            "source": source,
+            "created": time.time(),
+            "hits": 0,
+            "formats": {},
+        }
+        meta["formats"][f"{sample_rate}_{channels}"] = {"sample_rate": sample_rate, "channels": channels,
+                                                       "frames": frames}
+        meta["last_used"] = time.time()
+        self._write_meta(entry_dir, meta)
+        self.prune()
+
+
+def default_cache():
+    """
+    Cache padrão: ativo só com AUDIO_DECODE_CACHE=1.
+    """
+    if os.environ.get("AUDIO_DECODE_CACHE", "").strip().lower() in ("1", "true", "yes"):
+        return DecodeCache()
+    return None
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Leitura de áudio e cache de PCM decodificado")
+    parser.add_argument("command", choices=["info", "decode", "stats", "prune", "clear"],
+                        help="info: formato do arquivo | decode: decodifica para o cache | stats: resumo do "
+                             "cache | prune: aplica o limite | clear: remove tudo")
+    parser.add_argument("file", nargs="?", help="Arquivo de áudio (para info e decode)")
+    parser.add_argument("--sample-rate", type=int, default=None, help="Taxa do PCM em cache (decode; padrão: a do arquivo)")
+    parser.add_argument("--channels", type=int, default=None, help="Canais do PCM em cache (decode; padrão: os do arquivo)")
+    parser.add_argument("--cache-dir", default=None,
+                        help=f"Pasta do cache (padrão: AUDIO_DECODE_CACHE_DIR ou {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--max-size", default=None,
+                        help=f"Limite para prune, ex.: 500M, 5G (padrão: AUDIO_DECODE_CACHE_MAX_GB ou "
+                             f"{DEFAULT_MAX_GB}G)")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        if not args.file:
+            parser.error("informe o arquivo")
+        info = probe(args.file)
+        print(f"🎵 {args.file}: {info['sample_rate']} Hz, {info['channels']} canal(is), {info['duration']:.2f}s")
+        return
+
+    max_bytes = parse_size(args.max_size) if args.max_size else None
+    cache = DecodeCache(args.cache_dir, max_bytes)
+
+    if args.command == "decode":
+        if not args.file:
+            parser.error("informe o arquivo")
+        info = probe(args.file)
+        sample_rate = args.sample_rate or info["sample_rate"]
+        channels = args.channels or info["channels"]
+        if cache.open(source_key(args.file), sample_rate, channels) is not None:
+            print(f"⏭️  {args.file}: já está no cache ({sample_rate} Hz, {channels} canal(is))")
+            return
+        started = time.perf_counter()
+        frames = sum(block.shape[1] for block in read_pcm_blocks(args.file, sample_rate, channels, cache=cache))
+        print(f"✅ {args.file}: {frames / sample_rate:.1f}s decodificados para o cache em "
+              f"{time.perf_counter() - started:.2f}s ({sample_rate} Hz, {channels} canal(is))")
+    elif args.command == "stats":
+        entries = cache.entries()
+        total = sum(e["size"] for e in entries)
+        print(f"📂 Cache: {cache.cache_dir}")
+        print(f"   Entradas: {len(entries)}")
+        print(f"   Tamanho: {total / 1024 ** 2:.2f} MB de {cache.max_bytes / 1024 ** 3:.2f} GB")
+        print(f"   Acertos: {sum(e.get('hits', 0) for e in entries)}")
+    elif args.command == "prune":
+        removed = cache.prune()
+        print(f"🗑️  {len(removed)} entrada(s) removida(s)")
+    elif args.command == "clear":
+        removed = cache.clear()
+        print(f"🗑️  Cache limpo: {len(removed)} entrada(s) removida(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Base dos caches em disco do projeto (PCM decodificado em audio_io.py, stems
+separados em stem-separator/separation_cache.py) e leitura de tamanhos como
+'25M' nas linhas de comando.
+
+Cada entrada é uma pasta <cache>/<2 primeiros caracteres da chave>/<chave>/
+com um meta.json (gravado com arquivo temporário + rename) e os arquivos de
+dados. O tamanho total é limitado com remoção LRU pelo campo "last_used".
+
+Só usa a biblioteca padrão: é importado também por scripts sem numpy
+(youtube-downloader/transcode.py).
+"""
+
+import os
+import json
+import shutil
+from pathlib import Path
+
+
+META_FILENAME = "meta.json"
+
+
+def parse_size(text):
+    """
+    Converte tamanhos como '500M', '10G' ou '1024' (bytes) para bytes.
+    """
+    text = str(text).strip().upper()
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+    if text and text[-1] == "B":
+        text = text[:-1]
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(float(text))
+
+
+def format_size(num_bytes):
+    """
+    Formata bytes para exibição (MB ou GB).
+    """
+    if num_bytes >= 1024 ** 3:
+        return f"{num_bytes / 1024 ** 3:.2f} GB"
+    return f"{num_bytes / 1024 ** 2:.2f} MB"
+
+
+class DiskCache:
+    """
+    Cache em disco com limite de tamanho e remoção LRU.
+
+    As subclasses definem DATA_PATTERN (arquivos de dados contados no tamanho
+    de cada entrada) e o que é gravado em cada pasta.
+    """
+
+    DATA_PATTERN = "*"
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    def entry_dir(self, key):
+        return self.cache_dir / key[:2] / key
+
+    def _read_meta(self, entry_dir):
+        try:
+            with open(entry_dir / META_FILENAME, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_meta(self, entry_dir, meta):
+        tmp = entry_dir / f".{META_FILENAME}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, entry_dir / META_FILENAME)
+
+    def entries(self):
+        """
+        Lista as entradas do cache (mais recentes primeiro).
+        """
+        result = []
+        if not self.cache_dir.exists():
+            return result
+        for meta_path in self.cache_dir.glob(f"*/*/{META_FILENAME}"):
+            meta = self._read_meta(meta_path.parent)
+            if meta is None:
+                continue
+            meta["path"] = str(meta_path.parent)
+            meta["size"] = sum(f.stat().st_size for f in meta_path.parent.glob(self.DATA_PATTERN))
+            result.append(meta)
+        result.sort(key=lambda m: m.get("last_used", 0), reverse=True)
+        return result
+
+    def prune(self, max_bytes=None):
+        """
+        Remove as entradas usadas há mais tempo até o cache caber no limite.
+
+        Returns:
+            list: entradas removidas
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = self.entries()
+        total = sum(e["size"] for e in entries)
+        removed = []
+        # entries() vem do mais recente para o mais antigo
+        while entries and total > max_bytes:
+            oldest = entries.pop()
+            shutil.rmtree(oldest["path"], ignore_errors=True)
+            total -= oldest["size"]
+            removed.append(oldest)
+        return removed
+
+    def clear(self):
+        """
+        Remove todas as entradas.
+        """
+        return self.prune(max_bytes=0)
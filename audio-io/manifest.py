@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manifesto das etapas de processamento de cada música (music/<id>/.manifest/).
+
+O backend (processMusic) e o ingest decidiam o que refazer só pela existência
+dos arquivos: um vocals.wav gravado pela metade contava como pronto e trocar o
+original não invalidava nada. Aqui cada ferramenta registra o que produziu,
+um arquivo JSON por etapa:
+
+  separate  stem-separator/separate.py       original.<ext> -> vocals.wav, instrumental.wav
+            (e batch.py, uma entrada por música)
+  waveform  waveform-generator/waveform_extractor.py   vocals.wav -> waveform.bin (+ png, previews...)
+  pitch     pitch-analyzer/pitch_contour.py  vocals.wav -> pitch.bin
+  lyrics    audio-io/transcribe_chunks.py    vocals.wav -> lyrics.lrc
+            (ou lrc-generator, via `record`)
+
+O registro é gravado com estado "running" antes de a ferramenta tocar nas
+saídas e vira "complete" (ou "failed") no fim, com o hash SHA-256, tamanho e
+data de cada entrada e saída, a versão da etapa, os parâmetros e o tempo gasto.
+As ferramentas gravam as saídas em arquivo temporário + rename, então um
+arquivo com o nome final está sempre inteiro; um registro "running" que ficou
+para trás marca uma execução interrompida.
+
+O planejador compara o registro com a pasta e devolve as etapas a refazer:
+saída ausente ou alterada, execução interrompida ou com erro, versão da etapa
+mudou, conteúdo de uma entrada mudou (o hash só é recalculado quando tamanho
+ou data do arquivo mudam) ou alguma etapa anterior vai ser refeita. Músicas
+processadas antes do manifesto não têm registro: por padrão a etapa é refeita;
+com --trust-unrecorded vale a existência das saídas (como no processMusic) e
+`adopt` registra as saídas atuais como referência.
+
+Uso:
+  python manifest.py plan                            # todas as músicas de music/
+  python manifest.py plan abc def --json
+  python manifest.py plan music/abc --trust-unrecorded
+  python manifest.py adopt                           # registra as saídas das músicas antigas
+  python manifest.py show abc
+  python manifest.py record music/abc --steps lyrics --run npx tsx lrc-generator/src/index.ts ...
+  python manifest.py record music/abc --steps lyrics   # lyrics.lrc editado à mão
+
+Registros com "authored" (letra alinhada a partir do texto conhecido, letra
+editada no editor) descrevem saídas escritas pela pessoa: só são refeitos se a
+saída sumir, nunca por mudança de entrada, versão ou etapa anterior.
+
+`record` roda uma ferramenta que não registra a si mesma (ex.: o gerador de
+LRC em TypeScript) e grava o registro da etapa em volta dela: as entradas são
+as da etapa na pasta e o código de saída do comando decide "complete" ou
+"failed". Sem --run, registra as saídas atuais como escritas à mão.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+import io
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MUSIC_DIR = PROJECT_ROOT / 'music'
+
+MANIFEST_DIRNAME = '.manifest'
+
+STATE_RUNNING = 'running'
+STATE_COMPLETE = 'complete'
+STATE_FAILED = 'failed'
+
+# Entrada especial: o arquivo original.<ext> da música, qualquer que seja a extensão
+ORIGINAL = 'original'
+ORIGINAL_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.flac', '.ogg', '.webm', '.mp4')
+
+# Etapas da pasta de uma música, na ordem do pipeline. A versão sobe quando o
+# formato ou o algoritmo da saída muda, invalidando o que já foi gravado.
+# `legacy`: saídas antigas que ainda contam como prontas sem registro.
+# `editable`: saídas que a pessoa edita (editor de letras); conteúdo diferente
+# do registro é edição, não motivo para refazer a etapa.
+STEPS = {
+    "separate": {"version": 1, "inputs": (ORIGINAL,), "outputs": ('vocals.wav', 'instrumental.wav')},
+    "waveform": {"version": 1, "inputs": ('vocals.wav',), "outputs": ('waveform.bin',),
+                 "legacy": ('waveform.json',)},
+    "pitch": {"version": 1, "inputs": ('vocals.wav',), "outputs": ('pitch.bin',)},
+    "lyrics": {"version": 1, "inputs": ('vocals.wav',), "outputs": ('lyrics.lrc',), "editable": True},
+}
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def hash_file(path):
+    """
+    SHA-256 do conteúdo (mesmo hash do source_key do audio_io.py).
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_record(path, previous=None):
+    """
+    Hash, tamanho e data do arquivo. O hash de `previous` (registro anterior do
+    mesmo arquivo) é reaproveitado quando tamanho e data não mudaram.
+    """
+    stat = os.stat(path)
+    if previous and (previous.get("size"), previous.get("mtime_ns")) == (stat.st_size, stat.st_mtime_ns):
+        digest = previous["sha256"]
+    else:
+        digest = hash_file(path)
+    return {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def unchanged(path, record):
+    """
+    O arquivo ainda tem o conteúdo do registro? Só recalcula o hash quando a
+    data mudou com o mesmo tamanho (ex.: cópia ou touch).
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    if stat.st_size != record.get("size"):
+        return False
+    if stat.st_mtime_ns == record.get("mtime_ns"):
+        return True
+    return hash_file(path) == record.get("sha256")
+
+
+def find_original(song_dir):
+    for extension in ORIGINAL_EXTENSIONS:
+        path = Path(song_dir) / f"{ORIGINAL}{extension}"
+        if path.exists():
+            return path
+    return None
+
+
+def step_inputs(song_dir, step):
+    """
+    Entradas da etapa na pasta da música: {nome: caminho ou None se ausente}.
+    """
+    inputs = {}
+    for name in STEPS[step]["inputs"]:
+        if name == ORIGINAL:
+            path = find_original(song_dir)
+            inputs[path.name if path else ORIGINAL] = path
+        else:
+            path = Path(song_dir) / name
+            inputs[name] = path if path.exists() else None
+    return inputs
+
+
+def upstream_steps(step):
+    """
+    Etapas cujas saídas são entradas de `step`.
+    """
+    inputs = set(STEPS[step]["inputs"])
+    return [name for name, spec in STEPS.items() if name != step and inputs & set(spec["outputs"])]
+
+
+def entry_path(song_dir, step):
+    return Path(song_dir) / MANIFEST_DIRNAME / f"{step}.json"
+
+
+def read_entry(song_dir, step):
+    try:
+        with open(entry_path(song_dir, step), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_entry(song_dir, step, entry):
+    """
+    Grava o registro da etapa (arquivo temporário + rename).
+    """
+    path = entry_path(song_dir, step)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _relative_name(path, song_dir):
+    path = Path(path).absolute()
+    try:
+        return str(path.relative_to(Path(song_dir).absolute())).replace(os.sep, '/')
+    except ValueError:
+        return str(path)
+
+
+class StepRecord:
+    """
+    Registra uma execução de etapa no manifesto da pasta das saídas.
+
+    Na entrada grava o estado "running" com o hash das entradas; na saída sem
+    erro, o hash das saídas e o tempo ("complete"); com exceção (inclusive
+    sys.exit), "failed" com a mensagem. As saídas que não existirem no fim
+    (ex.: stems não pedidos) ficam de fora do registro. authored=True marca
+    saídas escritas a partir do que a pessoa forneceu (ex.: letra conhecida).
+
+    Uso:
+        with StepRecord('pitch', [vocals], [pitch_bin], params={"hop": 0.01}):
+            ... grava pitch_bin ...
+    """
+
+    def __init__(self, step, inputs, outputs, params=None, tool=None, authored=False):
+        if step not in STEPS:
+            raise ValueError(f"Etapa desconhecida: {step} (opções: {', '.join(STEPS)})")
+        self.step = step
+        self.inputs = [str(path) for path in inputs]
+        self.outputs = [str(path) for path in outputs]
+        if not self.outputs:
+            raise ValueError("Nenhuma saída para registrar")
+        self.song_dir = Path(self.outputs[0]).absolute().parent
+        self.params = dict(params or {})
+        self.tool = tool or os.path.basename(sys.argv[0] or '') or None
+        self.authored = authored
+        self.entry = None
+        self._started = None
+
+    def __enter__(self):
+        previous = read_entry(self.song_dir, self.step) or {}
+        previous_inputs = previous.get("inputs") or {}
+        inputs = {}
+        for path in self.inputs:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Arquivo não encontrado: {path}")
+            name = _relative_name(path, self.song_dir)
+            inputs[name] = file_record(path, previous_inputs.get(name))
+        self.entry = {
+            "step": self.step,
+            "version": STEPS[self.step]["version"],
+            "state": STATE_RUNNING,
+            "tool": self.tool,
+            "pid": os.getpid(),
+            "startedAt": now_iso(),
+            "inputs": inputs,
+            "params": self.params,
+        }
+        if self.authored:
+            self.entry["authored"] = True
+        write_entry(self.song_dir, self.step, self.entry)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.entry["seconds"] = round(time.perf_counter() - self._started, 3)
+        self.entry["finishedAt"] = now_iso()
+        self.entry["params"] = self.params
+        if exc_type is None:
+            self.entry["state"] = STATE_COMPLETE
+            self.entry["outputs"] = {_relative_name(path, self.song_dir): file_record(path)
+                                     for path in self.outputs if os.path.exists(path)}
+        else:
+            self.entry["state"] = STATE_FAILED
+            self.entry["error"] = str(exc) or exc_type.__name__
+        write_entry(self.song_dir, self.step, self.entry)
+        return False
+
+
+def check_step(song_dir, step, trust_unrecorded=False):
+    """
+    A etapa está em dia na pasta?
+
+    Returns:
+        str ou None: motivo para refazer (None = em dia)
+    """
+    song_dir = Path(song_dir)
+    spec = STEPS[step]
+    entry = read_entry(song_dir, step)
+
+    if entry is None:
+        missing = [name for name in spec["outputs"] if not (song_dir / name).exists()]
+        if missing and not any((song_dir / name).exists() for name in spec.get("legacy", ())):
+            return f"saída ausente: {', '.join(missing)}"
+        return None if trust_unrecorded else "sem registro no manifesto"
+
+    state = entry.get("state")
+    if state == STATE_RUNNING:
+        return f"execução interrompida (iniciada em {entry.get('startedAt')})"
+    if state != STATE_COMPLETE:
+        return f"falhou: {entry.get('error') or state}"
+    authored = entry.get("authored", False)
+    if not authored and entry.get("version") != spec["version"]:
+        return f"versão da etapa mudou ({entry.get('version')} -> {spec['version']})"
+
+    outputs = entry.get("outputs") or {}
+    missing = [name for name in spec["outputs"] if not (song_dir / name).exists()]
+    legacy_ok = any(name in outputs and (song_dir / name).exists() for name in spec.get("legacy", ()))
+    if missing and not legacy_ok:
+        return f"saída ausente: {', '.join(missing)}"
+    for name, record in outputs.items():
+        path = song_dir / name
+        if not path.exists():
+            return f"saída ausente: {name}"
+        if not unchanged(path, record) and not (authored or spec.get("editable")):
+            return f"saída alterada depois do registro: {name}"
+    if authored:
+        return None
+
+    # Entradas comparadas pelo conteúdo: o registro pode ter outro caminho
+    # (ex.: o upload em temp/ que virou original.mp3)
+    recorded = entry.get("inputs") or {}
+    recorded_hashes = {record.get("sha256") for record in recorded.values()}
+    for name, path in step_inputs(song_dir, step).items():
+        if path is None:
+            return f"entrada ausente: {name}"
+        current = file_record(path, recorded.get(name))
+        if current["sha256"] not in recorded_hashes:
+            return f"entrada mudou: {name}"
+    return None
+
+
+def is_authored(song_dir, step):
+    """
+    O registro da etapa descreve uma saída escrita pela pessoa?
+    """
+    entry = read_entry(song_dir, step) or {}
+    return entry.get("state") == STATE_COMPLETE and entry.get("authored", False)
+
+
+def plan_song(song_dir, steps=None, trust_unrecorded=False, force=()):
+    """
+    Etapas a refazer na pasta, em ordem: {etapa: motivo}. Uma etapa cuja
+    entrada vem de outra que vai ser refeita também é refeita.
+    """
+    selected = [step for step in STEPS if steps is None or step in steps]
+    plan = {}
+    for step in selected:
+        if step in force:
+            plan[step] = "forçada"
+            continue
+        pending = [name for name in upstream_steps(step) if name in plan]
+        if pending and not is_authored(song_dir, step):
+            plan[step] = f"depende de {', '.join(pending)}"
+            continue
+        reason = check_step(song_dir, step, trust_unrecorded)
+        if reason:
+            plan[step] = reason
+    return plan
+
+
+def adopt_song(song_dir):
+    """
+    Registra como "complete" as etapas sem registro cujas entradas e saídas
+    existem (músicas processadas antes do manifesto).
+
+    Returns:
+        list: etapas registradas
+    """
+    song_dir = Path(song_dir)
+    adopted = []
+    for step, spec in STEPS.items():
+        if read_entry(song_dir, step) is not None:
+            continue
+        inputs = step_inputs(song_dir, step)
+        outputs = [song_dir / name for name in spec["outputs"] + spec.get("legacy", ())
+                   if (song_dir / name).exists()]
+        if any(path is None for path in inputs.values()) or check_step(song_dir, step, True):
+            continue
+        write_entry(song_dir, step, {
+            "step": step,
+            "version": spec["version"],
+            "state": STATE_COMPLETE,
+            "adopted": True,
+            "finishedAt": now_iso(),
+            "inputs": {name: file_record(path) for name, path in inputs.items()},
+            "params": {},
+            "outputs": {path.name: file_record(path) for path in outputs},
+        })
+        adopted.append(step)
+    return adopted
+
+
+def record_step(song_dir, step, command):
+    """
+    Roda `command` registrando a etapa na pasta da música.
+
+    Returns:
+        int: código de saída do comando
+    """
+    song_dir = Path(song_dir)
+    inputs = [path for path in step_inputs(song_dir, step).values() if path is not None]
+    outputs = [song_dir / name for name in STEPS[step]["outputs"]]
+    tool = os.path.basename(command[0])
+    returncode = 1
+    try:
+        with StepRecord(step, inputs, outputs, params={"command": command}, tool=tool):
+            # No Windows npx/npm são .cmd e só rodam pelo shell
+            returncode = subprocess.call(command, shell=sys.platform == 'win32')
+            if returncode != 0:
+                raise RuntimeError(f"{tool} terminou com código {returncode}")
+            missing = [path.name for path in outputs if not path.exists()]
+            if missing:
+                raise RuntimeError(f"{tool} não gerou {', '.join(missing)}")
+    except (RuntimeError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return returncode or 1
+    return 0
+
+
+def record_outputs(song_dir, step, tool=None):
+    """
+    Registra as saídas atuais da etapa como escritas à mão (ex.: lyrics.lrc
+    salvo pelo editor de letras), para que não sejam regeradas.
+
+    Returns:
+        int: 0, ou 1 se alguma saída não existe
+    """
+    song_dir = Path(song_dir)
+    inputs = [path for path in step_inputs(song_dir, step).values() if path is not None]
+    outputs = [song_dir / name for name in STEPS[step]["outputs"]]
+    missing = [path.name for path in outputs if not path.exists()]
+    if missing:
+        print(f"❌ Saída não encontrada: {', '.join(missing)}", file=sys.stderr)
+        return 1
+    with StepRecord(step, inputs, outputs, tool=tool or "manual", authored=True):
+        pass
+    print(f"📝 {song_dir.name}: {step} registrado como editado", file=sys.stderr)
+    return 0
+
+
+def song_dirs(music_dir, songs=None):
+    """
+    Pastas das músicas pedidas (ID ou caminho) ou de todas as músicas de
+    music_dir (subpastas com original.<ext> ou algum registro).
+    """
+    music_dir = Path(music_dir)
+    if songs:
+        dirs = []
+        for song in songs:
+            path = Path(song)
+            dirs.append(path if path.is_dir() else music_dir / song)
+        return dirs
+    if not music_dir.is_dir():
+        return []
+    return sorted(path for path in music_dir.iterdir()
+                  if path.is_dir() and not path.name.startswith('.')
+                  and (find_original(path) is not None or (path / MANIFEST_DIRNAME).is_dir()))
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Manifesto das etapas e planejamento do que refazer")
+    parser.add_argument("command", choices=["plan", "adopt", "show", "record"],
+                        help="plan: etapas a refazer | adopt: registra as saídas de músicas antigas | "
+                             "show: imprime os registros | record: roda --run registrando a etapa (sem --run: "
+                             "registra as saídas atuais como editadas)")
+    parser.add_argument("songs", nargs="*", help="IDs ou pastas das músicas (padrão: todas de music/)")
+    parser.add_argument("--music-dir", default=str(DEFAULT_MUSIC_DIR), help="Pasta das músicas (padrão: music/)")
+    parser.add_argument("--steps", nargs="+", choices=list(STEPS), default=None,
+                        help="Etapas consideradas (padrão: todas)")
+    parser.add_argument("--force", nargs="+", choices=list(STEPS), default=(),
+                        help="Etapas refeitas mesmo em dia (e as que dependem delas)")
+    parser.add_argument("--trust-unrecorded", action="store_true",
+                        help="Etapas sem registro contam como em dia quando as saídas existem")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON no stdout")
+    parser.add_argument("--run", nargs=argparse.REMAINDER, default=None,
+                        help="record: comando a rodar (tudo depois de --run)")
+    args = parser.parse_args()
+
+    if args.command == "record" and (len(args.songs) != 1 or not args.steps or len(args.steps) != 1):
+        parser.error("record pede uma música e uma etapa em --steps")
+
+    dirs = song_dirs(args.music_dir, args.songs)
+    missing = [str(path) for path in dirs if not path.is_dir()]
+    if missing:
+        print(f"❌ Pasta não encontrada: {', '.join(missing)}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == "record":
+        if args.run:
+            sys.exit(record_step(dirs[0], args.steps[0], args.run))
+        sys.exit(record_outputs(dirs[0], args.steps[0]))
+
+    if args.command == "show":
+        result = {path.name: {step: read_entry(path, step) for step in STEPS} for path in dirs}
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+
+    if args.command == "adopt":
+        result = {path.name: adopt_song(path) for path in dirs}
+        if args.json:
+            print(json.dumps(result, ensure_ascii=False))
+        for name, steps in result.items():
+            print(f"{'📝' if steps else '⏭️ '} {name}: {', '.join(steps) if steps else 'nada a registrar'}",
+                  file=sys.stderr)
+        return
+
+    started = time.perf_counter()
+    result = {path.name: plan_song(path, args.steps, args.trust_unrecorded, args.force) for path in dirs}
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+    for name, plan in result.items():
+        if plan:
+            details = '; '.join(f"{step} ({reason})" for step, reason in plan.items())
+            print(f"🔁 {name}: {details}", file=sys.stderr)
+        else:
+            print(f"✅ {name}: em dia", file=sys.stderr)
+    pending = sum(1 for plan in result.values() if plan)
+    print(f"📋 {pending} de {len(result)} música(s) com etapas a refazer "
+          f"({sum(len(plan) for plan in result.values())} etapa(s), {time.perf_counter() - started:.2f}s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
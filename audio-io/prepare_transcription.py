@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prepara o áudio enviado para transcrição a partir do stem de vocais.
+
+Roda o VAD por energia (vad.py) no vocals.wav, remove os silêncios longos
+entre os trechos cantados (mantendo uma pausa curta entre eles) e codifica o
+resultado em MP3 mono 16 kHz, a taxa que o Whisper usa internamente. O
+bitrate é o de voz (32k), reduzido só se for preciso para caber no limite de
+tamanho.
+
+Junto do MP3 é gravado um mapa de tempo (JSON) para converter os tempos da
+transcrição de volta para o tempo da música:
+  {"segments": [{"start": 12.3, "end": 40.1, "offset": 0.0}, ...]}
+onde start/end são tempos da música e offset é o início do trecho no MP3.
+
+Uso:
+  python prepare_transcription.py music/abc/vocals.wav -o music/abc/temp_vocals_lrc.mp3
+  python prepare_transcription.py vocals.wav -o voz.mp3 --map voz_map.json --max-size 25M --json
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+import io
+
+import numpy as np
+
+from audio_io import load_audio, parse_size
+from vad import MIN_SILENCE, detect_voice
+
+# O cálculo do bitrate pela duração fica em youtube-downloader/transcode.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'youtube-downloader'))
+
+from transcode import DEFAULT_MAX_BYTES, capped_bitrate, partial_path_for
+
+
+# MP3 para transcrição: mono 16 kHz, bitrate de voz
+SPEECH_SAMPLE_RATE = 16000
+SPEECH_BITRATE = 32
+
+# Pausa mantida entre trechos (segundos), para o Whisper não juntar versos distantes
+DEFAULT_GAP = 0.5
+
+
+def build_time_map(segments, gap=DEFAULT_GAP):
+    """
+    Posição de cada trecho no áudio recortado.
+
+    Returns:
+        tuple: (lista de {"start", "end", "offset"}, duração do áudio recortado)
+    """
+    entries = []
+    offset = 0.0
+    for index, (start, end) in enumerate(segments):
+        if index > 0:
+            offset += gap
+        entries.append({"start": start, "end": end, "offset": round(offset, 3)})
+        offset += end - start
+    return entries, round(offset, 3)
+
+
+def encode_segments(audio, sample_rate, entries, output_path, bitrate, gap=DEFAULT_GAP,
+                    out_sample_rate=SPEECH_SAMPLE_RATE):
+    """
+    Codifica os trechos (com as pausas) em MP3 mono, enviando o PCM pelo stdin do ffmpeg.
+    O ffmpeg grava num arquivo temporário, renomeado para output_path só no fim sem erro.
+    """
+    partial = partial_path_for(str(output_path))
+    cmd = [
+        'ffmpeg', '-v', 'error', '-nostdin', '-y',
+        '-f', 'f32le', '-ar', str(sample_rate), '-ac', '1', '-i', 'pipe:0',
+        '-acodec', 'libmp3lame', '-b:a', f'{bitrate}k', '-ar', str(out_sample_rate), '-ac', '1',
+        partial
+    ]
+    try:
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise RuntimeError("FFmpeg não está instalado ou não está no PATH")
+
+    silence = np.zeros(int(round(gap * sample_rate)), dtype='<f4').tobytes()
+    try:
+        for index, entry in enumerate(entries):
+            if index > 0:
+                process.stdin.write(silence)
+            start = int(round(entry["start"] * sample_rate))
+            end = int(round(entry["end"] * sample_rate))
+            process.stdin.write(np.ascontiguousarray(audio[start:end], dtype='<f4').tobytes())
+        process.stdin.close()
+    except BrokenPipeError:
+        pass
+    errors = process.stderr.read().decode('utf-8', errors='replace').strip()
+    process.stderr.close()
+    if process.wait() != 0 or not os.path.exists(partial):
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise RuntimeError(f"FFmpeg falhou ao codificar {output_path}: {errors}")
+    os.replace(partial, output_path)
+
+
+def map_path_for(output_path):
+    """
+    Caminho padrão do mapa de tempo: <saída>_map.json.
+    """
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}_map.json")
+
+
+def prepare_transcription(input_file, output_path, map_path=None, max_bytes=DEFAULT_MAX_BYTES,
+                          bitrate=SPEECH_BITRATE, gap=DEFAULT_GAP, min_silence=MIN_SILENCE,
+                          threshold_db=None):
+    """
+    Gera o MP3 recortado e o mapa de tempo.
+
+    Returns:
+        dict: resumo (durações, trechos, bitrate, tamanho, caminhos) ou None se não há voz
+    """
+    audio, sample_rate = load_audio(input_file, channels=1)
+    audio = audio[0]
+    source_duration = len(audio) / sample_rate
+
+    segments = detect_voice(audio, sample_rate, threshold_db=threshold_db, min_silence=min_silence)
+    if not segments:
+        print("⚠️  Nenhum trecho com voz encontrado", file=sys.stderr)
+        return None
+
+    entries, duration = build_time_map(segments, gap)
+    bitrate = capped_bitrate(duration, max_bytes, bitrate)
+    print(f"✂️  {len(segments)} trecho(s): {duration:.1f}s de {source_duration:.1f}s "
+          f"({duration / source_duration:.0%}), {bitrate}k", file=sys.stderr)
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    encode_segments(audio, sample_rate, entries, output_path, bitrate, gap)
+
+    map_path = Path(map_path) if map_path else map_path_for(output_path)
+    time_map = {
+        "source": Path(input_file).name,
+        "source_duration": round(source_duration, 3),
+        "duration": duration,
+        "gap": gap,
+        "segments": entries,
+    }
+    tmp = map_path.with_name(f".{map_path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(time_map, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, map_path)
+
+    return {
+        "output": str(output_path),
+        "map": str(map_path),
+        "source_duration": round(source_duration, 3),
+        "duration": duration,
+        "segments": len(entries),
+        "bitrate": bitrate,
+        "size": output_path.stat().st_size,
+    }
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Prepara o MP3 de transcrição a partir dos vocais (sem silêncios)")
+    parser.add_argument("input_file", help="Stem de vocais (vocals.wav)")
+    parser.add_argument("--output", "-o", required=True, help="MP3 de saída")
+    parser.add_argument("--map", default=None, help="Mapa de tempo JSON (padrão: <saída>_map.json)")
+    parser.add_argument("--max-size", default=str(DEFAULT_MAX_BYTES), help="Limite do MP3 (padrão: 25M)")
+    parser.add_argument("--bitrate", type=int, default=SPEECH_BITRATE,
+                        help=f"Bitrate máximo em kbps (padrão: {SPEECH_BITRATE})")
+    parser.add_argument("--gap", type=float, default=DEFAULT_GAP,
+                        help=f"Pausa mantida entre trechos em segundos (padrão: {DEFAULT_GAP})")
+    parser.add_argument("--min-silence", type=float, default=MIN_SILENCE,
+                        help=f"Só silêncios maiores que isto são removidos (padrão: {MIN_SILENCE}s)")
+    parser.add_argument("--threshold-db", type=float, default=None, help="Limiar absoluto do VAD em dBFS")
+    parser.add_argument("--json", action="store_true", help="Imprime o resumo em JSON no stdout")
+    args = parser.parse_args()
+
+    try:
+        result = prepare_transcription(args.input_file, args.output, args.map, parse_size(args.max_size),
+                                       args.bitrate, args.gap, args.min_silence, args.threshold_db)
+    except (OSError, RuntimeError) as e:
+        print(f"❌ Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+    if result is None:
+        sys.exit(2)
+
+    print(f"✅ {result['output']}: {result['size'] / (1024 * 1024):.2f} MB "
+          f"(mapa de tempo: {result['map']})", file=sys.stderr)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Transcrição em paralelo do stem de vocais, em pedaços cortados nos silêncios.
+
+Em vez de um único upload do áudio inteiro (serial: o tempo cresce com a
+duração da música), o vocals.wav é dividido em pedaços enviados ao mesmo tempo
+para o endpoint de transcrição (POST {base}/audio/transcriptions):
+
+1. VAD por energia (vad.py) no vocals.wav mono 16 kHz.
+2. Os trechos com voz são agrupados em pedaços de até --chunk-seconds (e
+   abaixo de --max-size), de tamanhos parecidos. Um trecho longo demais é
+   cortado no quadro mais silencioso da segunda metade da janela.
+3. Cada pedaço é montado como em prepare_transcription.py (trechos com uma
+   pausa curta entre eles, mapa de tempo próprio) e codificado em FLAC mono
+   16 kHz na memória, sem ffmpeg.
+4. Os pedidos saem por um pool limitado (--concurrency) sobre asyncio; 429,
+   5xx e falhas de rede são repetidos com espera exponencial (respeitando o
+   Retry-After), sem ocupar a vaga do pool durante a espera.
+5. Os segmentos (verbose_json) de cada pedaço voltam para o tempo da música
+   pelo mapa de tempo do pedaço e são juntados em ordem.
+
+Com vagas suficientes, a transcrição leva mais ou menos o tempo do pedaço mais
+demorado. A URL vem de --base-url ou OPENAI_BASE_URL, então o script roda
+contra o servidor local lyrics-aligner/transcription_stub.py.
+
+Com --lrc a execução fica registrada no manifesto da pasta do LRC (etapa
+"lyrics", ver manifest.py).
+
+Uso:
+  python transcribe_chunks.py music/abc/vocals.wav -o music/abc/transcription.json
+  python transcribe_chunks.py vocals.wav -o t.json --lrc lyrics.lrc --concurrency 8 --chunk-seconds 45
+  python transcribe_chunks.py vocals.wav -o t.json --base-url http://127.0.0.1:8765/v1
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+import io
+
+import numpy as np
+import soundfile as sf
+
+from audio_io import load_audio, parse_size
+from manifest import StepRecord
+from prepare_transcription import DEFAULT_GAP, SPEECH_SAMPLE_RATE, build_time_map
+from vad import FRAME_SECONDS, MIN_SILENCE, detect_voice, frame_rms, to_db
+
+# Mesmo limite do upload único (25 MB da API da OpenAI)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'youtube-downloader'))
+
+from transcode import DEFAULT_MAX_BYTES
+
+DEFAULT_BASE_URL = 'https://api.openai.com/v1'
+DEFAULT_MODEL = 'whisper-1'
+DEFAULT_LANGUAGE = 'pt'
+
+# Maior duração de um pedaço (segundos de áudio enviado, pausas incluídas)
+DEFAULT_CHUNK_SECONDS = 60.0
+
+# Pedidos simultâneos
+DEFAULT_CONCURRENCY = 4
+
+# Tentativas extras por pedaço e espera entre elas (segundos, dobra a cada vez)
+DEFAULT_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 20.0
+
+# Tempo máximo de um pedido (segundos)
+REQUEST_TIMEOUT = 120.0
+
+# Respostas que valem uma nova tentativa
+RETRY_STATUS = (408, 409, 429, 500, 502, 503, 504)
+
+# Pior caso do FLAC (não comprime nada): PCM 16 bits
+FLAC_BYTES_PER_SECOND = SPEECH_SAMPLE_RATE * 2
+
+
+class TranscriptionError(RuntimeError):
+    """
+    Pedido recusado pela API (status HTTP e se vale repetir).
+    """
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        return self.status is None or self.status in RETRY_STATUS
+
+
+def split_long_segments(segments, db, max_seconds, frame_seconds=FRAME_SECONDS):
+    """
+    Corta os trechos maiores que max_seconds no quadro mais silencioso da
+    segunda metade de cada janela (respiração entre frases).
+    """
+    result = []
+    for start, end in segments:
+        while end - start > max_seconds:
+            lo = int((start + max_seconds / 2) / frame_seconds)
+            hi = max(int((start + max_seconds) / frame_seconds), lo + 1)
+            window = db[lo:hi]
+            cut = (lo + int(np.argmin(window))) * frame_seconds if window.size else start + max_seconds
+            cut = round(min(max(cut, start + frame_seconds), start + max_seconds), 3)
+            result.append((start, cut))
+            start = cut
+        result.append((start, end))
+    return result
+
+
+def plan_chunks(segments, max_seconds, gap=DEFAULT_GAP):
+    """
+    Agrupa os trechos (já menores que max_seconds) em pedaços de duração
+    parecida: o total é dividido pelo menor número de pedaços que respeita
+    max_seconds e cada pedaço fecha ao passar dessa média.
+
+    Returns:
+        list: pedaços, cada um uma lista de (início, fim)
+    """
+    total = sum(end - start for start, end in segments) + gap * max(len(segments) - 1, 0)
+    target = total / max(int(np.ceil(total / max_seconds)), 1)
+
+    chunks = []
+    current, length = [], 0.0
+    for start, end in segments:
+        added = (end - start) + (gap if current else 0.0)
+        if current and (length + added > max_seconds or length >= target):
+            chunks.append(current)
+            current, length = [], 0.0
+            added = end - start
+        current.append((start, end))
+        length += added
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def encode_chunk(audio, sample_rate, entries, gap=DEFAULT_GAP):
+    """
+    Trechos do pedaço (com as pausas) em FLAC mono, na memória.
+
+    Returns:
+        bytes
+    """
+    silence = np.zeros(int(round(gap * sample_rate)), dtype=np.float32)
+    parts = []
+    for index, entry in enumerate(entries):
+        if index > 0:
+            parts.append(silence)
+        parts.append(audio[int(round(entry["start"] * sample_rate)):int(round(entry["end"] * sample_rate))])
+    buffer = io.BytesIO()
+    sf.write(buffer, np.concatenate(parts), sample_rate, format='FLAC', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+def to_song_time(entries, time_value, edge='start'):
+    """
+    Tempo do áudio recortado para o tempo da música (mesma regra de
+    lrc-generator/src/timeMap.ts: tempos na pausa entre dois trechos vão para o
+    início do seguinte ou, com edge='end', para o fim do anterior).
+    """
+    index = 0
+    while index + 1 < len(entries) and entries[index + 1]["offset"] <= time_value:
+        index += 1
+    entry = entries[index]
+    if time_value < entry["offset"]:
+        return entry["start"]
+    inside = time_value - entry["offset"]
+    if inside <= entry["end"] - entry["start"]:
+        return entry["start"] + inside
+    if edge == 'start' and index + 1 < len(entries):
+        return entries[index + 1]["start"]
+    return entry["end"]
+
+
+def multipart_body(fields, file_name, file_data, content_type='audio/flac'):
+    """
+    Corpo multipart/form-data com os campos de texto e o arquivo.
+
+    Returns:
+        tuple: (bytes, valor do Content-Type)
+    """
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        if value is None or value == '':
+            continue
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                   f'{value}\r\n'.encode('utf-8'))
+    body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{file_name}"\r\n'
+               f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8'))
+    body.write(file_data)
+    body.write(f'\r\n--{boundary}--\r\n'.encode('utf-8'))
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+def _retry_after(headers):
+    if headers is None:
+        return None
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000.0
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except ValueError:
+        pass
+    return None
+
+
+def post_transcription(url, api_key, fields, file_name, file_data, timeout=REQUEST_TIMEOUT):
+    """
+    Um pedido (bloqueante, roda em uma thread do pool).
+
+    Returns:
+        dict: resposta verbose_json
+    """
+    body, content_type = multipart_body(fields, file_name, file_data)
+    request = urllib.request.Request(url, data=body, method='POST', headers={
+        'Authorization': f'Bearer {api_key}',
+        'Content-Type': content_type,
+        'Accept': 'application/json',
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        detail = e.read().decode('utf-8', errors='replace')[:300]
+        raise TranscriptionError(f"HTTP {e.code}: {detail}", e.code, _retry_after(e.headers)) from e
+    except (urllib.error.URLError, OSError) as e:
+        raise TranscriptionError(f"Falha de rede: {getattr(e, 'reason', e)}") from e
+    except ValueError as e:
+        raise TranscriptionError(f"Resposta inválida: {e}", status=502) from e
+
+
+class ChunkDispatcher:
+    """
+    Envia os pedaços pelo pool (asyncio.Semaphore + threads para o urllib) e
+    repete os pedidos que falham por limite de taxa, erro do servidor ou rede.
+    """
+
+    def __init__(self, base_url, api_key, model=DEFAULT_MODEL, language=DEFAULT_LANGUAGE, prompt=None,
+                 concurrency=DEFAULT_CONCURRENCY, retries=DEFAULT_RETRIES, timeout=REQUEST_TIMEOUT):
+        self.url = base_url.rstrip('/') + '/audio/transcriptions'
+        self.api_key = api_key
+        self.fields = {
+            "model": model,
+            "language": language,
+            "prompt": prompt,
+            "temperature": "0",
+            "response_format": "verbose_json",
+            "timestamp_granularities[]": "segment",
+        }
+        self.concurrency = max(int(concurrency), 1)
+        self.retries = max(int(retries), 0)
+        self.timeout = timeout
+
+    async def _send(self, executor, semaphore, chunk):
+        loop = asyncio.get_running_loop()
+        name = f"chunk-{chunk['index']:03d}.flac"
+        for attempt in range(self.retries + 1):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await loop.run_in_executor(
+                        executor, post_transcription, self.url, self.api_key, self.fields, name,
+                        chunk["data"], self.timeout)
+                except TranscriptionError as e:
+                    if not e.retryable or attempt == self.retries:
+                        raise TranscriptionError(
+                            f"Pedaço {chunk['index']} ({chunk['start']:.1f}s-{chunk['end']:.1f}s) falhou "
+                            f"após {attempt + 1} tentativa(s): {e}", e.status) from e
+                    error = e
+                else:
+                    chunk["attempts"] = attempt + 1
+                    chunk["seconds"] = round(time.perf_counter() - started, 3)
+                    return response
+
+            # Espera fora do pool: as vagas continuam atendendo os outros pedaços
+            delay = error.retry_after
+            if delay is None:
+                delay = BACKOFF_BASE * 2 ** attempt * (0.5 + random.random())
+            delay = min(delay, BACKOFF_MAX)
+            print(f"🔁 Pedaço {chunk['index']}: {error} (nova tentativa em {delay:.1f}s)", file=sys.stderr)
+            await asyncio.sleep(delay)
+
+    async def run(self, chunks):
+        """
+        Transcreve todos os pedaços.
+
+        Returns:
+            list: respostas, na ordem dos pedaços
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            tasks = [asyncio.ensure_future(self._send(executor, semaphore, chunk)) for chunk in chunks]
+            try:
+                return await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+
+
+def stitch_segments(chunks, responses):
+    """
+    Segmentos de todos os pedaços no tempo da música, em ordem e renumerados.
+    """
+    segments = []
+    for chunk, response in zip(chunks, responses):
+        for segment in response.get("segments") or []:
+            text = (segment.get("text") or '').strip()
+            if not text:
+                continue
+            start = to_song_time(chunk["entries"], float(segment["start"]), 'start')
+            end = max(to_song_time(chunk["entries"], float(segment["end"]), 'end'), start)
+            segments.append({"start": round(start, 3), "end": round(end, 3), "text": text,
+                             "chunk": chunk["index"]})
+    segments.sort(key=lambda segment: segment["start"])
+    for index, segment in enumerate(segments):
+        segment["id"] = index
+    return segments
+
+
+def write_lrc(path, segments):
+    """
+    LRC com uma linha por segmento (arquivo temporário + rename).
+    """
+    lines = []
+    for segment in segments:
+        centiseconds = int(round(segment["start"] * 100))
+        minutes, centiseconds = divmod(centiseconds, 6000)
+        lines.append(f"[{minutes:02d}:{centiseconds // 100:02d}.{centiseconds % 100:02d}]{segment['text']}")
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(temp_path, path)
+
+
+def transcribe_chunks(input_file, dispatcher, chunk_seconds=DEFAULT_CHUNK_SECONDS, max_bytes=DEFAULT_MAX_BYTES,
+                      gap=DEFAULT_GAP, min_silence=MIN_SILENCE, threshold_db=None):
+    """
+    VAD, divisão, envio em paralelo e junção dos segmentos.
+
+    Returns:
+        dict: transcrição no formato verbose_json (tempos da música) + pedaços e tempos,
+              ou None se não há voz
+    """
+    started = time.perf_counter()
+    audio, sample_rate = load_audio(input_file, sample_rate=SPEECH_SAMPLE_RATE, channels=1)
+    audio = audio[0]
+    duration = len(audio) / sample_rate
+
+    segments = detect_voice(audio, sample_rate, threshold_db=threshold_db, min_silence=min_silence)
+    if not segments:
+        print("⚠️  Nenhum trecho com voz encontrado", file=sys.stderr)
+        return None
+
+    # O FLAC nunca passa do PCM 16 bits: limitar a duração garante o limite de tamanho
+    max_seconds = min(chunk_seconds, max_bytes / FLAC_BYTES_PER_SECOND * 0.95)
+    db = to_db(frame_rms(audio, sample_rate))
+    planned = plan_chunks(split_long_segments(segments, db, max_seconds), max_seconds, gap)
+
+    chunks = []
+    for index, chunk_segments in enumerate(planned):
+        entries, length = build_time_map(chunk_segments, gap)
+        data = encode_chunk(audio, sample_rate, entries, gap)
+        if len(data) > max_bytes:
+            raise RuntimeError(f"Pedaço {index} com {len(data)} bytes passa do limite de {max_bytes}")
+        chunks.append({"index": index, "start": entries[0]["start"], "end": entries[-1]["end"],
+                       "duration": length, "entries": entries, "data": data})
+    prepared = time.perf_counter()
+    print(f"✂️  {len(chunks)} pedaço(s) de até {max(c['duration'] for c in chunks):.1f}s "
+          f"({len(segments)} trecho(s) com voz em {duration:.1f}s), {dispatcher.concurrency} em paralelo",
+          file=sys.stderr)
+
+    responses = asyncio.run(dispatcher.run(chunks))
+    finished = time.perf_counter()
+
+    stitched = stitch_segments(chunks, responses)
+    return {
+        "task": "transcribe",
+        "language": next((r.get("language") for r in responses if r.get("language")), None),
+        "duration": round(duration, 3),
+        "text": ' '.join(segment["text"] for segment in stitched),
+        "segments": stitched,
+        "chunks": [{
+            "index": chunk["index"],
+            "start": chunk["start"],
+            "end": chunk["end"],
+            "duration": chunk["duration"],
+            "bytes": len(chunk["data"]),
+            "attempts": chunk["attempts"],
+            "seconds": chunk["seconds"],
+        } for chunk in chunks],
+        "timing": {
+            "prepare": round(prepared - started, 3),
+            "transcription": round(finished - prepared, 3),
+            "slowest_chunk": max(chunk["seconds"] for chunk in chunks),
+        },
+    }
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Transcreve os vocais em pedaços paralelos cortados nos silêncios")
+    parser.add_argument("input_file", help="Stem de vocais (vocals.wav)")
+    parser.add_argument("--output", "-o", required=True, help="Transcrição JSON (verbose_json no tempo da música)")
+    parser.add_argument("--lrc", default=None, help="Também grava um LRC com um verso por segmento")
+    parser.add_argument("--base-url", default=os.environ.get("OPENAI_BASE_URL") or DEFAULT_BASE_URL,
+                        help="URL base da API (padrão: OPENAI_BASE_URL ou a da OpenAI)")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help=f"Modelo (padrão: {DEFAULT_MODEL})")
+    parser.add_argument("--language", default=DEFAULT_LANGUAGE, help=f"Idioma (padrão: {DEFAULT_LANGUAGE})")
+    parser.add_argument("--prompt", default=None, help="Prompt de contexto enviado com cada pedaço")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Pedidos simultâneos (padrão: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help=f"Novas tentativas por pedaço (padrão: {DEFAULT_RETRIES})")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT,
+                        help=f"Tempo máximo de cada pedido em segundos (padrão: {REQUEST_TIMEOUT:.0f})")
+    parser.add_argument("--chunk-seconds", type=float, default=DEFAULT_CHUNK_SECONDS,
+                        help=f"Maior duração de um pedaço (padrão: {DEFAULT_CHUNK_SECONDS:.0f}s)")
+    parser.add_argument("--max-size", default=str(DEFAULT_MAX_BYTES), help="Limite de cada upload (padrão: 25M)")
+    parser.add_argument("--gap", type=float, default=DEFAULT_GAP,
+                        help=f"Pausa mantida entre trechos em segundos (padrão: {DEFAULT_GAP})")
+    parser.add_argument("--min-silence", type=float, default=MIN_SILENCE,
+                        help=f"Só silêncios maiores que isto são removidos (padrão: {MIN_SILENCE}s)")
+    parser.add_argument("--threshold-db", type=float, default=None, help="Limiar absoluto do VAD em dBFS")
+    args = parser.parse_args()
+
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        print("❌ OPENAI_API_KEY não configurada (use qualquer valor com o servidor local)", file=sys.stderr)
+        sys.exit(1)
+    if not os.path.exists(args.input_file):
+        print(f"❌ Arquivo não encontrado: {args.input_file}", file=sys.stderr)
+        sys.exit(1)
+
+    dispatcher = ChunkDispatcher(args.base_url, api_key, args.model, args.language, args.prompt,
+                                 args.concurrency, args.retries, args.timeout)
+    # O manifesto registra a etapa "lyrics" (o lyrics.lrc); sem --lrc não há etapa a registrar
+    params = {"model": args.model, "language": args.language, "chunk_seconds": args.chunk_seconds,
+              "gap": args.gap, "min_silence": args.min_silence, "threshold_db": args.threshold_db}
+    record = StepRecord('lyrics', [args.input_file], [args.lrc, args.output], params) if args.lrc else nullcontext()
+    with record:
+        try:
+            result = transcribe_chunks(args.input_file, dispatcher, args.chunk_seconds, parse_size(args.max_size),
+                                       args.gap, args.min_silence, args.threshold_db)
+        except (OSError, RuntimeError) as e:
+            print(f"❌ Erro: {e}", file=sys.stderr)
+            sys.exit(1)
+        if result is None:
+            sys.exit(2)
+
+        temp_path = args.output + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, args.output)
+        if args.lrc:
+            write_lrc(args.lrc, result["segments"])
+
+    timing = result["timing"]
+    retried = sum(chunk["attempts"] - 1 for chunk in result["chunks"])
+    print(f"✅ {len(result['segments'])} segmento(s) de {len(result['chunks'])} pedaço(s) em "
+          f"{timing['transcription']:.2f}s (pedaço mais lento: {timing['slowest_chunk']:.2f}s, "
+          f"{retried} nova(s) tentativa(s)): {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detecção de atividade vocal (VAD) por energia.
+
+Pensada para o stem de vocais: fora dos trechos cantados o sinal é quase
+silêncio, então um limiar relativo ao nível dos trechos mais fortes separa
+bem voz e pausas. O RMS é calculado em quadros de 20 ms, de forma vetorizada.
+
+Uso:
+  python vad.py music/abc/vocals.wav
+  python vad.py music/abc/vocals.wav --min-silence 2 --json
+"""
+
+import sys
+import json
+import argparse
+import io
+
+import numpy as np
+
+from audio_io import load_audio
+
+
+# Duração de cada quadro de energia (segundos)
+FRAME_SECONDS = 0.02
+
+# Limiar: nível dos trechos fortes (percentil) menos a faixa dinâmica, nunca abaixo do piso
+REFERENCE_PERCENTILE = 95
+DYNAMIC_RANGE_DB = 30.0
+FLOOR_DB = -55.0
+
+# Silêncios mais curtos que isto não separam trechos; trechos mais curtos que
+# MIN_VOICE são descartados; PADDING é mantido antes e depois de cada trecho
+MIN_SILENCE = 1.0
+MIN_VOICE = 0.1
+PADDING = 0.2
+
+
+def frame_rms(audio, sample_rate, frame_seconds=FRAME_SECONDS):
+    """
+    RMS de cada quadro de um sinal mono (o último quadro incompleto é descartado).
+
+    Returns:
+        np.ndarray: float32 [quadros]
+    """
+    frame = max(int(round(frame_seconds * sample_rate)), 1)
+    count = len(audio) // frame
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = np.asarray(audio[:count * frame], dtype=np.float32).reshape(count, frame)
+    return np.sqrt(np.einsum('ij,ij->i', frames, frames) / frame).astype(np.float32)
+
+
+def to_db(rms):
+    """
+    RMS linear para dBFS.
+    """
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+
+def voice_threshold(db, dynamic_range=DYNAMIC_RANGE_DB, floor=FLOOR_DB):
+    """
+    Limiar em dBFS a partir do nível dos quadros mais fortes.
+    """
+    if db.size == 0:
+        return floor
+    return max(float(np.percentile(db, REFERENCE_PERCENTILE)) - dynamic_range, floor)
+
+
+def active_runs(mask):
+    """
+    Intervalos [início, fim) de quadros consecutivos ativos.
+    """
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges.reshape(-1, 2)
+
+
+def detect_voice(audio, sample_rate, frame_seconds=FRAME_SECONDS, threshold_db=None,
+                 dynamic_range=DYNAMIC_RANGE_DB, min_silence=MIN_SILENCE, min_voice=MIN_VOICE,
+                 padding=PADDING):
+    """
+    Trechos com voz de um sinal mono.
+
+    Args:
+        threshold_db: limiar absoluto em dBFS (None calcula pelo nível do sinal)
+        min_silence: silêncios mais curtos (segundos) são mantidos dentro do trecho
+        min_voice: trechos mais curtos são descartados
+        padding: margem mantida antes e depois de cada trecho
+
+    Returns:
+        list: [(início, fim)] em segundos, ordenados e sem sobreposição
+    """
+    db = to_db(frame_rms(audio, sample_rate, frame_seconds))
+    return segments_from_db(db, len(audio) / sample_rate, frame_seconds, threshold_db, dynamic_range,
+                            min_silence, min_voice, padding)
+
+
+def segments_from_db(db, duration, frame_seconds=FRAME_SECONDS, threshold_db=None,
+                     dynamic_range=DYNAMIC_RANGE_DB, min_silence=MIN_SILENCE, min_voice=MIN_VOICE,
+                     padding=PADDING):
+    """
+    Trechos com voz a partir do nível (dBFS) de cada quadro, para quem já
+    calculou a energia (ex.: lendo o áudio em blocos). Mesmos argumentos de detect_voice.
+    """
+    if threshold_db is None:
+        threshold_db = voice_threshold(db, dynamic_range)
+    runs = active_runs(db >= threshold_db)
+    if len(runs) == 0:
+        return []
+
+    # Juntar trechos separados por silêncios curtos
+    max_gap = int(round(min_silence / frame_seconds))
+    merged = [list(runs[0])]
+    for start, end in runs[1:]:
+        if start - merged[-1][1] < max_gap:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    min_frames = int(round(min_voice / frame_seconds))
+    segments = []
+    for start, end in merged:
+        if end - start < min_frames:
+            continue
+        seg_start = max(start * frame_seconds - padding, 0.0)
+        seg_end = min(end * frame_seconds + padding, duration)
+        if segments and seg_start <= segments[-1][1]:
+            segments[-1] = (segments[-1][0], seg_end)
+        else:
+            segments.append((seg_start, seg_end))
+    return [(round(start, 3), round(end, 3)) for start, end in segments]
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Detecta os trechos com voz (VAD por energia)")
+    parser.add_argument("input_file", help="Arquivo de áudio (de preferência o stem de vocais)")
+    parser.add_argument("--threshold-db", type=float, default=None,
+                        help="Limiar absoluto em dBFS (padrão: calculado pelo nível do sinal)")
+    parser.add_argument("--min-silence", type=float, default=MIN_SILENCE,
+                        help=f"Menor silêncio que separa trechos, em segundos (padrão: {MIN_SILENCE})")
+    parser.add_argument("--json", action="store_true", help="Imprime os trechos em JSON")
+    args = parser.parse_args()
+
+    audio, sample_rate = load_audio(args.input_file, channels=1)
+    segments = detect_voice(audio[0], sample_rate, threshold_db=args.threshold_db,
+                            min_silence=args.min_silence)
+
+    if args.json:
+        print(json.dumps(segments))
+        return
+    total = audio.shape[1] / sample_rate
+    voiced = sum(end - start for start, end in segments)
+    for start, end in segments:
+        print(f"🎤 {start:8.2f}s - {end:8.2f}s")
+    print(f"📊 {len(segments)} trecho(s), {voiced:.1f}s de voz em {total:.1f}s ({voiced / max(total, 1e-9):.0%})")
+
+
+if __name__ == "__main__":
+    main()
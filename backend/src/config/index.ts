@@ -43,6 +43,14 @@ export const PROCESSING_CONFIG = {
   MAX_FILE_SIZE: 500 * 1024 * 1024, // 500MB
   CHUNK_SIZE: 100000, // ~10MB per chunk
   STATUS_CLEANUP_TIME: 3600000, // 1 hour in ms
+  USE_SEPARATION_WORKER: process.env.SEPARATION_WORKER !== '0', // Keep Demucs loaded in a persistent Python worker
+  SEPARATION_RUNTIME: (process.env.SEPARATION_RUNTIME || 'torch') as 'torch' | 'int8' | 'onnx', // CPU inference runtime (stem-separator/cpu_inference.py)
+  SEPARATION_THREADS: process.env.SEPARATION_THREADS ? parseInt(process.env.SEPARATION_THREADS, 10) : undefined, // Intra-op threads
+  SEPARATION_TIER: (process.env.SEPARATION_TIER || 'balanced') as 'fast' | 'balanced' | 'best', // Default quality/speed tier
+  SEPARATION_BATCH_SIZE: process.env.SEPARATION_BATCH_SIZE ? parseInt(process.env.SEPARATION_BATCH_SIZE, 10) : 1, // Queued worker jobs separated together (stem-separator/batch.py)
+  SEPARATION_PROGRESSIVE: process.env.SEPARATION_PROGRESSIVE !== undefined ? parseFloat(process.env.SEPARATION_PROGRESSIVE) : 20, // Seconds separated first so playback can start early (0 disables)
+  TRANSCRIPTION_MAX_SIZE: 25 * 1024 * 1024, // 25 MB (OpenAI API limit); larger sources get a size-capped MP3
+  TRANSCRIPTION_VAD: process.env.TRANSCRIPTION_VAD !== '0', // Transcribe the vocal stem with long silences cut (audio-io/prepare_transcription.py)
 };
 
 // Audio/Video configuration
@@ -50,6 +58,15 @@ export const MEDIA_CONFIG = {
   ALLOWED_AUDIO_EXTENSIONS: ['mp3', 'wav', 'm4a', 'flac', 'ogg'],
   ALLOWED_VIDEO_EXTENSIONS: ['mp4', 'mkv', 'webm', 'avi'],
   WAVEFORM_PREVIEW_SAMPLE_RATE: 1000,
+  WAVEFORM_FILE: 'waveform.bin', // Binary multi-resolution peaks (waveform-generator/waveform_format.py)
+  LEGACY_WAVEFORM_FILE: 'waveform.json', // Per-sample JSON (still readable)
+  WAVEFORM_PREVIEW_SUFFIX: '_preview.json', // Precomputed fixed-length previews next to the waveform file
+  VOCAL_ACTIVITY_FILE: 'vocal_activity.json', // Voiced segments + 100 ms RMS (waveform-generator/vocal_activity.py)
+  PITCH_FILE: 'pitch.bin', // f0 contour of the vocal stem, int16 MIDI cents every 10 ms (pitch-analyzer/pitch_format.py)
+  LYRICS_SOURCE_FILE: 'lyrics_source.txt', // Known lyric text aligned to the vocal stem (lyrics-aligner/align_lyrics.py)
+  TRANSCRIPTION_AUDIO_FILE: 'temp_audio_lrc.mp3', // Size-capped MP3 for transcription (youtube-downloader/transcode.py)
+  TRANSCRIPTION_VAD_FILE: 'temp_vocals_lrc.mp3', // Vocal stem without long silences, for transcription (audio-io/prepare_transcription.py)
+  TRANSCRIPTION_TIME_MAP_FILE: 'temp_vocals_lrc_map.json', // Maps TRANSCRIPTION_VAD_FILE times back to song times
 };
 
 // WebSocket configuration
@@ -1,7 +1,12 @@
 import { Request, Response } from 'express';
-import { readFileSync, writeFileSync } from 'fs';
+import { dirname, join } from 'path';
+import { existsSync, readFileSync, writeFileSync } from 'fs';
 import { getLyricsPath } from '../services/songPathService.js';
+import { execPython } from '../services/processingService.js';
+import { getSongById, updateSong } from '../utils/database.js';
+import { PROJECT_ROOT, MEDIA_CONFIG } from '../config/index.js';
 import { asyncHandler } from '../middlewares/errorHandler.js';
+import { recordEditedStep } from '../utils/stepManifest.js';
 import { LyricsJson } from '../types/index.js';
 
 /**
@@ -176,6 +181,9 @@ export const updateLyrics = asyncHandler(async (req: Request, res: Response) =>
     writeFileSync(lrcPath, updatedContent, 'utf-8');
   }
 
+  // Hand-edited lyrics must not be replaced by a new transcription
+  await recordEditedStep(dirname(lrcPath), 'lyrics', 'Lyrics');
+
   console.log(`[Lyrics] ✅ Linha ${lineIndex} atualizada para: "${newText}"${newTime !== undefined ? ` (tempo: ${secondsToLrcTimestamp(newTime)})` : ''}`);
 
   res.json({
@@ -276,6 +284,9 @@ export const addLyrics = asyncHandler(async (req: Request, res: Response) => {
   const updatedContent = lines.join('\n');
   writeFileSync(lrcPath, updatedContent, 'utf-8');
 
+  // Hand-edited lyrics must not be replaced by a new transcription
+  await recordEditedStep(dirname(lrcPath), 'lyrics', 'Lyrics');
+
   console.log(`[Lyrics] ✅ Nova linha adicionada em ${timestamp}: "${text.trim()}"`);
 
   res.json({
@@ -334,6 +345,9 @@ export const deleteLyrics = asyncHandler(async (req: Request, res: Response) =>
   const updatedContent = updatedLines.join('\n');
   writeFileSync(lrcPath, updatedContent, 'utf-8');
 
+  // Hand-edited lyrics must not be replaced by a new transcription
+  await recordEditedStep(dirname(lrcPath), 'lyrics', 'Lyrics');
+
   console.log(`[Lyrics] ✅ Linha ${lineIndex} removida: "${lineToDelete}"`);
 
   res.json({
@@ -342,3 +356,62 @@ export const deleteLyrics = asyncHandler(async (req: Request, res: Response) =>
     lineIndex
   });
 });
+
+/**
+ * POST /api/lyrics/align
+ * Aligns known lyric text (one line per verse) to the song's vocal stem locally
+ * (lyrics-aligner/align_lyrics.py) and writes the result as the song's LRC,
+ * without the remote transcription round trip
+ */
+export const alignLyrics = asyncHandler(async (req: Request, res: Response) => {
+  const { songId, text } = req.body;
+
+  if (!songId || typeof text !== 'string' || !text.trim()) {
+    return res.status(400).json({ error: 'Missing required fields: songId, text' });
+  }
+
+  const song = getSongById(songId);
+  if (!song) {
+    return res.status(404).json({ error: 'Música não encontrada' });
+  }
+
+  const songDir = join(PROJECT_ROOT, 'music', song.id);
+  const vocalsPath = join(songDir, song.files.vocals || 'vocals.wav');
+  if (!existsSync(vocalsPath)) {
+    return res.status(404).json({ error: 'Stem de vocais não encontrado para esta música' });
+  }
+
+  // The known text is kept next to the LRC so the song can be realigned later
+  const textPath = join(songDir, MEDIA_CONFIG.LYRICS_SOURCE_FILE);
+  writeFileSync(textPath, text.trim() + '\n', 'utf-8');
+
+  const lyricsFile = song.files.lyrics || 'lyrics.lrc';
+  const alignScript = join(PROJECT_ROOT, 'lyrics-aligner', 'align_lyrics.py');
+  try {
+    const { stdout } = await execPython(
+      `python "${alignScript}" "${vocalsPath}" --lyrics "${textPath}" -o "${join(songDir, lyricsFile)}" --json`,
+      undefined,
+      `[Align Lyrics ${songId}]`
+    );
+    // The JSON result is the last stdout line
+    const result = JSON.parse(stdout.trim().split('\n').pop() || '{}');
+
+    if (!song.files.lyrics) {
+      updateSong(song.id, { files: { ...song.files, lyrics: lyricsFile } });
+    }
+
+    console.log(`[Lyrics] ✅ Letra alinhada localmente: ${result.lines.length} linha(s) em ${result.timing.alignment}s`);
+    res.json({
+      success: true,
+      lyrics: result.lines,
+      totalLines: result.lines.length,
+      timing: result.timing
+    });
+  } catch (error: any) {
+    console.error('[Lyrics] ❌ Erro ao alinhar letra:', error.message);
+    res.status(500).json({
+      success: false,
+      error: `Falha ao alinhar letra: ${error.stderr || error.message}`
+    });
+  }
+});
@@ -1,11 +1,12 @@
 import { Request, Response } from 'express';
 import { join, extname } from 'path';
-import { existsSync, mkdirSync, renameSync, statSync } from 'fs';
+import { existsSync, mkdirSync, renameSync } from 'fs';
 import { getSongById, updateSong } from '../utils/database.js';
 import multer from 'multer';
 import { PROJECT_ROOT, PATHS, PROCESSING_CONFIG, MEDIA_CONFIG } from '../config/index.js';
 import { asyncHandler } from '../middlewares/errorHandler.js';
-import { processingStatus, processMusic, processYouTubeMusic, execPython } from '../services/processingService.js';
+import { isSeparationTier } from '../utils/separationInfo.js';
+import { processingStatus, processMusic, processYouTubeMusic, execPython, prepareTranscriptionAudio } from '../services/processingService.js';
 
 // Configure multer for file uploads
 const storage = multer.diskStorage({
@@ -88,12 +89,16 @@ export const uploadFile = asyncHandler(async (req: Request, res: Response) => {
  * Start processing a song
  */
 export const startProcessing = asyncHandler(async (req: Request, res: Response) => {
-  const { fileId, musicName, displayName, tempPath, songId, bandId } = req.body;
+  const { fileId, musicName, displayName, tempPath, songId, bandId, tier } = req.body;
 
   if (!fileId || !musicName || !tempPath || !songId) {
     return res.status(400).json({ error: 'Dados incompletos' });
   }
 
+  if (tier !== undefined && !isSeparationTier(tier)) {
+    return res.status(400).json({ error: `Nível inválido: ${tier} (use fast, balanced ou best)` });
+  }
+
   if (!existsSync(tempPath)) {
     return res.status(404).json({ error: 'Arquivo não encontrado' });
   }
@@ -117,11 +122,12 @@ export const startProcessing = asyncHandler(async (req: Request, res: Response)
   console.log(`📋 ID: ${fileId}`);
   console.log(`🎵 Música: ${musicName}`);
   console.log(`🎸 Banda: ${bandId || 'Não especificada'}`);
+  console.log(`🎚️  Nível: ${tier || PROCESSING_CONFIG.SEPARATION_TIER}`);
   console.log(`📁 Diretório: ${musicDir}`);
   console.log(`${'='.repeat(60)}\n`);
 
   // Start processing in background
-  processMusic(fileId, tempPath, musicDir, songId, musicName, displayName || musicName, bandId).catch(err => {
+  processMusic(fileId, tempPath, musicDir, songId, musicName, displayName || musicName, bandId, tier).catch(err => {
     console.error(`[${fileId}] ❌ Erro fatal no processamento:`, err);
     const status = processingStatus.get(fileId);
     if (status) {
@@ -495,56 +501,12 @@ async function generateLRCForSong(
     status.step = 'Verificando tamanho do arquivo...';
     status.progress = 20;
 
-    // Verificar tamanho do arquivo
-    const audioFileSize = statSync(audioPath).size;
-    const maxSize = 25 * 1024 * 1024; // 25 MB (limite da API OpenAI)
-    
-    let audioForLRC = audioPath;
-    
-    // Se o arquivo for muito grande, converter para MP3
-    if (audioFileSize > maxSize) {
-      console.log(`[${processId}] ⚠️  Arquivo muito grande (${(audioFileSize / 1024 / 1024).toFixed(2)} MB), convertendo para MP3...`);
-      
-      status.step = 'Convertendo áudio para MP3...';
-      status.progress = 25;
-      
-      const mp3Path = join(musicDir, 'temp_audio_lrc.mp3');
-      const convertScript = join(PROJECT_ROOT, 'youtube-downloader', 'convert_audio_to_mp3.py');
-      
-      if (existsSync(convertScript)) {
-        try {
-          await execPython(
-            `python "${convertScript}" "${audioPath}" "${mp3Path}" "128k" "22050" "1"`,
-            undefined,
-            `${processId} [Convert to MP3]`
-          );
-          
-          if (existsSync(mp3Path)) {
-            const mp3Size = statSync(mp3Path).size;
-            if (mp3Size > maxSize) {
-              // Tentar versão ainda menor
-              const smallerMp3Path = join(musicDir, 'temp_audio_lrc_small.mp3');
-              await execPython(
-                `python "${convertScript}" "${audioPath}" "${smallerMp3Path}" "96k" "16000" "1"`,
-                undefined,
-                `${processId} [Convert to Small MP3]`
-              );
-              
-              if (existsSync(smallerMp3Path)) {
-                audioForLRC = smallerMp3Path;
-              } else {
-                audioForLRC = mp3Path;
-              }
-            } else {
-              audioForLRC = mp3Path;
-            }
-            console.log(`[${processId}] ✅ Áudio convertido para MP3`);
-          }
-        } catch (convertError: any) {
-          console.warn(`[${processId}] ⚠️  Erro ao converter: ${convertError.message}`);
-        }
-      }
-    }
+    // Vocais sem silêncios (com mapa de tempo) ou, sem eles, a mixagem com limite de tamanho
+    const { audioPath: audioForLRC, timeMapPath } = await prepareTranscriptionAudio(audioPath, musicDir, processId, (progress: number) => {
+      status.step = `Convertendo áudio para MP3... ${progress}%`;
+      status.progress = 20 + Math.round(progress * 0.1);
+    });
+    const timeMapArg = timeMapPath ? ` --time-map "${timeMapPath}"` : '';
 
     status.step = 'Gerando letras LRC...';
     status.progress = 30;
@@ -553,7 +515,7 @@ async function generateLRCForSong(
     const lrcScript = join(PROJECT_ROOT, 'lrc-generator', 'src', 'index.ts');
     
     await execPython(
-      `cd "${join(PROJECT_ROOT, 'lrc-generator')}" && npx tsx "${lrcScript}" "${audioForLRC}" --output-dir "${musicDir}"`, 
+      `cd "${join(PROJECT_ROOT, 'lrc-generator')}" && npx tsx "${lrcScript}" "${audioForLRC}" --output-dir "${musicDir}"${timeMapArg}`, 
       join(PROJECT_ROOT, 'lrc-generator'), 
       `${processId} [LRC Generator]`,
       (progress: number) => {
@@ -607,7 +569,12 @@ async function generateLRCForSong(
 
     // Limpar arquivos temporários
     try {
-      const tempMp3Files = ['temp_audio_lrc.mp3', 'temp_audio_lrc_small.mp3'];
+      const tempMp3Files = [
+        MEDIA_CONFIG.TRANSCRIPTION_AUDIO_FILE,
+        MEDIA_CONFIG.TRANSCRIPTION_VAD_FILE,
+        MEDIA_CONFIG.TRANSCRIPTION_TIME_MAP_FILE,
+        'temp_audio_lrc_small.mp3'
+      ];
       for (const tempFile of tempMp3Files) {
         const tempPath = join(musicDir, tempFile);
         if (existsSync(tempPath)) {
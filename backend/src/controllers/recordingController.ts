@@ -1,11 +1,12 @@
 import { Request, Response } from 'express';
 import { join } from 'path';
-import { existsSync, mkdirSync, writeFileSync, readFileSync } from 'fs';
+import { existsSync, mkdirSync, writeFileSync, readFileSync, readdirSync } from 'fs';
 import { getSongById } from '../utils/database.js';
+import { Song } from '../types/index.js';
 import multer from 'multer';
-import { PROJECT_ROOT, PATHS } from '../config/index.js';
+import { PROJECT_ROOT, PATHS, MEDIA_CONFIG } from '../config/index.js';
 import { asyncHandler } from '../middlewares/errorHandler.js';
-import { execPython } from '../services/processingService.js';
+import { execPython, extractPitchContour } from '../services/processingService.js';
 
 // Configure multer for recording uploads
 const storage = multer.memoryStorage();
@@ -662,3 +663,170 @@ export const getRecordingLRC = asyncHandler(async (req: Request, res: Response)
   res.setHeader('Expires', '0');
   res.send(lrcContent);
 });
+
+/**
+ * Recording file and metadata paths: the given recordingId or the most recent one
+ */
+function findRecording(recordingsDir: string, recordingId?: string): { recordingFile: string; metadataFile: string } | null {
+  if (!existsSync(recordingsDir)) {
+    return null;
+  }
+
+  let recordingName = recordingId ? `${recordingId}.webm` : undefined;
+  if (!recordingName) {
+    const webmFiles = readdirSync(recordingsDir)
+      .filter(f => f.endsWith('.webm'))
+      .sort((a, b) => parseInt(b.replace('recording-', '')) - parseInt(a.replace('recording-', '')));
+    recordingName = webmFiles[0];
+  }
+
+  if (!recordingName || !existsSync(join(recordingsDir, recordingName))) {
+    return null;
+  }
+  return {
+    recordingFile: join(recordingsDir, recordingName),
+    metadataFile: join(recordingsDir, recordingName.replace('.webm', '.json'))
+  };
+}
+
+/**
+ * Recording metadata (startTime, offset, alignment); empty when missing or unreadable
+ */
+function readRecordingMetadata(metadataFile: string): { startTime?: number; offset?: number; alignment?: any } {
+  if (!existsSync(metadataFile)) {
+    return {};
+  }
+  try {
+    return JSON.parse(readFileSync(metadataFile, 'utf-8'));
+  } catch (err) {
+    console.warn('Erro ao ler metadados da gravação:', err);
+    return {};
+  }
+}
+
+/**
+ * Estimate the recording latency against the song audio (pitch-analyzer/align_recording.py).
+ * The script writes `alignment` (and `offset`, when the correlation peak is reliable)
+ * into the recording metadata. Returns the alignment result, or null on failure.
+ */
+async function alignRecording(
+  recording: { recordingFile: string; metadataFile: string },
+  song: Song,
+  logPrefix: string
+): Promise<any | null> {
+  const musicDir = join(PROJECT_ROOT, 'music', song.id);
+  const referencePath = [song.files.original, song.files.instrumental]
+    .filter((file): file is string => !!file)
+    .map(file => join(musicDir, file))
+    .find(file => existsSync(file));
+  if (!referencePath) {
+    console.warn(`⚠️ ${logPrefix}: áudio da música não encontrado, gravação sem alinhamento`);
+    return null;
+  }
+
+  const alignScript = join(PROJECT_ROOT, 'pitch-analyzer', 'align_recording.py');
+  try {
+    const { stdout } = await execPython(
+      `python "${alignScript}" "${recording.recordingFile}" --reference "${referencePath}" --metadata "${recording.metadataFile}"`,
+      undefined,
+      `[Align ${logPrefix}]`
+    );
+    // The JSON result is the last stdout line
+    const alignment = JSON.parse(stdout.trim().split('\n').pop() || '{}');
+    console.log(`⏱️ Latência da gravação: ${(alignment.offset * 1000).toFixed(1)} ms (confiança ${alignment.confidence}${alignment.reliable ? '' : ', descartada'})`);
+    return alignment;
+  } catch (error: any) {
+    console.warn(`⚠️ ${logPrefix}: falha ao alinhar gravação: ${error.stderr || error.message}`);
+    return null;
+  }
+}
+
+/**
+ * POST /api/recording/align/:songId?recordingId=id
+ * Estimate the recording latency (cross-correlation of onset envelopes against the
+ * song audio) and store it as `offset` in the recording metadata.
+ */
+export const alignRecordingOffset = asyncHandler(async (req: Request, res: Response) => {
+  const { songId } = req.params;
+  const recordingId = req.query.recordingId as string | undefined;
+
+  const song = getSongById(songId);
+  if (!song) {
+    return res.status(404).json({ error: 'Música não encontrada' });
+  }
+
+  const recording = findRecording(join(PATHS.RECORDINGS_DIR, songId), recordingId);
+  if (!recording) {
+    return res.status(404).json({ error: 'Nenhuma gravação encontrada para esta música' });
+  }
+
+  const alignment = await alignRecording(recording, song, `Align ${songId}`);
+  if (!alignment) {
+    return res.status(500).json({ success: false, error: 'Falha ao alinhar gravação' });
+  }
+  res.json({ success: true, ...alignment });
+});
+
+/**
+ * POST /api/recording/score/:songId?recordingId=id
+ * Score a recording locally by pitch (pitch-analyzer/pitch_score.py), without transcription.
+ * Returns per-line results in the LyricResult shape used by /api/scores.
+ */
+export const scoreRecording = asyncHandler(async (req: Request, res: Response) => {
+  const { songId } = req.params;
+  const recordingId = req.query.recordingId as string | undefined;
+
+  const song = getSongById(songId);
+  if (!song) {
+    return res.status(404).json({ error: 'Música não encontrada' });
+  }
+
+  const recording = findRecording(join(PATHS.RECORDINGS_DIR, songId), recordingId);
+  if (!recording) {
+    return res.status(404).json({ error: 'Nenhuma gravação encontrada para esta música' });
+  }
+
+  const musicDir = join(PROJECT_ROOT, 'music', song.id);
+  const lyricsPath = join(musicDir, song.files.lyrics || 'lyrics.lrc');
+  const pitchPath = join(musicDir, MEDIA_CONFIG.PITCH_FILE);
+  if (!existsSync(lyricsPath)) {
+    return res.status(404).json({ error: 'Letra sincronizada não encontrada para esta música' });
+  }
+
+  // Songs processed before the pitch stage: extract the reference contour once
+  if (!existsSync(pitchPath)) {
+    const vocalsPath = join(musicDir, 'vocals.wav');
+    if (!existsSync(vocalsPath) || !(await extractPitchContour(vocalsPath, musicDir, `Score ${songId}`))) {
+      return res.status(404).json({ error: 'Contorno de pitch de referência não disponível' });
+    }
+  }
+
+  let metadata = readRecordingMetadata(recording.metadataFile);
+  const startTime = metadata.startTime || 0;
+
+  // Recordings not aligned yet: estimate the device latency once and keep it in the metadata
+  if (!metadata.alignment) {
+    await alignRecording(recording, song, `Score ${songId}`);
+    metadata = readRecordingMetadata(recording.metadataFile);
+  }
+  const offset = metadata.offset || 0;
+
+  const scoreScript = join(PROJECT_ROOT, 'pitch-analyzer', 'pitch_score.py');
+  try {
+    const { stdout } = await execPython(
+      `python "${scoreScript}" "${recording.recordingFile}" --reference "${pitchPath}" --lyrics "${lyricsPath}" --start ${startTime} --offset ${offset}`,
+      undefined,
+      `[Pitch Score]`
+    );
+    // The JSON result is the last stdout line
+    const result = JSON.parse(stdout.trim().split('\n').pop() || '{}');
+    console.log(`🎯 Gravação pontuada: ${result.results.length} linha(s), média ${result.average}% (${result.timing.total}s)`);
+    res.json({ success: true, ...result });
+  } catch (error: any) {
+    console.error('Erro ao pontuar gravação:', error.message);
+    res.status(500).json({
+      success: false,
+      error: `Falha ao pontuar gravação: ${error.stderr || error.message}`
+    });
+  }
+});
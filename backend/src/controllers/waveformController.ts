@@ -4,8 +4,10 @@ import {
   getWaveformChunk,
   getTotalChunks,
   getWaveformPreview,
-  loadWaveformData
+  getWaveformLength
 } from '../utils/chunkUtils.js';
+import { loadVocalActivity, getVocalActivityAt } from '../utils/vocalActivity.js';
+import { getPitchPath, readPitchContour } from '../utils/pitchFile.js';
 import { asyncHandler } from '../middlewares/errorHandler.js';
 import { PROCESSING_CONFIG, WEBSOCKET_CONFIG } from '../config/index.js';
 import { WaveformMetadata, WaveformChunk } from '../types/index.js';
@@ -79,8 +81,7 @@ export const stream = asyncHandler(async (req: Request, res: Response) => {
   // Send chunks sequentially
   const CHUNK_SIZE = PROCESSING_CONFIG.CHUNK_SIZE;
   let currentIndex = 0;
-  const waveformData = loadWaveformData(songId);
-  const waveform = waveformData.waveform;
+  const waveformLength = getWaveformLength(songId);
 
   let isClientConnected = true;
 
@@ -90,7 +91,7 @@ export const stream = asyncHandler(async (req: Request, res: Response) => {
       return;
     }
 
-    if (currentIndex >= waveform.length) {
+    if (currentIndex >= waveformLength) {
       // End of stream
       if (isClientConnected && !res.destroyed && !res.closed) {
         try {
@@ -104,8 +105,8 @@ export const stream = asyncHandler(async (req: Request, res: Response) => {
       return;
     }
 
-    const endIndex = Math.min(currentIndex + CHUNK_SIZE, waveform.length);
-    const chunk = waveform.slice(currentIndex, endIndex);
+    const endIndex = Math.min(currentIndex + CHUNK_SIZE, waveformLength);
+    const chunk = getWaveformChunk(currentIndex, endIndex, songId);
 
     try {
       if (isClientConnected && !res.destroyed && !res.closed) {
@@ -178,3 +179,47 @@ export const getPreview = asyncHandler(async (req: Request, res: Response) => {
     sampleRate: rate
   });
 });
+
+/**
+ * GET /api/waveform/activity?song=id[&t=seconds]
+ * Vocal activity index of the song; with t, only whether there is singing at that time
+ */
+export const getActivity = asyncHandler(async (req: Request, res: Response) => {
+  const songId = req.query.song as string;
+  const activity = loadVocalActivity(songId);
+
+  if (!activity) {
+    return res.status(404).json({ error: 'Vocal activity index not found' });
+  }
+
+  if (req.query.t === undefined) {
+    return res.json(activity);
+  }
+
+  const time = parseFloat(req.query.t as string);
+  if (isNaN(time)) {
+    return res.status(400).json({ error: 'Invalid t parameter' });
+  }
+  res.json(getVocalActivityAt(activity, time));
+});
+
+/**
+ * GET /api/waveform/pitch?song=id[&start=seconds&end=seconds]
+ * Pitch contour of the vocal stem (melody guide), in MIDI cents every hop seconds
+ */
+export const getPitch = asyncHandler(async (req: Request, res: Response) => {
+  const songId = req.query.song as string;
+  const pitchPath = getPitchPath(songId);
+
+  if (!pitchPath) {
+    return res.status(404).json({ error: 'Pitch contour not found' });
+  }
+
+  const start = req.query.start !== undefined ? parseFloat(req.query.start as string) : 0;
+  const end = req.query.end !== undefined ? parseFloat(req.query.end as string) : undefined;
+  if (isNaN(start) || start < 0 || (end !== undefined && (isNaN(end) || end < start))) {
+    return res.status(400).json({ error: 'Invalid start/end parameters' });
+  }
+
+  res.json(readPitchContour(pitchPath, start, end));
+});
@@ -7,6 +7,7 @@ router.get('/', lyricsController.getLyrics);
 router.get('/json', lyricsController.getLyricsJson);
 router.put('/', lyricsController.updateLyrics);
 router.post('/', lyricsController.addLyrics);
+router.post('/align', lyricsController.alignLyrics);
 router.delete('/', lyricsController.deleteLyrics);
 
 export { router as lyricsRoutes };
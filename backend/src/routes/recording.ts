@@ -6,5 +6,7 @@ const router = Router();
 router.post('/upload', recordingController.upload.single('audio'), recordingController.uploadRecording);
 router.post('/generate-lrc/:songId', recordingController.generateLRC);
 router.get('/lrc/:songId', recordingController.getRecordingLRC);
+router.post('/align/:songId', recordingController.alignRecordingOffset);
+router.post('/score/:songId', recordingController.scoreRecording);
 
 export { router as recordingRoutes };
@@ -1,6 +1,6 @@
 import { Router } from 'express';
 import * as waveformController from '../controllers/waveformController.js';
-import { validateWaveformChunk, validatePreviewRate } from '../middlewares/validation.js';
+import { validateSongId, validateWaveformChunk, validatePreviewRate } from '../middlewares/validation.js';
 
 const router = Router();
 
@@ -8,5 +8,7 @@ router.get('/metadata', waveformController.getMetadata);
 router.get('/chunk', validateWaveformChunk, waveformController.getChunk);
 router.get('/stream', waveformController.stream);
 router.get('/preview', validatePreviewRate, waveformController.getPreview);
+router.get('/activity', validateSongId, waveformController.getActivity);
+router.get('/pitch', validateSongId, waveformController.getPitch);
 
 export { router as waveformRoutes };
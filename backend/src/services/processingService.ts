@@ -2,8 +2,12 @@ import { spawn } from 'child_process';
 import { join, extname } from 'path';
 import { existsSync, mkdirSync, renameSync, statSync } from 'fs';
 import { addSong, getSongById, updateSong } from '../utils/database.js';
-import { PROJECT_ROOT, PROCESSING_CONFIG, PATHS } from '../config/index.js';
-import { ProcessingStatus } from '../types/index.js';
+import { PROJECT_ROOT, PROCESSING_CONFIG, PATHS, MEDIA_CONFIG } from '../config/index.js';
+import { ProcessingStatus, SeparationTier } from '../types/index.js';
+import { isSeparationWorkerEnabled, submitSeparationJob } from './separationWorker.js';
+import { findWaveformFile, readWaveformDuration, readWaveformHeader } from '../utils/waveformFile.js';
+import { readSeparationInfo, isTierUpgrade } from '../utils/separationInfo.js';
+import { planSongSteps, recordStepCommand } from '../utils/stepManifest.js';
 
 // Store processing status
 export const processingStatus = new Map<string, ProcessingStatus>();
@@ -115,7 +119,7 @@ export async function execPython(
           if (onProgress) {
             const progress = parseProgress(line);
             if (progress !== null) {
-              onProgress(progress);
+              onProgress(progress, line.trim());
             }
           }
         }
@@ -167,6 +171,136 @@ export async function execPython(
   });
 }
 
+/**
+ * Audio to send to transcription, plus the time map when it was cut by the VAD.
+ */
+export interface TranscriptionAudio {
+  audioPath: string;
+  timeMapPath?: string;
+}
+
+/**
+ * Returns the audio file to send to transcription.
+ *
+ * When the vocal stem is available (and PROCESSING_CONFIG.TRANSCRIPTION_VAD is on),
+ * prepare_transcription.py cuts its long silences and writes a 16 kHz speech MP3 plus a
+ * time map; the LRC generator uses the map to put the timestamps back on the song timeline.
+ * Otherwise (or if that fails / finds no voice) the full mix is used as in prepareCappedAudio.
+ */
+export async function prepareTranscriptionAudio(
+  sourcePath: string,
+  musicDir: string,
+  logPrefix: string,
+  onProgress?: (progress: number, message?: string) => void
+): Promise<TranscriptionAudio> {
+  const vocalsPath = join(musicDir, 'vocals.wav');
+  const prepareScript = join(PROJECT_ROOT, 'audio-io', 'prepare_transcription.py');
+  if (PROCESSING_CONFIG.TRANSCRIPTION_VAD && existsSync(vocalsPath) && existsSync(prepareScript)) {
+    const vadPath = join(musicDir, MEDIA_CONFIG.TRANSCRIPTION_VAD_FILE);
+    const timeMapPath = join(musicDir, MEDIA_CONFIG.TRANSCRIPTION_TIME_MAP_FILE);
+    try {
+      console.log(`[${logPrefix}] ✂️  Recortando silêncios dos vocais para transcrição...`);
+      await execPython(
+        `python "${prepareScript}" "${vocalsPath}" -o "${vadPath}" --map "${timeMapPath}" --max-size ${PROCESSING_CONFIG.TRANSCRIPTION_MAX_SIZE}`,
+        undefined,
+        `${logPrefix} [VAD]`
+      );
+      if (existsSync(vadPath) && existsSync(timeMapPath)) {
+        console.log(`[${logPrefix}] ✅ Vocais recortados: ${(statSync(vadPath).size / 1024 / 1024).toFixed(2)} MB`);
+        return { audioPath: vadPath, timeMapPath };
+      }
+    } catch (vadError: any) {
+      // Exit code 2: no voice found in the stem
+      const reason = vadError.code === 2 ? 'nenhuma voz encontrada nos vocais' : vadError.message;
+      console.warn(`[${logPrefix}] ⚠️  Recorte por VAD indisponível (${reason}), usando a mixagem completa...`);
+    }
+  }
+
+  return { audioPath: await prepareCappedAudio(sourcePath, musicDir, logPrefix, onProgress) };
+}
+
+/**
+ * Returns the full-mix audio file to send to transcription.
+ *
+ * Sources within PROCESSING_CONFIG.TRANSCRIPTION_MAX_SIZE are used as-is. Larger ones are
+ * converted once by transcode.py to a mono MP3 whose bitrate is derived from the duration,
+ * so the result fits without a second, lower-quality retry. A capped MP3 already written
+ * next to the source (e.g. by the video extraction) is reused when it is newer than the source.
+ * Falls back to the source if the conversion fails.
+ */
+async function prepareCappedAudio(
+  sourcePath: string,
+  musicDir: string,
+  logPrefix: string,
+  onProgress?: (progress: number, message?: string) => void
+): Promise<string> {
+  const maxSize = PROCESSING_CONFIG.TRANSCRIPTION_MAX_SIZE;
+  const sourceSize = statSync(sourcePath).size;
+  if (sourceSize <= maxSize) {
+    return sourcePath;
+  }
+
+  const mp3Path = join(musicDir, MEDIA_CONFIG.TRANSCRIPTION_AUDIO_FILE);
+  // Same ffmpeg run as the source (video extraction): allow for the outputs being closed one after another
+  if (existsSync(mp3Path) && statSync(mp3Path).mtimeMs + 1000 >= statSync(sourcePath).mtimeMs && statSync(mp3Path).size <= maxSize) {
+    console.log(`[${logPrefix}] ⏭️  MP3 para transcrição já gerado, reutilizando: ${mp3Path}`);
+    return mp3Path;
+  }
+
+  console.log(`[${logPrefix}] ⚠️  Arquivo de áudio muito grande (${(sourceSize / 1024 / 1024).toFixed(2)} MB), convertendo para MP3...`);
+  const transcodeScript = join(PROJECT_ROOT, 'youtube-downloader', 'transcode.py');
+  if (!existsSync(transcodeScript)) {
+    console.warn(`[${logPrefix}] ⚠️  Script de conversão não encontrado, tentando com arquivo original...`);
+    return sourcePath;
+  }
+
+  try {
+    await execPython(
+      `python "${transcodeScript}" "${sourcePath}" --capped "${mp3Path}" --max-size ${maxSize}`,
+      undefined,
+      `${logPrefix} [Convert to MP3]`,
+      onProgress
+    );
+    if (existsSync(mp3Path)) {
+      console.log(`[${logPrefix}] ✅ Áudio convertido para MP3: ${(statSync(mp3Path).size / 1024 / 1024).toFixed(2)} MB`);
+      return mp3Path;
+    }
+    console.warn(`[${logPrefix}] ⚠️  Falha ao converter para MP3, tentando com arquivo original...`);
+  } catch (convertError: any) {
+    console.warn(`[${logPrefix}] ⚠️  Erro ao converter para MP3: ${convertError.message}`);
+    console.warn(`[${logPrefix}] ⚠️  Tentando com arquivo original (pode falhar se muito grande)...`);
+  }
+  return sourcePath;
+}
+
+/**
+ * Extracts the pitch contour (melody guide) of the vocal stem into pitch.bin.
+ *
+ * Runs next to the waveform and lyrics steps (pitch-analyzer/pitch_contour.py is a
+ * vectorized YIN, far faster than real time), so it does not lengthen ingest.
+ * Failures are logged and never fail the processing: the song just has no pitch guide.
+ */
+export async function extractPitchContour(vocalsPath: string, musicDir: string, logPrefix: string): Promise<boolean> {
+  const pitchScript = join(PROJECT_ROOT, 'pitch-analyzer', 'pitch_contour.py');
+  const pitchPath = join(musicDir, MEDIA_CONFIG.PITCH_FILE);
+  if (!existsSync(pitchScript)) {
+    console.warn(`[${logPrefix}] ⚠️  Script de pitch não encontrado, pulando contorno de pitch...`);
+    return false;
+  }
+
+  try {
+    console.log(`[${logPrefix}] 🎼 Extraindo contorno de pitch...`);
+    await execPython(`python "${pitchScript}" "${vocalsPath}" -o "${pitchPath}"`, undefined, `${logPrefix} [Pitch]`);
+    if (existsSync(pitchPath)) {
+      console.log(`[${logPrefix}] ✅ Contorno de pitch gerado (${(statSync(pitchPath).size / 1024).toFixed(2)} KB)`);
+      return true;
+    }
+  } catch (pitchError: any) {
+    console.warn(`[${logPrefix}] ⚠️  Erro ao extrair contorno de pitch: ${pitchError.message}`);
+  }
+  return false;
+}
+
 /**
  * Helper function to update processing progress in database
  */
@@ -186,7 +320,7 @@ export async function updateProcessingProgress(
         updatedFiles.instrumental = progress.instrumental ? 'instrumental.wav' : '';
       }
       if (progress.waveform !== undefined) {
-        updatedFiles.waveform = progress.waveform ? 'waveform.json' : '';
+        updatedFiles.waveform = progress.waveform ? MEDIA_CONFIG.WAVEFORM_FILE : '';
       }
       if (progress.lyrics !== undefined) {
         updatedFiles.lyrics = progress.lyrics ? 'lyrics.lrc' : '';
@@ -216,7 +350,8 @@ export async function processMusic(
   songId: string,
   musicName: string,
   displayName: string,
-  bandId?: string
+  bandId?: string,
+  tier: SeparationTier = PROCESSING_CONFIG.SEPARATION_TIER
 ) {
   const status = processingStatus.get(fileId);
   if (!status) return;
@@ -283,13 +418,23 @@ export async function processMusic(
   // Check which steps have already been completed
   const vocalsPath = join(musicDir, 'vocals.wav');
   const instrumentalPath = join(musicDir, 'instrumental.wav');
-  const waveformPath = join(musicDir, 'waveform.json');
+  const waveformPath = join(musicDir, MEDIA_CONFIG.WAVEFORM_FILE);
   const lyricsPath = join(musicDir, 'lyrics.lrc');
   
-  const vocalsExists = existsSync(vocalsPath);
-  const instrumentalExists = existsSync(instrumentalPath);
-  const waveformExists = existsSync(waveformPath);
-  const lyricsExists = existsSync(lyricsPath);
+  // Existing outputs only count when the step manifest says they are complete and up to date
+  const stalePlan = await planSongSteps(musicDir, fileId);
+  for (const [step, reason] of Object.entries(stalePlan)) {
+    console.log(`[${fileId}] 🔁 Etapa ${step} será refeita: ${reason}`);
+  }
+  const vocalsExists = existsSync(vocalsPath) && !stalePlan.separate;
+  const instrumentalExists = existsSync(instrumentalPath) && !stalePlan.separate;
+  // Legacy waveform.json still counts as processed
+  const waveformExists = findWaveformFile(musicDir) !== null && !stalePlan.waveform;
+  const lyricsExists = existsSync(lyricsPath) && !stalePlan.lyrics;
+  // Stems from a faster tier are separated again when a better tier is requested
+  let separationTier = readSeparationInfo(musicDir)?.tier;
+  const upgradeSeparation = vocalsExists && isTierUpgrade(separationTier, tier);
+  const separateInstrumental = !instrumentalExists || upgradeSeparation;
   
   console.log(`[${fileId}] 🔍 Verificando etapas já concluídas:`);
   console.log(`[${fileId}]   ${vocalsExists ? '✅' : '❌'} Vocais: ${vocalsExists ? 'Já processado' : 'Pendente'}`);
@@ -300,35 +445,85 @@ export async function processMusic(
   try {
     status.status = 'processing';
     
-    // Step 1: Extract vocals
-    if (!vocalsExists) {
+    // Step 1: Extract vocals (single Demucs pass also writes the instrumental when missing)
+    if (!vocalsExists || upgradeSeparation) {
       status.step = 'Extraindo vocais...';
       status.progress = 10;
 
-      console.log(`[${fileId}] 🎤 Etapa 1/4: Extraindo vocais...`);
+      if (upgradeSeparation) {
+        console.log(`[${fileId}] ⬆️  Stems no nível "${separationTier}", separando novamente no nível "${tier}"`);
+      }
+      console.log(`[${fileId}] 🎤 Etapa 1/4: Extraindo vocais${separateInstrumental ? ' e instrumental' : ''}...`);
       console.log(`[${fileId}] 📂 Arquivo de entrada: ${tempPath}`);
       
-      const extractVoiceScript = join(PROJECT_ROOT, 'just-voice', 'extract_voice.py');
+      const separateScript = join(PROJECT_ROOT, 'stem-separator', 'separate.py');
+      const stems = separateInstrumental ? ['vocals', 'instrumental'] : ['vocals'];
       
       // Ensure directory exists
       const fs = await import('fs/promises');
       await fs.mkdir(musicDir, { recursive: true });
       
-      // Pass correct output directory (with songId) to script
-      // Capture progress in real-time
-      await execPython(
-        `python "${extractVoiceScript}" "${tempPath}" --output "${musicDir}"`, 
-        undefined, 
-        `${fileId} [Extract Vocals]`,
-        (progress: number, message?: string) => {
-          // Update progress of step 1 (10% to 30%)
-          const stepProgress = 10 + (progress * 0.2);
-          status.progress = Math.round(stepProgress);
-          if (message) {
-            status.step = `Extraindo vocais... ${progress}%`;
+      // Progressive separation: stems become playable while the rest is separated
+      const progressive = PROCESSING_CONFIG.SEPARATION_PROGRESSIVE > 0 ? PROCESSING_CONFIG.SEPARATION_PROGRESSIVE : undefined;
+      const onReadyUntil = (readyUntil: number) => {
+        if (status.readyUntil === undefined) {
+          console.log(`[${fileId}] ⏯️  Início da música pronto para tocar (${readyUntil}s)`);
+          // Point the song at the partial files so the audio routes can serve them
+          try {
+            const song = getSongById(songId);
+            if (song) {
+              updateSong(songId, {
+                files: { ...song.files, vocals: 'vocals.wav', ...(separateInstrumental ? { instrumental: 'instrumental.wav' } : {}) }
+              });
+            }
+          } catch (err: any) {
+            console.warn(`[${fileId}] ⚠️  Erro ao liberar reprodução parcial:`, err.message);
           }
         }
-      );
+        status.readyUntil = readyUntil;
+      };
+
+      // Update progress of steps 1 and 2 (10% to 50%)
+      const onSeparationProgress = (progress: number, message?: string) => {
+        const readyMatch = message?.match(/Pronto até ([\d.]+)s/);
+        if (readyMatch) {
+          onReadyUntil(parseFloat(readyMatch[1]));
+          return;
+        }
+        const stepProgress = 10 + (progress * 0.4);
+        status.progress = Math.round(stepProgress);
+        if (message) {
+          status.step = `Extraindo vocais... ${progress}%`;
+        }
+      };
+      
+      // Pass correct output directory (with songId) to script
+      // Capture progress in real-time
+      if (isSeparationWorkerEnabled()) {
+        await submitSeparationJob(
+          {
+            input: tempPath,
+            outputDir: musicDir,
+            stems,
+            runtime: PROCESSING_CONFIG.SEPARATION_RUNTIME,
+            threads: PROCESSING_CONFIG.SEPARATION_THREADS,
+            tier,
+            progressive
+          },
+          `${fileId} [Separate Stems]`,
+          onSeparationProgress
+        );
+      } else {
+        await execPython(
+          `python "${separateScript}" "${tempPath}" --output "${musicDir}" --stems ${stems.join(' ')}` +
+            ` --runtime ${PROCESSING_CONFIG.SEPARATION_RUNTIME} --tier ${tier}` +
+            (PROCESSING_CONFIG.SEPARATION_THREADS ? ` --threads ${PROCESSING_CONFIG.SEPARATION_THREADS}` : '') +
+            (progressive ? ` --progressive ${progressive}` : ''), 
+          undefined, 
+          `${fileId} [Separate Stems]`,
+          onSeparationProgress
+        );
+      }
       
       // Verify file was created in expected location
       if (!existsSync(vocalsPath)) {
@@ -378,15 +573,24 @@ export async function processMusic(
       const vocalsSize = statSync(vocalsPath).size;
       console.log(`[${fileId}] ✅ Vocais extraídos com sucesso! (${(vocalsSize / 1024 / 1024).toFixed(2)} MB)`);
       
-      // Update database with progress
-      await updateProcessingProgress(songId, { vocals: true });
+      // Update database with progress (instrumental comes from the same Demucs pass)
+      const instrumentalFromSeparation = separateInstrumental && existsSync(instrumentalPath);
+      separationTier = readSeparationInfo(musicDir)?.tier || tier;
+      await updateProcessingProgress(songId, { vocals: true, ...(instrumentalFromSeparation ? { instrumental: true } : {}) });
+      if (instrumentalFromSeparation) {
+        const instrumentalSize = statSync(instrumentalPath).size;
+        console.log(`[${fileId}] ✅ Instrumental gerado na mesma passada! (${(instrumentalSize / 1024 / 1024).toFixed(2)} MB)`);
+      }
       
       // Salvar no banco de dados imediatamente após cada etapa
       try {
         const song = getSongById(songId);
         if (song) {
-          const updatedFiles = { ...song.files, vocals: 'vocals.wav' };
-          updateSong(songId, { files: updatedFiles, metadata: { ...song.metadata, lastProcessed: new Date().toISOString() } });
+          const updatedFiles = { ...song.files, vocals: 'vocals.wav', ...(instrumentalFromSeparation ? { instrumental: 'instrumental.wav' } : {}) };
+          updateSong(songId, {
+            files: updatedFiles,
+            metadata: { ...song.metadata, separationTier, lastProcessed: new Date().toISOString() }
+          });
           console.log(`[${fileId}] 💾 Progresso salvo no banco de dados (vocais)`);
         }
       } catch (err: any) {
@@ -398,8 +602,8 @@ export async function processMusic(
       console.log(`[${fileId}] ✅ Vocais encontrados (${(vocalsSize / 1024 / 1024).toFixed(2)} MB)`);
     }
 
-    // Step 2: Remove voice (instrumental)
-    if (!instrumentalExists) {
+    // Step 2: Remove voice (instrumental) - only needed when step 1 did not run
+    if (!existsSync(instrumentalPath)) {
       status.step = 'Removendo voz...';
       status.progress = 30;
 
@@ -482,14 +686,23 @@ export async function processMusic(
       } catch (err: any) {
         console.warn(`[${fileId}] ⚠️  Erro ao salvar progresso no banco:`, err.message);
       }
-    } else {
+    } else if (instrumentalExists) {
       console.log(`[${fileId}] ⏭️  Instrumental já processado, pulando etapa...`);
       const instrumentalSize = statSync(instrumentalPath).size;
       console.log(`[${fileId}] ✅ Instrumental encontrado (${(instrumentalSize / 1024 / 1024).toFixed(2)} MB)`);
     }
 
-    // Step 3: Generate waveform (use vocals.wav)
-    if (!waveformExists) {
+    // Pitch contour from vocals.wav, in parallel with the waveform and lyrics steps
+    const pitchPath = join(musicDir, MEDIA_CONFIG.PITCH_FILE);
+    let pitchTask: Promise<boolean> | null = null;
+    if (!existsSync(pitchPath) || upgradeSeparation || stalePlan.pitch) {
+      pitchTask = extractPitchContour(vocalsPath, musicDir, fileId);
+    } else {
+      console.log(`[${fileId}] ⏭️  Contorno de pitch já gerado, pulando...`);
+    }
+
+    // Step 3: Generate waveform (use vocals.wav); redone with the pitch after a tier upgrade
+    if (!waveformExists || upgradeSeparation) {
       status.step = 'Gerando waveform...';
       status.progress = 50;
 
@@ -498,7 +711,7 @@ export async function processMusic(
       
       const waveformScript = join(PROJECT_ROOT, 'waveform-generator', 'waveform_extractor.py');
       await execPython(
-        `python "${waveformScript}" "${vocalsPath}" "waveform.json" "waveform.png" "${musicDir}"`, 
+        `python "${waveformScript}" "${vocalsPath}" "${MEDIA_CONFIG.WAVEFORM_FILE}" "waveform.png" "${musicDir}" --stream`, 
         undefined, 
         `${fileId} [Waveform]`,
         (progress: number, message?: string) => {
@@ -530,8 +743,8 @@ export async function processMusic(
         for (const searchDir of searchDirs) {
           try {
             const files = await fs.readdir(searchDir);
-            const waveformFile = files.find((f: string) => {
-              if (!f.endsWith('.json')) return false;
+            const candidate = files.find((f: string) => {
+              if (!f.endsWith('.bin')) return false;
               const lowerF = f.toLowerCase();
               const lowerMusicName = musicName.toLowerCase();
               const lowerSongId = songId.toLowerCase();
@@ -541,8 +754,8 @@ export async function processMusic(
                      lowerF.includes('waveform');
             });
             
-            if (waveformFile) {
-              foundPath = join(searchDir, waveformFile);
+            if (candidate) {
+              foundPath = join(searchDir, candidate);
               console.log(`[${fileId}] ✅ Arquivo encontrado em: ${foundPath}`);
               break;
             }
@@ -554,17 +767,13 @@ export async function processMusic(
         if (foundPath) {
           try {
             const fs = await import('fs/promises');
-            const content = await fs.readFile(foundPath, 'utf-8');
-            const data = JSON.parse(content);
+            // Throws if the file is not a valid waveform.bin
+            readWaveformHeader(foundPath);
             
-            if (data.waveform || Array.isArray(data) || (data.sample_rate && data.duration)) {
-              console.log(`[${fileId}] 📦 Movendo arquivo para: ${waveformPath}`);
-              await fs.mkdir(musicDir, { recursive: true });
-              await fs.rename(foundPath, waveformPath);
-              console.log(`[${fileId}] ✅ Arquivo movido com sucesso!`);
-            } else {
-              throw new Error('Arquivo encontrado mas formato inválido');
-            }
+            console.log(`[${fileId}] 📦 Movendo arquivo para: ${waveformPath}`);
+            await fs.mkdir(musicDir, { recursive: true });
+            await fs.rename(foundPath, waveformPath);
+            console.log(`[${fileId}] ✅ Arquivo movido com sucesso!`);
           } catch (err: any) {
             console.error(`[${fileId}] ❌ Erro ao processar arquivo encontrado:`, err.message);
             throw new Error('Falha ao processar waveform encontrado');
@@ -583,7 +792,7 @@ export async function processMusic(
       try {
         const song = getSongById(songId);
         if (song) {
-          const updatedFiles = { ...song.files, waveform: 'waveform.json' };
+          const updatedFiles = { ...song.files, waveform: MEDIA_CONFIG.WAVEFORM_FILE };
           updateSong(songId, { files: updatedFiles, metadata: { ...song.metadata, lastProcessed: new Date().toISOString() } });
           console.log(`[${fileId}] 💾 Progresso salvo no banco de dados (waveform)`);
         }
@@ -592,7 +801,7 @@ export async function processMusic(
       }
     } else {
       console.log(`[${fileId}] ⏭️  Waveform já processado, pulando etapa...`);
-      const waveformSize = statSync(waveformPath).size;
+      const waveformSize = statSync(join(musicDir, findWaveformFile(musicDir)!)).size;
       console.log(`[${fileId}] ✅ Waveform encontrado (${(waveformSize / 1024).toFixed(2)} KB)`);
     }
 
@@ -603,73 +812,19 @@ export async function processMusic(
 
       console.log(`\n[${fileId}] 📝 Etapa 4/4: Gerando letras LRC...`);
       
-      // Verificar tamanho do arquivo de áudio
-      const audioFileSize = statSync(tempPath).size;
-      const maxSize = 25 * 1024 * 1024; // 25 MB (limite da API OpenAI)
-      
-      let audioForLRC = tempPath;
-      
-      // Se o arquivo for muito grande, converter para MP3 usando script Python
-      if (audioFileSize > maxSize) {
-        console.log(`[${fileId}] ⚠️  Arquivo de áudio muito grande (${(audioFileSize / 1024 / 1024).toFixed(2)} MB), convertendo para MP3...`);
-        
-        const mp3Path = join(musicDir, 'temp_audio_lrc.mp3');
-        const convertScript = join(PROJECT_ROOT, 'youtube-downloader', 'convert_audio_to_mp3.py');
-        
-        if (!existsSync(convertScript)) {
-          console.warn(`[${fileId}] ⚠️  Script de conversão não encontrado, tentando com arquivo original...`);
-        } else {
-          try {
-            // Converter para MP3 com qualidade reduzida (128k, 22kHz, mono)
-            await execPython(
-              `python "${convertScript}" "${tempPath}" "${mp3Path}" "128k" "22050" "1"`,
-              undefined,
-              `${fileId} [Convert to MP3]`
-            );
-            
-            if (existsSync(mp3Path)) {
-              const mp3Size = statSync(mp3Path).size;
-              console.log(`[${fileId}] ✅ Áudio convertido para MP3: ${(mp3Size / 1024 / 1024).toFixed(2)} MB`);
-              
-              // Se ainda for muito grande, reduzir mais (96k, 16kHz, mono)
-              if (mp3Size > maxSize) {
-                console.log(`[${fileId}] ⚠️  MP3 ainda é grande, reduzindo qualidade...`);
-                const smallerMp3Path = join(musicDir, 'temp_audio_lrc_small.mp3');
-                
-                try {
-                  await execPython(
-                    `python "${convertScript}" "${tempPath}" "${smallerMp3Path}" "96k" "16000" "1"`,
-                    undefined,
-                    `${fileId} [Convert to Small MP3]`
-                  );
-                  
-                  if (existsSync(smallerMp3Path)) {
-                    const smallerSize = statSync(smallerMp3Path).size;
-                    console.log(`[${fileId}] ✅ Versão reduzida criada: ${(smallerSize / 1024 / 1024).toFixed(2)} MB`);
-                    audioForLRC = smallerMp3Path;
-                  } else {
-                    audioForLRC = mp3Path;
-                  }
-                } catch (smallerError: any) {
-                  console.warn(`[${fileId}] ⚠️  Erro ao criar versão reduzida: ${smallerError.message}`);
-                  audioForLRC = mp3Path;
-                }
-              } else {
-                audioForLRC = mp3Path;
-              }
-            } else {
-              console.warn(`[${fileId}] ⚠️  Falha ao converter para MP3, tentando com arquivo original...`);
-            }
-          } catch (convertError: any) {
-            console.warn(`[${fileId}] ⚠️  Erro ao converter para MP3: ${convertError.message}`);
-            console.warn(`[${fileId}] ⚠️  Tentando com arquivo original (pode falhar se muito grande)...`);
-          }
-        }
-      }
+      // Vocais sem silêncios (com mapa de tempo) ou, sem eles, a mixagem com limite de tamanho
+      const { audioPath: audioForLRC, timeMapPath } = await prepareTranscriptionAudio(tempPath, musicDir, fileId);
+      const timeMapArg = timeMapPath ? ` --time-map "${timeMapPath}"` : '';
       
       const lrcScript = join(PROJECT_ROOT, 'lrc-generator', 'src', 'index.ts');
+      // The LRC generator does not record itself: run it through the step manifest recorder
+      const lrcCommand = recordStepCommand(
+        musicDir,
+        'lyrics',
+        `npx tsx "${lrcScript}" "${audioForLRC}" --output-dir "${musicDir}"${timeMapArg}`
+      );
       await execPython(
-        `cd "${join(PROJECT_ROOT, 'lrc-generator')}" && npx tsx "${lrcScript}" "${audioForLRC}" --output-dir "${musicDir}"`, 
+        `cd "${join(PROJECT_ROOT, 'lrc-generator')}" && ${lrcCommand}`, 
         join(PROJECT_ROOT, 'lrc-generator'), 
         `${fileId} [LRC Generator]`
       );
@@ -677,7 +832,12 @@ export async function processMusic(
       // Limpar arquivos temporários de MP3 se foram criados
       try {
         const fs = await import('fs/promises');
-        const tempMp3Files = ['temp_audio_lrc.mp3', 'temp_audio_lrc_small.mp3'];
+        const tempMp3Files = [
+          MEDIA_CONFIG.TRANSCRIPTION_AUDIO_FILE,
+          MEDIA_CONFIG.TRANSCRIPTION_VAD_FILE,
+          MEDIA_CONFIG.TRANSCRIPTION_TIME_MAP_FILE,
+          'temp_audio_lrc_small.mp3'
+        ];
         for (const tempFile of tempMp3Files) {
           const tempPath = join(musicDir, tempFile);
           if (existsSync(tempPath) && tempPath !== audioForLRC) {
@@ -734,6 +894,10 @@ export async function processMusic(
       console.log(`[${fileId}] ✅ Letras encontradas (${(lyricsSize / 1024).toFixed(2)} KB)`);
     }
 
+    if (pitchTask) {
+      await pitchTask;
+    }
+
     status.step = 'Atualizando banco de dados...';
     status.progress = 90;
 
@@ -741,12 +905,10 @@ export async function processMusic(
 
     // Get audio duration for database
     let duration = 0;
+    const waveformFile = findWaveformFile(musicDir);
     try {
-      if (existsSync(waveformPath)) {
-        const waveformData = await import('fs/promises').then(fs => 
-          fs.readFile(waveformPath, 'utf-8')
-        ).then(data => JSON.parse(data));
-        duration = waveformData.duration || 0;
+      if (waveformFile) {
+        duration = readWaveformDuration(join(musicDir, waveformFile));
         console.log(`[${fileId}] ⏱️  Duração detectada: ${duration.toFixed(2)} segundos`);
       }
     } catch (err) {
@@ -767,14 +929,15 @@ export async function processMusic(
           original: existsSync(join(musicDir, 'original' + extname(tempPath))) ? 'original' + extname(tempPath) : '',
           vocals: existsSync(vocalsPath) ? 'vocals.wav' : '',
           instrumental: existsSync(instrumentalPath) ? 'instrumental.wav' : '',
-          waveform: existsSync(waveformPath) ? 'waveform.json' : '',
+          waveform: waveformFile || '',
           lyrics: existsSync(lyricsPath) ? 'lyrics.lrc' : ''
         },
         metadata: {
           sampleRate: 44100,
           format: 'wav',
           createdAt: existingSong?.metadata?.createdAt || new Date().toISOString(),
-          lastProcessed: new Date().toISOString()
+          lastProcessed: new Date().toISOString(),
+          separationTier: separationTier || existingSong?.metadata?.separationTier
         },
         band: bandId || existingSong?.band || undefined
       };
@@ -849,7 +1012,7 @@ export async function processMusic(
         // Verificar quais arquivos foram processados
         const vocalsPath = join(musicDir, 'vocals.wav');
         const instrumentalPath = join(musicDir, 'instrumental.wav');
-        const waveformPath = join(musicDir, 'waveform.json');
+        const waveformFile = findWaveformFile(musicDir);
         const lyricsPath = join(musicDir, 'lyrics.lrc');
         const originalPath = join(musicDir, 'original' + extname(tempPath));
         
@@ -858,18 +1021,15 @@ export async function processMusic(
           original: existsSync(originalPath) ? 'original' + extname(tempPath) : song.files.original,
           vocals: existsSync(vocalsPath) ? 'vocals.wav' : song.files.vocals,
           instrumental: existsSync(instrumentalPath) ? 'instrumental.wav' : song.files.instrumental,
-          waveform: existsSync(waveformPath) ? 'waveform.json' : song.files.waveform,
+          waveform: waveformFile || song.files.waveform,
           lyrics: existsSync(lyricsPath) ? 'lyrics.lrc' : song.files.lyrics
         };
         
         // Tentar obter duração do waveform se disponível
         let duration = song.duration;
         try {
-          if (existsSync(waveformPath)) {
-            const waveformData = await import('fs/promises').then(fs => 
-              fs.readFile(waveformPath, 'utf-8')
-            ).then(data => JSON.parse(data));
-            duration = waveformData.duration || duration;
+          if (waveformFile) {
+            duration = readWaveformDuration(join(musicDir, waveformFile)) || duration;
           }
         } catch (err) {
           // Ignorar erro ao ler waveform
@@ -897,7 +1057,7 @@ export async function processMusic(
             original: existsSync(join(musicDir, 'original' + extname(tempPath))) ? 'original' + extname(tempPath) : '',
             vocals: existsSync(join(musicDir, 'vocals.wav')) ? 'vocals.wav' : '',
             instrumental: existsSync(join(musicDir, 'instrumental.wav')) ? 'instrumental.wav' : '',
-            waveform: existsSync(join(musicDir, 'waveform.json')) ? 'waveform.json' : '',
+            waveform: findWaveformFile(musicDir) || '',
             lyrics: existsSync(join(musicDir, 'lyrics.lrc')) ? 'lyrics.lrc' : ''
           },
           metadata: {
@@ -1084,7 +1244,9 @@ export async function processYouTubeMusic(
     const audioPath = join(musicDir, 'temp_audio.wav');
     console.log(`[${fileId}] 🎵 Extraindo áudio do vídeo...`);
     
-    // Usar script Python dedicado para extrair áudio do vídeo
+    // Usar script Python dedicado para extrair áudio do vídeo: o WAV para a separação e o MP3
+    // para a transcrição saem da mesma execução do ffmpeg
+    const transcriptionAudioPath = join(musicDir, MEDIA_CONFIG.TRANSCRIPTION_AUDIO_FILE);
     const extractAudioScript = join(PROJECT_ROOT, 'youtube-downloader', 'extract_audio_from_video.py');
     
     if (!existsSync(extractAudioScript)) {
@@ -1093,7 +1255,7 @@ export async function processYouTubeMusic(
     
     try {
       await execPython(
-        `python "${extractAudioScript}" "${actualVideoPath}" "${audioPath}"`,
+        `python "${extractAudioScript}" "${actualVideoPath}" "${audioPath}" "${transcriptionAudioPath}"`,
         undefined,
         `${fileId} [Extract Audio]`,
         (progress: number, message?: string) => {
@@ -1188,7 +1350,7 @@ export async function processYouTubeMusic(
         // Verificar quais arquivos foram processados
         const vocalsPath = join(musicDir, 'vocals.wav');
         const instrumentalPath = join(musicDir, 'instrumental.wav');
-        const waveformPath = join(musicDir, 'waveform.json');
+        const waveformFile = findWaveformFile(musicDir);
         const lyricsPath = join(musicDir, 'lyrics.lrc');
         const videoPath = join(musicDir, 'video.mp4');
         const audioPath = join(musicDir, 'temp_audio.wav');
@@ -1197,7 +1359,7 @@ export async function processYouTubeMusic(
           ...song.files,
           vocals: existsSync(vocalsPath) ? 'vocals.wav' : song.files.vocals,
           instrumental: existsSync(instrumentalPath) ? 'instrumental.wav' : song.files.instrumental,
-          waveform: existsSync(waveformPath) ? 'waveform.json' : song.files.waveform,
+          waveform: waveformFile || song.files.waveform,
           lyrics: existsSync(lyricsPath) ? 'lyrics.lrc' : song.files.lyrics,
           video: existsSync(videoPath) ? 'video.mp4' : song.files.video
         };
@@ -1205,11 +1367,8 @@ export async function processYouTubeMusic(
         // Tentar obter duração do waveform se disponível
         let duration = song.duration;
         try {
-          if (existsSync(waveformPath)) {
-            const waveformData = await import('fs/promises').then(fs => 
-              fs.readFile(waveformPath, 'utf-8')
-            ).then(data => JSON.parse(data));
-            duration = waveformData.duration || duration;
+          if (waveformFile) {
+            duration = readWaveformDuration(join(musicDir, waveformFile)) || duration;
           }
         } catch (err) {
           // Ignorar erro ao ler waveform
@@ -1229,7 +1388,7 @@ export async function processYouTubeMusic(
         // Se não existe, criar entrada básica
         const vocalsPath = join(musicDir, 'vocals.wav');
         const instrumentalPath = join(musicDir, 'instrumental.wav');
-        const waveformPath = join(musicDir, 'waveform.json');
+        const waveformFile = findWaveformFile(musicDir);
         const lyricsPath = join(musicDir, 'lyrics.lrc');
         const videoPath = join(musicDir, 'video.mp4');
         
@@ -1243,7 +1402,7 @@ export async function processYouTubeMusic(
             original: '',
             vocals: existsSync(vocalsPath) ? 'vocals.wav' : '',
             instrumental: existsSync(instrumentalPath) ? 'instrumental.wav' : '',
-            waveform: existsSync(waveformPath) ? 'waveform.json' : '',
+            waveform: waveformFile || '',
             lyrics: existsSync(lyricsPath) ? 'lyrics.lrc' : '',
             video: existsSync(videoPath) ? 'video.mp4' : ''
           },
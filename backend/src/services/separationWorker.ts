@@ -0,0 +1,190 @@
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import { join } from 'path';
+import { PROJECT_ROOT, PROCESSING_CONFIG } from '../config/index.js';
+
+export interface SeparationJob {
+  input: string;
+  outputDir: string;
+  stems?: string[];
+  model?: string;
+  device?: 'cuda' | 'cpu';
+  runtime?: 'torch' | 'int8' | 'onnx';
+  threads?: number;
+  tier?: 'fast' | 'balanced' | 'best';
+  progressive?: number;
+}
+
+interface PendingJob {
+  resolve: (outputs: Record<string, string>) => void;
+  reject: (error: Error) => void;
+  onProgress?: (progress: number, message?: string) => void;
+  logPrefix: string;
+}
+
+let worker: ChildProcessWithoutNullStreams | null = null;
+let nextJobId = 0;
+const pendingJobs = new Map<string, PendingJob>();
+// Jobs run in order inside the worker, so stderr progress belongs to the oldest pending job
+const jobOrder: string[] = [];
+
+/**
+ * Parse progress percentage from Demucs/tqdm progress bars
+ */
+function parseProgress(line: string): number | null {
+  const percentMatch = line.match(/(\d+)%/);
+  return percentMatch ? parseInt(percentMatch[1], 10) : null;
+}
+
+function failAllJobs(error: Error) {
+  for (const [jobId, job] of pendingJobs) {
+    job.reject(error);
+    pendingJobs.delete(jobId);
+  }
+  jobOrder.length = 0;
+}
+
+function handleWorkerMessage(line: string) {
+  let message: any;
+  try {
+    message = JSON.parse(line);
+  } catch {
+    console.log(`[Separation Worker] 📤 ${line}`);
+    return;
+  }
+
+  if (message.event === 'ready') {
+    console.log(`[Separation Worker] ✅ Worker pronto (modelos: ${(message.models || []).join(', ') || 'nenhum'})`);
+    return;
+  }
+
+  const job = message.id ? pendingJobs.get(message.id) : undefined;
+  if (!job) {
+    if (message.event === 'error') {
+      console.error(`[Separation Worker] ❌ ${message.error}`);
+    }
+    return;
+  }
+
+  switch (message.event) {
+    case 'queued':
+      console.log(`${job.logPrefix}📥 Job na fila do worker (posição ${message.position})`);
+      break;
+    case 'progress':
+      job.onProgress?.(message.progress, message.stage);
+      break;
+    case 'done':
+      console.log(`${job.logPrefix}✅ Separação concluída no worker (${message.elapsed}s)`);
+      job.onProgress?.(100);
+      pendingJobs.delete(message.id);
+      jobOrder.splice(jobOrder.indexOf(message.id), 1);
+      job.resolve(message.outputs || {});
+      break;
+    case 'error':
+      console.error(`${job.logPrefix}❌ Erro no worker: ${message.error}`);
+      pendingJobs.delete(message.id);
+      jobOrder.splice(jobOrder.indexOf(message.id), 1);
+      job.reject(new Error(message.error));
+      break;
+  }
+}
+
+/**
+ * Start the separation worker (once) and return the running process
+ */
+function getWorker(): ChildProcessWithoutNullStreams {
+  if (worker && worker.exitCode === null && !worker.killed) {
+    return worker;
+  }
+
+  const workerScript = join(PROJECT_ROOT, 'stem-separator', 'worker.py');
+  const env = { ...process.env, PYTHONIOENCODING: 'utf-8', PYTHONUTF8: '1', PYTHONUNBUFFERED: '1' };
+
+  console.log(`[Separation Worker] 🚀 Iniciando worker: ${workerScript}`);
+  const args = [workerScript];
+  if (PROCESSING_CONFIG.SEPARATION_BATCH_SIZE > 1) {
+    args.push('--batch-size', String(PROCESSING_CONFIG.SEPARATION_BATCH_SIZE));
+  }
+  const child = spawn('python', args, { env, windowsHide: true });
+
+  let stdoutBuffer = '';
+  child.stdout.on('data', (data: Buffer) => {
+    stdoutBuffer += data.toString('utf8');
+    const lines = stdoutBuffer.split('\n');
+    stdoutBuffer = lines.pop() || '';
+    lines.filter((line) => line.trim()).forEach((line) => handleWorkerMessage(line.trim()));
+  });
+
+  // Demucs logs and progress bars arrive on stderr
+  child.stderr.on('data', (data: Buffer) => {
+    const currentJob = jobOrder.length > 0 ? pendingJobs.get(jobOrder[0]) : undefined;
+    const prefix = currentJob ? currentJob.logPrefix : '[Separation Worker] ';
+    data.toString('utf8').split(/[\r\n]/).forEach((line: string) => {
+      if (!line.trim()) return;
+      console.log(`${prefix}⚠️  ${line.trim()}`);
+      const progress = parseProgress(line);
+      if (currentJob && progress !== null) {
+        currentJob.onProgress?.(progress, line.trim());
+      }
+    });
+  });
+
+  child.on('close', (code: number | null) => {
+    console.warn(`[Separation Worker] ⚠️  Worker encerrado (código: ${code})`);
+    if (worker === child) {
+      worker = null;
+    }
+    failAllJobs(new Error(`Worker de separação encerrado (código: ${code})`));
+  });
+
+  child.on('error', (error: Error) => {
+    console.error(`[Separation Worker] ❌ Erro ao iniciar worker:`, error.message);
+    if (worker === child) {
+      worker = null;
+    }
+    failAllJobs(error);
+  });
+
+  worker = child;
+  return child;
+}
+
+/**
+ * Submit a separation job to the persistent worker (model stays loaded between jobs)
+ */
+export function submitSeparationJob(
+  job: SeparationJob,
+  logPrefix?: string,
+  onProgress?: (progress: number, message?: string) => void
+): Promise<Record<string, string>> {
+  return new Promise((resolve, reject) => {
+    const child = getWorker();
+    const jobId = `job-${Date.now()}-${nextJobId++}`;
+    pendingJobs.set(jobId, {
+      resolve,
+      reject,
+      onProgress,
+      logPrefix: logPrefix ? `[${logPrefix}] ` : ''
+    });
+    jobOrder.push(jobId);
+
+    child.stdin.write(JSON.stringify({
+      id: jobId,
+      input: job.input,
+      output_dir: job.outputDir,
+      stems: job.stems,
+      model: job.model,
+      device: job.device,
+      runtime: job.runtime,
+      threads: job.threads,
+      tier: job.tier,
+      progressive: job.progressive
+    }) + '\n');
+  });
+}
+
+/**
+ * Whether processing should go through the persistent worker
+ */
+export function isSeparationWorkerEnabled(): boolean {
+  return PROCESSING_CONFIG.USE_SEPARATION_WORKER;
+}
@@ -9,11 +9,14 @@ export interface SongFile {
   video?: string;
 }
 
+export type SeparationTier = 'fast' | 'balanced' | 'best';
+
 export interface SongMetadata {
   sampleRate: number;
   format: string;
   createdAt: string;
   lastProcessed?: string;
+  separationTier?: SeparationTier; // Quality tier of the current stems (stem-separator TIERS)
 }
 
 export interface SongStatus {
@@ -100,6 +103,7 @@ export interface ProcessingStatus {
   progress: number;
   error?: string;
   songId?: string;
+  readyUntil?: number; // Seconds of vocals/instrumental already playable during progressive separation
 }
 
 export interface AudioInfo {
@@ -120,6 +124,7 @@ export interface WaveformMetadata {
   sample_rate: number;
   duration: number;
   num_samples: number;
+  num_values: number; // Values served by /chunk and /stream (samples in JSON, interleaved min/max peaks in waveform.bin)
   totalChunks: number;
   preview: number[];
   previewLength: number;
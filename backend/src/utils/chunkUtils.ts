@@ -2,38 +2,65 @@ import { readFileSync } from 'fs';
 import { getWaveformPath } from '../services/songPathService.js';
 import { WaveformData } from '../types/index.js';
 import { PROCESSING_CONFIG } from '../config/index.js';
+import {
+  isBinaryWaveform,
+  readWaveformHeader,
+  readWaveformPeaks,
+  readWaveformPreviews,
+  reducePreview,
+  WaveformBinHeader,
+  WaveformPreviewFile
+} from './waveformFile.js';
+
+/**
+ * Loaded waveform: legacy JSON keeps every sample in memory,
+ * the binary format keeps only the header and reads peaks by byte offset
+ */
+type LoadedWaveform =
+  | { format: 'json'; data: WaveformData }
+  | { format: 'bin'; path: string; header: WaveformBinHeader };
 
 let currentSongId: string | undefined = undefined;
-let cachedWaveformData: WaveformData | null = null;
+let cachedWaveform: LoadedWaveform | null = null;
+// undefined = not read yet, null = song has no precomputed previews
+let cachedPreviews: WaveformPreviewFile | null | undefined = undefined;
 
 /**
- * Carrega o arquivo JSON de waveform (com cache)
+ * Carrega o arquivo de waveform (com cache)
  */
-export function loadWaveformData(songId?: string): WaveformData {
+function loadWaveform(songId?: string): LoadedWaveform {
   // Se mudou a música, limpar cache
   if (currentSongId !== songId) {
     console.log(`[Waveform] 🔄 Limpando cache: ${currentSongId} -> ${songId}`);
-    cachedWaveformData = null;
+    cachedWaveform = null;
+    cachedPreviews = undefined;
     currentSongId = songId;
   }
 
-  if (cachedWaveformData) {
+  if (cachedWaveform) {
     console.log(`[Waveform] ✅ Usando cache para: ${songId}`);
-    return cachedWaveformData;
+    return cachedWaveform;
   }
 
   const waveformPath = getWaveformPath(songId);
-  
+
   if (!waveformPath) {
     throw new Error(`Waveform file not found for song: ${songId || 'default'}`);
   }
-  
+
   try {
     console.log(`[Waveform] 📂 Carregando waveform de: ${waveformPath}`);
-    const fileContent = readFileSync(waveformPath, 'utf-8');
-    cachedWaveformData = JSON.parse(fileContent) as WaveformData;
-    console.log(`[Waveform] ✅ Waveform carregado: ${cachedWaveformData.num_samples} amostras, duração: ${cachedWaveformData.duration}s`);
-    return cachedWaveformData;
+    if (isBinaryWaveform(waveformPath)) {
+      const header = readWaveformHeader(waveformPath);
+      cachedWaveform = { format: 'bin', path: waveformPath, header };
+      console.log(`[Waveform] ✅ Waveform carregado: ${header.num_samples} amostras, duração: ${header.duration}s (${header.levels.length} níveis de picos)`);
+    } else {
+      const fileContent = readFileSync(waveformPath, 'utf-8');
+      const data = JSON.parse(fileContent) as WaveformData;
+      cachedWaveform = { format: 'json', data };
+      console.log(`[Waveform] ✅ Waveform carregado: ${data.num_samples} amostras, duração: ${data.duration}s`);
+    }
+    return cachedWaveform;
   } catch (error) {
     console.error(`[Waveform] ❌ Erro ao carregar waveform:`, error);
     throw new Error(`Failed to load waveform data: ${error}`);
@@ -42,45 +69,113 @@ export function loadWaveformData(songId?: string): WaveformData {
 
 /**
  * Retorna apenas os metadados da waveform
+ * (num_values: tamanho do array servido em chunks, ver getWaveformLength)
  */
-export function getWaveformMetadata(songId?: string): Omit<WaveformData, 'waveform'> {
-  const data = loadWaveformData(songId);
+export function getWaveformMetadata(songId?: string): Omit<WaveformData, 'waveform'> & { num_values: number } {
+  const waveform = loadWaveform(songId);
+  const source = waveform.format === 'bin' ? waveform.header : waveform.data;
   return {
-    sample_rate: data.sample_rate,
-    duration: data.duration,
-    num_samples: data.num_samples
+    sample_rate: source.sample_rate,
+    duration: source.duration,
+    num_samples: source.num_samples,
+    num_values: getWaveformLength(songId)
   };
 }
 
+/**
+ * Retorna o número de valores do array servido em chunks
+ * (amostras no JSON; picos min/max intercalados do nível mais fino no formato binário)
+ */
+export function getWaveformLength(songId?: string): number {
+  const waveform = loadWaveform(songId);
+  if (waveform.format === 'bin') {
+    return waveform.header.levels[0].numBins * 2;
+  }
+  return waveform.data.waveform.length;
+}
+
 /**
  * Retorna um chunk específico do array waveform
  */
 export function getWaveformChunk(startIndex: number, endIndex?: number, songId?: string): number[] {
-  const data = loadWaveformData(songId);
-  const end = endIndex !== undefined ? Math.min(endIndex, data.waveform.length) : Math.min(startIndex + PROCESSING_CONFIG.CHUNK_SIZE, data.waveform.length);
-  return data.waveform.slice(startIndex, end);
+  const waveform = loadWaveform(songId);
+  const length = getWaveformLength(songId);
+  const end = endIndex !== undefined ? Math.min(endIndex, length) : Math.min(startIndex + PROCESSING_CONFIG.CHUNK_SIZE, length);
+  if (waveform.format === 'bin') {
+    return readWaveformPeaks(waveform.path, waveform.header.levels[0], startIndex, end);
+  }
+  return waveform.data.waveform.slice(startIndex, end);
 }
 
 /**
  * Retorna o número total de chunks necessários
  */
 export function getTotalChunks(songId?: string): number {
-  const data = loadWaveformData(songId);
-  return Math.ceil(data.waveform.length / PROCESSING_CONFIG.CHUNK_SIZE);
+  return Math.ceil(getWaveformLength(songId) / PROCESSING_CONFIG.CHUNK_SIZE);
+}
+
+/**
+ * Carrega os previews pré-calculados da música (com cache)
+ */
+function loadPreviews(songId?: string): WaveformPreviewFile | null {
+  loadWaveform(songId);
+  if (cachedPreviews === undefined) {
+    const waveformPath = getWaveformPath(songId);
+    try {
+      cachedPreviews = waveformPath ? readWaveformPreviews(waveformPath) : null;
+    } catch (error) {
+      console.warn(`[Waveform] ⚠️  Previews inválidos para ${songId}, usando o waveform completo:`, error);
+      cachedPreviews = null;
+    }
+  }
+  return cachedPreviews;
 }
 
 /**
  * Retorna uma amostragem reduzida da waveform (para preview)
- * Pega 1 ponto a cada N pontos
+ * 1 ponto (pico de maior magnitude) a cada N amostras
  */
 export function getWaveformPreview(sampleRate: number = 1000, songId?: string): number[] {
-  const data = loadWaveformData(songId);
+  const waveform = loadWaveform(songId);
   const preview: number[] = [];
-  
-  for (let i = 0; i < data.waveform.length; i += sampleRate) {
-    preview.push(data.waveform[i]);
+
+  // Preferir o menor preview pré-calculado com pontos suficientes (leitura simples de arquivo)
+  const previews = loadPreviews(songId);
+  if (previews) {
+    const targetLength = Math.ceil(previews.num_samples / sampleRate);
+    const length = Object.keys(previews.previews)
+      .map(Number)
+      .sort((a, b) => a - b)
+      .find((l) => l >= targetLength || previews.previews[l].length < l);
+    if (length !== undefined) {
+      return reducePreview(previews.previews[length], targetLength);
+    }
+  }
+
+  if (waveform.format === 'bin') {
+    // Usar o nível mais grosso que ainda tenha pelo menos 1 bin a cada N amostras
+    const levels = waveform.header.levels;
+    const level = [...levels].reverse().find((l) => l.samplesPerBin <= sampleRate) || levels[0];
+    const peaks = readWaveformPeaks(waveform.path, level, 0);
+    const binsPerPoint = Math.max(1, Math.round(sampleRate / level.samplesPerBin));
+
+    // Cada ponto é o pico (com sinal) de maior magnitude do grupo de bins
+    for (let bin = 0; bin < level.numBins; bin += binsPerPoint) {
+      let point = 0;
+      const lastBin = Math.min(bin + binsPerPoint, level.numBins);
+      for (let i = bin * 2; i < lastBin * 2; i++) {
+        if (Math.abs(peaks[i]) > Math.abs(point)) {
+          point = peaks[i];
+        }
+      }
+      preview.push(point);
+    }
+    return preview;
+  }
+
+  for (let i = 0; i < waveform.data.waveform.length; i += sampleRate) {
+    preview.push(waveform.data.waveform[i]);
   }
-  
+
   return preview;
 }
-
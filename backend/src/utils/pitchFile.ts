@@ -0,0 +1,86 @@
+import { openSync, readSync, closeSync, existsSync } from 'fs';
+import { join } from 'path';
+import { PROJECT_ROOT, MEDIA_CONFIG } from '../config/index.js';
+import { getSongById } from './database.js';
+
+// Layout documented in pitch-analyzer/pitch_format.py
+const MAGIC = 'KPIT';
+const HEADER_SIZE = 32;
+const UNVOICED = -32768;
+
+export interface PitchHeader {
+  sample_rate: number;
+  num_frames: number;
+  hop: number; // Seconds between frames; frame i is at i * hop
+  fmin: number;
+  fmax: number;
+  duration: number;
+}
+
+export interface PitchContour extends PitchHeader {
+  startFrame: number;
+  cents: (number | null)[]; // MIDI cents (6900 = A4), null = unvoiced
+}
+
+function readBytes(filePath: string, offset: number, length: number): Buffer {
+  const buffer = Buffer.alloc(length);
+  const fd = openSync(filePath, 'r');
+  try {
+    const bytesRead = readSync(fd, buffer, 0, length, offset);
+    return bytesRead < length ? buffer.subarray(0, bytesRead) : buffer;
+  } finally {
+    closeSync(fd);
+  }
+}
+
+/**
+ * Path of the pitch contour of a song, or null if it was not generated
+ */
+export function getPitchPath(songId: string): string | null {
+  const song = getSongById(songId);
+  if (!song) {
+    return null;
+  }
+  const pitchPath = join(PROJECT_ROOT, 'music', song.id, MEDIA_CONFIG.PITCH_FILE);
+  return existsSync(pitchPath) ? pitchPath : null;
+}
+
+/**
+ * Read only the header of a pitch.bin file
+ */
+export function readPitchHeader(filePath: string): PitchHeader {
+  const header = readBytes(filePath, 0, HEADER_SIZE);
+  if (header.length < HEADER_SIZE || header.toString('ascii', 0, 4) !== MAGIC) {
+    throw new Error(`Invalid pitch.bin file: ${filePath}`);
+  }
+  // Stored as f32: round 0.00999999977 back to 0.01
+  const hop = Math.round(header.readFloatLE(16) * 1e6) / 1e6;
+  const numFrames = header.readUInt32LE(12);
+  return {
+    sample_rate: header.readUInt32LE(8),
+    num_frames: numFrames,
+    hop,
+    fmin: header.readFloatLE(20),
+    fmax: header.readFloatLE(24),
+    duration: numFrames * hop
+  };
+}
+
+/**
+ * Read the contour between two times (seconds) by byte offset
+ */
+export function readPitchContour(filePath: string, startTime = 0, endTime?: number): PitchContour {
+  const header = readPitchHeader(filePath);
+  const startFrame = Math.max(0, Math.min(Math.floor(startTime / header.hop), header.num_frames));
+  const endFrame = endTime === undefined
+    ? header.num_frames
+    : Math.max(startFrame, Math.min(Math.ceil(endTime / header.hop), header.num_frames));
+
+  const buffer = readBytes(filePath, HEADER_SIZE + startFrame * 2, (endFrame - startFrame) * 2);
+  const cents = new Array<number | null>(buffer.length / 2);
+  for (let i = 0; i < cents.length; i++) {
+    const value = buffer.readInt16LE(i * 2);
+    cents[i] = value === UNVOICED ? null : value;
+  }
+  return { ...header, startFrame, cents };
+}
@@ -0,0 +1,54 @@
+import { existsSync, readFileSync } from 'fs';
+import { join } from 'path';
+import { SeparationTier } from '../types/index.js';
+
+// Written next to the stems by stem-separator/separate.py
+export const SEPARATION_INFO_FILE = 'separation.json';
+
+// Ordered from fastest to highest quality
+export const SEPARATION_TIERS: SeparationTier[] = ['fast', 'balanced', 'best'];
+
+export interface SeparationInfo {
+  tier: SeparationTier;
+  model: string;
+  shifts: number;
+  overlap: number;
+  segment: number | null;
+  runtime: string;
+  outputs: string[];
+  updated: string;
+}
+
+/**
+ * Whether a value is a known separation tier
+ */
+export function isSeparationTier(value: unknown): value is SeparationTier {
+  return typeof value === 'string' && (SEPARATION_TIERS as string[]).includes(value);
+}
+
+/**
+ * Read the settings of the last separation of a song, if recorded
+ */
+export function readSeparationInfo(musicDir: string): SeparationInfo | null {
+  const infoPath = join(musicDir, SEPARATION_INFO_FILE);
+  if (!existsSync(infoPath)) {
+    return null;
+  }
+  try {
+    const info = JSON.parse(readFileSync(infoPath, 'utf-8'));
+    return isSeparationTier(info?.tier) ? info : null;
+  } catch {
+    return null;
+  }
+}
+
+/**
+ * Whether separating again with `requested` improves on the recorded tier.
+ * Stems without a recorded tier are left untouched.
+ */
+export function isTierUpgrade(current: SeparationTier | undefined, requested: SeparationTier): boolean {
+  if (!current) {
+    return false;
+  }
+  return SEPARATION_TIERS.indexOf(requested) > SEPARATION_TIERS.indexOf(current);
+}
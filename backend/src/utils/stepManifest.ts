@@ -0,0 +1,84 @@
+import { execFile } from 'child_process';
+import { existsSync } from 'fs';
+import { basename, join } from 'path';
+import { PROJECT_ROOT } from '../config/index.js';
+
+// Steps recorded by the Python tools in music/<id>/.manifest/ (see audio-io/manifest.py)
+export type ManifestStep = 'separate' | 'waveform' | 'pitch' | 'lyrics';
+
+// Steps to run again, with the planner's reason
+export type StepPlan = Partial<Record<ManifestStep, string>>;
+
+const PLANNER_TIMEOUT_MS = 60_000;
+
+/**
+ * Wrap the shell command of a tool that does not record itself (e.g. the LRC
+ * generator) with `manifest.py record`, which writes the step entry as running,
+ * runs the command and marks the entry complete or failed from its exit code.
+ * Returns the command unchanged when the recorder is unavailable.
+ */
+export function recordStepCommand(musicDir: string, step: ManifestStep, command: string): string {
+  const recorderScript = join(PROJECT_ROOT, 'audio-io', 'manifest.py');
+  if (!existsSync(recorderScript)) {
+    return command;
+  }
+  return `python "${recorderScript}" record "${musicDir}" --steps ${step} --run ${command}`;
+}
+
+/**
+ * Record the current outputs of a step as written by hand (e.g. lyrics.lrc saved
+ * by the lyrics editor), so the planner does not regenerate them. Never rejects:
+ * a failure only leaves the previous entry in place.
+ */
+export function recordEditedStep(musicDir: string, step: ManifestStep, logPrefix: string): Promise<void> {
+  const recorderScript = join(PROJECT_ROOT, 'audio-io', 'manifest.py');
+  if (!existsSync(recorderScript) || !existsSync(musicDir)) {
+    return Promise.resolve();
+  }
+
+  const env = { ...process.env, PYTHONIOENCODING: 'utf-8', PYTHONUTF8: '1' };
+  const args = [recorderScript, 'record', musicDir, '--steps', step];
+  return new Promise((resolve) => {
+    execFile('python', args, { env, timeout: PLANNER_TIMEOUT_MS, windowsHide: true }, (error) => {
+      if (error) {
+        console.warn(`[${logPrefix}] ⚠️  Erro ao registrar a edição no manifesto de etapas: ${error.message}`);
+      }
+      resolve();
+    });
+  });
+}
+
+/**
+ * Ask the step planner which steps of a song must run again: interrupted or
+ * failed runs, outputs changed after being written, a replaced original,
+ * a newer step version, and everything downstream of those.
+ *
+ * Steps without a manifest entry (songs processed before the manifest) are
+ * trusted when their outputs exist, as before. Resolves to an empty plan when
+ * the planner is unavailable, so callers fall back to checking the files.
+ */
+export function planSongSteps(musicDir: string, logPrefix: string): Promise<StepPlan> {
+  const plannerScript = join(PROJECT_ROOT, 'audio-io', 'manifest.py');
+  if (!existsSync(plannerScript) || !existsSync(musicDir)) {
+    return Promise.resolve({});
+  }
+
+  const env = { ...process.env, PYTHONIOENCODING: 'utf-8', PYTHONUTF8: '1' };
+  const args = [plannerScript, 'plan', musicDir, '--trust-unrecorded', '--json'];
+  return new Promise((resolve) => {
+    execFile('python', args, { env, timeout: PLANNER_TIMEOUT_MS, windowsHide: true }, (error, stdout) => {
+      if (error) {
+        console.warn(`[${logPrefix}] ⚠️  Erro ao consultar o manifesto de etapas: ${error.message}`);
+        resolve({});
+        return;
+      }
+      try {
+        const plans = JSON.parse(stdout.trim().split('\n').pop() || '{}');
+        resolve(plans[basename(musicDir)] || {});
+      } catch (err: any) {
+        console.warn(`[${logPrefix}] ⚠️  Resposta inválida do manifesto de etapas: ${err.message}`);
+        resolve({});
+      }
+    });
+  });
+}
@@ -0,0 +1,108 @@
+import { existsSync, readFileSync, statSync } from 'fs';
+import { join } from 'path';
+import { PROJECT_ROOT, MEDIA_CONFIG } from '../config/index.js';
+import { getSongById } from './database.js';
+
+// Layout documented in waveform-generator/vocal_activity.py
+export interface VocalActivity {
+  version: number;
+  source?: string;
+  sample_rate: number;
+  duration: number;
+  threshold_db: number;
+  hop: number; // Seconds per rms value
+  segments: [number, number][]; // Sorted, non-overlapping [start, end] in seconds
+  rms: number[];
+}
+
+export interface VocalActivityAt {
+  time: number;
+  active: boolean;
+  segment: [number, number] | null;
+  rms: number;
+}
+
+// Parsed indexes by song, invalidated when the file changes (regenerated on reprocessing)
+const cache = new Map<string, { mtimeMs: number; activity: VocalActivity }>();
+
+/**
+ * Path of the vocal activity index of a song, or null if it was not generated
+ */
+export function getVocalActivityPath(songId: string): string | null {
+  const song = getSongById(songId);
+  if (!song) {
+    return null;
+  }
+  const activityPath = join(PROJECT_ROOT, 'music', song.id, MEDIA_CONFIG.VOCAL_ACTIVITY_FILE);
+  return existsSync(activityPath) ? activityPath : null;
+}
+
+/**
+ * Load the vocal activity index of a song (cached), or null if it was not generated
+ */
+export function loadVocalActivity(songId: string): VocalActivity | null {
+  const activityPath = getVocalActivityPath(songId);
+  if (!activityPath) {
+    return null;
+  }
+
+  const mtimeMs = statSync(activityPath).mtimeMs;
+  const cached = cache.get(songId);
+  if (cached && cached.mtimeMs === mtimeMs) {
+    return cached.activity;
+  }
+
+  const activity = JSON.parse(readFileSync(activityPath, 'utf-8')) as VocalActivity;
+  cache.set(songId, { mtimeMs, activity });
+  console.log(`[VocalActivity] ✅ Índice carregado para ${songId}: ${activity.segments.length} trecho(s) com voz`);
+  return activity;
+}
+
+/**
+ * Index of the segment containing `time`, or -1 (binary search over the sorted segments)
+ */
+export function findVocalSegment(activity: VocalActivity, time: number): number {
+  const segments = activity.segments;
+  let low = 0;
+  let high = segments.length - 1;
+  while (low <= high) {
+    const mid = (low + high) >> 1;
+    const [start, end] = segments[mid];
+    if (time < start) {
+      high = mid - 1;
+    } else if (time >= end) {
+      low = mid + 1;
+    } else {
+      return mid;
+    }
+  }
+  return -1;
+}
+
+/**
+ * Whether there is singing at `time` (seconds)
+ */
+export function isVocalActive(activity: VocalActivity, time: number): boolean {
+  return findVocalSegment(activity, time) >= 0;
+}
+
+/**
+ * RMS energy of the hop containing `time` (0 outside the song)
+ */
+export function vocalEnergyAt(activity: VocalActivity, time: number): number {
+  const index = Math.floor(time / activity.hop);
+  return index >= 0 && index < activity.rms.length ? activity.rms[index] : 0;
+}
+
+/**
+ * Activity state at `time`: whether it is voiced, the segment and the energy
+ */
+export function getVocalActivityAt(activity: VocalActivity, time: number): VocalActivityAt {
+  const index = findVocalSegment(activity, time);
+  return {
+    time,
+    active: index >= 0,
+    segment: index >= 0 ? activity.segments[index] : null,
+    rms: vocalEnergyAt(activity, time)
+  };
+}
@@ -0,0 +1,165 @@
+import { openSync, readSync, closeSync, existsSync, readFileSync } from 'fs';
+import { join, dirname, basename, extname } from 'path';
+import { MEDIA_CONFIG } from '../config/index.js';
+
+// Layout documented in waveform-generator/waveform_format.py
+const MAGIC = 'KWAV';
+const HEADER_SIZE = 32;
+const LEVEL_SIZE = 16;
+const INT16_SCALE = 32767;
+
+export interface WaveformLevel {
+  samplesPerBin: number;
+  numBins: number;
+  offset: number;
+}
+
+export interface WaveformBinHeader {
+  sample_rate: number;
+  num_samples: number;
+  duration: number;
+  peak: number;
+  levels: WaveformLevel[];
+}
+
+/**
+ * Whether the waveform file uses the binary multi-resolution format
+ */
+export function isBinaryWaveform(filePath: string): boolean {
+  return filePath.toLowerCase().endsWith('.bin');
+}
+
+function readBytes(filePath: string, offset: number, length: number): Buffer {
+  const buffer = Buffer.alloc(length);
+  const fd = openSync(filePath, 'r');
+  try {
+    const bytesRead = readSync(fd, buffer, 0, length, offset);
+    return bytesRead < length ? buffer.subarray(0, bytesRead) : buffer;
+  } finally {
+    closeSync(fd);
+  }
+}
+
+/**
+ * Read only the header and level table of a waveform.bin file
+ */
+export function readWaveformHeader(filePath: string): WaveformBinHeader {
+  const header = readBytes(filePath, 0, HEADER_SIZE);
+  if (header.length < HEADER_SIZE || header.toString('ascii', 0, 4) !== MAGIC) {
+    throw new Error(`Invalid waveform.bin file: ${filePath}`);
+  }
+
+  const numLevels = header.readUInt16LE(6);
+  const table = readBytes(filePath, HEADER_SIZE, numLevels * LEVEL_SIZE);
+  const levels: WaveformLevel[] = [];
+  for (let i = 0; i < numLevels; i++) {
+    const base = i * LEVEL_SIZE;
+    levels.push({
+      samplesPerBin: table.readUInt32LE(base),
+      numBins: table.readUInt32LE(base + 4),
+      offset: Number(table.readBigUInt64LE(base + 8))
+    });
+  }
+
+  return {
+    sample_rate: header.readUInt32LE(8),
+    num_samples: Number(header.readBigUInt64LE(12)),
+    duration: header.readDoubleLE(20),
+    peak: header.readFloatLE(28),
+    levels
+  };
+}
+
+/**
+ * Read interleaved [min, max, ...] peak values of one level by byte offset.
+ * start/end are value indexes (two values per bin), end exclusive.
+ */
+export function readWaveformPeaks(
+  filePath: string,
+  level: WaveformLevel,
+  start: number,
+  end?: number
+): number[] {
+  const totalValues = level.numBins * 2;
+  const from = Math.max(0, Math.min(start, totalValues));
+  const to = Math.max(from, Math.min(end ?? totalValues, totalValues));
+  if (to === from) return [];
+
+  const buffer = readBytes(filePath, level.offset + from * 2, (to - from) * 2);
+  const values = new Array<number>(buffer.length / 2);
+  for (let i = 0; i < values.length; i++) {
+    values[i] = buffer.readInt16LE(i * 2) / INT16_SCALE;
+  }
+  return values;
+}
+
+/**
+ * Find the waveform file of a song directory (binary preferred, legacy JSON accepted)
+ */
+export function findWaveformFile(musicDir: string): string | null {
+  for (const fileName of [MEDIA_CONFIG.WAVEFORM_FILE, MEDIA_CONFIG.LEGACY_WAVEFORM_FILE]) {
+    if (existsSync(join(musicDir, fileName))) {
+      return fileName;
+    }
+  }
+  return null;
+}
+
+/**
+ * Read song duration from a waveform file (header only for the binary format)
+ */
+export function readWaveformDuration(filePath: string): number {
+  if (isBinaryWaveform(filePath)) {
+    return readWaveformHeader(filePath).duration;
+  }
+  return JSON.parse(readFileSync(filePath, 'utf-8')).duration || 0;
+}
+
+export interface WaveformPreviewFile {
+  sample_rate: number;
+  duration: number;
+  num_samples: number;
+  previews: Record<string, number[]>;
+}
+
+/**
+ * Path of the precomputed previews next to a waveform file
+ * (waveform.bin -> waveform_preview.json)
+ */
+export function getPreviewFilePath(waveformPath: string): string {
+  return join(dirname(waveformPath), basename(waveformPath, extname(waveformPath)) + MEDIA_CONFIG.WAVEFORM_PREVIEW_SUFFIX);
+}
+
+/**
+ * Read the precomputed previews of a waveform file, or null if they were not generated
+ */
+export function readWaveformPreviews(waveformPath: string): WaveformPreviewFile | null {
+  const previewPath = getPreviewFilePath(waveformPath);
+  if (!existsSync(previewPath)) {
+    return null;
+  }
+  return JSON.parse(readFileSync(previewPath, 'utf-8')) as WaveformPreviewFile;
+}
+
+/**
+ * Reduce a signed-peak preview to `length` points, keeping the value of
+ * largest magnitude in each bucket (same bucketing as waveform_format.reduce_peaks)
+ */
+export function reducePreview(values: number[], length: number): number[] {
+  if (values.length <= length) {
+    return values;
+  }
+  const reduced = new Array<number>(length);
+  for (let bucket = 0; bucket < length; bucket++) {
+    const start = Math.ceil((bucket * values.length) / length);
+    const end = Math.ceil(((bucket + 1) * values.length) / length);
+    let point = values[start];
+    for (let i = start + 1; i < end; i++) {
+      if (Math.abs(values[i]) > Math.abs(point)) {
+        point = values[i];
+      }
+    }
+    reduced[bucket] = point;
+  }
+  return reduced;
+}
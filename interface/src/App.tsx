@@ -55,7 +55,7 @@ function App() {
   const { currentTime, isPlaying, play, pause, seek } = useSyncWebSocket();
   const { alert, confirm, AlertComponent, ConfirmComponent } = useAlert();
   const { uploadRecording, generateLRC, error: recordingError, isUploading, isProcessing } = useAudioRecorder();
-  const { calculateScoreFromRecordedLRC } = useScoreCalculation();
+  const { calculateScore } = useScoreCalculation();
 
   // Carregar lista de músicas, categorias e bandas do banco de dados
   useEffect(() => {
@@ -632,7 +632,7 @@ function App() {
       setViewMode('results');
     }
 
-    // Processar tudo em background (upload, LRC, cálculo de pontuação)
+    // Processar tudo em background (upload, pontuação ou LRC)
     try {
       console.log('📤 Iniciando upload da gravação...');
       const recordingId = await uploadRecording(audioBlob, selectedSong, startTime);
@@ -649,43 +649,12 @@ function App() {
 
       console.log('✅ Upload concluído, recordingId:', recordingId);
       
-      // No modo config, gerar LRC apenas se a opção estiver habilitada
-      // No modo presentation, sempre gerar LRC para calcular pontuação
-      const shouldGenerateLRC = isPresentationMode || generateLRCAfterRecording;
-      
-      if (!shouldGenerateLRC) {
-        console.log('ℹ️ LRC não será gerado (opção desmarcada no modo config)');
-        // Modo config sem gerar LRC - apenas mostrar mensagem
-        await alert('Gravação enviada com sucesso! LRC não foi gerado (opção desmarcada).', {
-          type: 'success',
-          title: 'Sucesso'
-        });
-        return;
-      }
-
-      console.log('🔄 Iniciando geração de LRC...');
-      const lrcPath = await generateLRC(selectedSong, recordingId);
-      
-      if (!lrcPath) {
-        console.error('❌ Geração de LRC falhou: lrcPath é null');
-        if (isPresentationMode) {
-          await handlePresentationError('Erro ao gerar o LRC. Verifique o console do backend.', 'Aviso');
-        } else {
-          await alert('Gravação salva, mas houve erro ao gerar o LRC. Verifique o console do backend.', {
-            type: 'warning',
-            title: 'Aviso'
-          });
-        }
-        return;
-      }
-
-      console.log('✅ LRC gerado com sucesso:', lrcPath);
-      setRecordingIdForScore(recordingId);
-      
+      // No modo presentation, pontuar direto pelo pitch (sem gerar o LRC da gravação)
       if (isPresentationMode) {
+        setRecordingIdForScore(recordingId);
         // Calcular pontuação em background
         try {
-          const scoreResult = await calculateScoreFromRecordedLRC(selectedSong, recordingId);
+          const scoreResult = await calculateScore(selectedSong, recordingId);
           
           if (!scoreResult) {
             await handlePresentationError(
@@ -729,7 +698,32 @@ function App() {
           await handlePresentationError('Erro ao calcular pontuação: ' + scoreError.message);
         }
       } else {
-        // Modo config: apenas mostrar comparação
+        // Modo config: gerar LRC apenas se a opção estiver habilitada
+        if (!generateLRCAfterRecording) {
+          console.log('ℹ️ LRC não será gerado (opção desmarcada no modo config)');
+          await alert('Gravação enviada com sucesso! LRC não foi gerado (opção desmarcada).', {
+            type: 'success',
+            title: 'Sucesso'
+          });
+          return;
+        }
+
+        console.log('🔄 Iniciando geração de LRC...');
+        const lrcPath = await generateLRC(selectedSong, recordingId);
+
+        if (!lrcPath) {
+          console.error('❌ Geração de LRC falhou: lrcPath é null');
+          await alert('Gravação salva, mas houve erro ao gerar o LRC. Verifique o console do backend.', {
+            type: 'warning',
+            title: 'Aviso'
+          });
+          return;
+        }
+
+        console.log('✅ LRC gerado com sucesso:', lrcPath);
+        setRecordingIdForScore(recordingId);
+
+        // Mostrar comparação das letras
         setLrcRefreshKey(prev => prev + 1);
         setShowLRCComparison(true);
         await alert('Gravação processada! Comparação de letras disponível.', {
@@ -748,7 +742,7 @@ function App() {
         });
       }
     }
-  }, [selectedSong, uploadRecording, generateLRC, alert, calculateScoreFromRecordedLRC, viewMode, handlePresentationError, generateLRCAfterRecording]);
+  }, [selectedSong, uploadRecording, generateLRC, alert, calculateScore, viewMode, handlePresentationError, generateLRCAfterRecording]);
 
   // Se estiver no modo de resultados, mostrar a tela de resultados
   if (viewMode === 'results' && finalScore) {
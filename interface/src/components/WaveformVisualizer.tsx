@@ -7,6 +7,7 @@ interface WaveformVisualizerProps {
     sample_rate: number;
     duration: number;
     num_samples: number;
+    num_values?: number;
     preview?: number[];
     totalChunks?: number;
   } | null;
@@ -166,7 +167,7 @@ export default function WaveformVisualizer({
       <h3>Waveform</h3>
       {isLoading && (
         <div className="waveform-loading">
-          Carregando waveform completa... ({waveformRef.current.length.toLocaleString()} / {waveformData.num_samples.toLocaleString()} pontos)
+          Carregando waveform completa... ({waveformRef.current.length.toLocaleString()} / {(waveformData.num_values ?? waveformData.num_samples).toLocaleString()} pontos)
         </div>
       )}
       <canvas ref={canvasRef} className="waveform-canvas" />
@@ -2,15 +2,18 @@ import { useCallback } from 'react';
 import { recordingService } from '../services/recordingService.js';
 import { lyricsService } from '../services/lyricsService.js';
 import { parseLRC, alignLRCLinesByTextOnly, calculateScoreFromLRCAlignment } from '../utils/textUtils.js';
+import { LyricResult } from '../types/index.js';
+
+type ScoreResult = { results: LyricResult[]; totalScore: number };
 
 /**
- * Hook para calcular pontuação baseada em LRC gravado
+ * Hook para calcular pontuação de uma gravação
  */
 export function useScoreCalculation() {
   const calculateScoreFromRecordedLRC = useCallback(async (
     songId: string,
     recordingId?: string
-  ): Promise<{ results: Array<{ lyric: string; score: number; percentage: number; totalWords: number }>; totalScore: number } | null> => {
+  ): Promise<ScoreResult | null> => {
     try {
       // O backend agora aguarda o LRC ser criado antes de retornar sucesso
       const recordedLRCContent = await recordingService.getRecordingLRC(songId, recordingId);
@@ -39,5 +42,43 @@ export function useScoreCalculation() {
     }
   }, []);
 
-  return { calculateScoreFromRecordedLRC };
+  /**
+   * Pontuação local pelo pitch (POST /api/recording/score), sem transcrição.
+   * Se o backend não conseguir pontuar (sem pitch.bin, sem voz alinhada...),
+   * cai no caminho antigo: gera o LRC da gravação e compara as letras.
+   */
+  const calculateScore = useCallback(async (
+    songId: string,
+    recordingId?: string
+  ): Promise<ScoreResult | null> => {
+    try {
+      const response = await recordingService.scoreRecording(songId, recordingId);
+      const results: LyricResult[] = (response.results || []).map((result) => ({
+        lyric: result.lyric,
+        score: result.score,
+        percentage: result.percentage,
+        totalWords: result.totalWords,
+      }));
+      if (response.success && results.length > 0) {
+        console.log(`🎯 Pontuação local: ${results.length} linha(s), média ${response.average}% (${response.timing.total}s)`);
+        return { results, totalScore: response.totalScore };
+      }
+      console.warn('⚠️ Pontuação local sem linhas pontuadas, usando o LRC da gravação');
+    } catch (error: any) {
+      console.warn('⚠️ Pontuação local indisponível, usando o LRC da gravação:', error.message);
+    }
+
+    try {
+      const response = await recordingService.generateLRC(songId, recordingId);
+      if (!response.success) {
+        throw new Error(response.message || 'Erro ao gerar LRC');
+      }
+    } catch (error: any) {
+      console.error('❌ Erro ao gerar LRC da gravação:', error);
+      return null;
+    }
+    return calculateScoreFromRecordedLRC(songId, recordingId);
+  }, [calculateScoreFromRecordedLRC]);
+
+  return { calculateScore, calculateScoreFromRecordedLRC };
 }
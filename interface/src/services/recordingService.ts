@@ -1,5 +1,6 @@
 import { apiService } from './api.js';
 import { API_CONFIG } from '../config/index.js';
+import { LyricResult } from '../types/index.js';
 
 export interface RecordingUploadResponse {
   success: boolean;
@@ -15,6 +16,14 @@ export interface GenerateLRCResponse {
   message?: string;
 }
 
+export interface ScoreRecordingResponse {
+  success: boolean;
+  results: LyricResult[];
+  totalScore: number;
+  average: number;
+  timing: { decode: number; pitch: number; alignment: number; total: number };
+}
+
 /**
  * Recording API service
  */
@@ -75,6 +84,24 @@ export const recordingService = {
     return response.json();
   },
 
+  /**
+   * Score recording locally by pitch against the song's vocal contour (no transcription)
+   */
+  async scoreRecording(songId: string, recordingId?: string): Promise<ScoreRecordingResponse> {
+    const endpoint = recordingId
+      ? `/api/recording/score/${songId}?recordingId=${recordingId}`
+      : `/api/recording/score/${songId}`;
+
+    const response = await fetch(`${API_CONFIG.BASE_URL}${endpoint}`, { method: 'POST' });
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ error: 'Erro desconhecido' }));
+      throw new Error(error.error || `Erro ao pontuar gravação: ${response.statusText}`);
+    }
+
+    return response.json();
+  },
+
   /**
    * Get recording LRC content
    */
@@ -84,6 +84,7 @@ export interface WaveformMetadata {
   sample_rate: number;
   duration: number;
   num_samples: number;
+  num_values?: number; // Valores servidos em chunks (picos min/max intercalados no waveform.bin)
   totalChunks: number;
   preview: number[];
   previewLength: number;
@@ -3,6 +3,9 @@
 """
 Script para extrair apenas a voz de um arquivo de áudio usando Demucs (Meta).
 Extrai o stem de vocais e salva em alta qualidade na pasta output/.
+
+É um modo do separador de passada única (stem-separator/separate.py); para gerar
+vocals.wav e instrumental.wav juntos, use separate.py diretamente.
 """
 
 import sys
@@ -10,33 +13,23 @@ import argparse
 from pathlib import Path
 import io
 
-# Configurar encoding UTF-8 para Windows
-if sys.platform == 'win32':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+# O separador de passada única fica em stem-separator/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'stem-separator'))
 
-try:
-    import torch
-    import torchaudio
-    import soundfile as sf
-    from demucs.pretrained import get_model
-    from demucs.apply import apply_model
-    from demucs.audio import AudioFile
-except ImportError as e:
-    print(f"Erro: Dependências não instaladas. Execute: pip install -r requirements.txt")
-    print(f"Detalhes: {e}")
-    sys.exit(1)
+from separate import separate_stems
 
 
-def extract_vocals(input_file, output_dir=None, model_name="htdemucs", device=None):
+def extract_vocals(input_file, output_dir=None, model_name=None, device=None, max_window=None, tier=None):
     """
     Extrai apenas a voz de um arquivo de áudio usando Demucs.
     
     Args:
         input_file (str): Caminho para o arquivo de áudio de entrada
         output_dir (str): Diretório onde salvar o arquivo de saída
-        model_name (str): Nome do modelo Demucs a usar (htdemucs é o mais recente)
+        model_name (str): Nome do modelo Demucs a usar (padrão: o do nível)
         device (str): Dispositivo a usar ('cuda' para GPU ou 'cpu' para CPU)
+        max_window (float): Separa em janelas de até N segundos (memória limitada, para arquivos longos)
+        tier (str): Nível de qualidade/velocidade ('fast', 'balanced' ou 'best')
     """
     
     # 1. Verificar se o arquivo de entrada existe
@@ -78,86 +71,19 @@ def extract_vocals(input_file, output_dir=None, model_name="htdemucs", device=No
     output_file = output_path / output_filename
     print(f"📂 Diretório de saída: {output_path.absolute()}")
     
-    # 3. Detectar dispositivo (GPU se disponível, senão CPU)
-    if device is None:
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-    print(f"🖥️  Usando dispositivo: {device}")
-    
-    # 4. Carregar o modelo Demucs pré-treinado
-    print(f"🤖 Carregando modelo Demucs ({model_name})...")
-    model = get_model(model_name)
-    model.to(device)
-    model.eval()
-    print("✅ Modelo carregado com sucesso!")
-    
-    # Obter informações do modelo (pode ser BagOfModels ou modelo único)
-    # BagOfModels não tem sample_rate diretamente, precisa acessar o modelo interno
-    if hasattr(model, 'models') and len(model.models) > 0:
-        # É um BagOfModels, pegar o primeiro modelo interno
-        inner_model = model.models[0]
-        sample_rate = inner_model.samplerate
-        audio_channels = inner_model.audio_channels
-    else:
-        # É um modelo único
-        sample_rate = getattr(model, 'samplerate', getattr(model, 'sample_rate', 44100))
-        audio_channels = getattr(model, 'audio_channels', 2)
-    
-    # 5. Carregar e processar o arquivo de áudio
-    print(f"🎵 Carregando arquivo de áudio...")
-    wav = AudioFile(input_path).read(streams=0, samplerate=sample_rate, channels=audio_channels)
-    
-    # Converter para numpy se for tensor
-    if isinstance(wav, torch.Tensor):
-        wav_np = wav.cpu().numpy()
-    else:
-        wav_np = wav
-    
-    # Normalizar o áudio
-    ref = wav_np.mean(0)
-    wav_np = (wav_np - ref.mean()) / ref.std()
-    
-    # Converter para tensor e preparar para o modelo
-    wav_tensor = torch.from_numpy(wav_np).float()
-    if len(wav_tensor.shape) == 1:
-        wav_tensor = wav_tensor.unsqueeze(0)
-    wav_tensor = wav_tensor.unsqueeze(0).to(device)
-    
-    print(f"   Taxa de amostragem: {sample_rate} Hz")
-    print(f"   Canais: {audio_channels}")
-    print(f"   Duração: {wav_tensor.shape[-1] / sample_rate:.2f} segundos")
-    
-    # 6. Aplicar o modelo para separar os stems
-    print(f"🎤 Separando stems de áudio (isso pode levar alguns minutos)...")
-    with torch.no_grad():
-        sources = apply_model(model, wav_tensor, shifts=1, split=True, overlap=0.25, progress=True)
-    
-    # 7. Extrair apenas o stem de vocais
-    # O modelo htdemucs separa em: [drums, bass, other, vocals]
-    stems = ["drums", "bass", "other", "vocals"]
-    vocals_idx = stems.index("vocals")
-    
-    print(f"🎙️  Extraindo stem de vocais...")
-    vocals = sources[0, vocals_idx].cpu()
-    
-    # Desnormalizar o áudio
-    ref_tensor = torch.from_numpy(ref)
-    vocals = vocals * ref_tensor.std() + ref_tensor.mean()
-    
-    # Converter para numpy para salvar com soundfile
-    vocals_np = vocals.numpy()
-    
-    # Transpor se necessário (soundfile espera [samples, channels])
-    if vocals_np.shape[0] < vocals_np.shape[-1]:
-        vocals_np = vocals_np.T
-
-    # 8. Arquivo de saída já foi definido acima
-    
-    # 9. Salvar o arquivo de vocais usando soundfile
-    print(f"💾 Salvando arquivo de vocais...")
-    sf.write(str(output_file), vocals_np, sample_rate, subtype='PCM_24')
+    # 3. Separar com o separador de passada única (apenas o stem de vocais)
+    saved = separate_stems(
+        input_file=str(input_path),
+        output_dir=str(output_path),
+        outputs={"vocals": output_file},
+        model_name=model_name,
+        device=device,
+        max_window=max_window,
+        tier=tier
+    )
     
     print(f"✅ Vocais extraídos com sucesso!")
-    print(f"📄 Arquivo salvo em: {output_file.absolute()}")
+    print(f"📄 Arquivo salvo em: {saved['vocals']}")
     
     return str(output_file.absolute())
 
@@ -166,6 +92,11 @@ def main():
     """
     Função principal do script.
     """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
     parser = argparse.ArgumentParser(
         description="Extrai apenas a voz de um arquivo de áudio usando Demucs",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -174,6 +105,7 @@ Exemplos:
   python extract_voice.py musica.mp3
   python extract_voice.py musica.wav --output minha_pasta
   python extract_voice.py musica.m4a --model htdemucs_ft
+  python extract_voice.py musica.mp3 --tier fast
         """
     )
     
@@ -195,9 +127,18 @@ Exemplos:
         "--model",
         "-m",
         type=str,
-        default="htdemucs",
+        default=None,
         choices=["htdemucs", "htdemucs_ft", "mdx_extra"],
-        help="Modelo Demucs a usar (padrão: htdemucs - o mais recente)"
+        help="Modelo Demucs a usar (padrão: o do nível)"
+    )
+    
+    parser.add_argument(
+        "--tier",
+        "-t",
+        type=str,
+        choices=["fast", "balanced", "best"],
+        default=None,
+        help="Nível de qualidade/velocidade (padrão: SEPARATION_TIER ou balanced)"
     )
     
     parser.add_argument(
@@ -209,6 +150,13 @@ Exemplos:
         help="Dispositivo a usar (cuda para GPU, cpu para CPU). Se não especificado, usa GPU se disponível."
     )
     
+    parser.add_argument(
+        "--max-window",
+        type=float,
+        default=None,
+        help="Separa em janelas de até N segundos com memória limitada (padrão: SEPARATION_MAX_WINDOW ou o arquivo inteiro)"
+    )
+    
     args = parser.parse_args()
     
     try:
@@ -217,7 +165,9 @@ Exemplos:
             input_file=args.input_file,
             output_dir=args.output,
             model_name=args.model,
-            device=args.device
+            device=args.device,
+            max_window=args.max_window,
+            tier=args.tier
         )
         
         print("\n" + "="*50)
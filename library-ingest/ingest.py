@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Processamento em lote da biblioteca inteira (ou de uma pasta de arquivos).
+
+Hoje o backend reprocessa a biblioteca música por música (processMusic). Aqui
+as etapas de todas as músicas entram em um único escalonador, cada etapa em um
+processo filho (os mesmos scripts que o backend chama):
+
+  decode    audio-io/audio_io.py decode        PCM 44.1 kHz estéreo no cache de decodificação
+  separate  stem-separator/separate.py         vocals.wav + instrumental.wav (Demucs)
+  waveform  waveform-generator/waveform_extractor.py   waveform.bin, waveform.png, vocal_activity.json
+  pitch     pitch-analyzer/pitch_contour.py    pitch.bin
+  lyrics    audio-io/transcribe_chunks.py      lyrics.lrc (opcional: usa a API de transcrição)
+
+Limites de concorrência:
+- Orçamento de núcleos (--jobs): cada separação consome --separation-cores
+  núcleos (e roda com esse número de threads), as outras etapas um núcleo.
+  Os pedidos são atendidos em ordem, então a separação não passa fome.
+- Por etapa: por padrão uma separação a cada --separation-cores núcleos e as
+  etapas baratas com todos os núcleos (troque com --limit etapa=N).
+- Antecipação: a decodificação anda no máximo --lookahead músicas à frente da
+  separação, para o cache não descartar PCM que ainda vai ser usado.
+
+Retomada: cada início, fim e erro de etapa vai para um diário
+(music/.ingest/journal.jsonl, gravado com fsync). Ao rodar de novo, as etapas
+concluídas são puladas e as que ficaram pela metade (início sem fim) são
+refeitas, mesmo que o arquivo de saída exista. Quando as saídas existem, o
+manifesto da música (music/<id>/.manifest/, ver audio-io/manifest.py) também é
+consultado: execução interrompida, saída alterada ou original trocado fazem a
+etapa rodar de novo. Sem registro no diário nem no manifesto (músicas antigas),
+vale a existência das saídas, como no processMusic.
+
+No fim, o music/database.json é atualizado e a vazão total é impressa.
+
+Uso:
+  python ingest.py                                   # todas as músicas do database.json
+  python ingest.py --songs abc def --stages waveform pitch --force waveform
+  python ingest.py --folder ~/Musicas --jobs 16 --separation-cores 4
+  python ingest.py --dry-run
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+import io
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# A leitura de áudio compartilhada fica em audio-io/
+sys.path.insert(0, str(PROJECT_ROOT / 'audio-io'))
+
+from audio_io import probe
+from manifest import check_step
+
+DEFAULT_MUSIC_DIR = PROJECT_ROOT / 'music'
+DATABASE_FILENAME = 'database.json'
+
+# Diário e logs das etapas (music/.ingest/)
+STATE_DIRNAME = '.ingest'
+JOURNAL_FILENAME = 'journal.jsonl'
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.flac', '.ogg')
+
+# Ordem do pipeline; lyrics só roda quando pedida
+STAGES = ('decode', 'separate', 'waveform', 'pitch', 'lyrics')
+DEFAULT_STAGES = ('decode', 'separate', 'waveform', 'pitch')
+ANALYSIS_STAGES = ('waveform', 'pitch', 'lyrics')
+
+# Saídas de cada etapa na pasta da música (a decodificação vai para o cache)
+STAGE_OUTPUTS = {
+    "decode": (),
+    "separate": ('vocals.wav', 'instrumental.wav'),
+    "waveform": ('waveform.bin',),
+    "pitch": ('pitch.bin',),
+    "lyrics": ('lyrics.lrc',),
+}
+
+# waveform.json antigo ainda conta como waveform pronta (como no backend)
+LEGACY_WAVEFORM_FILENAME = 'waveform.json'
+
+TRANSCRIPTION_FILENAME = 'transcription.json'
+SEPARATION_INFO_FILENAME = 'separation.json'
+
+# Formato que a separação lê (MODEL_SAMPLE_RATE/MODEL_AUDIO_CHANNELS do separate.py)
+SEPARATION_SAMPLE_RATE = 44100
+SEPARATION_CHANNELS = 2
+
+SEPARATION_TIERS = ('fast', 'balanced', 'best')
+
+# Núcleos por separação (threads do Demucs)
+DEFAULT_SEPARATION_CORES = 4
+
+
+def _base36(value):
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    text = ''
+    while True:
+        value, remainder = divmod(value, 36)
+        text = digits[remainder] + text
+        if value == 0:
+            return text
+
+
+def new_song_id():
+    """
+    ID no mesmo formato do upload do backend (Date.now em base 36 + aleatório).
+    """
+    return f"{_base36(int(time.time() * 1000))}-{_base36(random.randint(0, 10 ** 9))}"
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m{seconds:02d}s"
+    return f"{minutes}m{seconds:02d}s" if minutes else f"{seconds}s"
+
+
+class Journal:
+    """
+    Diário das etapas (JSON Lines). Cada registro é gravado com fsync antes de
+    a etapa seguir, então um crash perde no máximo a linha sendo escrita (que é
+    ignorada na leitura).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.last = {}
+        self.sources = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._apply(entry)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _apply(self, entry):
+        if entry.get("stage") == 'register':
+            self.sources[entry.get("source")] = entry["id"]
+        else:
+            self.last[(entry.get("id"), entry.get("stage"))] = entry.get("event")
+
+    def record(self, song_id, stage, event, **extra):
+        entry = {"time": datetime.now(timezone.utc).isoformat(), "id": song_id, "stage": stage, "event": event,
+                 **extra}
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._apply(entry)
+
+    def close(self):
+        self._file.close()
+
+
+class CoreBudget:
+    """
+    Semáforo com peso: cada etapa reserva `cost` núcleos do total. Pedidos são
+    atendidos na ordem de chegada, então uma separação esperando 4 núcleos não
+    é ultrapassada para sempre pelas etapas de 1 núcleo.
+    """
+
+    def __init__(self, total):
+        self.total = max(int(total), 1)
+        self.free = self.total
+        self.waiters = deque()
+
+    async def acquire(self, cost):
+        cost = min(max(int(cost), 1), self.total)
+        if not self.waiters and self.free >= cost:
+            self.free -= cost
+            return cost
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((cost, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(cost)
+            elif (cost, future) in self.waiters:
+                self.waiters.remove((cost, future))
+            raise
+        return cost
+
+    def release(self, cost):
+        self.free += cost
+        while self.waiters and self.waiters[0][0] <= self.free:
+            cost, future = self.waiters.popleft()
+            if future.done():
+                continue
+            self.free -= cost
+            future.set_result(None)
+
+
+def load_database(path):
+    if not Path(path).exists():
+        return {"version": "1.0.0", "lastUpdated": None, "songs": [], "categories": [], "bands": []}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_database(path, database):
+    """
+    Grava o database.json (arquivo temporário + rename).
+    """
+    database["lastUpdated"] = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(database, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def find_original(song_dir, song=None):
+    name = ((song or {}).get("files") or {}).get("original")
+    if name and (song_dir / name).exists():
+        return song_dir / name
+    for extension in AUDIO_EXTENSIONS:
+        if (song_dir / f"original{extension}").exists():
+            return song_dir / f"original{extension}"
+    return None
+
+
+def songs_from_database(music_dir, database, ids=None):
+    """
+    Músicas do database.json que têm o arquivo original na pasta.
+    """
+    songs = []
+    for entry in database.get("songs", []):
+        if ids and entry["id"] not in ids:
+            continue
+        song_dir = music_dir / entry["id"]
+        original = find_original(song_dir, entry)
+        if original is None:
+            print(f"⚠️  {entry['id']}: arquivo original não encontrado, pulando", file=sys.stderr)
+            continue
+        songs.append({"id": entry["id"], "name": entry.get("displayName") or entry.get("name") or entry["id"],
+                      "dir": song_dir, "original": original, "duration": entry.get("duration") or 0.0})
+    return songs
+
+
+def songs_from_folder(folder, music_dir, database, journal):
+    """
+    Registra os arquivos de áudio de uma pasta como músicas novas: copia para
+    music/<id>/original.<ext> e cria a entrada no banco. O caminho de origem
+    fica no diário, então uma retomada reaproveita o mesmo ID.
+    """
+    songs = []
+    files = sorted(path for path in Path(folder).rglob('*')
+                   if path.is_file() and path.suffix.lower() in AUDIO_EXTENSIONS)
+    for path in files:
+        source = str(path.resolve())
+        song_id = journal.sources.get(source)
+        if song_id is None:
+            song_id = new_song_id()
+            journal.record(song_id, 'register', 'done', source=source)
+        song_dir = music_dir / song_id
+        original = song_dir / f"original{path.suffix.lower()}"
+        if not original.exists():
+            song_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = original.with_name(original.name + '.tmp')
+            shutil.copyfile(path, temp_path)
+            os.replace(temp_path, original)
+
+        if not any(entry["id"] == song_id for entry in database["songs"]):
+            now = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+            database["songs"].append({
+                "id": song_id,
+                "name": ''.join(c for c in path.stem if c.isascii() and c.isalnum()) or song_id,
+                "displayName": path.stem,
+                "artist": "Unknown",
+                "duration": 0,
+                "files": {"original": original.name, "vocals": "", "instrumental": "", "waveform": "",
+                          "lyrics": ""},
+                "metadata": {"sampleRate": 44100, "format": "wav", "createdAt": now, "lastProcessed": now},
+                "status": {"vocals": False, "instrumental": False, "waveform": False, "lyrics": False,
+                           "ready": False},
+            })
+        songs.append({"id": song_id, "name": path.stem, "dir": song_dir, "original": original, "duration": 0.0})
+    return songs
+
+
+def outputs_exist(song, stage):
+    if stage == 'waveform' and (song["dir"] / LEGACY_WAVEFORM_FILENAME).exists():
+        return True
+    return all((song["dir"] / name).exists() for name in STAGE_OUTPUTS[stage])
+
+
+def separation_tier(song_dir):
+    try:
+        with open(song_dir / SEPARATION_INFO_FILENAME, 'r', encoding='utf-8') as f:
+            tier = json.load(f).get("tier")
+    except (OSError, ValueError):
+        return None
+    return tier if tier in SEPARATION_TIERS else None
+
+
+def plan_song(song, stages, journal, force=(), tier=None):
+    """
+    Etapas que precisam rodar para a música, em ordem.
+
+    Uma etapa roda quando é forçada, quando ficou pela metade ou falhou no
+    diário, quando falta alguma saída, quando o manifesto diz que ela não está
+    em dia ou (separação) quando o nível pedido é melhor que o dos stems
+    atuais. Tudo o que depende de uma etapa refeita também é refeito; a
+    decodificação só roda junto com a separação.
+    """
+    plan = []
+    for stage in ('separate',) + ANALYSIS_STAGES:
+        if stage not in stages:
+            continue
+        last = journal.last.get((song["id"], stage))
+        run = (stage in force or last in ('start', 'failed') or not outputs_exist(song, stage)
+               or (stage != 'separate' and 'separate' in plan)
+               or check_step(song["dir"], stage, trust_unrecorded=True) is not None)
+        if stage == 'separate' and not run and tier:
+            current = separation_tier(song["dir"])
+            run = current is not None and SEPARATION_TIERS.index(tier) > SEPARATION_TIERS.index(current)
+        if run:
+            plan.append(stage)
+    if 'separate' in plan and 'decode' in stages:
+        plan.insert(0, 'decode')
+    return plan
+
+
+class IngestRunner:
+    """
+    Escalona as etapas de todas as músicas: uma corrotina por música, etapas
+    em processos filhos, limites por etapa e orçamento de núcleos compartilhado.
+    """
+
+    def __init__(self, journal, stages, jobs, separation_cores=DEFAULT_SEPARATION_CORES, limits=None,
+                 lookahead=None, tier=None, runtime=None, log_dir=None, database_path=None):
+        self.journal = journal
+        self.stages = stages
+        self.jobs = max(int(jobs), 1)
+        self.separation_cores = min(max(int(separation_cores), 1), self.jobs)
+        self.tier = tier
+        self.runtime = runtime
+        self.log_dir = Path(log_dir)
+        self.database_path = database_path
+
+        separations = max(self.jobs // self.separation_cores, 1)
+        defaults = {stage: self.jobs for stage in STAGES}
+        defaults["separate"] = separations
+        defaults.update(limits or {})
+        self.limits = defaults
+        self.lookahead = lookahead or 2 * separations
+        self.costs = {stage: 1 for stage in STAGES}
+        self.costs["separate"] = self.separation_cores
+
+        self.stats = {stage: {"runs": 0, "failed": 0, "seconds": 0.0} for stage in STAGES}
+        self.processed = []
+        self.failed = []
+        self.skipped = []
+
+    def stage_command(self, song, stage):
+        python = sys.executable
+        vocals = str(song["dir"] / 'vocals.wav')
+        if stage == 'decode':
+            return [python, str(PROJECT_ROOT / 'audio-io' / 'audio_io.py'), 'decode', str(song["original"]),
+                    '--sample-rate', str(SEPARATION_SAMPLE_RATE), '--channels', str(SEPARATION_CHANNELS)]
+        if stage == 'separate':
+            command = [python, str(PROJECT_ROOT / 'stem-separator' / 'separate.py'), str(song["original"]),
+                       '--output', str(song["dir"]), '--stems', 'vocals', 'instrumental',
+                       '--threads', str(self.separation_cores)]
+            if self.tier:
+                command += ['--tier', self.tier]
+            if self.runtime:
+                command += ['--runtime', self.runtime]
+            return command
+        if stage == 'waveform':
+            return [python, str(PROJECT_ROOT / 'waveform-generator' / 'waveform_extractor.py'), vocals,
+                    'waveform.bin', 'waveform.png', str(song["dir"]), '--stream']
+        if stage == 'pitch':
+            return [python, str(PROJECT_ROOT / 'pitch-analyzer' / 'pitch_contour.py'), vocals,
+                    '-o', str(song["dir"] / 'pitch.bin')]
+        if stage == 'lyrics':
+            return [python, str(PROJECT_ROOT / 'audio-io' / 'transcribe_chunks.py'), vocals,
+                    '-o', str(song["dir"] / TRANSCRIPTION_FILENAME), '--lrc', str(song["dir"] / 'lyrics.lrc')]
+        raise ValueError(f"Etapa desconhecida: {stage}")
+
+    def stage_env(self, stage):
+        env = dict(os.environ, PYTHONUNBUFFERED='1')
+        # A separação lê o PCM que a etapa decode deixou no cache
+        if stage in ('decode', 'separate') and 'decode' in self.stages:
+            env["AUDIO_DECODE_CACHE"] = '1'
+        return env
+
+    async def run_step(self, song, stage):
+        """
+        Roda uma etapa em um processo filho (saída no log da etapa).
+
+        Returns:
+            bool: sucesso
+        """
+        async with self.semaphores[stage]:
+            cost = await self.budget.acquire(self.costs[stage])
+            log_path = self.log_dir / f"{song['id']}.{stage}.log"
+            started = time.perf_counter()
+            self.journal.record(song["id"], stage, 'start')
+            try:
+                with open(log_path, 'wb') as log:
+                    process = await asyncio.create_subprocess_exec(
+                        *self.stage_command(song, stage), stdout=log, stderr=asyncio.subprocess.STDOUT,
+                        stdin=asyncio.subprocess.DEVNULL, env=self.stage_env(stage))
+                    try:
+                        code = await process.wait()
+                    except asyncio.CancelledError:
+                        process.kill()
+                        await process.wait()
+                        raise
+            except OSError as e:
+                code = None
+                print(f"❌ [{song['id']}] {stage}: {e}", file=sys.stderr)
+            finally:
+                self.budget.release(cost)
+
+        seconds = time.perf_counter() - started
+        stats = self.stats[stage]
+        stats["runs"] += 1
+        stats["seconds"] += seconds
+        missing = [name for name in STAGE_OUTPUTS[stage] if not (song["dir"] / name).exists()]
+        if code == 0 and not missing:
+            self.journal.record(song["id"], stage, 'done', seconds=round(seconds, 3))
+            print(f"✅ [{song['id']}] {stage} em {seconds:.1f}s", file=sys.stderr)
+            return True
+
+        stats["failed"] += 1
+        reason = f"código {code}" if code != 0 else f"saída ausente: {', '.join(missing)}"
+        self.journal.record(song["id"], stage, 'failed', seconds=round(seconds, 3), reason=reason)
+        print(f"❌ [{song['id']}] {stage} falhou ({reason}), log: {log_path}", file=sys.stderr)
+        return False
+
+    async def process_song(self, song, plan):
+        ok = True
+        if 'separate' in plan:
+            async with self.lookahead_slots:
+                # Falha na decodificação não impede a separação (ela decodifica sozinha)
+                if 'decode' in plan:
+                    await self.run_step(song, 'decode')
+                ok = await self.run_step(song, 'separate')
+        if ok and not (song["dir"] / 'vocals.wav').exists():
+            print(f"❌ [{song['id']}] vocals.wav ausente: inclua a etapa separate", file=sys.stderr)
+            ok = False
+        if ok:
+            results = await asyncio.gather(*(self.run_step(song, stage) for stage in plan
+                                             if stage in ANALYSIS_STAGES))
+            ok = all(results)
+        (self.processed if ok else self.failed).append(song)
+        if self.database_path:
+            update_database_entry(self.database_path, song)
+
+    async def run(self, plans):
+        """
+        Processa as músicas com etapas pendentes; plans é [(música, etapas)].
+        """
+        self.budget = CoreBudget(self.jobs)
+        self.semaphores = {stage: asyncio.Semaphore(max(int(limit), 1)) for stage, limit in self.limits.items()}
+        self.lookahead_slots = asyncio.Semaphore(max(int(self.lookahead), 1))
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        await asyncio.gather(*(self.process_song(song, plan) for song, plan in plans))
+
+
+def update_database_entry(database_path, song):
+    """
+    Atualiza arquivos, status e duração da música no database.json (mesma regra
+    do checkSongFiles do backend: ready = vocais, instrumental, waveform e letras).
+    """
+    database = load_database(database_path)
+    entry = next((item for item in database["songs"] if item["id"] == song["id"]), None)
+    if entry is None:
+        return
+    song_dir = song["dir"]
+    files = dict(entry.get("files") or {})
+    for key, name in (("vocals", 'vocals.wav'), ("instrumental", 'instrumental.wav'),
+                      ("waveform", 'waveform.bin'), ("lyrics", 'lyrics.lrc')):
+        if (song_dir / name).exists():
+            files[key] = name
+    entry["files"] = files
+    status = {key: bool(files.get(key)) and (song_dir / files[key]).exists()
+              for key in ("vocals", "instrumental", "waveform", "lyrics")}
+    status["ready"] = all(status.values())
+    entry["status"] = status
+    if song.get("duration"):
+        entry["duration"] = song["duration"]
+    metadata = dict(entry.get("metadata") or {})
+    metadata["lastProcessed"] = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+    tier = separation_tier(song_dir)
+    if tier:
+        metadata["separationTier"] = tier
+    entry["metadata"] = metadata
+    save_database(database_path, database)
+
+
+def song_duration(song):
+    try:
+        return probe(song["original"])["duration"]
+    except (OSError, RuntimeError):
+        return song.get("duration") or 0.0
+
+
+def print_summary(runner, plans, elapsed):
+    """
+    Vazão total e tempo gasto em cada etapa.
+
+    Returns:
+        dict: o mesmo resumo, para --json
+    """
+    audio_seconds = sum(song.get("duration") or 0.0 for song in runner.processed)
+    songs_per_hour = len(runner.processed) / elapsed * 3600 if elapsed > 0 else 0.0
+    summary = {
+        "songs": len(plans),
+        "processed": len(runner.processed),
+        "failed": [song["id"] for song in runner.failed],
+        "skipped": len(runner.skipped),
+        "elapsed": round(elapsed, 3),
+        "audioSeconds": round(audio_seconds, 3),
+        "realtimeFactor": round(audio_seconds / elapsed, 3) if elapsed > 0 else None,
+        "songsPerHour": round(songs_per_hour, 2),
+        "stages": {stage: {**stats, "seconds": round(stats["seconds"], 3)}
+                   for stage, stats in runner.stats.items() if stats["runs"]},
+    }
+    print(f"\n📊 {len(runner.processed)} música(s) processada(s), {len(runner.failed)} com erro, "
+          f"{len(runner.skipped)} já em dia, em {format_duration(elapsed)}", file=sys.stderr)
+    if elapsed > 0 and runner.processed:
+        print(f"   Vazão: {songs_per_hour:.1f} músicas/hora, {audio_seconds / 60:.1f} min de áudio "
+              f"({audio_seconds / elapsed:.1f}x tempo real)", file=sys.stderr)
+    for stage, stats in summary["stages"].items():
+        busy = stats["seconds"] / (elapsed * runner.limits[stage]) if elapsed > 0 else 0.0
+        print(f"   {stage:9s} {stats['runs']:4d} execução(ões), {stats['failed']} erro(s), "
+              f"{stats['seconds']:.1f}s no total, média {stats['seconds'] / stats['runs']:.1f}s, "
+              f"ocupação {busy:.0%} de {runner.limits[stage]} vaga(s)", file=sys.stderr)
+    return summary
+
+
+def parse_limits(values):
+    limits = {}
+    for value in values or []:
+        stage, _, count = value.partition('=')
+        if stage not in STAGES or not count.isdigit() or int(count) < 1:
+            raise ValueError(f"Limite inválido: {value} (use etapa=N, etapas: {', '.join(STAGES)})")
+        limits[stage] = int(count)
+    return limits
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Processa a biblioteca inteira em paralelo, com retomada")
+    parser.add_argument("--music-dir", default=str(DEFAULT_MUSIC_DIR), help="Pasta das músicas (padrão: music/)")
+    parser.add_argument("--folder", default=None, help="Pasta com arquivos de áudio novos a importar e processar")
+    parser.add_argument("--songs", nargs="+", default=None, help="Só estes IDs do database.json")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(DEFAULT_STAGES),
+                        help=f"Etapas (padrão: {' '.join(DEFAULT_STAGES)})")
+    parser.add_argument("--force", nargs="+", choices=STAGES, default=[],
+                        help="Refaz estas etapas mesmo que estejam em dia")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="Núcleos disponíveis para as etapas (padrão: todos)")
+    parser.add_argument("--separation-cores", type=int, default=DEFAULT_SEPARATION_CORES,
+                        help=f"Núcleos (threads) por separação (padrão: {DEFAULT_SEPARATION_CORES})")
+    parser.add_argument("--limit", nargs="+", default=None, metavar="ETAPA=N",
+                        help="Máximo de processos simultâneos por etapa, ex.: separate=1 pitch=8")
+    parser.add_argument("--lookahead", type=int, default=None,
+                        help="Músicas decodificadas à frente da separação (padrão: 2 por separação simultânea)")
+    parser.add_argument("--tier", choices=SEPARATION_TIERS, default=None,
+                        help="Nível da separação; stems de um nível inferior são refeitos")
+    parser.add_argument("--runtime", choices=["torch", "int8", "onnx"], default=None,
+                        help="Runtime de inferência da separação (padrão: o do separate.py)")
+    parser.add_argument("--dry-run", action="store_true", help="Só mostra as etapas pendentes")
+    parser.add_argument("--json", action="store_true", help="Imprime o resumo em JSON no stdout")
+    args = parser.parse_args()
+
+    try:
+        limits = parse_limits(args.limit)
+    except ValueError as e:
+        parser.error(str(e))
+    if 'lyrics' in args.stages and not os.environ.get("OPENAI_API_KEY"):
+        print("❌ A etapa lyrics precisa de OPENAI_API_KEY (e OPENAI_BASE_URL para o servidor local)",
+              file=sys.stderr)
+        sys.exit(1)
+
+    music_dir = Path(args.music_dir).resolve()
+    database_path = music_dir / DATABASE_FILENAME
+    state_dir = music_dir / STATE_DIRNAME
+    journal = Journal(state_dir / JOURNAL_FILENAME)
+
+    try:
+        database = load_database(database_path)
+        if args.folder:
+            if not Path(args.folder).is_dir():
+                print(f"❌ Pasta não encontrada: {args.folder}", file=sys.stderr)
+                sys.exit(1)
+            if args.dry_run:
+                print("❌ --dry-run não importa arquivos; rode sem --folder para ver o plano", file=sys.stderr)
+                sys.exit(1)
+            songs = songs_from_folder(args.folder, music_dir, database, journal)
+            save_database(database_path, database)
+        else:
+            songs = songs_from_database(music_dir, database, set(args.songs) if args.songs else None)
+
+        runner = IngestRunner(journal, args.stages, args.jobs, args.separation_cores, limits, args.lookahead,
+                              args.tier, args.runtime, state_dir / 'logs', database_path)
+        plans = []
+        for song in songs:
+            plan = plan_song(song, args.stages, journal, args.force, args.tier)
+            if plan:
+                plans.append((song, plan))
+            else:
+                runner.skipped.append(song)
+
+        print(f"📚 {len(songs)} música(s): {len(plans)} com etapas pendentes, {len(runner.skipped)} em dia. "
+              f"{args.jobs} núcleo(s), separação com {runner.separation_cores} cada "
+              f"(até {runner.limits['separate']} simultânea(s))", file=sys.stderr)
+        if args.dry_run:
+            for song, plan in plans:
+                print(f"   {song['id']} ({song['name']}): {' → '.join(plan)}", file=sys.stderr)
+            return
+
+        for song, _ in plans:
+            song["duration"] = song_duration(song)
+
+        started = time.perf_counter()
+        try:
+            asyncio.run(runner.run(plans))
+        except KeyboardInterrupt:
+            print("\n⏸️  Interrompido: rode de novo para continuar de onde parou", file=sys.stderr)
+            sys.exit(130)
+        summary = print_summary(runner, plans, time.perf_counter() - started)
+    finally:
+        journal.close()
+
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False))
+    if runner.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import OpenAI from 'openai';
 import * as fs from 'fs';
 import * as path from 'path';
+import { loadTimeMap, remapSegments } from './timeMap.js';
 
 /**
  * Classe responsável por gerar arquivos LRC a partir de arquivos de áudio
@@ -240,6 +241,22 @@ export class LRCGenerator {
     }
   }
 
+  /**
+   * Grava o LRC em arquivo temporário e renomeia para o nome final, para que
+   * um arquivo com o nome final esteja sempre inteiro (o backend e o manifesto
+   * de etapas tratam lyrics.lrc existente como pronto)
+   */
+  private writeLRCFile(filePath: string, lrcContent: string): void {
+    const tempPath = path.join(path.dirname(filePath), `.${path.basename(filePath)}.${process.pid}.tmp`);
+    try {
+      fs.writeFileSync(tempPath, lrcContent, 'utf-8');
+      fs.renameSync(tempPath, filePath);
+    } catch (error) {
+      fs.rmSync(tempPath, { force: true });
+      throw error;
+    }
+  }
+
   /**
    * Obtém o MIME type do arquivo de áudio
    */
@@ -266,16 +283,26 @@ export class LRCGenerator {
     options?: {
       language?: string;
       prompt?: string;
+      timeMap?: string;
     }
   ): Promise<string> {
     console.log(`🎵 Iniciando geração de LRC para: ${audioFilePath}`);
 
+    const { timeMap: timeMapPath, ...transcribeOptions } = options || {};
+
     // Transcreve o áudio
-    const segments = await this.transcribeAudio(audioFilePath, {
-      ...options,
+    let segments = await this.transcribeAudio(audioFilePath, {
+      ...transcribeOptions,
       responseFormat: 'verbose_json',
     });
 
+    // Áudio recortado (sem silêncios): voltar para o tempo da música
+    if (timeMapPath) {
+      const timeMap = loadTimeMap(timeMapPath);
+      segments = remapSegments(timeMap, segments);
+      console.log(`🕒 Tempos convertidos para a música com o mapa: ${timeMapPath} (${timeMap.segments.length} trechos)`);
+    }
+
     // Converte para formato LRC
     const lrcContent = this.convertToLRC(segments);
 
@@ -332,10 +359,9 @@ export class LRCGenerator {
       finalOutputPath = path.join(musicDir, 'lyrics.lrc');
     }
 
-    // Se o arquivo já existe, remove-o para garantir substituição
+    // Se o arquivo já existe, é substituído no rename (ver writeLRCFile)
     if (fs.existsSync(finalOutputPath)) {
       console.log(`📝 Substituindo arquivo LRC existente: ${finalOutputPath}`);
-      fs.unlinkSync(finalOutputPath);
     }
 
     // Se for um diretório de música, também remove arquivos LRC antigos com nomes diferentes
@@ -359,7 +385,7 @@ export class LRCGenerator {
     }
 
     // Salva o arquivo LRC
-    fs.writeFileSync(finalOutputPath, lrcContent, 'utf-8');
+    this.writeLRCFile(finalOutputPath, lrcContent);
 
     console.log(`✅ Arquivo LRC gerado com sucesso: ${finalOutputPath}`);
     console.log(`📊 Total de segmentos: ${segments.length}`);
@@ -375,7 +401,7 @@ export class LRCGenerator {
     outputPath: string
   ): string {
     const lrcContent = this.convertToLRC(segments);
-    fs.writeFileSync(outputPath, lrcContent, 'utf-8');
+    this.writeLRCFile(outputPath, lrcContent);
     console.log(`✅ Arquivo LRC gerado: ${outputPath}`);
     return outputPath;
   }
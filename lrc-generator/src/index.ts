@@ -33,6 +33,7 @@ Opções:
   --output <caminho>      Caminho personalizado para o arquivo LRC ou pasta de saída
   --output-dir <pasta>    Pasta onde salvar o arquivo LRC (cria automaticamente se não existir)
   --prompt <texto>        Prompt contextual para melhorar a transcrição
+  --time-map <json>       Mapa de tempo do áudio recortado (audio-io/prepare_transcription.py)
 
 Variáveis de Ambiente:
   OPENAI_API_KEY          Chave da API da OpenAI (obrigatória)
@@ -70,7 +71,7 @@ Ou defina a variável de ambiente diretamente.
   }
 
   // Parse das opções
-  const options: { language?: string; prompt?: string; output?: string; outputDir?: string } = {};
+  const options: { language?: string; prompt?: string; output?: string; outputDir?: string; timeMap?: string } = {};
   
   // Debug: mostrar todos os argumentos recebidos
   console.log('📝 Argumentos recebidos:', JSON.stringify(args));
@@ -97,6 +98,14 @@ Ou defina a variável de ambiente diretamente.
       options.prompt = promptValue;
       console.log(`📝 Prompt recebido: ${promptValue.substring(0, 100)}...`);
       i++;
+    } else if (currentArg === '--time-map' && nextArg) {
+      let mapValue = nextArg.trim();
+      if ((mapValue.startsWith('"') && mapValue.endsWith('"')) || 
+          (mapValue.startsWith("'") && mapValue.endsWith("'"))) {
+        mapValue = mapValue.slice(1, -1);
+      }
+      options.timeMap = mapValue;
+      i++;
     } else if (currentArg === '--output' && nextArg) {
       let outputValue = nextArg.trim();
       if ((outputValue.startsWith('"') && outputValue.endsWith('"')) || 
@@ -195,6 +204,7 @@ Ou defina a variável de ambiente diretamente.
     const outputPath = await generator.generateLRC(audioFilePath, options.output, {
       language: options.language,
       prompt: options.prompt,
+      timeMap: options.timeMap,
     });
 
     console.log(`
@@ -0,0 +1,82 @@
+import * as fs from 'fs';
+
+/**
+ * Trecho do áudio recortado: [start, end] no tempo da música, começando em
+ * `offset` no áudio enviado para transcrição.
+ */
+export interface TimeMapSegment {
+  start: number;
+  end: number;
+  offset: number;
+}
+
+/**
+ * Mapa de tempo gravado por audio-io/prepare_transcription.py
+ */
+export interface TimeMap {
+  source?: string;
+  source_duration?: number;
+  duration: number;
+  gap: number;
+  segments: TimeMapSegment[];
+}
+
+/**
+ * Lê e valida o mapa de tempo (JSON)
+ */
+export function loadTimeMap(filePath: string): TimeMap {
+  const map = JSON.parse(fs.readFileSync(filePath, 'utf-8')) as TimeMap;
+  if (!Array.isArray(map.segments) || map.segments.length === 0) {
+    throw new Error(`Mapa de tempo sem trechos: ${filePath}`);
+  }
+  return map;
+}
+
+/**
+ * Converte um tempo do áudio recortado para o tempo da música.
+ *
+ * Tempos que caem na pausa entre dois trechos vão para o início do trecho
+ * seguinte (`edge = 'start'`) ou para o fim do anterior (`edge = 'end'`).
+ */
+export function toSongTime(map: TimeMap, time: number, edge: 'start' | 'end' = 'start'): number {
+  const segments = map.segments;
+
+  // Busca binária pelo último trecho com offset <= time
+  let low = 0;
+  let high = segments.length - 1;
+  while (low < high) {
+    const mid = (low + high + 1) >> 1;
+    if (segments[mid].offset <= time) {
+      low = mid;
+    } else {
+      high = mid - 1;
+    }
+  }
+
+  const segment = segments[low];
+  if (time < segment.offset) {
+    return segment.start;
+  }
+  const length = segment.end - segment.start;
+  const inside = time - segment.offset;
+  if (inside <= length) {
+    return segment.start + inside;
+  }
+  // Na pausa depois do trecho
+  const next = segments[low + 1];
+  if (edge === 'start' && next) {
+    return next.start;
+  }
+  return segment.end;
+}
+
+/**
+ * Converte os segmentos da transcrição para o tempo da música
+ */
+export function remapSegments<T extends { start: number; end: number }>(map: TimeMap, segments: T[]): T[] {
+  return segments.map((segment) => {
+    const start = toSongTime(map, segment.start, 'start');
+    const end = Math.max(toSongTime(map, segment.end, 'end'), start);
+    return { ...segment, start, end };
+  });
+}
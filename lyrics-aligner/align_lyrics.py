@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Alinhamento forçado local da letra conhecida ao stem de vocais.
+
+Quando o texto da letra já é conhecido, não é preciso transcrever o áudio
+(e herdar as alucinações do Whisper, como "Thanks so much. Bye-bye."): basta
+descobrir quando cada linha começa.
+
+1. Características do vocals.wav (mono, 16 kHz, passo de 10 ms): nível em dB
+   suavizado e máscara de voz (limiar do VAD de audio-io/vad.py, ou os trechos
+   do vocal_activity.json gerado junto com a waveform).
+2. Núcleos de sílaba: máximos locais do nível dentro dos trechos com voz, com
+   proeminência mínima e espaçamento mínimo. Cada evento guarda o seu ataque
+   (vale anterior) e a pausa sem voz desde o evento anterior.
+3. A letra vira uma sequência de sílabas (grupos de vogais de cada palavra),
+   marcando a primeira sílaba de cada linha.
+4. DTW sílabas x eventos: uma sílaba pode se estender por vários eventos
+   (melisma), várias sílabas podem cair no mesmo evento (legato) e início de
+   linha é atraído por pausas longas, enquanto sílabas no meio da linha são
+   penalizadas por elas. A recorrência horizontal vira um mínimo acumulado,
+   então cada linha da matriz é calculada de uma vez com NumPy.
+5. O tempo de cada linha é o ataque do evento da sua primeira sílaba; a saída
+   é um LRC padrão [mm:ss.xx].
+
+O lyrics.lrc gravado na pasta da música fica registrado no manifesto
+(audio-io/manifest.py) como letra escrita pela pessoa: o processamento não
+o substitui por uma transcrição.
+
+Uso:
+  python align_lyrics.py ../music/<id>/vocals.wav --lyrics letra.txt
+  python align_lyrics.py vocals.wav --lyrics letra.txt -o lyrics.lrc --activity vocal_activity.json --json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from contextlib import nullcontext
+import io
+
+import numpy as np
+
+# A leitura de áudio e o VAD compartilhados ficam em audio-io/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'audio-io'))
+
+from audio_io import load_audio
+from vad import to_db, voice_threshold
+from manifest import STEPS, StepRecord
+
+# Análise
+FEATURE_SAMPLE_RATE = 16000
+HOP = 0.01
+
+# Suavização do nível antes de procurar os núcleos (segundos)
+SMOOTHING = 0.05
+
+# Núcleos de sílaba: espaçamento mínimo (s) e proeminência mínima (dB) em ±PROMINENCE_WINDOW
+PEAK_SPACING = 0.12
+PEAK_PROMINENCE_DB = 3.0
+PROMINENCE_WINDOW = 0.15
+
+# Maior distância entre o ataque e o pico de um evento (s)
+MAX_ATTACK = 0.3
+
+# Pausa (s) a partir da qual a quebra de linha é considerada certa
+PAUSE_SATURATION = 0.8
+
+# Custos do DTW
+SKIP_COST = 0.4          # evento extra dentro de uma sílaba (melisma, vibrato)
+MERGE_COST = 0.6         # sílaba sem evento próprio (legato)
+BOUNDARY_WEIGHT = 3.0    # início de linha sem pausa antes
+PAUSE_WEIGHT = 1.5       # pausa no meio de uma linha
+LINE_MERGE_COST = 3.0    # duas linhas começando no mesmo evento
+
+LRC_TAG = re.compile(r'\[[^\]]*\]')
+VOWELS = re.compile(r'[aeiouyáéíóúàâêôãõäëïöüαεηιουω]+', re.IGNORECASE)
+WORD = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*")
+
+
+def read_lyrics(path):
+    """
+    Linhas da letra a partir de um .txt ou de um .lrc (tempos e tags removidos).
+
+    Returns:
+        list[str]: linhas não vazias
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_lyrics(f.read())
+
+
+def parse_lyrics(text):
+    lines = []
+    for raw in text.splitlines():
+        line = LRC_TAG.sub('', raw).strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def count_syllables(text):
+    """
+    Sílabas aproximadas de uma linha: grupos de vogais de cada palavra (pelo
+    menos uma por palavra).
+    """
+    return sum(max(len(VOWELS.findall(word)), 1) for word in WORD.findall(text)) or 1
+
+
+def _moving_average(values, width):
+    if width <= 1:
+        return values
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    index = np.arange(len(values))
+    lo = np.clip(index - width // 2, 0, len(values))
+    hi = np.clip(index + width // 2 + 1, 0, len(values))
+    return (cumulative[hi] - cumulative[lo]) / (hi - lo)
+
+
+def _window_extreme(values, radius, reducer, fill):
+    padded = np.concatenate((np.full(radius, fill), values, np.full(radius, fill)))
+    return reducer(np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1), axis=1)
+
+
+def level_features(audio, sample_rate, hop=HOP):
+    """
+    Nível (dBFS) por quadro, bruto e suavizado.
+    """
+    hop_samples = max(int(round(hop * sample_rate)), 1)
+    count = len(audio) // hop_samples
+    frames = np.asarray(audio[:count * hop_samples], dtype=np.float32).reshape(count, hop_samples)
+    db = to_db(np.sqrt(np.einsum('ij,ij->i', frames, frames, dtype=np.float64) / hop_samples))
+    return db, _moving_average(db, max(int(round(SMOOTHING / hop)), 1))
+
+
+def voiced_mask(db, hop=HOP, activity=None):
+    """
+    Quadros com voz: limiar do VAD (ou o do vocal_activity.json) e, se houver,
+    só dentro dos trechos do índice de atividade vocal.
+    """
+    threshold_db = activity["threshold_db"] if activity else voice_threshold(db)
+    mask = db >= threshold_db
+    if activity:
+        inside = np.zeros(len(db), dtype=bool)
+        for start, end in activity["segments"]:
+            inside[int(start / hop):int(np.ceil(end / hop))] = True
+        mask &= inside
+    return mask
+
+
+def syllable_events(db, smooth, voiced, hop=HOP):
+    """
+    Núcleos de sílaba detectados no nível suavizado.
+
+    Returns:
+        tuple: (quadro do pico, quadro do ataque, pausa sem voz antes em segundos), um por evento
+    """
+    spacing = max(int(round(PEAK_SPACING / hop)), 1)
+    local_max = _window_extreme(smooth, spacing // 2, np.max, -np.inf)
+    prominence = smooth - _window_extreme(smooth, max(int(round(PROMINENCE_WINDOW / hop)), 1), np.min, np.inf)
+    peaks = np.flatnonzero((smooth >= local_max) & voiced & (prominence >= PEAK_PROMINENCE_DB))
+
+    # Platôs geram picos repetidos: manter um por grupo de picos próximos
+    if len(peaks) > 1:
+        peaks = peaks[np.concatenate(([True], np.diff(peaks) >= spacing))]
+
+    # Pausa sem voz entre eventos consecutivos (soma acumulada dos quadros sem voz)
+    unvoiced = np.concatenate(([0], np.cumsum(~voiced)))
+    gaps = np.empty(len(peaks))
+    if len(peaks):
+        gaps[0] = np.inf
+        gaps[1:] = (unvoiced[peaks[1:]] - unvoiced[peaks[:-1]]) * hop
+
+    # Ataque: vale do nível antes do pico (limitado a MAX_ATTACK e ao pico anterior),
+    # avançado até o primeiro quadro com voz
+    attack = max(int(round(MAX_ATTACK / hop)), 1)
+    onsets = np.empty(len(peaks), dtype=int)
+    previous = 0
+    for index, peak in enumerate(peaks):
+        lo = max(previous, peak - attack)
+        valley = lo + int(np.argmin(smooth[lo:peak + 1]))
+        after = np.flatnonzero(voiced[valley:peak + 1])
+        onsets[index] = valley + (int(after[0]) if len(after) else 0)
+        previous = peak
+    return peaks, onsets, gaps
+
+
+def align_syllables(line_syllables, gaps):
+    """
+    DTW entre as sílabas da letra e os eventos do áudio.
+
+    Args:
+        line_syllables: número de sílabas de cada linha
+        gaps: pausa antes de cada evento (s)
+
+    Returns:
+        np.ndarray: índice do evento onde começa cada linha
+    """
+    first = np.concatenate([[True] + [False] * (count - 1) for count in line_syllables])
+    num_syllables, num_events = len(first), len(gaps)
+    pause = np.clip(np.nan_to_num(gaps, posinf=PAUSE_SATURATION) / PAUSE_SATURATION, 0.0, 1.0)
+
+    # Custo de começar a sílaba em cada evento: linha nova quer pausa, meio de linha não
+    line_start = BOUNDARY_WEIGHT * (1.0 - pause)
+    mid_line = PAUSE_WEIGHT * pause
+
+    # Continuar uma sílaba no evento seguinte: custo fixo + pausa atravessada
+    step = SKIP_COST + PAUSE_WEIGHT * pause
+    step[0] = 0.0
+    steps = np.cumsum(step)
+    positions = np.arange(num_events)
+
+    # Eventos antes da primeira sílaba e depois da última custam como qualquer evento pulado
+    cost = line_start + SKIP_COST * positions
+    origin = np.zeros((num_syllables, num_events), dtype=np.int32)
+    diagonal = np.zeros((num_syllables, num_events), dtype=bool)
+    for row in range(num_syllables):
+        if row:
+            diag = np.full(num_events, np.inf)
+            diag[1:] = cost[:-1]
+            vert = cost + MERGE_COST + (LINE_MERGE_COST if first[row] else 0.0)
+            diagonal[row] = diag <= vert
+            entry = np.minimum(diag, vert) + (line_start if first[row] else mid_line)
+        else:
+            entry = cost
+            diagonal[row] = True
+
+        # D[i] = min(entry[i], D[i-1] + step[i]) = steps[i] + min_{k<=i}(entry[k] - steps[k])
+        shifted = entry - steps
+        running = np.minimum.accumulate(shifted)
+        origin[row] = np.maximum.accumulate(np.where(shifted <= running, positions, 0))
+        cost = steps + running
+
+    # Caminho de volta a partir do melhor fim
+    starts = np.zeros(num_syllables, dtype=int)
+    event = int(np.argmin(cost + SKIP_COST * (num_events - 1 - positions)))
+    for row in range(num_syllables - 1, -1, -1):
+        begin = int(origin[row, event])
+        starts[row] = begin
+        event = begin - 1 if diagonal[row, begin] else begin
+    return starts[np.flatnonzero(first)]
+
+
+def format_lrc_time(seconds):
+    """
+    Tempo em segundos para a tag [mm:ss.xx].
+    """
+    centiseconds = int(round(max(seconds, 0.0) * 100))
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    return f"[{minutes:02d}:{centiseconds // 100:02d}.{centiseconds % 100:02d}]"
+
+
+def lrc_text(timed_lines):
+    return '\n'.join(f"{format_lrc_time(start)}{text}" for start, text in timed_lines) + '\n'
+
+
+def write_lrc(path, timed_lines):
+    """
+    Grava o LRC (arquivo temporário + rename: nunca fica um LRC pela metade).
+    """
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(lrc_text(timed_lines))
+    os.replace(temp_path, path)
+
+
+def align_audio(audio, sample_rate, lines, activity=None):
+    """
+    Tempo de início de cada linha em um sinal mono já carregado.
+
+    Returns:
+        tuple: ([(segundos, texto)], número de eventos detectados)
+    """
+    if not lines:
+        return [], 0
+    db, smooth = level_features(audio, sample_rate)
+    voiced = voiced_mask(db, HOP, activity)
+    peaks, onsets, gaps = syllable_events(db, smooth, voiced)
+    if len(peaks) == 0:
+        raise ValueError("Nenhuma voz detectada no áudio")
+
+    starts = align_syllables([count_syllables(line) for line in lines], gaps)
+    times = onsets[starts] * HOP
+    # Linhas que caíram no mesmo evento ficam em ordem, 10 ms uma depois da outra
+    for index in range(1, len(times)):
+        if times[index] - times[index - 1] < 0.01:
+            times[index] = times[index - 1] + 0.01
+    return [(round(float(start), 2), text) for start, text in zip(times, lines)], len(peaks)
+
+
+def activity_path_for(audio_file):
+    return os.path.join(os.path.dirname(os.path.abspath(audio_file)), 'vocal_activity.json')
+
+
+def load_activity(path):
+    """
+    Índice de atividade vocal (waveform-generator/vocal_activity.py), se existir.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def align_lyrics(audio_file, lines, activity_path=None):
+    """
+    Lê o stem de vocais e alinha as linhas da letra.
+
+    Returns:
+        dict: linhas com tempo e resumo (eventos, tempos de leitura e análise)
+    """
+    started = time.perf_counter()
+    audio, sample_rate = load_audio(audio_file, sample_rate=FEATURE_SAMPLE_RATE, channels=1)
+    decoded = time.perf_counter()
+    activity = load_activity(activity_path or activity_path_for(audio_file))
+    timed_lines, events = align_audio(audio[0], sample_rate, lines, activity)
+    return {
+        "lines": [{"time": start, "text": text} for start, text in timed_lines],
+        "events": events,
+        "syllables": sum(count_syllables(line) for line in lines),
+        "activity": activity is not None,
+        "timing": {
+            "decode": round(decoded - started, 3),
+            "alignment": round(time.perf_counter() - decoded, 3),
+        },
+    }
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Alinha a letra conhecida ao stem de vocais e gera o LRC")
+    parser.add_argument("input_file", help="Stem de vocais (vocals.wav)")
+    parser.add_argument("--lyrics", required=True, help="Letra em texto (uma linha por verso) ou LRC a realinhar")
+    parser.add_argument("--output", "-o", default=None, help="LRC de saída (padrão: lyrics.lrc na pasta do áudio)")
+    parser.add_argument("--activity", default=None,
+                        help="vocal_activity.json (padrão: o da pasta do áudio, se existir)")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON no stdout")
+    args = parser.parse_args()
+
+    for path in (args.input_file, args.lyrics):
+        if not os.path.exists(path):
+            print(f"❌ Arquivo não encontrado: {path}", file=sys.stderr)
+            sys.exit(1)
+
+    lines = read_lyrics(args.lyrics)
+    if not lines:
+        print(f"❌ Letra vazia: {args.lyrics}", file=sys.stderr)
+        sys.exit(1)
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(args.input_file)), 'lyrics.lrc')
+    print(f"🎼 Alinhando {len(lines)} linha(s) a {args.input_file}", file=sys.stderr)
+    # Só o lyrics.lrc da pasta da música entra no manifesto
+    is_song_lyrics = os.path.basename(output) in STEPS["lyrics"]["outputs"]
+    record = StepRecord('lyrics', [args.input_file], [output], params={"lyrics": os.path.basename(args.lyrics)},
+                        authored=True) if is_song_lyrics else nullcontext()
+    try:
+        with record:
+            result = align_lyrics(args.input_file, lines, args.activity)
+            write_lrc(output, [(line["time"], line["text"]) for line in result["lines"]])
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"❌ Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    result["output"] = output
+    print(f"✅ LRC salvo em: {output} ({result['syllables']} sílabas em {result['events']} eventos; "
+          f"alinhamento {result['timing']['alignment']:.2f}s, leitura {result['timing']['decode']:.2f}s)",
+          file=sys.stderr)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor local que imita o endpoint de transcrição da OpenAI
+(POST /v1/audio/transcriptions), para rodar o lrc-generator e os testes sem
+rede e sem chave de API.
+
+Em vez de transcrever, o servidor alinha a letra conhecida ao áudio enviado
+(align_lyrics.py) e devolve um segmento por linha. A letra vem do campo
+`prompt` do pedido (uma linha por verso) ou de --lyrics. Sem letra, devolve um
+segmento por trecho com voz (audio-io/vad.py) com o texto de --text.
+
+Formatos de resposta: json, text e verbose_json (com segments).
+
+Para testar clientes que enviam vários pedidos ao mesmo tempo, a latência pode
+crescer com a duração do áudio (--rtf) e uma fração dos pedidos pode falhar de
+propósito (--fail-rate) com 429 (com Retry-After), 500 ou 503.
+
+Uso:
+  python transcription_stub.py --port 8765 --lyrics letra.txt
+  python transcription_stub.py --rtf 0.1 --fail-rate 0.3
+  OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=local npm run dev -- ../music/<id>/vocals.wav
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import threading
+import argparse
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+
+from align_lyrics import FEATURE_SAMPLE_RATE, align_audio, parse_lyrics, read_lyrics
+from audio_io import load_audio
+from vad import detect_voice
+
+DEFAULT_PORT = 8765
+ENDPOINT = '/v1/audio/transcriptions'
+
+# Texto dos segmentos quando a letra não é conhecida
+DEFAULT_TEXT = '♪'
+
+# Falhas simuladas com --fail-rate e espera pedida nos 429 (segundos)
+FAIL_STATUSES = (429, 500, 503)
+RETRY_AFTER = 0.5
+
+
+def parse_multipart(content_type, body):
+    """
+    Campos de um corpo multipart/form-data.
+
+    Returns:
+        dict: nome -> (bytes, nome do arquivo ou None)
+    """
+    message = BytesParser(policy=HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body)
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        if name:
+            fields[name] = (part.get_payload(decode=True) or b'', part.get_filename())
+    return fields
+
+
+def build_segments(audio, sample_rate, lines, text=DEFAULT_TEXT):
+    """
+    Segmentos no formato verbose_json: um por linha da letra (alinhada) ou, sem
+    letra, um por trecho com voz.
+    """
+    duration = len(audio) / sample_rate
+    if lines:
+        timed, _ = align_audio(audio, sample_rate, lines)
+        spans = [(start, timed[index + 1][0] if index + 1 < len(timed) else duration, line)
+                 for index, (start, line) in enumerate(timed)]
+    else:
+        spans = [(start, end, text) for start, end in detect_voice(audio, sample_rate)]
+
+    return [{
+        "id": index,
+        "seek": 0,
+        "start": round(start, 2),
+        "end": round(max(end, start), 2),
+        "text": f" {line}",
+        "tokens": [],
+        "temperature": 0.0,
+        "avg_logprob": 0.0,
+        "compression_ratio": 1.0,
+        "no_speech_prob": 0.0,
+    } for index, (start, end, line) in enumerate(spans)]
+
+
+class TranscriptionStub(BaseHTTPRequestHandler):
+    """
+    Um pedido por thread (ThreadingHTTPServer), como uma API de verdade
+    atendendo uploads em paralelo.
+    """
+
+    server_version = 'TranscriptionStub/1.0'
+    lines = []
+    text = DEFAULT_TEXT
+    delay = 0.0
+    rtf = 0.0
+    fail_rate = 0.0
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+
+    def _reply(self, status, body, content_type='application/json', headers=None):
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, message, error_type='invalid_request_error', headers=None):
+        self._reply(status, json.dumps({"error": {"message": message, "type": error_type}},
+                                       ensure_ascii=False), headers=headers)
+
+    def _injected_failure(self):
+        with self.rng_lock:
+            if self.rng.random() >= self.fail_rate:
+                return None
+            return self.rng.choice(FAIL_STATUSES)
+
+    def do_POST(self):
+        if self.path.split('?')[0].rstrip('/') != ENDPOINT:
+            return self._error(404, f"Endpoint não encontrado: {self.path}")
+
+        length = int(self.headers.get('Content-Length') or 0)
+        fields = parse_multipart(self.headers.get('Content-Type', ''), self.rfile.read(length))
+        if 'file' not in fields:
+            return self._error(400, "Campo 'file' ausente")
+
+        data, filename = fields['file']
+        response_format = fields.get('response_format', (b'json', None))[0].decode('utf-8') or 'json'
+        if response_format not in ('json', 'text', 'verbose_json'):
+            return self._error(400, f"response_format não suportado: {response_format}")
+        prompt = fields.get('prompt', (b'', None))[0].decode('utf-8')
+        lines = parse_lyrics(prompt) if '\n' in prompt.strip() else self.lines
+
+        status = self._injected_failure()
+        if status == 429:
+            return self._error(429, "Falha simulada: limite de requisições", 'rate_limit_error',
+                               {'Retry-After': str(RETRY_AFTER), 'retry-after-ms': str(int(RETRY_AFTER * 1000))})
+        if status:
+            return self._error(status, f"Falha simulada: HTTP {status}", 'server_error')
+
+        started = time.perf_counter()
+        suffix = os.path.splitext(filename or '')[1] or '.bin'
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, f'upload{suffix}')
+            with open(path, 'wb') as f:
+                f.write(data)
+            try:
+                audio, sample_rate = load_audio(path, sample_rate=FEATURE_SAMPLE_RATE, channels=1)
+                segments = build_segments(audio[0], sample_rate, lines, self.text)
+            except (OSError, RuntimeError, ValueError) as e:
+                return self._error(400, f"Áudio inválido: {e}")
+
+        # Latência simulada da API, fixa + proporcional ao áudio (o processamento local já conta)
+        remaining = self.delay + self.rtf * audio.shape[1] / sample_rate - (time.perf_counter() - started)
+        if remaining > 0:
+            time.sleep(remaining)
+
+        text = ''.join(segment["text"] for segment in segments).strip()
+        if response_format == 'text':
+            return self._reply(200, text + '\n', 'text/plain')
+        if response_format == 'json':
+            return self._reply(200, json.dumps({"text": text}, ensure_ascii=False))
+        return self._reply(200, json.dumps({
+            "task": "transcribe",
+            "language": fields.get('language', (b'', None))[0].decode('utf-8') or 'unknown',
+            "duration": round(audio.shape[1] / sample_rate, 2),
+            "text": text,
+            "segments": segments,
+        }, ensure_ascii=False))
+
+    def log_message(self, format, *args):
+        print(f"📨 {self.address_string()} {format % args}", file=sys.stderr)
+
+
+def make_server(host='127.0.0.1', port=DEFAULT_PORT, lines=None, text=DEFAULT_TEXT, delay=0.0, rtf=0.0,
+                fail_rate=0.0, seed=0):
+    """
+    Cria o servidor (port=0 escolhe uma porta livre: server.server_address[1]).
+    """
+    handler = type('ConfiguredTranscriptionStub', (TranscriptionStub,),
+                   {"lines": list(lines or []), "text": text, "delay": delay, "rtf": rtf,
+                    "fail_rate": fail_rate, "rng": random.Random(seed), "rng_lock": threading.Lock()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Servidor local que imita a API de transcrição")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta (padrão: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Porta (padrão: {DEFAULT_PORT})")
+    parser.add_argument("--lyrics", default=None, help="Letra conhecida (texto ou LRC) usada nas respostas")
+    parser.add_argument("--text", default=DEFAULT_TEXT, help="Texto dos segmentos quando não há letra")
+    parser.add_argument("--delay", type=float, default=0.0, help="Latência simulada por pedido (s)")
+    parser.add_argument("--rtf", type=float, default=0.0,
+                        help="Latência simulada por segundo de áudio enviado (ex.: 0.1 = 6s por minuto)")
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="Fração dos pedidos que falha com 429/500/503 (padrão: 0)")
+    parser.add_argument("--seed", type=int, default=0, help="Semente das falhas simuladas")
+    args = parser.parse_args()
+
+    lines = read_lyrics(args.lyrics) if args.lyrics else []
+    server = make_server(args.host, args.port, lines, args.text, args.delay, args.rtf, args.fail_rate, args.seed)
+    print(f"🎙️ Transcrição local em http://{args.host}:{server.server_address[1]}{ENDPOINT} "
+          f"({len(lines)} linha(s) de letra)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 Servidor encerrado", file=sys.stderr)
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
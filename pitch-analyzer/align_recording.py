@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Estima a latência de uma gravação em relação à música (original.mp3 ou
+instrumental.wav) e grava o resultado nos metadados da gravação.
+
+Navegadores e celulares devolvem a gravação com um atraso desconhecido em
+relação ao playback, o que estraga qualquer comparação por tempo. O atraso é
+estimado por correlação cruzada dos envelopes de ataque (onsets):
+
+1. Os dois áudios são lidos mono a 8 kHz (audio-io/audio_io.py).
+2. Envelope de ataque: energia em quadros curtos após pré-ênfase, em escala
+   log, derivada com retificação de meia onda e sem a média local. Tudo por
+   reshape/cumsum, sem laço por amostra.
+3. Busca grossa: correlação cruzada normalizada por FFT dos envelopes a
+   200 Hz (passo de 5 ms), em ±max_lag segundos em torno do startTime.
+4. Refinamento: mesma correlação com envelopes a 1 kHz (passo de 1 ms) em
+   ±10 ms em torno do pico grosso, seguida de interpolação parabólica do pico
+   (resolução abaixo do passo do envelope).
+
+O offset segue a convenção de pitch_score.py: o instante t da gravação
+corresponde ao tempo startTime + offset + t da música.
+
+Uso:
+  python align_recording.py recordings/abc/recording-1.webm --reference music/abc/original.mp3 --start 12.5
+  python align_recording.py recording-1.webm --reference original.mp3 --metadata recording-1.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import io
+
+import numpy as np
+
+# A leitura de áudio compartilhada fica em audio-io/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'audio-io'))
+
+from audio_io import load_audio
+
+# Taxa da análise: os ataques não precisam de mais que 4 kHz de banda
+ALIGN_SAMPLE_RATE = 8000
+
+# Passo dos envelopes (segundos): busca grossa e refinamento
+COARSE_HOP = 0.005
+FINE_HOP = 0.001
+
+# Faixa de busca padrão em torno do startTime (segundos)
+DEFAULT_MAX_LAG = 2.0
+
+# Meia largura do refinamento, em passos da busca grossa
+REFINE_STEPS = 2
+
+# Até quantos atrasos a correlação é calculada direto, sem FFT
+DIRECT_LAGS = 64
+
+# Janela da média local removida do envelope (segundos)
+ENVELOPE_SMOOTHING = 0.1
+
+# Coeficiente da pré-ênfase (realça os ataques em relação aos graves sustentados)
+PRE_EMPHASIS = 0.97
+
+# Pico da correlação, em desvios padrão acima da mediana, para o offset ser confiável
+MIN_PEAK_Z = 6.0
+
+
+def onset_envelope(audio, sample_rate, hop):
+    """
+    Envelope de ataque com um valor por `hop` segundos.
+
+    Returns:
+        np.ndarray: float64 [quadros], média local removida
+    """
+    hop_samples = max(int(round(hop * sample_rate)), 1)
+    count = len(audio) // hop_samples
+    if count < 2:
+        return np.zeros(max(count, 0))
+
+    emphasized = np.empty(count * hop_samples, dtype=np.float32)
+    emphasized[0] = audio[0]
+    np.subtract(audio[1:count * hop_samples], PRE_EMPHASIS * audio[:count * hop_samples - 1], out=emphasized[1:])
+    frames = emphasized.reshape(count, hop_samples)
+    energy = np.log1p(1000.0 * np.einsum('ij,ij->i', frames, frames, dtype=np.float64) / hop_samples)
+
+    flux = np.zeros(count)
+    flux[1:] = np.maximum(np.diff(energy), 0.0)
+
+    # Remover a média móvel (soma acumulada): sobra o que é ataque, não nível
+    width = max(int(round(ENVELOPE_SMOOTHING / hop)), 1)
+    cumulative = np.concatenate(([0.0], np.cumsum(flux)))
+    lo = np.clip(np.arange(count) - width // 2, 0, count)
+    hi = np.clip(np.arange(count) + width // 2 + 1, 0, count)
+    return flux - (cumulative[hi] - cumulative[lo]) / (hi - lo)
+
+
+def _next_pow2(n):
+    return 1 << (int(n) - 1).bit_length()
+
+
+def cross_correlation(recording, reference, start, min_lag, max_lag):
+    """
+    Correlação cruzada normalizada por FFT:
+    c[k] = <rec, ref[start + k : start + k + len(rec)]> / (|rec| |janela da ref|)
+    para k em [min_lag, max_lag]. Trechos fora da referência contam como zero.
+
+    Returns:
+        np.ndarray: float64 [max_lag - min_lag + 1]
+    """
+    length = len(recording)
+    lags = max_lag - min_lag + 1
+    first = start + min_lag
+    window = np.zeros(lags + length - 1)
+    lo, hi = max(first, 0), min(first + len(window), len(reference))
+    if hi > lo:
+        window[lo - first:hi - first] = reference[lo:hi]
+
+    if lags <= DIRECT_LAGS:
+        # Poucos atrasos (refinamento): um produto interno por atraso sai mais barato que a FFT
+        corr = np.array([np.dot(window[k:k + length], recording) for k in range(lags)])
+    else:
+        n_fft = _next_pow2(len(window) + length)
+        spectrum = np.fft.rfft(window, n_fft) * np.conj(np.fft.rfft(recording, n_fft))
+        corr = np.fft.irfft(spectrum, n_fft)[:lags]
+
+    # Energia de cada janela da referência (soma acumulada dos quadrados)
+    squares = np.concatenate(([0.0], np.cumsum(np.square(window))))
+    energy = squares[length:length + lags] - squares[:lags]
+    norm = np.sqrt(np.maximum(energy, 1e-12) * max(float(np.dot(recording, recording)), 1e-12))
+    return corr / norm
+
+
+def parabolic_peak(values, index):
+    """
+    Deslocamento (-0.5..0.5) do pico real em torno de values[index].
+    """
+    if index <= 0 or index >= len(values) - 1:
+        return 0.0
+    prev, cur, nxt = values[index - 1], values[index], values[index + 1]
+    denominator = prev - 2.0 * cur + nxt
+    if abs(denominator) < 1e-12:
+        return 0.0
+    return float(np.clip(0.5 * (prev - nxt) / denominator, -0.5, 0.5))
+
+
+def estimate_offset(recording, reference, sample_rate, start_time=0.0, max_lag=DEFAULT_MAX_LAG):
+    """
+    Offset da gravação em relação à referência a partir de start_time.
+
+    Returns:
+        dict: offset (s), peak (correlação normalizada), confidence (z do pico), reliable
+    """
+    # Só o trecho da referência que a busca pode alcançar, alinhado à grade dos envelopes
+    grid = int(round(COARSE_HOP * sample_rate))
+    margin = max_lag + ENVELOPE_SMOOTHING
+    first = max(int((start_time - margin) * sample_rate) // grid * grid, 0)
+    last = int((start_time + len(recording) / sample_rate + margin) * sample_rate)
+    reference = reference[first:last]
+    local_start = start_time - first / sample_rate
+
+    # Busca grossa
+    rec = onset_envelope(recording, sample_rate, COARSE_HOP)
+    ref = onset_envelope(reference, sample_rate, COARSE_HOP)
+    start = int(round(local_start / COARSE_HOP))
+    lag_steps = int(round(max_lag / COARSE_HOP))
+    coarse = cross_correlation(rec, ref, start, -lag_steps, lag_steps)
+    best = int(np.argmax(coarse))
+    coarse_lag = (start + best - lag_steps) * COARSE_HOP - local_start
+
+    spread = np.std(coarse)
+    confidence = float((coarse[best] - np.median(coarse)) / spread) if spread > 0 else 0.0
+
+    # Refinamento em torno do pico grosso
+    rec = onset_envelope(recording, sample_rate, FINE_HOP)
+    ref = onset_envelope(reference, sample_rate, FINE_HOP)
+    ratio = int(round(COARSE_HOP / FINE_HOP))
+    center = int(round((local_start + coarse_lag) / FINE_HOP))
+    radius = REFINE_STEPS * ratio
+    fine = cross_correlation(rec, ref, center, -radius, radius)
+    peak = int(np.argmax(fine))
+    offset = (center + peak - radius + parabolic_peak(fine, peak)) * FINE_HOP - local_start
+
+    return {
+        "offset": round(offset, 4),
+        "peak": round(float(fine[peak]), 4),
+        "confidence": round(confidence, 2),
+        "reliable": bool(confidence >= MIN_PEAK_Z),
+    }
+
+
+def align_recording(recording_file, reference_file, start_time=0.0, max_lag=DEFAULT_MAX_LAG):
+    """
+    Lê os dois arquivos e estima o offset.
+
+    Returns:
+        dict: resultado de estimate_offset + referência e tempos
+    """
+    started = time.perf_counter()
+    recording, sample_rate = load_audio(recording_file, sample_rate=ALIGN_SAMPLE_RATE, channels=1)
+    reference, _ = load_audio(reference_file, sample_rate=ALIGN_SAMPLE_RATE, channels=1)
+    decoded = time.perf_counter()
+    result = estimate_offset(recording[0], reference[0], sample_rate, start_time, max_lag)
+    result.update({
+        "reference": os.path.basename(reference_file),
+        "startTime": start_time,
+        "maxLag": max_lag,
+        "timing": {
+            "decode": round(decoded - started, 3),
+            "alignment": round(time.perf_counter() - decoded, 3),
+        },
+    })
+    return result
+
+
+def update_metadata(metadata_path, alignment):
+    """
+    Grava o alinhamento nos metadados da gravação. O campo `offset` (lido pela
+    pontuação) só muda quando o pico é confiável.
+    """
+    metadata = {}
+    if os.path.exists(metadata_path):
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    metadata["alignment"] = alignment
+    if alignment["reliable"]:
+        metadata["offset"] = alignment["offset"]
+
+    temp_path = metadata_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, metadata_path)
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Estima a latência de uma gravação em relação à música")
+    parser.add_argument("recording", help="Gravação do usuário (webm, wav, mp3...)")
+    parser.add_argument("--reference", required=True, help="Áudio da música (original.mp3 ou instrumental.wav)")
+    parser.add_argument("--start", type=float, default=None,
+                        help="Tempo da música em que a gravação começou (padrão: startTime dos metadados ou 0)")
+    parser.add_argument("--metadata", default=None, help="JSON de metadados da gravação, atualizado com o offset")
+    parser.add_argument("--max-lag", type=float, default=DEFAULT_MAX_LAG,
+                        help=f"Maior atraso procurado em segundos (padrão: {DEFAULT_MAX_LAG})")
+    args = parser.parse_args()
+
+    for path in (args.recording, args.reference):
+        if not os.path.exists(path):
+            print(f"❌ Arquivo não encontrado: {path}", file=sys.stderr)
+            sys.exit(1)
+
+    start_time = args.start
+    if start_time is None:
+        start_time = 0.0
+        if args.metadata and os.path.exists(args.metadata):
+            with open(args.metadata, 'r', encoding='utf-8') as f:
+                start_time = float(json.load(f).get("startTime") or 0.0)
+
+    try:
+        result = align_recording(args.recording, args.reference, start_time, args.max_lag)
+        if args.metadata:
+            update_metadata(args.metadata, result)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"❌ Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    status = "✅" if result["reliable"] else "⚠️"
+    print(f"{status} Offset: {result['offset'] * 1000:+.1f} ms (pico {result['peak']:.2f}, "
+          f"confiança {result['confidence']:.1f}; alinhamento {result['timing']['alignment'] * 1000:.0f} ms, "
+          f"leitura {result['timing']['decode']:.2f}s)", file=sys.stderr)
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serviço de pontuação ao vivo: recebe o PCM do microfone por WebSocket, calcula
+o pitch quadro a quadro e devolve o acerto em relação ao contorno de
+referência da música (pitch.bin, gerado na ingestão por pitch_contour.py).
+
+Cada sessão tem um buffer circular pré-alocado e todos os vetores do YIN de um
+quadro são alocados na abertura da sessão; no caminho de cada quadro só há
+operações NumPy com `out=`. Um quadro custa algumas dezenas de microssegundos,
+então um processo atende dezenas de cantores com latência muito abaixo de 20 ms.
+
+Protocolo (ws://host:3002/):
+  cliente -> {"type": "start", "songId": "abc", "startTime": 12.5,
+              "sampleRate": 16000, "format": "s16", "offset": 0}
+  servidor -> {"type": "ready", "hop": 0.02, "sampleRate": 8000, ...}
+  cliente -> quadros binários de PCM mono (s16 ou f32 little-endian)
+  servidor -> {"type": "feedback", "samples": n, "frames": [...], "accuracy": 87, ...}
+  cliente -> {"type": "stop"}
+  servidor -> {"type": "summary", "accuracy": 85, "hits": 410, "notes": 482, ...}
+
+startTime é o tempo da música no primeiro quadro de áudio enviado e offset a
+latência conhecida do microfone (s), somada ao startTime como em pitch_score.py.
+
+Uso:
+  python live_score.py --port 3002 --music-dir ../music
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import asyncio
+import argparse
+import io
+
+import numpy as np
+
+from pitch_contour import DEFAULT_FMAX, DEFAULT_FMIN, DEFAULT_THRESHOLD, WINDOW_SECONDS
+from pitch_format import MIDI_ZERO_HZ, UNVOICED, read_pitch_bin
+from pitch_score import HIT_CENTS, RECORDING_SAMPLE_RATE
+from ws_stream import MAX_MESSAGE_SIZE, ConnectionClosed, WebSocket, server_handshake
+
+DEFAULT_PORT = 3002
+DEFAULT_MUSIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'music')
+PITCH_FILE = 'pitch.bin'
+
+# A análise ao vivo usa a mesma taxa da pontuação offline; a entrada precisa
+# ser um múltiplo dela (8, 16, 24, 32 ou 48 kHz) e é decimada pela média
+ANALYSIS_SAMPLE_RATE = RECORDING_SAMPLE_RATE
+
+# Passo entre quadros analisados (segundos)
+LIVE_HOP = 0.02
+
+# Abaixo desta energia (dBFS) o microfone é considerado em silêncio. O limiar
+# do VAD da ingestão é relativo à música inteira, o que não existe ao vivo
+SILENCE_DB = -45.0
+
+# Tolerância de tempo na comparação com a referência (segundos para cada lado):
+# absorve a latência do microfone e pequenas antecipações/atrasos do cantor
+TIMING_TOLERANCE = 0.15
+
+# Maior bloco de áudio convertido de uma vez (amostras de entrada)
+MAX_BLOCK_SAMPLES = 48000
+
+# Latências por quadro guardadas para o resumo da sessão
+LATENCY_HISTORY = 4096
+
+SAMPLE_FORMATS = {'s16': np.dtype('<i2'), 'f32': np.dtype('<f4')}
+
+SONG_ID = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+class ReferenceContour:
+    """
+    Contorno da música em cents float32 (NaN = sem voz), com NaN nas bordas
+    para que toda consulta leia uma fatia de tamanho fixo. É só leitura e
+    compartilhado entre as sessões da mesma música.
+    """
+
+    def __init__(self, path, tolerance=TIMING_TOLERANCE):
+        header, cents = read_pitch_bin(path)
+        self.hop = header["hop"]
+        self.duration = header["duration"]
+        self.pad = max(int(round(tolerance / self.hop)), 0)
+        self.frames = header["num_frames"]
+        values = np.asarray(cents)
+        self.cents = np.full(self.frames + 2 * self.pad, np.nan, dtype=np.float32)
+        self.cents[self.pad:self.pad + self.frames] = np.where(values == UNVOICED, np.nan, values)
+
+
+_references = {}
+
+
+def load_reference(path):
+    """
+    Contorno da música (cache pelo mtime do pitch.bin).
+    """
+    mtime = os.path.getmtime(path)
+    cached = _references.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    reference = ReferenceContour(path)
+    _references[path] = (mtime, reference)
+    return reference
+
+
+class LiveSession:
+    """
+    Estado de um cantor: buffer circular, vetores do YIN e placar.
+
+    O buffer tem `capacity` amostras (múltiplo do passo) seguidas de um
+    espelho das primeiras `length` amostras; assim a janela de análise que
+    termina em qualquer fronteira de passo é contígua e a visão dela pode ser
+    criada uma única vez, na abertura da sessão.
+    """
+
+    def __init__(self, reference, start_time=0.0, input_rate=16000, sample_format='s16', offset=0.0,
+                 hop=LIVE_HOP, fmin=DEFAULT_FMIN, fmax=DEFAULT_FMAX, threshold=DEFAULT_THRESHOLD,
+                 silence_db=SILENCE_DB):
+        if input_rate <= 0 or input_rate % ANALYSIS_SAMPLE_RATE:
+            raise ValueError(f"Taxa de amostragem não suportada: {input_rate} "
+                             f"(use um múltiplo de {ANALYSIS_SAMPLE_RATE} Hz)")
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Formato não suportado: {sample_format} (use s16 ou f32)")
+
+        sr = ANALYSIS_SAMPLE_RATE
+        self.reference = reference
+        self.start_time = float(start_time) + float(offset)
+        self.dtype = SAMPLE_FORMATS[sample_format]
+        self.scale = 1.0 / 32768.0 if sample_format == 's16' else 1.0
+        self.factor = input_rate // sr
+        self.inverse_factor = 1.0 / self.factor
+        self.threshold = threshold
+        self.silence_energy = 10.0 ** (silence_db / 10.0)
+
+        self.hop = max(int(round(hop * sr)), 1)
+        self.window = max(int(round(WINDOW_SECONDS * sr)), 1)
+        self.tau_min = max(int(math.floor(sr / fmax)), 2)
+        self.tau_max = int(math.ceil(sr / fmin))
+        self.length = self.window + self.tau_max + 1
+
+        # Buffer circular + espelho e as visões de cada fronteira de passo
+        slots = -(-(self.length + self.hop) // self.hop)
+        self.capacity = slots * self.hop
+        self.ring = np.zeros(self.capacity + self.length, dtype=np.float32)
+        self.views = []
+        for slot in range(slots):
+            start = (slot + 1) * self.hop - self.length
+            if start < 0:
+                start += self.capacity
+            frame = self.ring[start:start + self.length]
+            lagged = np.lib.stride_tricks.sliding_window_view(frame, self.window)[:self.tau_max + 1]
+            self.views.append((frame, lagged, frame[:self.window]))
+        self.position = 0
+
+        # Conversão e decimação da entrada
+        self.block = np.zeros(MAX_BLOCK_SAMPLES, dtype=np.float32)
+        self.decimated = np.zeros(MAX_BLOCK_SAMPLES // self.factor + 1, dtype=np.float32)
+        self.carry = np.zeros(self.factor, dtype=np.float32)
+        self.carry_count = 0
+
+        # Vetores do YIN de um quadro
+        self.corr = np.zeros(self.tau_max + 1, dtype=np.float32)
+        self.squares = np.zeros(self.length, dtype=np.float32)
+        self.cumulative = np.zeros(self.length + 1, dtype=np.float64)
+        self.energy = np.zeros(self.tau_max + 1, dtype=np.float64)
+        self.diff = np.zeros(self.tau_max + 1, dtype=np.float64)
+        self.running = np.zeros(self.tau_max, dtype=np.float64)
+        self.cmndf = np.ones(self.tau_max + 1, dtype=np.float64)
+        self.below = np.zeros(self.tau_max - self.tau_min, dtype=bool)
+        self.taus = np.arange(1, self.tau_max + 1, dtype=np.float64)
+
+        # Comparação com a referência (fatia de tamanho fixo)
+        self.distance = np.zeros(2 * reference.pad + 1, dtype=np.float32)
+
+        # Quadros da última mensagem: tempo, pitch, nota alvo, desvio (NaN = ausente)
+        max_frames = MAX_MESSAGE_SIZE // (self.dtype.itemsize * self.factor * self.hop) + 2
+        self.frames = np.zeros((max_frames, 4), dtype=np.float64)
+        self.frame_hits = np.zeros(max_frames, dtype=bool)
+        self.frame_count = 0
+
+        # Placar e latência
+        self.received = 0
+        self.analyzed = 0
+        self.notes = 0
+        self.hits = 0
+        self.voiced = 0
+        self.latencies = np.zeros(LATENCY_HISTORY, dtype=np.float64)
+
+    def feed(self, data):
+        """
+        Adiciona um bloco de PCM (bytes) e analisa cada passo completado.
+
+        Returns:
+            int: quadros analisados neste bloco (em self.frames[:n])
+        """
+        samples = np.frombuffer(data, dtype=self.dtype, count=len(data) // self.dtype.itemsize)
+        self.frame_count = 0
+        for start in range(0, len(samples), MAX_BLOCK_SAMPLES):
+            self._feed_block(samples[start:start + MAX_BLOCK_SAMPLES])
+        return self.frame_count
+
+    def _feed_block(self, samples):
+        count = len(samples)
+        block = self.block[:count]
+        np.multiply(samples, self.scale, out=block, casting='unsafe')
+        self.received += count
+
+        if self.factor == 1:
+            self._push(block)
+            return
+
+        # Completar o grupo pendente do bloco anterior
+        used = 0
+        if self.carry_count:
+            used = min(self.factor - self.carry_count, count)
+            self.carry[self.carry_count:self.carry_count + used] = block[:used]
+            self.carry_count += used
+            if self.carry_count < self.factor:
+                return
+            self.decimated[0] = self.carry.sum() * self.inverse_factor
+            self.carry_count = 0
+            self._push(self.decimated[:1])
+
+        groups = (count - used) // self.factor
+        if groups:
+            whole = block[used:used + groups * self.factor].reshape(groups, self.factor)
+            decimated = self.decimated[:groups]
+            np.add.reduce(whole, axis=1, out=decimated)
+            decimated *= self.inverse_factor
+            self._push(decimated)
+        rest = count - used - groups * self.factor
+        if rest:
+            self.carry[:rest] = block[count - rest:]
+            self.carry_count = rest
+
+    def _push(self, samples):
+        offset = 0
+        total = len(samples)
+        while offset < total:
+            position = self.position
+            take = min(self.hop - position % self.hop, total - offset)
+            chunk = samples[offset:offset + take]
+            self.ring[position:position + take] = chunk
+            if position < self.length:
+                mirrored = min(take, self.length - position)
+                self.ring[self.capacity + position:self.capacity + position + mirrored] = chunk[:mirrored]
+            offset += take
+            position += take
+            if position % self.hop == 0:
+                self._analyze(position // self.hop - 1)
+            self.position = position % self.capacity
+
+    def _pitch(self, slot):
+        """
+        YIN de um quadro nos vetores pré-alocados.
+
+        Returns:
+            float: cents MIDI, ou NaN sem voz
+        """
+        frame, lagged, head = self.views[slot]
+        window = self.window
+
+        np.square(frame, out=self.squares)
+        np.cumsum(self.squares, out=self.cumulative[1:])
+        if self.cumulative[window] < self.silence_energy * window:
+            return math.nan
+
+        # r(tau) e energia da janela deslocada por tau
+        np.matmul(lagged, head, out=self.corr)
+        np.subtract(self.cumulative[window:window + self.tau_max + 1], self.cumulative[:self.tau_max + 1],
+                    out=self.energy)
+
+        # Diferença e diferença normalizada pela média acumulada (CMNDF)
+        diff = self.diff
+        np.multiply(self.corr, -2.0, out=diff)
+        diff += self.energy
+        diff += self.energy[0]
+        np.maximum(diff, 0.0, out=diff)
+        np.cumsum(diff[1:], out=self.running)
+        np.maximum(self.running, 1e-12, out=self.running)
+        cmndf = self.cmndf
+        np.multiply(diff[1:], self.taus, out=cmndf[1:])
+        np.divide(cmndf[1:], self.running, out=cmndf[1:])
+
+        # Primeiro atraso abaixo do limiar, seguido até o mínimo local
+        np.less(cmndf[self.tau_min:self.tau_max], self.threshold, out=self.below)
+        first = int(self.below.argmax())
+        if not self.below[first]:
+            return math.nan
+        tau = self.tau_min + first
+        while tau + 1 < self.tau_max and cmndf[tau + 1] < cmndf[tau]:
+            tau += 1
+
+        # Interpolação parabólica em torno do mínimo
+        prev, cur, nxt = cmndf[tau - 1], cmndf[tau], cmndf[tau + 1]
+        denominator = prev - 2.0 * cur + nxt
+        shift = 0.5 * (prev - nxt) / denominator if abs(denominator) > 1e-12 else 0.0
+        refined = tau + min(max(shift, -1.0), 1.0)
+        return 1200.0 * math.log2(ANALYSIS_SAMPLE_RATE / refined / MIDI_ZERO_HZ)
+
+    def _analyze(self, slot):
+        started = time.perf_counter()
+        cents = self._pitch(slot)
+
+        # Tempo da música no centro da janela de integração
+        end = self.analyzed * self.hop + self.hop
+        song_time = self.start_time + (end - self.length + self.window / 2.0) / ANALYSIS_SAMPLE_RATE
+        self.analyzed += 1
+
+        reference = self.reference
+        target = math.nan
+        deviation = math.nan
+        hit = False
+        index = int(round(song_time / reference.hop))
+        if 0 <= index < reference.frames:
+            target = float(reference.cents[index + reference.pad])
+            if not math.isnan(cents):
+                # Menor desvio (sem oitava) dentro da tolerância de tempo
+                distance = self.distance
+                np.subtract(reference.cents[index:index + 2 * reference.pad + 1], cents, out=distance)
+                distance += 600.0
+                np.mod(distance, 1200.0, out=distance)
+                distance -= 600.0
+                np.abs(distance, out=distance)
+                deviation = float(np.fmin.reduce(distance))
+                hit = deviation <= HIT_CENTS
+        if not math.isnan(cents):
+            self.voiced += 1
+        if not math.isnan(target):
+            self.notes += 1
+            self.hits += hit
+
+        row = self.frames[self.frame_count]
+        row[0] = song_time
+        row[1] = cents
+        row[2] = target
+        row[3] = deviation
+        self.frame_hits[self.frame_count] = hit
+        self.frame_count += 1
+        self.latencies[(self.analyzed - 1) % LATENCY_HISTORY] = time.perf_counter() - started
+
+    @property
+    def accuracy(self):
+        return int(round(100.0 * self.hits / self.notes)) if self.notes else 0
+
+    def feedback(self, count):
+        """
+        Mensagem com os quadros do último bloco.
+        """
+        frames = []
+        for row, hit in zip(self.frames[:count].tolist(), self.frame_hits[:count].tolist()):
+            frames.append({
+                "time": round(row[0], 3),
+                "pitch": None if math.isnan(row[1]) else round(row[1]),
+                "target": None if math.isnan(row[2]) else round(row[2]),
+                "deviation": None if math.isnan(row[3]) else round(row[3]),
+                "hit": hit,
+            })
+        return {
+            "type": "feedback",
+            "samples": self.received,
+            "frames": frames,
+            "accuracy": self.accuracy,
+            "hits": self.hits,
+            "notes": self.notes,
+        }
+
+    def summary(self):
+        """
+        Resumo da sessão, com a latência de processamento por quadro (ms).
+        """
+        latencies = self.latencies[:min(self.analyzed, LATENCY_HISTORY)] * 1000.0
+        return {
+            "type": "summary",
+            "accuracy": self.accuracy,
+            "hits": self.hits,
+            "notes": self.notes,
+            "frames": self.analyzed,
+            "voicedFrames": self.voiced,
+            "duration": round(self.received / (self.factor * ANALYSIS_SAMPLE_RATE), 3),
+            "latencyMs": {
+                "median": round(float(np.median(latencies)), 3) if len(latencies) else 0.0,
+                "p99": round(float(np.percentile(latencies, 99)), 3) if len(latencies) else 0.0,
+                "max": round(float(latencies.max()), 3) if len(latencies) else 0.0,
+            },
+        }
+
+
+class LiveScoreServer:
+    """
+    Servidor asyncio: uma tarefa por conexão, todas no mesmo laço de eventos.
+    """
+
+    def __init__(self, music_dir=DEFAULT_MUSIC_DIR):
+        self.music_dir = music_dir
+        self.sessions = 0
+
+    def open_session(self, message):
+        song_id = str(message.get("songId", ""))
+        if not SONG_ID.match(song_id):
+            raise ValueError("songId inválido")
+        pitch_path = os.path.join(self.music_dir, song_id, PITCH_FILE)
+        if not os.path.exists(pitch_path):
+            raise ValueError(f"Contorno de pitch não encontrado para a música {song_id}")
+        return LiveSession(
+            load_reference(pitch_path),
+            start_time=float(message.get("startTime", 0.0)),
+            input_rate=int(message.get("sampleRate", 16000)),
+            sample_format=str(message.get("format", "s16")),
+            offset=float(message.get("offset", 0.0)),
+        )
+
+    async def handle(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        try:
+            await server_handshake(reader, writer)
+        except ConnectionClosed:
+            writer.close()
+            return
+
+        ws = WebSocket(reader, writer)
+        session = None
+        self.sessions += 1
+        try:
+            while True:
+                message = await ws.recv()
+                if isinstance(message, bytes):
+                    if session is None:
+                        await ws.send(json.dumps({"type": "error", "error": "Envie {\"type\": \"start\"} antes do áudio"}))
+                        continue
+                    count = session.feed(message)
+                    if count:
+                        await ws.send(json.dumps(session.feedback(count), separators=(',', ':')))
+                    continue
+
+                try:
+                    control = json.loads(message)
+                except ValueError:
+                    await ws.send(json.dumps({"type": "error", "error": "Mensagem JSON inválida"}))
+                    continue
+
+                if control.get("type") == "start":
+                    try:
+                        session = self.open_session(control)
+                    except (OSError, ValueError) as e:
+                        await ws.send(json.dumps({"type": "error", "error": str(e)}, ensure_ascii=False))
+                        continue
+                    print(f"🎤 Sessão iniciada ({peer}): música {control['songId']}, "
+                          f"{self.sessions} conexão(ões) ativa(s)", file=sys.stderr)
+                    await ws.send(json.dumps({
+                        "type": "ready",
+                        "hop": session.hop / ANALYSIS_SAMPLE_RATE,
+                        "sampleRate": ANALYSIS_SAMPLE_RATE,
+                        "tolerance": TIMING_TOLERANCE,
+                        "hitCents": HIT_CENTS,
+                    }))
+                elif control.get("type") == "stop":
+                    if session is not None:
+                        await ws.send(json.dumps(session.summary()))
+                    await ws.close()
+                    break
+        except ConnectionClosed:
+            pass
+        finally:
+            self.sessions -= 1
+            if session is not None:
+                summary = session.summary()
+                print(f"🏁 Sessão encerrada ({peer}): {summary['accuracy']}% em {summary['duration']:.1f}s, "
+                      f"latência mediana {summary['latencyMs']['median']:.3f} ms", file=sys.stderr)
+            writer.close()
+
+
+async def serve(host='0.0.0.0', port=DEFAULT_PORT, music_dir=DEFAULT_MUSIC_DIR):
+    """
+    Sobe o servidor e atende até ser interrompido.
+    """
+    server = LiveScoreServer(music_dir)
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"🎯 Pontuação ao vivo em ws://{host}:{port}/ (músicas em {music_dir})", file=sys.stderr)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Serviço WebSocket de pontuação de pitch ao vivo")
+    parser.add_argument("--host", default="0.0.0.0", help="Endereço de escuta (padrão: 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Porta (padrão: {DEFAULT_PORT})")
+    parser.add_argument("--music-dir", default=DEFAULT_MUSIC_DIR, help="Pasta das músicas processadas")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.music_dir))
+    except KeyboardInterrupt:
+        print("👋 Servidor encerrado", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
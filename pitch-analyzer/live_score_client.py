@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cliente de teste do serviço de pontuação ao vivo (live_score.py).
+
+Sintetiza um "cantor" a partir do próprio pitch.bin da música (tom com
+harmônicos seguindo o contorno, com desafinação e ruído opcionais), envia o
+PCM em tempo real em blocos de 20 ms, como o AudioRecorder faria, e mede a
+latência entre o envio de cada bloco e a chegada do feedback dele. Vários
+cantores simultâneos podem ser simulados com --clients.
+
+Uso:
+  python live_score_client.py abc --start 30 --duration 20
+  python live_score_client.py abc --clients 40 --detune 300 --noise 0.01
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import io
+
+import numpy as np
+
+from live_score import DEFAULT_MUSIC_DIR, DEFAULT_PORT, PITCH_FILE
+from pitch_format import cents_to_hz, read_pitch_bin
+from ws_stream import connect
+
+# Blocos enviados pelo cliente (segundos)
+CHUNK_SECONDS = 0.02
+
+# Amplitude relativa dos harmônicos da voz sintética
+HARMONICS = (1.0, 0.5, 0.3, 0.15)
+
+
+def synthesize_singer(pitch_path, start_time, duration, sample_rate, detune=0.0, noise=0.0, seed=0):
+    """
+    Voz sintética que segue o contorno da música a partir de start_time.
+
+    Returns:
+        np.ndarray: PCM int16 mono
+    """
+    header, cents = read_pitch_bin(pitch_path)
+    hop = header["hop"]
+    num_samples = int(round(duration * sample_rate))
+    times = start_time + np.arange(num_samples) / sample_rate
+    frames = np.clip((times / hop).astype(int), 0, header["num_frames"] - 1)
+    contour = np.asarray(cents)[frames]
+    hz = cents_to_hz(contour) * 2.0 ** (detune / 1200.0)
+    hz[(times < 0) | (times >= header["duration"])] = 0.0
+
+    phase = 2.0 * np.pi * np.cumsum(hz) / sample_rate
+    voice = np.zeros(num_samples)
+    for index, amplitude in enumerate(HARMONICS, start=1):
+        voice += amplitude * np.sin(index * phase)
+    voice *= 0.2 * (hz > 0)
+    if noise:
+        voice += np.random.default_rng(seed).normal(0.0, noise, num_samples)
+    return (np.clip(voice, -1.0, 1.0) * 32767).astype('<i2')
+
+
+async def sing(url, song_id, pcm, start_time, sample_rate, pace=True):
+    """
+    Uma sessão: envia o PCM em blocos e coleta o feedback.
+
+    Returns:
+        dict: resumo do servidor + latências medidas no cliente (ms)
+    """
+    ws = await connect(url)
+    await ws.send(json.dumps({"type": "start", "songId": song_id, "startTime": start_time,
+                              "sampleRate": sample_rate, "format": "s16"}))
+    ready = json.loads(await ws.recv())
+    if ready.get("type") != "ready":
+        raise RuntimeError(ready.get("error", "resposta inesperada"))
+
+    chunk = int(round(CHUNK_SECONDS * sample_rate))
+    hop_samples = int(round(ready["hop"] * sample_rate))
+    sent_at = {}
+    latencies = []
+
+    async def receive():
+        while True:
+            message = json.loads(await ws.recv())
+            if message["type"] == "summary":
+                return message
+            received = time.perf_counter()
+            # Bloco que completou o último quadro deste feedback
+            samples = message["samples"] - message["samples"] % hop_samples
+            key = -(-samples // chunk) * chunk if samples else 0
+            if key in sent_at:
+                latencies.append((received - sent_at.pop(key)) * 1000.0)
+
+    receiver = asyncio.create_task(receive())
+    started = time.perf_counter()
+    for index, offset in enumerate(range(0, len(pcm), chunk)):
+        if pace:
+            delay = started + index * CHUNK_SECONDS - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        block = pcm[offset:offset + chunk]
+        sent_at[offset + len(block)] = time.perf_counter()
+        await ws.send(block.tobytes())
+    await ws.send(json.dumps({"type": "stop"}))
+    summary = await receiver
+    await ws.close()
+
+    latencies = np.array(latencies) if latencies else np.zeros(1)
+    summary["clientLatencyMs"] = {
+        "median": round(float(np.median(latencies)), 3),
+        "p99": round(float(np.percentile(latencies, 99)), 3),
+        "max": round(float(latencies.max()), 3),
+    }
+    return summary
+
+
+async def run(args):
+    pitch_path = os.path.join(args.music_dir, args.song_id, PITCH_FILE)
+    url = f"ws://{args.host}:{args.port}/"
+    tasks = []
+    for index in range(args.clients):
+        pcm = synthesize_singer(pitch_path, args.start, args.duration, args.sample_rate, args.detune,
+                                args.noise, seed=index)
+        tasks.append(sing(url, args.song_id, pcm, args.start, args.sample_rate, pace=not args.no_pace))
+    return await asyncio.gather(*tasks)
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Cliente sintético do serviço de pontuação ao vivo")
+    parser.add_argument("song_id", help="ID da música (pasta em music/ com pitch.bin)")
+    parser.add_argument("--host", default="127.0.0.1", help="Servidor (padrão: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Porta (padrão: {DEFAULT_PORT})")
+    parser.add_argument("--music-dir", default=DEFAULT_MUSIC_DIR, help="Pasta das músicas processadas")
+    parser.add_argument("--start", type=float, default=0.0, help="Tempo da música em que o canto começa (s)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Duração do canto (s)")
+    parser.add_argument("--sample-rate", type=int, default=16000, help="Taxa do PCM enviado (padrão: 16000)")
+    parser.add_argument("--clients", type=int, default=1, help="Cantores simultâneos (padrão: 1)")
+    parser.add_argument("--detune", type=float, default=0.0, help="Desafinação da voz sintética (cents)")
+    parser.add_argument("--noise", type=float, default=0.0, help="Desvio do ruído branco somado à voz")
+    parser.add_argument("--no-pace", action="store_true", help="Envia o mais rápido possível (sem tempo real)")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.music_dir, args.song_id, PITCH_FILE)):
+        print(f"❌ pitch.bin não encontrado para a música {args.song_id}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        summaries = asyncio.run(run(args))
+    except (OSError, RuntimeError) as e:
+        print(f"❌ Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for index, summary in enumerate(summaries):
+        print(f"🎤 Cantor {index + 1}: {summary['accuracy']}% ({summary['hits']}/{summary['notes']} quadros), "
+              f"processamento {summary['latencyMs']['median']:.3f} ms (máx {summary['latencyMs']['max']:.3f}), "
+              f"ida e volta {summary['clientLatencyMs']['median']:.2f} ms "
+              f"(p99 {summary['clientLatencyMs']['p99']:.2f}, máx {summary['clientLatencyMs']['max']:.2f})",
+              file=sys.stderr)
+    print(json.dumps(summaries, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
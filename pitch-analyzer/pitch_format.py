@@ -0,0 +1,126 @@
+"""
+Formato binário do contorno de pitch (pitch.bin)
+
+Guarda a frequência fundamental (f0) do stem de vocais em passo fixo (por
+padrão 10 ms), um int16 por quadro, em cents MIDI (nota MIDI x 100: 6900 =
+A4 = 440 Hz). Quadros sem voz valem UNVOICED. Uma música de 5 minutos ocupa
+cerca de 60 KB, e qualquer trecho pode ser lido por offset de bytes.
+
+Layout (little-endian):
+  Cabeçalho (32 bytes)
+    4s   magic "KPIT"
+    u16  versão (1)
+    u16  reservado (0)
+    u32  taxa de amostragem da análise
+    u32  número de quadros
+    f32  passo entre quadros em segundos
+    f32  frequência mínima procurada (Hz)
+    f32  frequência máxima procurada (Hz)
+    f32  limiar do YIN usado na análise
+  Dados
+    int16 [quadros], cents MIDI; UNVOICED (-32768) = sem voz
+    O quadro i corresponde ao tempo i * passo.
+"""
+
+import os
+import struct
+
+import numpy as np
+
+
+MAGIC = b'KPIT'
+VERSION = 1
+
+HEADER = struct.Struct('<4sHHIIffff')
+
+# Quadro sem voz
+UNVOICED = -32768
+
+# Frequência da nota MIDI 0 (cents = 0)
+MIDI_ZERO_HZ = 440.0 * 2.0 ** (-69 / 12)
+
+
+def hz_to_cents(f0):
+    """
+    Frequências em Hz para cents MIDI (float). Valores <= 0 viram NaN.
+    """
+    f0 = np.asarray(f0, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(f0 > 0, 1200.0 * np.log2(f0 / MIDI_ZERO_HZ), np.nan)
+
+
+def cents_to_hz(cents):
+    """
+    Cents MIDI (int16 do arquivo) para Hz; quadros sem voz viram 0.
+    """
+    cents = np.asarray(cents)
+    hz = MIDI_ZERO_HZ * 2.0 ** (cents.astype(np.float64) / 1200.0)
+    return np.where(cents == UNVOICED, 0.0, hz)
+
+
+def quantize_cents(cents):
+    """
+    Cents float (NaN = sem voz) para o int16 gravado no arquivo.
+    """
+    cents = np.asarray(cents, dtype=np.float64)
+    voiced = np.isfinite(cents)
+    out = np.full(cents.shape, UNVOICED, dtype='<i2')
+    out[voiced] = np.clip(np.round(cents[voiced]), UNVOICED + 1, 32767)
+    return out
+
+
+def write_pitch_bin(path, cents, sample_rate, hop, fmin, fmax, threshold):
+    """
+    Grava o contorno (int16 de quantize_cents) no formato pitch.bin.
+
+    Returns:
+        int: tamanho do arquivo em bytes
+    """
+    cents = np.asarray(cents, dtype='<i2')
+    # Arquivo temporário + rename: o pitch.bin com o nome final está sempre completo
+    directory, name = os.path.split(str(path))
+    tmp = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, int(sample_rate), len(cents), float(hop), float(fmin),
+                            float(fmax), float(threshold)))
+        f.write(cents.tobytes())
+    os.replace(tmp, path)
+    return HEADER.size + cents.nbytes
+
+
+def read_header(path):
+    """
+    Lê apenas o cabeçalho.
+
+    Returns:
+        dict com sample_rate, num_frames, hop, fmin, fmax, threshold e duration
+    """
+    with open(path, 'rb') as f:
+        magic, version, _, sample_rate, num_frames, hop, fmin, fmax, threshold = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"Arquivo não é um pitch.bin: {path}")
+    if version != VERSION:
+        raise ValueError(f"Versão de pitch.bin não suportada: {version}")
+    return {
+        "sample_rate": sample_rate,
+        "num_frames": num_frames,
+        # f32 no arquivo: arredondar (0.01 é gravado como 0.00999999977...)
+        "hop": round(hop, 6),
+        "fmin": round(fmin, 3),
+        "fmax": round(fmax, 3),
+        "threshold": round(threshold, 4),
+        "duration": round(num_frames * round(hop, 6), 6),
+    }
+
+
+def read_pitch_bin(path, header=None):
+    """
+    Abre o contorno com np.memmap (sem ler o arquivo inteiro).
+
+    Returns:
+        tuple: (cabeçalho, int16 [quadros] em cents MIDI)
+    """
+    if header is None:
+        header = read_header(path)
+    cents = np.memmap(path, dtype='<i2', mode='r', offset=HEADER.size, shape=(header["num_frames"],))
+    return header, cents
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pontuação local de uma gravação pelo pitch, sem transcrição nem rede.
+
+Compara o contorno de pitch da gravação (YIN de pitch_contour.py) com o
+contorno de referência dos vocais (pitch.bin) e devolve uma nota por linha da
+letra no formato LyricResult usado pelo placar: lyric, score, percentage,
+totalWords.
+
+1. A gravação é analisada a 8 kHz com passo de 25 ms (suficiente para a voz
+   e ~5x mais rápido que a análise da ingestão).
+2. Os dois contornos são agrupados em blocos de 50 ms. Cada bloco tem o pitch
+   (mediana, em cents) e um marcador de ataque (início de voz ou mudança de
+   nota).
+3. Um DTW com faixa (Sakoe-Chiba) e inclinação limitada a 1/2..2 alinha a
+   gravação à música a partir do startTime. Como os passos só dependem das
+   duas linhas anteriores, cada linha da matriz é calculada de uma vez com NumPy.
+4. Para cada linha da letra, os blocos com voz na referência contam como
+   acerto quando a gravação alinhada tem voz a menos de HIT_CENTS da nota,
+   ignorando a oitava (quem canta uma oitava abaixo não é penalizado).
+
+Uso:
+  python pitch_score.py gravacao.webm --reference music/abc/pitch.bin --lyrics music/abc/lyrics.lrc --start 12.5
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import warnings
+import argparse
+import io
+
+import numpy as np
+
+# A leitura de áudio compartilhada fica em audio-io/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'audio-io'))
+
+from audio_io import load_audio
+from pitch_contour import pitch_contour
+from pitch_format import UNVOICED, read_pitch_bin
+
+# Análise da gravação
+RECORDING_SAMPLE_RATE = 8000
+RECORDING_HOP = 0.025
+
+# Resolução do alinhamento (segundos por bloco)
+DTW_HOP = 0.05
+
+# Desvio máximo entre a gravação e a música em torno do startTime (segundos)
+BAND_SECONDS = 3.0
+
+# Custos do DTW: diferença de nota (sem oitava) saturada em PITCH_CAP_CENTS,
+# voz de um lado só e diferença nos ataques
+PITCH_CAP_CENTS = 300.0
+VOICING_MISMATCH_COST = 0.6
+ONSET_WEIGHT = 0.3
+
+# Penalidade dos passos fora da diagonal: o andamento do cantor varia pouco,
+# então o alinhamento não deve saltar entre notas parecidas para "achar" acertos
+SLOPE_PENALTY = 0.5
+
+# Mudança de pitch entre blocos que conta como nova nota (cents)
+ONSET_CENTS = 80.0
+
+# Distância máxima (cents, sem oitava) para um bloco contar como acerto
+HIT_CENTS = 100.0
+
+LRC_LINE = re.compile(r'\[(\d{1,3}):(\d{2})(?:[.:](\d{1,3}))?\](.*)')
+
+
+def parse_lrc(path):
+    """
+    Linhas da letra com tempo: [(segundos, texto)], ordenadas.
+    """
+    lines = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for raw in f:
+            match = LRC_LINE.match(raw.strip())
+            if not match:
+                continue
+            minutes, seconds, fraction, text = match.groups()
+            text = text.strip()
+            if not text:
+                continue
+            fraction = int(fraction) / (10 ** len(fraction)) if fraction else 0.0
+            lines.append((int(minutes) * 60 + int(seconds) + fraction, text))
+    return sorted(lines, key=lambda line: line[0])
+
+
+def count_words(text):
+    """
+    Número de palavras da linha (mínimo 1), como no placar da interface.
+    """
+    words = re.sub(r'[^\w\s]', ' ', text.lower()).split()
+    return max(len(words), 1)
+
+
+def pool_contour(cents, factor):
+    """
+    Agrupa um contorno (cents, NaN = sem voz) em blocos de `factor` quadros:
+    mediana dos quadros com voz, ou NaN se menos da metade tem voz.
+    """
+    factor = max(int(factor), 1)
+    count = -(-len(cents) // factor)
+    padded = np.full(count * factor, np.nan)
+    padded[:len(cents)] = cents
+    blocks = padded.reshape(count, factor)
+    voiced = np.isfinite(blocks).sum(axis=1) * 2 >= factor
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        pooled = np.nanmedian(blocks, axis=1)
+    return np.where(voiced, pooled, np.nan)
+
+
+def onsets(cents):
+    """
+    Marcador de ataque por bloco: início de voz ou mudança de nota.
+    """
+    voiced = np.isfinite(cents)
+    previous = np.concatenate(([np.nan], cents[:-1]))
+    with np.errstate(invalid='ignore'):
+        jump = np.abs(cents - previous) > ONSET_CENTS
+    starts = voiced & ~np.isfinite(previous)
+    return (starts | (voiced & jump)).astype(np.float64)
+
+
+def chroma_distance(a, b):
+    """
+    Distância em cents ignorando a oitava (0..600); NaN se algum lado não tem voz.
+    """
+    return np.abs(np.mod(a - b + 600.0, 1200.0) - 600.0)
+
+
+def band_costs(rec, ref, rec_onsets, ref_onsets, lo, width):
+    """
+    Custos locais na faixa: linha i, coluna b corresponde a j = i + lo + b.
+
+    Returns:
+        np.ndarray: [len(rec), width], inf fora da referência
+    """
+    rows = np.arange(len(rec))[:, None]
+    cols = rows + lo + np.arange(width)[None, :]
+    valid = (cols >= 0) & (cols < len(ref))
+    cols = np.clip(cols, 0, len(ref) - 1)
+
+    a = rec[:, None]
+    b = ref[cols]
+    a_voiced = np.isfinite(a)
+    b_voiced = np.isfinite(b)
+    with np.errstate(invalid='ignore'):
+        pitch = np.minimum(chroma_distance(a, b), PITCH_CAP_CENTS) / PITCH_CAP_CENTS
+    cost = np.where(a_voiced & b_voiced, pitch, np.where(a_voiced | b_voiced, VOICING_MISMATCH_COST, 0.0))
+    cost = cost + ONSET_WEIGHT * np.abs(rec_onsets[:, None] - ref_onsets[cols])
+    return np.where(valid, cost, np.inf)
+
+
+def banded_dtw(cost):
+    """
+    DTW simétrico com inclinação 1/2..2 (Sakoe-Chiba, P = 1/2) na faixa.
+
+    Passos: (1,1) peso 2; (1,2) e (2,1) passando pela célula intermediária,
+    com SLOPE_PENALTY.
+    Cada linha depende só das duas anteriores, então é calculada inteira com
+    NumPy. Início e fim livres dentro da faixa; quando a gravação passa do fim
+    da referência, o caminho termina na última linha que ainda a alcança.
+
+    Returns:
+        list: caminho [(i, b)] do início ao fim
+    """
+    rows, width = cost.shape
+    inf = np.inf
+    total = np.full((rows, width), inf)
+    steps = np.zeros((rows, width), dtype=np.int8)
+
+    pad = np.full(1, inf)
+    prev1 = np.zeros(width)       # linha i-1 (virtual: início livre)
+    prev2 = np.zeros(width)       # linha i-2
+    cost_prev = np.zeros(width)   # custo local da linha i-1
+    for i in range(rows):
+        c = cost[i]
+        # (i-1, j-1) -> mesma coluna b na linha anterior
+        diagonal = prev1 + 2.0 * c
+        # (i-1, j-2) passando por (i, j-1) -> coluna b-1
+        horizontal = np.concatenate((pad, prev1[:-1] + 2.0 * c[:-1])) + c + SLOPE_PENALTY
+        # (i-2, j-1) passando por (i-1, j) -> coluna b+1
+        vertical = np.concatenate((prev2[1:] + 2.0 * cost_prev[1:], pad)) + c + SLOPE_PENALTY
+        candidates = np.stack((diagonal, horizontal, vertical))
+        choice = np.argmin(candidates, axis=0)
+        total[i] = candidates[choice, np.arange(width)]
+        steps[i] = choice
+        prev2, prev1, cost_prev = prev1, total[i], c
+
+    # Fim livre: melhor coluna da última linha com algum custo finito (as
+    # linhas seguintes, além do fim da referência, ficam fora do caminho)
+    reachable = np.flatnonzero(np.isfinite(total).any(axis=1))
+    if not len(reachable):
+        return []
+    i = int(reachable[-1])
+    b = int(np.argmin(total[i]))
+    path = [(i, b)]
+    while True:
+        step = steps[i, b]
+        if step == 0:
+            i, b = i - 1, b
+        elif step == 1:
+            path.append((i, b - 1))
+            i, b = i - 1, b - 1
+        else:
+            if i - 1 >= 0:
+                path.append((i - 1, b + 1))
+            i, b = i - 2, b + 1
+        if i < 0 or not np.isfinite(total[i, b]):
+            break
+        path.append((i, b))
+    path.reverse()
+    return path
+
+
+def score_recording(recording_file, reference_path, lyrics_path, start_time=0.0, offset=0.0):
+    """
+    Pontua uma gravação contra o contorno de referência.
+
+    Args:
+        start_time: tempo da música (s) em que a gravação começou
+        offset: latência conhecida da gravação (s), somada ao start_time
+
+    Returns:
+        dict: {"results": [LyricResult], "totalScore", "average", "timing"}
+    """
+    started = time.perf_counter()
+    header, ref_cents = read_pitch_bin(reference_path)
+    ref_cents = np.asarray(ref_cents)
+    ref = pool_contour(np.where(ref_cents == UNVOICED, np.nan, ref_cents.astype(np.float64)),
+                       round(DTW_HOP / header["hop"]))
+    lines = parse_lrc(lyrics_path)
+
+    audio, sample_rate = load_audio(recording_file, sample_rate=RECORDING_SAMPLE_RATE, channels=1)
+    decoded = time.perf_counter()
+    rec = pool_contour(pitch_contour(audio[0], sample_rate, hop=RECORDING_HOP), round(DTW_HOP / RECORDING_HOP))
+    analyzed = time.perf_counter()
+
+    results = []
+    path = []
+    aligned = analyzed
+    if len(rec) and len(ref):
+        # Faixa em torno da diagonal que começa no startTime
+        band = int(round(BAND_SECONDS / DTW_HOP))
+        lo = int(round((start_time + offset) / DTW_HOP)) - band
+        width = 2 * band + 1
+        cost = band_costs(rec, ref, onsets(rec), onsets(ref), lo, width)
+        path = banded_dtw(cost)
+        aligned = time.perf_counter()
+
+    if path:
+        path_rec = np.array([i for i, _ in path], dtype=np.float64)
+        path_ref = np.clip(np.array([i + lo + b for i, b in path], dtype=np.float64), 0, len(ref) - 1)
+
+        # Para cada bloco da referência, o bloco alinhado da gravação
+        first_ref, last_ref = int(path_ref[0]), int(path_ref[-1])
+        ref_blocks = np.clip(np.arange(first_ref, last_ref + 1), 0, len(ref) - 1)
+        rec_blocks = np.clip(np.round(np.interp(ref_blocks, path_ref, path_rec)).astype(int), 0, len(rec) - 1)
+        with np.errstate(invalid='ignore'):
+            hits = chroma_distance(rec[rec_blocks], ref[ref_blocks]) <= HIT_CENTS
+        voiced = np.isfinite(ref[ref_blocks])
+
+        for index, (line_start, text) in enumerate(lines):
+            line_end = lines[index + 1][0] if index + 1 < len(lines) else header["duration"]
+            first = max(int(np.floor(line_start / DTW_HOP)), first_ref) - first_ref
+            last = min(int(np.ceil(line_end / DTW_HOP)), last_ref + 1) - first_ref
+            if last <= first:
+                continue
+            expected = int(voiced[first:last].sum())
+            if expected == 0:
+                continue
+            percentage = int(round(100.0 * hits[first:last].sum() / expected))
+            total_words = count_words(text)
+            results.append({
+                "lyric": text,
+                "score": int(round(percentage / 100.0 * total_words)),
+                "percentage": percentage,
+                "totalWords": total_words,
+            })
+
+    average = int(round(sum(r["percentage"] for r in results) / len(results))) if results else 0
+    return {
+        "results": results,
+        "totalScore": sum(r["score"] * 100 for r in results),
+        "average": average,
+        "timing": {
+            "decode": round(decoded - started, 3),
+            "pitch": round(analyzed - decoded, 3),
+            "alignment": round(aligned - analyzed, 3),
+            "total": round(time.perf_counter() - started, 3),
+        },
+    }
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Pontua uma gravação pelo pitch (sem transcrição)")
+    parser.add_argument("recording", help="Gravação do usuário (webm, wav, mp3...)")
+    parser.add_argument("--reference", required=True, help="Contorno de referência (music/<id>/pitch.bin)")
+    parser.add_argument("--lyrics", required=True, help="Letra sincronizada (music/<id>/lyrics.lrc)")
+    parser.add_argument("--start", type=float, default=0.0, help="Tempo da música em que a gravação começou (s)")
+    parser.add_argument("--offset", type=float, default=0.0, help="Latência da gravação (s), somada a --start")
+    args = parser.parse_args()
+
+    for path in (args.recording, args.reference, args.lyrics):
+        if not os.path.exists(path):
+            print(f"❌ Arquivo não encontrado: {path}", file=sys.stderr)
+            sys.exit(1)
+
+    try:
+        result = score_recording(args.recording, args.reference, args.lyrics, args.start, args.offset)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"❌ Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    timing = result["timing"]
+    print(f"🎯 {len(result['results'])} linha(s) pontuadas, média {result['average']}% "
+          f"({timing['total']:.2f}s: leitura {timing['decode']:.2f}s, pitch {timing['pitch']:.2f}s, "
+          f"alinhamento {timing['alignment']:.2f}s)", file=sys.stderr)
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
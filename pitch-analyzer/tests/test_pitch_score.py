@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da pontuação local (pitch_score.py) com áudio sintético.
+
+Rodar da raiz do projeto: python -m pytest pitch-analyzer/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pitch_format import hz_to_cents, quantize_cents, write_pitch_bin
+from pitch_score import BAND_SECONDS, RECORDING_SAMPLE_RATE, banded_dtw, score_recording
+
+SONG_SECONDS = 60.0
+NOTE_HZ = 220.0
+
+
+def write_song(folder):
+    """
+    pitch.bin com uma nota constante e uma letra de duas linhas.
+    """
+    hop = 0.01
+    cents = np.full(int(SONG_SECONDS / hop), hz_to_cents(NOTE_HZ))
+    reference = os.path.join(folder, 'pitch.bin')
+    write_pitch_bin(reference, quantize_cents(cents), 16000, hop, 65.0, 1000.0, 0.15)
+    lyrics = os.path.join(folder, 'lyrics.lrc')
+    with open(lyrics, 'w', encoding='utf-8') as f:
+        f.write('[00:01.00]primeira linha\n[00:30.00]segunda linha\n')
+    return reference, lyrics
+
+
+def write_recording(folder, seconds):
+    t = np.arange(int(seconds * RECORDING_SAMPLE_RATE)) / RECORDING_SAMPLE_RATE
+    path = os.path.join(folder, 'recording.wav')
+    sf.write(path, (0.3 * np.sin(2 * np.pi * NOTE_HZ * t)).astype(np.float32), RECORDING_SAMPLE_RATE)
+    return path
+
+
+def test_recording_past_end_of_song(tmp_path):
+    reference, lyrics = write_song(str(tmp_path))
+    # Bem mais que BAND_SECONDS além do fim do pitch.bin
+    recording = write_recording(str(tmp_path), SONG_SECONDS + BAND_SECONDS + 7.0)
+
+    result = score_recording(recording, reference, lyrics, start_time=0.0)
+
+    assert [r["percentage"] for r in result["results"]] == [100, 100]
+
+
+def test_recording_starting_after_end_of_song(tmp_path):
+    reference, lyrics = write_song(str(tmp_path))
+    recording = write_recording(str(tmp_path), 5.0)
+
+    result = score_recording(recording, reference, lyrics, start_time=SONG_SECONDS + 2 * BAND_SECONDS)
+
+    assert result["results"] == []
+    assert result["average"] == 0
+
+
+def test_banded_dtw_ends_on_last_reachable_row():
+    cost = np.zeros((10, 3))
+    cost[6:] = np.inf
+
+    path = banded_dtw(cost)
+
+    assert path[-1][0] == 5
+    assert all(np.isfinite(cost[i, b]) for i, b in path)
@@ -0,0 +1,236 @@
+"""
+WebSocket mínimo (RFC 6455) sobre streams do asyncio, só com a biblioteca
+padrão: handshake HTTP, quadros de texto/binários, fragmentação, ping/pong e
+close. Sem extensões (permessage-deflate) nem subprotocolos.
+
+Usado pelo serviço de pontuação ao vivo (live_score.py) e pelo cliente de
+teste (live_score_client.py).
+"""
+
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+from urllib.parse import urlsplit
+
+GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+# Maior mensagem aceita (bytes): 1 s de PCM float32 a 48 kHz com folga
+MAX_MESSAGE_SIZE = 1 << 20
+
+
+class ConnectionClosed(Exception):
+    """
+    A outra ponta fechou a conexão (ou ela caiu).
+    """
+
+
+def accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + GUID).encode('ascii')).digest()).decode('ascii')
+
+
+async def _read_headers(reader):
+    lines = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionClosed("Conexão encerrada durante o handshake")
+        line = line.decode('latin-1').rstrip('\r\n')
+        if not line:
+            return lines
+        lines.append(line)
+
+
+def _parse_headers(lines):
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+async def server_handshake(reader, writer):
+    """
+    Responde ao pedido de upgrade do cliente.
+
+    Returns:
+        str: caminho pedido (com a query string)
+    """
+    lines = await _read_headers(reader)
+    if not lines:
+        raise ConnectionClosed("Pedido vazio")
+    method, path, _ = (lines[0].split(' ') + ['', ''])[:3]
+    headers = _parse_headers(lines[1:])
+    key = headers.get('sec-websocket-key')
+    if method != 'GET' or 'websocket' not in headers.get('upgrade', '').lower() or not key:
+        writer.write(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+        await writer.drain()
+        raise ConnectionClosed("Pedido não é um upgrade para WebSocket")
+
+    writer.write((
+        'HTTP/1.1 101 Switching Protocols\r\n'
+        'Upgrade: websocket\r\n'
+        'Connection: Upgrade\r\n'
+        f'Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n'
+    ).encode('ascii'))
+    await writer.drain()
+    return path
+
+
+async def client_handshake(reader, writer, host, path='/'):
+    """
+    Envia o pedido de upgrade e valida a resposta do servidor.
+    """
+    key = base64.b64encode(os.urandom(16)).decode('ascii')
+    writer.write((
+        f'GET {path} HTTP/1.1\r\n'
+        f'Host: {host}\r\n'
+        'Upgrade: websocket\r\n'
+        'Connection: Upgrade\r\n'
+        f'Sec-WebSocket-Key: {key}\r\n'
+        'Sec-WebSocket-Version: 13\r\n\r\n'
+    ).encode('ascii'))
+    await writer.drain()
+    lines = await _read_headers(reader)
+    headers = _parse_headers(lines[1:])
+    if not lines or ' 101 ' not in lines[0] + ' ' or headers.get('sec-websocket-accept') != accept_key(key):
+        raise ConnectionClosed(f"Handshake recusado: {lines[0] if lines else 'sem resposta'}")
+
+
+def _mask(payload, key):
+    # XOR de inteiros grandes: mais rápido que NumPy para quadros pequenos
+    length = len(payload)
+    mask = (key * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, 'little') ^ int.from_bytes(mask, 'little')).to_bytes(length, 'little')
+
+
+class WebSocket:
+    """
+    Uma conexão já estabelecida. O servidor envia quadros sem máscara e o
+    cliente com máscara, como pede o protocolo.
+    """
+
+    def __init__(self, reader, writer, client=False, max_size=MAX_MESSAGE_SIZE):
+        self.reader = reader
+        self.writer = writer
+        self.client = client
+        self.max_size = max_size
+        self.closed = False
+
+    async def _read_frame(self):
+        try:
+            head = await self.reader.readexactly(2)
+            fin = bool(head[0] & 0x80)
+            opcode = head[0] & 0x0F
+            masked = bool(head[1] & 0x80)
+            length = head[1] & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', await self.reader.readexactly(8))[0]
+            if length > self.max_size:
+                raise ConnectionClosed(f"Mensagem grande demais: {length} bytes")
+            key = await self.reader.readexactly(4) if masked else None
+            payload = await self.reader.readexactly(length)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            raise ConnectionClosed(str(e)) from e
+        if key is not None and payload:
+            payload = _mask(payload, key)
+        return fin, opcode, payload
+
+    async def recv(self):
+        """
+        Próxima mensagem de dados.
+
+        Returns:
+            str (texto) ou bytes (binário)
+        """
+        parts = []
+        message_opcode = None
+        while True:
+            fin, opcode, payload = await self._read_frame()
+            if opcode == OP_PING:
+                await self._send_frame(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                if not self.closed:
+                    await self.close(payload[:2] or struct.pack('!H', 1000))
+                raise ConnectionClosed("Conexão fechada pela outra ponta")
+            if opcode != OP_CONTINUATION:
+                message_opcode = opcode
+            parts.append(payload)
+            if fin:
+                break
+            if sum(len(part) for part in parts) > self.max_size:
+                raise ConnectionClosed("Mensagem fragmentada grande demais")
+
+        data = parts[0] if len(parts) == 1 else b''.join(parts)
+        if message_opcode == OP_TEXT:
+            return data.decode('utf-8')
+        return data
+
+    async def _send_frame(self, opcode, payload):
+        if self.closed and opcode != OP_CLOSE:
+            raise ConnectionClosed("Conexão já fechada")
+        length = len(payload)
+        mask_bit = 0x80 if self.client else 0
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, mask_bit | length)
+        elif length < 1 << 16:
+            header = struct.pack('!BBH', 0x80 | opcode, mask_bit | 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, mask_bit | 127, length)
+        if self.client:
+            key = os.urandom(4)
+            header += key
+            payload = _mask(payload, key) if payload else payload
+        try:
+            self.writer.write(header + payload)
+            await self.writer.drain()
+        except ConnectionError as e:
+            raise ConnectionClosed(str(e)) from e
+
+    async def send(self, message):
+        """
+        Envia str como quadro de texto e bytes como quadro binário.
+        """
+        if isinstance(message, str):
+            await self._send_frame(OP_TEXT, message.encode('utf-8'))
+        else:
+            await self._send_frame(OP_BINARY, bytes(message))
+
+    async def close(self, payload=struct.pack('!H', 1000)):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self._send_frame(OP_CLOSE, payload)
+        except ConnectionClosed:
+            pass
+        self.writer.close()
+
+
+async def connect(url):
+    """
+    Abre uma conexão de cliente (ws://host:porta/caminho).
+    """
+    parts = urlsplit(url)
+    if parts.scheme != 'ws':
+        raise ValueError(f"Apenas ws:// é suportado: {url}")
+    port = parts.port or 80
+    reader, writer = await asyncio.open_connection(parts.hostname, port)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    await client_handshake(reader, writer, f'{parts.hostname}:{port}', path)
+    return WebSocket(reader, writer, client=True)
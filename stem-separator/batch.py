@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Separação em lote: várias músicas passam juntas pelo modelo.
+
+Cada música é cortada em janelas do mesmo tamanho (a última é completada com
+silêncio), normalizada com as próprias estatísticas, e as janelas de músicas
+diferentes são empilhadas em lotes [músicas, canais, amostras] para uma única
+chamada do apply_model. Os resultados são espalhados de volta para a pasta de
+cada música (music/<id>/), com o mesmo crossfade da separação em janelas.
+Cada música ganha seu registro "separate" no manifesto da pasta
+(audio-io/manifest.py), como na separação de uma música só.
+
+Com --json o stdout tem só o resultado em JSON; o progresso vai para o stderr.
+
+Uso:
+  python batch.py musica1.mp3 musica2.mp3 musica3.mp3            # music/<nome do arquivo>/
+  python batch.py --jobs lote.json --batch-size 8
+  python batch.py *.mp3 --music-dir ../music --tier fast
+
+Formato do --jobs:
+  [{"input": "uploads/a.mp3", "id": "minha-musica"},
+   {"input": "uploads/b.mp3", "output_dir": "saida/b"}]
+"""
+
+import sys
+import json
+import time
+import argparse
+import contextlib
+from pathlib import Path
+import io
+
+import numpy as np
+import torch
+from demucs.apply import apply_model
+
+from separate import (RAW_STEMS, MODEL_SAMPLE_RATE, MODEL_AUDIO_CHANNELS, TIERS, default_sidecars,
+                      load_model, resolve_outputs, resolve_tier, separation_settings, store_in_cache,
+                      write_separation_info, write_sidecars)
+from separation_cache import SeparationCache, CacheKeyBuilder
+from chunked import DEFAULT_CROSSFADE, FrameReader, StemWriter, WindowStitcher, iter_windows, scan_input
+from audio_io import read_pcm_blocks
+from manifest import StepRecord
+from cpu_inference import DEFAULT_RUNTIME, RUNTIMES, configure_threads
+
+
+# Músicas por chamada do modelo
+DEFAULT_BATCH_SIZE = 4
+
+# Tamanho das janelas (segundos); todas as janelas do lote têm esse tamanho
+DEFAULT_BATCH_WINDOW = 30.0
+
+DEFAULT_MUSIC_DIR = Path(__file__).resolve().parent.parent / "music"
+
+
+class SongJob:
+    """
+    Uma música do lote e o estado da sua separação.
+    """
+
+    def __init__(self, input_file, output_dir, song_id=None):
+        self.input_path = Path(input_file)
+        self.output_dir = Path(output_dir)
+        self.id = song_id or self.input_path.stem
+        self.paths = None
+        self.stats = None
+        self.key = None
+        self.writer = None
+        self.stitcher = None
+        self.saved = None
+        self.error = None
+        self.record = None
+
+    @property
+    def frames(self):
+        return self.stats[0] if self.stats else 0
+
+
+def finish_record(song, error=None):
+    """
+    Fecha o registro da música no manifesto: "complete" ou, com erro, "failed".
+    """
+    if song.record is None:
+        return
+    record, song.record = song.record, None
+    if error is None:
+        record.__exit__(None, None, None)
+    else:
+        record.__exit__(type(error), error, error.__traceback__)
+
+
+def iter_batch_windows(songs, sample_rate, channels, window_frames, overlap_frames):
+    """
+    Janelas (música, janela [canais, amostras], é_a_última) de todas as
+    músicas, em ordem: as janelas de uma música chegam sempre em sequência.
+    """
+    for song in songs:
+        reader = FrameReader(read_pcm_blocks(song.input_path, sample_rate, channels))
+        for _, chunk, is_last in iter_windows(reader, window_frames, overlap_frames):
+            yield song, chunk, is_last
+
+
+def run_batch(model, device, items, window_frames, shifts, overlap, segment):
+    """
+    Normaliza, completa e empilha as janelas e roda o modelo uma vez.
+
+    Returns:
+        list: fontes [stems, canais, amostras] desnormalizadas de cada janela
+    """
+    channels = items[0][1].shape[0]
+    batch = np.zeros((len(items), channels, window_frames), dtype=np.float32)
+    for index, (song, chunk, _) in enumerate(items):
+        _, mean, std, _ = song.stats
+        batch[index, :, :chunk.shape[1]] = (chunk - mean) / std
+
+    with torch.no_grad():
+        sources = apply_model(model, torch.from_numpy(batch).to(device), shifts=shifts, split=True,
+                              overlap=overlap, segment=segment, progress=False)
+    sources = sources.cpu().numpy()
+
+    results = []
+    for index, (song, chunk, _) in enumerate(items):
+        _, mean, std, _ = song.stats
+        results.append(sources[index, ..., :chunk.shape[1]] * std + mean)
+    return results
+
+
+def separate_batch(jobs, outputs=("vocals", "instrumental"), batch_size=DEFAULT_BATCH_SIZE,
+                   window=DEFAULT_BATCH_WINDOW, crossfade=DEFAULT_CROSSFADE, model_name=None,
+                   device=None, model_bundle=None, shifts=None, overlap=None, segment=None, tier=None,
+                   use_cache=True, cache=None, runtime=DEFAULT_RUNTIME, threads=None, sidecars=None):
+    """
+    Separa várias músicas em lotes.
+
+    Args:
+        jobs: lista de SongJob
+        outputs: Saídas a gravar em cada pasta (lista de nomes)
+        batch_size (int): Janelas por chamada do modelo
+        window (float): Tamanho das janelas em segundos
+        crossfade (float): Sobreposição entre janelas de uma música em segundos
+        Demais argumentos: como em separate.separate_stems
+
+    Returns:
+        dict: {"songs": {id: saídas gravadas ou {"error": ...}}, "audio_seconds", "elapsed", "throughput"}
+    """
+    start_time = time.time()
+    settings = resolve_tier(tier, model_name, shifts, overlap, segment)
+    print(f"🎚️  Nível: {settings['tier']} (modelo {settings['model']}, shifts {settings['shifts']}, "
+          f"overlap {settings['overlap']})")
+    cache_settings = separation_settings(settings["model"], settings["shifts"], settings["overlap"],
+                                         settings["segment"], runtime, max_window=window,
+                                         crossfade=crossfade, batched=True)
+    if use_cache and cache is None:
+        cache = SeparationCache()
+    if sidecars is None:
+        sidecars = default_sidecars()
+
+    sample_rate, channels = MODEL_SAMPLE_RATE, MODEL_AUDIO_CHANNELS
+    if model_bundle is not None:
+        _, _, sample_rate, channels = model_bundle
+
+    # 1ª passada de cada música: normalização, chave do cache e duração
+    pending = []
+    for song in jobs:
+        try:
+            if not song.input_path.exists():
+                raise FileNotFoundError(f"Arquivo não encontrado: {song.input_path}")
+            song.paths = resolve_outputs(outputs, song.output_dir)
+            # Registro "running" no manifesto até os stems da música ficarem prontos
+            song.record = StepRecord("separate", [song.input_path], song.paths.values(),
+                                     params={**settings, "runtime": runtime}).__enter__()
+            key_builder = CacheKeyBuilder() if use_cache else None
+            song.stats = scan_input(song.input_path, sample_rate, channels, key_builder)
+        except Exception as e:
+            song.error = str(e)
+            finish_record(song, e)
+            print(f"❌ {song.id}: {e}")
+            continue
+
+        if use_cache:
+            song.key = key_builder.hexdigest(sample_rate, cache_settings)
+            restored = cache.restore(song.key, song.paths)
+            if restored is not None:
+                print(f"⚡ {song.id}: resultado encontrado no cache ({song.key[:12]})")
+                song.saved = restored
+                write_sidecars(restored, sidecars)
+                write_separation_info(song.output_dir, settings, restored, runtime)
+                finish_record(song)
+                continue
+        pending.append(song)
+
+    audio_seconds = sum(song.frames for song in pending) / sample_rate
+    print(f"🎵 {len(pending)} música(s) para separar ({audio_seconds:.0f}s de áudio), "
+          f"lotes de {batch_size} janela(s) de {window:.0f}s")
+
+    if pending:
+        if model_bundle is None:
+            model_bundle = load_model(settings["model"], device, runtime, threads)
+        model, device, _, _ = model_bundle
+
+        window_frames = int(window * sample_rate)
+        overlap_frames = int(crossfade * sample_rate)
+        if window_frames <= 2 * overlap_frames:
+            raise ValueError(f"A janela ({window}s) precisa ser maior que o dobro do crossfade ({crossfade}s)")
+        hop = window_frames - overlap_frames
+        total_windows = sum(1 + -(-max(song.frames - window_frames, 0) // hop) for song in pending)
+        num_batches = -(-total_windows // batch_size)
+
+        done_windows = 0
+        items = []
+        windows = iter_batch_windows(pending, sample_rate, channels, window_frames, overlap_frames)
+        try:
+            for item in windows:
+                song = item[0]
+                # Arquivos abertos só quando a música entra no lote
+                if song.writer is None:
+                    song.writer = StemWriter(song.paths, RAW_STEMS, sample_rate, channels, sidecars=sidecars)
+                    song.stitcher = WindowStitcher(song.writer, overlap_frames)
+                items.append(item)
+                if len(items) < batch_size:
+                    continue
+                done_windows += len(items)
+                _process_batch(model, device, items, window_frames, settings, cache, cache_settings,
+                               runtime, done_windows, total_windows, num_batches, batch_size)
+                items = []
+            if items:
+                done_windows += len(items)
+                _process_batch(model, device, items, window_frames, settings, cache, cache_settings,
+                               runtime, done_windows, total_windows, num_batches, batch_size)
+        except BaseException as e:
+            for song in pending:
+                if song.writer is not None and song.saved is None:
+                    song.writer.abort()
+                finish_record(song, e)
+            raise
+
+    elapsed = time.time() - start_time
+    throughput = audio_seconds / elapsed if elapsed > 0 else 0.0
+    print(f"✅ Lote concluído: {audio_seconds:.0f}s de áudio em {elapsed:.1f}s "
+          f"({throughput:.2f}s de áudio por segundo)")
+
+    return {
+        "songs": {song.id: song.saved if song.error is None else {"error": song.error} for song in jobs},
+        "audio_seconds": round(audio_seconds, 3),
+        "elapsed": round(elapsed, 3),
+        "throughput": round(throughput, 3),
+    }
+
+
+def _process_batch(model, device, items, window_frames, settings, cache, cache_settings, runtime,
+                   done_windows, total_windows, num_batches, batch_size):
+    """
+    Roda um lote e entrega cada janela à sua música, finalizando as que terminaram.
+    """
+    batch_start = time.time()
+    results = run_batch(model, device, items, window_frames, settings["shifts"], settings["overlap"],
+                        settings["segment"])
+
+    for (song, _, is_last), sources in zip(items, results):
+        song.stitcher.add(sources, is_last)
+        if is_last:
+            song.saved = song.writer.close()
+            print(f"💾 {song.id}: {', '.join(song.saved)} gravados em {song.output_dir}")
+            if song.key is not None:
+                store_in_cache(cache, song.key, song.saved, cache_settings, song.input_path)
+            write_separation_info(song.output_dir, settings, song.saved, runtime)
+            finish_record(song)
+
+    batch_index = -(-done_windows // batch_size)
+    print(f"📊 Lote {batch_index}/{num_batches}: {len(items)} janela(s) em {time.time() - batch_start:.1f}s "
+          f"({int(done_windows * 100 / total_windows)}%)", flush=True)
+
+
+def load_jobs(inputs, jobs_file=None, music_dir=DEFAULT_MUSIC_DIR):
+    """
+    Monta a lista de SongJob a partir dos arquivos da linha de comando e/ou de
+    um JSON [{"input", "id" ou "output_dir"}].
+    """
+    music_dir = Path(music_dir)
+    jobs = [SongJob(path, music_dir / Path(path).stem) for path in inputs]
+    if jobs_file:
+        with open(jobs_file, 'r', encoding='utf-8') as f:
+            for entry in json.load(f):
+                song_id = entry.get("id") or Path(entry["input"]).stem
+                output_dir = entry.get("output_dir") or music_dir / song_id
+                jobs.append(SongJob(entry["input"], output_dir, song_id))
+    return jobs
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(
+        description="Separa várias músicas em lotes, com uma chamada do modelo por lote",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos:
+  python batch.py musica1.mp3 musica2.mp3 musica3.mp3
+  python batch.py --jobs lote.json --batch-size 8 --threads 8
+  python batch.py *.mp3 --music-dir ../music --tier fast --json
+        """
+    )
+    parser.add_argument("inputs", nargs="*", help="Arquivos de áudio (saída em music/<nome do arquivo>/)")
+    parser.add_argument("--jobs", help="JSON com a lista de músicas [{\"input\", \"id\" ou \"output_dir\"}]")
+    parser.add_argument("--music-dir", default=str(DEFAULT_MUSIC_DIR),
+                        help=f"Pasta das músicas (padrão: {DEFAULT_MUSIC_DIR})")
+    parser.add_argument("--stems", "-s", nargs="+", default=["vocals", "instrumental"],
+                        help="Saídas a gravar (padrão: vocals instrumental)")
+    parser.add_argument("--batch-size", "-b", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Janelas por chamada do modelo (padrão: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--window", type=float, default=DEFAULT_BATCH_WINDOW,
+                        help=f"Tamanho das janelas em segundos (padrão: {DEFAULT_BATCH_WINDOW:.0f})")
+    parser.add_argument("--crossfade", type=float, default=DEFAULT_CROSSFADE,
+                        help=f"Sobreposição entre janelas em segundos (padrão: {DEFAULT_CROSSFADE})")
+    parser.add_argument("--tier", "-t", choices=list(TIERS), default=None,
+                        help="Nível de qualidade/velocidade (padrão: SEPARATION_TIER ou balanced)")
+    parser.add_argument("--model", "-m", default=None, help="Modelo Demucs (padrão: o do nível)")
+    parser.add_argument("--device", "-d", choices=["cuda", "cpu"], default=None,
+                        help="Dispositivo (padrão: GPU se disponível)")
+    parser.add_argument("--runtime", choices=RUNTIMES, default=DEFAULT_RUNTIME,
+                        help="Runtime de inferência em CPU (padrão: torch)")
+    parser.add_argument("--threads", type=int, default=None, help="Threads intra-op")
+    parser.add_argument("--no-cache", action="store_true", help="Não consultar nem preencher o cache")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    jobs = load_jobs(args.inputs, args.jobs, args.music_dir)
+    if not jobs:
+        parser.error("informe os arquivos de áudio ou --jobs")
+
+    if args.threads:
+        configure_threads(args.threads)
+
+    # Com --json o stdout fica só com o resultado (como no transcode.py)
+    log = sys.stderr if args.json else sys.stdout
+    with contextlib.redirect_stdout(log):
+        result = separate_batch(jobs, outputs=args.stems, batch_size=args.batch_size, window=args.window,
+                                crossfade=args.crossfade, model_name=args.model, device=args.device,
+                                tier=args.tier, use_cache=not args.no_cache, runtime=args.runtime,
+                                threads=args.threads)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    failed = [song_id for song_id, saved in result["songs"].items() if "error" in (saved or {})]
+    if failed:
+        print(f"\n❌ Falharam: {', '.join(failed)}", file=log)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
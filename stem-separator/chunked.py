@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Separação em janelas com memória limitada, para entradas muito longas.
+
+O áudio é decodificado por um pipe do ffmpeg (audio-io/) e lido em janelas que se
+sobrepõem. O Demucs roda em cada janela, as sobreposições são misturadas com
+crossfade linear e cada bloco pronto é gravado direto nos WAVs de saída. A
+memória usada depende do tamanho da janela, não da duração do arquivo.
+
+Usado por separate.py quando max_window é definido (--max-window ou a
+variável de ambiente SEPARATION_MAX_WINDOW).
+
+No modo progressivo (--progressive) a primeira janela é curta e os WAVs são
+fechados após cada janela, então o começo da música já pode ser tocado
+enquanto o resto é separado.
+"""
+
+import os
+import sys
+import math
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+import torch
+from demucs.apply import apply_model
+
+# A leitura de áudio compartilhada fica em audio-io/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'audio-io'))
+
+from audio_io import READ_BLOCK_FRAMES, SidecarWriter, read_pcm_blocks
+
+
+# Sobreposição padrão entre janelas (segundos), misturada com crossfade
+DEFAULT_CROSSFADE = 5.0
+
+# Pico do instrumental após a normalização (o mesmo do modo em memória)
+INSTRUMENTAL_PEAK = 0.95
+
+
+class FrameReader:
+    """
+    Lê um número exato de amostras de uma sequência de blocos [canais, amostras].
+    """
+
+    def __init__(self, blocks):
+        self._blocks = iter(blocks)
+        self._pending = None
+
+    def read(self, frames):
+        """
+        Retorna até `frames` amostras, ou None no fim do áudio.
+        """
+        parts = []
+        needed = frames
+        while needed > 0:
+            if self._pending is None or self._pending.shape[1] == 0:
+                self._pending = next(self._blocks, None)
+                if self._pending is None:
+                    break
+                continue
+            part = self._pending[:, :needed]
+            self._pending = self._pending[:, needed:]
+            parts.append(part)
+            needed -= part.shape[1]
+        if not parts:
+            return None
+        return np.concatenate(parts, axis=1) if len(parts) > 1 else parts[0]
+
+
+def iter_windows(reader, window_frames, overlap_frames, first_frames=None):
+    """
+    Gera janelas (início, janela [canais, amostras], é_a_última) em que cada
+    janela repete as últimas `overlap_frames` amostras da anterior.
+
+    `first_frames` define um tamanho diferente para a primeira janela.
+    """
+    chunk = reader.read(first_frames or window_frames)
+    if chunk is None:
+        return
+    start = 0
+    while True:
+        new = reader.read(window_frames - overlap_frames)
+        is_last = new is None
+        yield start, chunk, is_last
+        if is_last:
+            return
+        start += chunk.shape[1] - overlap_frames
+        chunk = np.concatenate((chunk[:, -overlap_frames:], new), axis=1)
+
+
+def scan_input(input_path, sample_rate, channels, key_builder=None):
+    """
+    Primeira passada: conta as amostras e calcula média e desvio padrão do
+    sinal mono (a mesma normalização do modo em memória) e o pico da mixagem.
+
+    Returns:
+        tuple: (amostras, média, desvio padrão, pico)
+    """
+    count = 0
+    total = 0.0
+    total_squares = 0.0
+    peak = 0.0
+    for block in read_pcm_blocks(input_path, sample_rate, channels):
+        mono = block.mean(axis=0, dtype=np.float64)
+        total += float(mono.sum())
+        total_squares += float(np.dot(mono, mono))
+        count += block.shape[1]
+        if block.size:
+            peak = max(peak, float(np.abs(block).max()))
+        if key_builder is not None:
+            key_builder.update(block)
+
+    if count == 0:
+        raise ValueError(f"Nenhuma amostra de áudio em {input_path}")
+    mean = total / count
+    std = math.sqrt(max(total_squares / count - mean * mean, 0.0))
+    return count, mean, std or 1.0, peak
+
+
+class StemWriter:
+    """
+    Grava os stems bloco a bloco.
+
+    Os stems brutos são gravados em PCM_24 num arquivo temporário, renomeado
+    para o nome final no close() (um WAV com o nome final está sempre
+    completo). O instrumental precisa do pico do arquivo inteiro para ser
+    normalizado, então é gravado em float num arquivo temporário e convertido
+    para PCM_16 no close().
+
+    Com `preview_peak` (modo progressivo), cada write() reabre os WAVs finais,
+    acrescenta o bloco e fecha de novo, deixando o cabeçalho sempre válido.
+    O instrumental parcial é normalizado pelo pico da mixagem (conhecido desde
+    a primeira passada) e substituído pela versão exata no close().
+
+    As saídas em `sidecars` também são gravadas em float32 no sidecar .f32,
+    publicado no close() depois do WAV final.
+    """
+
+    def __init__(self, outputs, stem_names, sample_rate, channels, preview_peak=None, sidecars=()):
+        self.outputs = outputs
+        self.stem_names = list(stem_names)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.instrumental_peak = 0.0
+        self.frames_written = 0
+        self.progressive = preview_peak is not None
+        self._preview_scale = INSTRUMENTAL_PEAK / preview_peak if preview_peak else 1.0
+        self._files = {}
+        self._sidecars = {}
+        self._temp_instrumental = None
+        self._temp_stems = {}
+
+        for name, path in outputs.items():
+            # Remover antes de gravar no lugar: o arquivo pode ser um hardlink para o cache
+            if self.progressive and path.exists():
+                path.unlink()
+            if name == "instrumental":
+                self._temp_instrumental = path.with_name(f".{path.stem}.partial.wav")
+                self._files[name] = sf.SoundFile(str(self._temp_instrumental), 'w', sample_rate,
+                                                 channels, subtype='FLOAT')
+            elif not self.progressive:
+                self._temp_stems[name] = path.with_name(f".{path.stem}.{os.getpid()}.partial.wav")
+                self._files[name] = sf.SoundFile(str(self._temp_stems[name]), 'w', sample_rate, channels,
+                                                 subtype='PCM_24')
+
+            if self.progressive:
+                # WAV vazio e válido, que cresce a cada bloco
+                subtype = 'PCM_16' if name == "instrumental" else 'PCM_24'
+                sf.SoundFile(str(path), 'w', sample_rate, channels, subtype=subtype).close()
+
+            if name in sidecars:
+                self._sidecars[name] = SidecarWriter(path, sample_rate, channels)
+
+    def write(self, sources):
+        """
+        Grava um bloco de fontes [stems, canais, amostras] já desnormalizado.
+        """
+        for name, path in self.outputs.items():
+            if name == "instrumental":
+                audio = sum(sources[self.stem_names.index(stem)]
+                            for stem in self.stem_names if stem != "vocals")
+                if audio.size:
+                    self.instrumental_peak = max(self.instrumental_peak, float(np.abs(audio).max()))
+            else:
+                audio = sources[self.stem_names.index(name)]
+                if name in self._sidecars:
+                    self._sidecars[name].write(audio)
+            # soundfile espera [amostras, canais]
+            block = np.ascontiguousarray(audio.T)
+            if name in self._files:
+                self._files[name].write(block)
+            if self.progressive:
+                if name == "instrumental":
+                    block = np.clip(block * self._preview_scale, -1.0, 1.0)
+                self._append(path, block)
+        self.frames_written += sources.shape[-1]
+
+    def _append(self, path, block):
+        """
+        Acrescenta amostras ao fim de um WAV e fecha (atualizando o cabeçalho).
+        """
+        with sf.SoundFile(str(path), 'r+') as f:
+            f.seek(0, sf.SEEK_END)
+            f.write(block)
+
+    def close(self):
+        """
+        Fecha os arquivos e finaliza o instrumental.
+
+        Returns:
+            dict: {nome da saída: caminho absoluto}
+        """
+        for f in self._files.values():
+            f.close()
+        for name, temp_path in self._temp_stems.items():
+            os.replace(temp_path, self.outputs[name])
+        self._temp_stems = {}
+
+        if self._temp_instrumental is not None:
+            path = self.outputs["instrumental"]
+            scale = INSTRUMENTAL_PEAK / self.instrumental_peak if self.instrumental_peak > 0 else 1.0
+            info = sf.info(str(self._temp_instrumental))
+            # Arquivo temporário + rename: no modo progressivo o parcial pode estar tocando
+            final = path.with_name(f".{path.stem}.final.wav")
+            sidecar = self._sidecars.get("instrumental")
+            with sf.SoundFile(str(final), 'w', info.samplerate, info.channels, subtype='PCM_16') as out:
+                for block in sf.blocks(str(self._temp_instrumental), blocksize=READ_BLOCK_FRAMES, dtype='float32'):
+                    out.write(block * scale)
+                    if sidecar is not None:
+                        sidecar.write((block * scale).T)
+            os.replace(final, path)
+            os.remove(self._temp_instrumental)
+            self._temp_instrumental = None
+
+        # Depois dos WAVs finais: o cabeçalho do sidecar guarda o tamanho e a data do WAV
+        for sidecar in self._sidecars.values():
+            sidecar.close()
+        self._sidecars = {}
+
+        return {name: str(Path(path).absolute()) for name, path in self.outputs.items()}
+
+    def abort(self):
+        """
+        Fecha e remove arquivos parciais após um erro.
+        """
+        for f in self._files.values():
+            if not f.closed:
+                f.close()
+        for sidecar in self._sidecars.values():
+            sidecar.abort()
+        final = [path.with_name(f".{path.stem}.final.wav") for name, path in self.outputs.items()
+                 if name == "instrumental"]
+        partial = list(self._temp_stems.values()) + [self._temp_instrumental] + final
+        # No modo progressivo os WAVs parciais já estão com o nome final
+        if self.progressive:
+            partial += list(self.outputs.values())
+        for path in partial:
+            if path is not None and Path(path).exists():
+                Path(path).unlink()
+
+
+class WindowStitcher:
+    """
+    Junta as janelas separadas de uma música: mistura cada sobreposição com
+    crossfade linear e entrega ao writer só os blocos já prontos.
+    """
+
+    def __init__(self, writer, overlap_frames):
+        self.writer = writer
+        self.overlap_frames = overlap_frames
+        self._fade_in = np.linspace(0.0, 1.0, overlap_frames, dtype=np.float32)
+        self._fade_out = 1.0 - self._fade_in
+        self._tail = None
+
+    def add(self, sources, is_last):
+        """
+        Recebe as fontes [stems, canais, amostras] desnormalizadas da próxima janela.
+        """
+        if self._tail is not None:
+            mix = min(self.overlap_frames, sources.shape[-1])
+            sources[..., :mix] = (self._tail[..., :mix] * self._fade_out[:mix]
+                                  + sources[..., :mix] * self._fade_in[:mix])
+
+        if is_last:
+            self.writer.write(sources)
+            self._tail = None
+        else:
+            self.writer.write(sources[..., :-self.overlap_frames])
+            self._tail = sources[..., -self.overlap_frames:].copy()
+
+
+def separate_windows(model, device, input_path, sample_rate, channels, stats, writer,
+                     max_window, crossfade=DEFAULT_CROSSFADE, shifts=1, overlap=0.25, segment=None,
+                     first_window=None):
+    """
+    Segunda passada: roda o modelo em cada janela e grava os blocos prontos.
+
+    Args:
+        stats: resultado de scan_input() (amostras, média, desvio padrão, pico)
+        writer: StemWriter que recebe os blocos
+        max_window: tamanho máximo da janela em segundos
+        crossfade: sobreposição entre janelas em segundos
+        first_window: tamanho da primeira janela em segundos (modo progressivo)
+    """
+    total_frames, mean, std, _ = stats
+    window_frames = int(max_window * sample_rate)
+    overlap_frames = int(crossfade * sample_rate)
+    first_frames = int(first_window * sample_rate) if first_window else window_frames
+    if min(window_frames, first_frames) <= 2 * overlap_frames:
+        raise ValueError(f"A janela ({first_window or max_window}s) precisa ser maior que o dobro "
+                         f"do crossfade ({crossfade}s)")
+
+    hop = window_frames - overlap_frames
+    num_windows = 1 + math.ceil(max(total_frames - first_frames, 0) / hop)
+    print(f"🪟 Separando em {num_windows} janela(s) de até {max_window:.0f}s "
+          f"(crossfade de {crossfade:.1f}s)")
+    if first_window:
+        print(f"⏩ Modo progressivo: primeira janela de {first_window:.0f}s")
+
+    stitcher = WindowStitcher(writer, overlap_frames)
+    reader = FrameReader(read_pcm_blocks(input_path, sample_rate, channels))
+    windows = iter_windows(reader, window_frames, overlap_frames, first_frames)
+    for index, (start, chunk, is_last) in enumerate(windows):
+        normalized = torch.from_numpy((chunk - mean) / std).float().unsqueeze(0).to(device)
+        with torch.no_grad():
+            sources = apply_model(model, normalized, shifts=shifts, split=True, overlap=overlap,
+                                  segment=segment, progress=False)
+        sources = sources[0].cpu().numpy() * std + mean
+        del normalized
+        stitcher.add(sources, is_last)
+
+        done = min(start + chunk.shape[1], total_frames)
+        progress = int(done * 100 / total_frames)
+        print(f"📊 Janela {index + 1}/{num_windows}: {done / sample_rate:.0f}s de "
+              f"{total_frames / sample_rate:.0f}s ({progress}%)", flush=True)
+        if writer.progressive:
+            # O backend lê este tempo para liberar a reprodução do trecho já gravado
+            ready = writer.frames_written / sample_rate
+            print(f"⏯️  Pronto até {ready:.1f}s de {total_frames / sample_rate:.1f}s "
+                  f"({int(writer.frames_written * 100 / total_frames)}%)", flush=True)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Opções de inferência em CPU para o Demucs.
+
+Runtimes:
+  torch  modelo original em fp32 (padrão)
+  int8   quantização dinâmica int8 das camadas lineares (torch.ao.quantization)
+  onnx   modelo exportado para ONNX e executado com o ONNX Runtime
+
+Também controla as threads do PyTorch (intra-op e inter-op) e do ONNX Runtime.
+Usado por separate.py (--runtime, --threads, --interop-threads) e pelo worker,
+onde as opções podem ser escolhidas por job.
+"""
+
+import os
+from pathlib import Path
+
+import torch
+from torch import nn
+
+
+RUNTIMES = ["torch", "int8", "onnx"]
+DEFAULT_RUNTIME = "torch"
+
+# Modelos exportados ficam em cache/onnx/ na raiz do projeto (pode ser trocada por ONNX_CACHE_DIR)
+DEFAULT_ONNX_DIR = Path(__file__).resolve().parent.parent / "cache" / "onnx"
+
+# Versão do opset usada na exportação (a primeira com STFT)
+ONNX_OPSET = 17
+
+# Número de inter-op threads já aplicado (o PyTorch só permite definir uma vez)
+_interop_threads = None
+
+
+def configure_threads(num_threads=None, interop_threads=None):
+    """
+    Define as threads do PyTorch. None mantém o valor atual.
+
+    O número de inter-op threads só pode ser definido uma vez por processo,
+    antes do primeiro trabalho paralelo; pedidos diferentes depois disso são
+    ignorados com um aviso.
+    """
+    global _interop_threads
+
+    if num_threads:
+        torch.set_num_threads(int(num_threads))
+
+    if interop_threads and interop_threads != _interop_threads:
+        try:
+            torch.set_num_interop_threads(int(interop_threads))
+            _interop_threads = interop_threads
+        except RuntimeError:
+            print(f"⚠️  Inter-op threads já definidas ({torch.get_num_interop_threads()}), "
+                  f"ignorando {interop_threads}")
+
+    print(f"🧵 Threads: {torch.get_num_threads()} intra-op, {torch.get_num_interop_threads()} inter-op")
+
+
+def _inner_models(model):
+    """
+    Modelos individuais: um BagOfModels tem vários, os outros são o próprio modelo.
+    """
+    return list(model.models) if hasattr(model, "models") else [model]
+
+
+def _replace_inner_models(model, replacements):
+    if hasattr(model, "models"):
+        for index, replacement in enumerate(replacements):
+            model.models[index] = replacement
+        return model
+    return replacements[0]
+
+
+def quantize_int8(model):
+    """
+    Quantização dinâmica int8 das camadas lineares (transformer e projeções).
+
+    As convoluções continuam em fp32: a quantização dinâmica do PyTorch só
+    cobre nn.Linear e camadas recorrentes.
+    """
+    quantized = []
+    for inner in _inner_models(model):
+        inner = torch.ao.quantization.quantize_dynamic(inner.cpu(), {nn.Linear, nn.LSTM}, dtype=torch.qint8)
+        quantized.append(inner)
+    print("🗜️  Modelo quantizado para int8 (camadas lineares)")
+    return _replace_inner_models(model, quantized)
+
+
+def _training_length(inner):
+    """
+    Tamanho fixo de entrada do modelo (o HTDemucs sempre processa segmentos
+    do tamanho usado no treino).
+    """
+    return int(float(inner.segment) * inner.samplerate)
+
+
+class OnnxModel(nn.Module):
+    """
+    Executa um modelo Demucs exportado com o ONNX Runtime, com a mesma
+    interface esperada pelo apply_model (sources, samplerate, valid_length...).
+    """
+
+    def __init__(self, inner, session):
+        super().__init__()
+        self.session = session
+        self.sources = inner.sources
+        self.samplerate = inner.samplerate
+        self.audio_channels = inner.audio_channels
+        self.segment = inner.segment
+        self.length = _training_length(inner)
+        self.input_name = session.get_inputs()[0].name
+        # O apply_model consulta o dispositivo pelos parâmetros do modelo
+        self.anchor = nn.Parameter(torch.zeros(1), requires_grad=False)
+
+    def valid_length(self, length):
+        return self.length
+
+    def forward(self, mix):
+        outputs = []
+        for item in mix:
+            result = self.session.run(None, {self.input_name: item[None].cpu().numpy()})[0]
+            outputs.append(torch.from_numpy(result))
+        return torch.cat(outputs).to(mix.device)
+
+
+def export_onnx(inner, path):
+    """
+    Exporta um modelo individual para ONNX com entrada de tamanho fixo.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    dummy = torch.zeros(1, inner.audio_channels, _training_length(inner))
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    print(f"📦 Exportando modelo para ONNX: {path}")
+    try:
+        with torch.no_grad():
+            torch.onnx.export(inner.cpu().eval(), dummy, str(tmp), opset_version=ONNX_OPSET,
+                              input_names=["mix"], output_names=["sources"])
+    except Exception as e:
+        if tmp.exists():
+            tmp.unlink()
+        raise RuntimeError(f"Não foi possível exportar o modelo para ONNX ({e}). "
+                           f"Use o runtime 'torch' ou 'int8'.") from e
+    os.replace(tmp, path)
+
+
+def to_onnx(model, model_name, num_threads=None, onnx_dir=None):
+    """
+    Troca os modelos individuais por sessões do ONNX Runtime, exportando
+    (uma vez, com cache em disco) os que ainda não existirem.
+    """
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise RuntimeError("Runtime 'onnx' requer o onnxruntime. Execute: pip install onnxruntime")
+
+    onnx_dir = Path(onnx_dir or os.environ.get("ONNX_CACHE_DIR", DEFAULT_ONNX_DIR))
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if num_threads:
+        options.intra_op_num_threads = int(num_threads)
+
+    wrapped = []
+    for index, inner in enumerate(_inner_models(model)):
+        path = onnx_dir / f"{model_name}_{index}_{_training_length(inner)}.onnx"
+        if not path.exists():
+            export_onnx(inner, path)
+        session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        wrapped.append(OnnxModel(inner, session))
+    print(f"⚙️  Modelo carregado no ONNX Runtime ({len(wrapped)} sessão(ões))")
+    return _replace_inner_models(model, wrapped)
+
+
+def prepare_model(model, model_name, runtime=DEFAULT_RUNTIME, num_threads=None):
+    """
+    Aplica o runtime pedido a um modelo já carregado em CPU.
+    """
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Runtime desconhecido: {runtime} (opções: {', '.join(RUNTIMES)})")
+    if runtime == "int8":
+        return quantize_int8(model)
+    if runtime == "onnx":
+        return to_onnx(model, model_name, num_threads)
+    return model
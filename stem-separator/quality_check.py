@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verificação de qualidade dos runtimes de inferência em CPU.
+
+Separa um trecho do arquivo com o modelo fp32 (referência) e com cada runtime
+pedido (int8, onnx), e informa para cada stem o SDR em relação à referência
+(quanto maior, menor a diferença) e o ganho de velocidade.
+
+Os testes usam shifts=0 para que as execuções sejam determinísticas e a
+diferença venha só do runtime.
+
+Uso:
+  python quality_check.py musica.mp3
+  python quality_check.py musica.mp3 --runtimes int8 --duration 60 --threads 8
+  python quality_check.py musica.mp3 --min-sdr 30    # sai com erro abaixo de 30 dB
+
+Com --json o stdout tem só o resultado em JSON; o progresso vai para o stderr.
+"""
+
+import sys
+import json
+import time
+import argparse
+import contextlib
+import io
+
+import numpy as np
+
+from separate import RAW_STEMS, MODEL_SAMPLE_RATE, MODEL_AUDIO_CHANNELS, decode_audio, load_model, run_model
+from cpu_inference import DEFAULT_RUNTIME, RUNTIMES, configure_threads
+
+
+def sdr(reference, estimate):
+    """
+    Signal-to-distortion ratio (dB) de estimate em relação a reference.
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    error = reference - np.asarray(estimate, dtype=np.float64)
+    signal_energy = np.sum(reference ** 2)
+    error_energy = np.sum(error ** 2)
+    if error_energy == 0:
+        return float("inf")
+    if signal_energy == 0:
+        return float("-inf")
+    return float(10 * np.log10(signal_energy / error_energy))
+
+
+def separate_excerpt(wav, model_name, runtime, threads=None):
+    """
+    Separa o trecho com o runtime pedido.
+
+    Returns:
+        tuple: (fontes [stems, canais, amostras] desnormalizadas, segundos de inferência)
+    """
+    model, device, _, _ = load_model(model_name, "cpu", runtime, threads)
+    start = time.time()
+    sources, ref = run_model(model, device, wav, shifts=0, progress=False)
+    elapsed = time.time() - start
+    return sources.numpy() * ref.std() + ref.mean(), elapsed
+
+
+def check_quality(input_file, runtimes=("int8",), model_name="htdemucs", offset=30.0, duration=30.0,
+                  threads=None):
+    """
+    Compara cada runtime com a referência fp32.
+
+    Returns:
+        dict: {runtime: {"elapsed": s, "speedup": x, "sdr": {stem: dB}}}
+    """
+    wav = decode_audio(input_file, MODEL_SAMPLE_RATE, MODEL_AUDIO_CHANNELS)
+    start = int(offset * MODEL_SAMPLE_RATE)
+    if start >= wav.shape[-1]:
+        start = 0
+    wav = np.ascontiguousarray(wav[:, start:start + int(duration * MODEL_SAMPLE_RATE)])
+    print(f"🎵 Trecho: {start / MODEL_SAMPLE_RATE:.1f}s + {wav.shape[-1] / MODEL_SAMPLE_RATE:.1f}s")
+
+    print(f"\n🎯 Referência ({DEFAULT_RUNTIME} fp32)")
+    baseline, baseline_elapsed = separate_excerpt(wav, model_name, DEFAULT_RUNTIME, threads)
+    print(f"   {baseline_elapsed:.2f}s")
+
+    results = {DEFAULT_RUNTIME: {"elapsed": round(baseline_elapsed, 3), "speedup": 1.0, "sdr": {}}}
+    for runtime in runtimes:
+        if runtime == DEFAULT_RUNTIME:
+            continue
+        print(f"\n⚙️  Runtime: {runtime}")
+        try:
+            sources, elapsed = separate_excerpt(wav, model_name, runtime, threads)
+        except Exception as e:
+            print(f"   ❌ {e}")
+            results[runtime] = {"error": str(e)}
+            continue
+        results[runtime] = {
+            "elapsed": round(elapsed, 3),
+            "speedup": round(baseline_elapsed / elapsed, 2) if elapsed > 0 else None,
+            "sdr": {stem: round(sdr(baseline[i], sources[i]), 2) for i, stem in enumerate(RAW_STEMS)},
+        }
+        print(f"   {elapsed:.2f}s")
+
+    return results
+
+
+def print_report(results):
+    """
+    Imprime a tabela de SDR e tempos.
+    """
+    print("\n" + "=" * 72)
+    header = f"{'runtime':<8} {'tempo':>8} {'ganho':>7} " + " ".join(f"{stem:>10}" for stem in RAW_STEMS)
+    print(header)
+    print("-" * 72)
+    for runtime, result in results.items():
+        if "error" in result:
+            print(f"{runtime:<8} erro: {result['error']}")
+            continue
+        sdrs = " ".join(f"{result['sdr'].get(stem, float('inf')):>7.1f} dB" if result["sdr"] else f"{'ref':>10}"
+                        for stem in RAW_STEMS)
+        print(f"{runtime:<8} {result['elapsed']:>7.2f}s {result['speedup']:>6.2f}x {sdrs}")
+    print("=" * 72)
+    print("SDR em relação à referência fp32 (quanto maior, menor a diferença)")
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Compara runtimes de CPU com a referência fp32 (SDR)")
+    parser.add_argument("input_file", help="Arquivo de áudio de teste")
+    parser.add_argument("--runtimes", nargs="+", choices=RUNTIMES, default=["int8", "onnx"],
+                        help="Runtimes a comparar (padrão: int8 onnx)")
+    parser.add_argument("--model", "-m", default="htdemucs", help="Modelo Demucs (padrão: htdemucs)")
+    parser.add_argument("--offset", type=float, default=30.0, help="Início do trecho em segundos (padrão: 30)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Duração do trecho em segundos (padrão: 30)")
+    parser.add_argument("--threads", type=int, default=None, help="Threads intra-op")
+    parser.add_argument("--min-sdr", type=float, default=None,
+                        help="Sai com código 1 se algum stem ficar abaixo deste SDR (dB)")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    # Com --json o stdout fica só com o resultado (como no batch.py)
+    log = sys.stderr if args.json else sys.stdout
+    with contextlib.redirect_stdout(log):
+        if args.threads:
+            configure_threads(args.threads)
+        results = check_quality(args.input_file, args.runtimes, args.model, args.offset, args.duration,
+                                args.threads)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print_report(results)
+
+    if args.min_sdr is not None:
+        below = [f"{runtime}/{stem}" for runtime, result in results.items()
+                 for stem, value in result.get("sdr", {}).items() if value < args.min_sdr]
+        failed = [runtime for runtime, result in results.items() if "error" in result]
+        if below or failed:
+            print(f"\n❌ Abaixo de {args.min_sdr} dB ou com erro: {', '.join(below + failed)}", file=log)
+            sys.exit(1)
+        print(f"\n✅ Todos os stems acima de {args.min_sdr} dB", file=log)
+
+
+if __name__ == "__main__":
+    main()
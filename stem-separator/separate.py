@@ -0,0 +1,683 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Separação de stems em uma única passada do Demucs (Meta).
+Executa o modelo uma vez e grava todas as saídas pedidas (vocals, instrumental
+e, opcionalmente, drums/bass/other) a partir do mesmo tensor de fontes.
+
+Os scripts just-voice/extract_voice.py e voice-remove/remove_voice.py são modos
+deste script.
+
+Para entradas muito longas, --max-window (ou SEPARATION_MAX_WINDOW, em segundos)
+separa em janelas com memória limitada (ver chunked.py).
+
+Com --progressive N os primeiros N segundos são separados primeiro e gravados
+em WAVs já tocáveis; o resto é acrescentado aos mesmos arquivos, janela a
+janela, com o modelo já carregado.
+
+Junto de vocals.wav é gravado o sidecar vocals.f32 (PCM float32 com cabeçalho
+JSON), que o gerador de waveform e as ferramentas de análise abrem por memory
+map, sem decodificar o WAV (ver audio-io/audio_io.py).
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+import io
+
+# A leitura de áudio compartilhada fica em audio-io/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'audio-io'))
+
+try:
+    import torch
+    import soundfile as sf
+    from demucs.pretrained import get_model
+    from demucs.apply import apply_model
+    from separation_cache import SeparationCache, CacheKeyBuilder, cache_key
+    from chunked import DEFAULT_CROSSFADE, StemWriter, scan_input, separate_windows
+    from cpu_inference import DEFAULT_RUNTIME, RUNTIMES, configure_threads, prepare_model
+    from audio_io import load_audio, ensure_sidecar, write_sidecar
+    from manifest import StepRecord
+except ImportError as e:
+    print(f"Erro: Dependências não instaladas. Execute: pip install -r requirements.txt")
+    print(f"Detalhes: {e}")
+    sys.exit(1)
+
+
+# Stems brutos do htdemucs, na ordem em que o modelo os devolve
+RAW_STEMS = ["drums", "bass", "other", "vocals"]
+
+# Saídas que podem ser pedidas: os stems brutos mais o instrumental (tudo menos vocais)
+AVAILABLE_OUTPUTS = RAW_STEMS + ["instrumental"]
+
+# Nome do arquivo gravado para cada saída
+OUTPUT_FILENAMES = {name: f"{name}.wav" for name in AVAILABLE_OUTPUTS}
+
+# Formato de entrada dos modelos Demucs v4 (usado para decodificar antes de carregar o modelo)
+MODEL_SAMPLE_RATE = 44100
+MODEL_AUDIO_CHANNELS = 2
+
+
+# Níveis de qualidade/velocidade: modelo, shifts, overlap e segmento (None = padrão do modelo)
+TIERS = {
+    # "Adicionar agora" no modo festa: resultado em menos de um minuto
+    "fast": {"model": "htdemucs", "shifts": 0, "overlap": 0.1, "segment": None},
+    # Padrão do processamento (os valores usados antes dos níveis existirem)
+    "balanced": {"model": "htdemucs", "shifts": 1, "overlap": 0.25, "segment": None},
+    # Catálogo, rodando à noite: modelo ajustado e mais shifts
+    "best": {"model": "htdemucs_ft", "shifts": 4, "overlap": 0.5, "segment": None},
+}
+DEFAULT_TIER = "balanced"
+
+# Arquivo gravado junto às saídas com o nível e as configurações usadas
+SEPARATION_INFO_FILENAME = "separation.json"
+
+
+def resolve_tier(tier=None, model_name=None, shifts=None, overlap=None, segment=None):
+    """
+    Configurações de um nível; valores passados explicitamente têm prioridade.
+    Sem nível, usa a variável de ambiente SEPARATION_TIER ou "balanced".
+
+    Returns:
+        dict: {tier, model, shifts, overlap, segment}
+    """
+    tier = tier or os.environ.get("SEPARATION_TIER") or DEFAULT_TIER
+    if tier not in TIERS:
+        raise ValueError(f"Nível desconhecido: {tier} (opções: {', '.join(TIERS)})")
+    settings = {"tier": tier, **TIERS[tier]}
+    for key, value in (("model", model_name), ("shifts", shifts), ("overlap", overlap), ("segment", segment)):
+        if value is not None:
+            settings[key] = value
+    return settings
+
+
+def write_separation_info(output_dir, settings, saved, runtime=DEFAULT_RUNTIME):
+    """
+    Grava separation.json na pasta de saída, para o backend registrar o nível
+    da música (e um resultado "fast" poder ser refeito depois com "best").
+    """
+    info = {
+        **settings,
+        "runtime": runtime,
+        "outputs": sorted(saved),
+        "updated": datetime.now(timezone.utc).isoformat(),
+    }
+    path = Path(output_dir) / SEPARATION_INFO_FILENAME
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(info, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️  Não foi possível gravar {path}: {e}")
+
+
+# Primeira janela do modo progressivo (segundos) e janela das seguintes quando
+# --max-window não é informado
+DEFAULT_PROGRESSIVE_WINDOW = 20.0
+PROGRESSIVE_MAX_WINDOW = 60.0
+
+
+# Saídas que ganham um sidecar .f32 para as etapas seguintes (waveform, análise)
+DEFAULT_SIDECARS = ("vocals",)
+
+
+def default_sidecars():
+    """
+    Saídas com sidecar da variável SEPARATION_SIDECARS (nomes separados por
+    vírgula; "none" desativa) ou DEFAULT_SIDECARS.
+    """
+    value = os.environ.get("SEPARATION_SIDECARS")
+    if value is None:
+        return DEFAULT_SIDECARS
+    value = value.strip().lower()
+    if value in ("", "none", "0"):
+        return ()
+    return tuple(name.strip() for name in value.split(",") if name.strip())
+
+
+def write_sidecars(saved, sidecars):
+    """
+    Garante o sidecar .f32 atualizado de cada saída pedida (as gravadas agora
+    já têm; as restauradas do cache são convertidas a partir do WAV).
+    """
+    for name in sidecars:
+        if name not in saved:
+            continue
+        try:
+            ensure_sidecar(saved[name])
+        except (OSError, RuntimeError) as e:
+            print(f"⚠️  Não foi possível gravar o sidecar de {name}: {e}")
+
+
+def default_max_window():
+    """
+    Janela máxima padrão (segundos) da variável SEPARATION_MAX_WINDOW; None desativa.
+    """
+    value = os.environ.get("SEPARATION_MAX_WINDOW", "").strip()
+    return float(value) if value else None
+
+
+def load_model(model_name="htdemucs", device=None, runtime=DEFAULT_RUNTIME, num_threads=None):
+    """
+    Carrega o modelo Demucs e descobre taxa de amostragem e canais.
+
+    Args:
+        runtime: 'torch' (fp32), 'int8' (quantização dinâmica) ou 'onnx' (ONNX Runtime);
+                 os dois últimos rodam só em CPU
+        num_threads: threads do ONNX Runtime (runtime 'onnx')
+
+    Returns:
+        tuple: (model, device, sample_rate, audio_channels)
+    """
+    if runtime != DEFAULT_RUNTIME and device == "cuda":
+        print(f"⚠️  Runtime '{runtime}' roda apenas em CPU, ignorando --device cuda")
+        device = "cpu"
+    if device is None:
+        device = "cuda" if runtime == DEFAULT_RUNTIME and torch.cuda.is_available() else "cpu"
+    print(f"🖥️  Usando dispositivo: {device}")
+
+    print(f"🤖 Carregando modelo Demucs ({model_name})...")
+    model = get_model(model_name)
+    model.to(device)
+    model.eval()
+    # Os atributos (taxa, canais) são lidos antes de trocar os modelos internos
+    inner_attrs = model.models[0] if hasattr(model, 'models') and len(model.models) > 0 else model
+    sample_rate = getattr(inner_attrs, 'samplerate', getattr(inner_attrs, 'sample_rate', 44100))
+    audio_channels = getattr(inner_attrs, 'audio_channels', 2)
+    model = prepare_model(model, model_name, runtime, num_threads)
+    print("✅ Modelo carregado com sucesso!")
+
+    return model, device, sample_rate, audio_channels
+
+
+def resolve_outputs(outputs, output_dir):
+    """
+    Normaliza as saídas pedidas para um dicionário {nome: caminho}.
+
+    Args:
+        outputs: lista de nomes (gravados em output_dir com o nome padrão)
+                 ou dicionário {nome: caminho} para caminhos explícitos
+        output_dir: diretório usado para caminhos relativos/padrão
+    """
+    output_dir = Path(output_dir)
+    if isinstance(outputs, dict):
+        items = outputs.items()
+    else:
+        items = ((name, OUTPUT_FILENAMES.get(name, f"{name}.wav")) for name in outputs)
+
+    resolved = {}
+    for name, path in items:
+        if name not in AVAILABLE_OUTPUTS:
+            raise ValueError(f"Saída desconhecida: {name} (opções: {', '.join(AVAILABLE_OUTPUTS)})")
+        path = Path(path)
+        if not path.is_absolute():
+            path = output_dir / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        resolved[name] = path
+
+    if not resolved:
+        raise ValueError("Nenhuma saída pedida")
+    return resolved
+
+
+def write_outputs(sources, ref, sample_rate, outputs, sidecars=()):
+    """
+    Grava as saídas pedidas a partir do tensor de fontes [stems, canais, amostras].
+
+    O tensor está na escala normalizada de entrada do modelo; ref é o sinal mono
+    de referência usado na normalização. As saídas em `sidecars` ganham também
+    o .f32 com as amostras float32.
+    """
+    ref_tensor = torch.from_numpy(ref)
+    # Desnormalizar todos os stems de uma vez
+    sources = sources * ref_tensor.std() + ref_tensor.mean()
+
+    saved = {}
+    for name, path in outputs.items():
+        if name == "instrumental":
+            # Combinar tudo exceto os vocais para criar a versão instrumental
+            audio = sum(sources[RAW_STEMS.index(stem)] for stem in RAW_STEMS if stem != "vocals")
+            # Normalizar para evitar clipping
+            max_val = audio.abs().max()
+            if max_val > 0:
+                audio = audio / max_val * 0.95
+            subtype = 'PCM_16'
+        else:
+            audio = sources[RAW_STEMS.index(name)]
+            subtype = 'PCM_24'
+
+        print(f"💾 Salvando {name} em: {path}")
+        # Arquivo temporário + rename: um WAV com o nome final está sempre completo
+        # (e o rename troca a entrada, sem escrever no hardlink para o cache)
+        tmp = path.with_name(f".{path.stem}.{os.getpid()}.partial.wav")
+        try:
+            # soundfile espera [amostras, canais]
+            sf.write(str(tmp), audio.numpy().T, sample_rate, subtype=subtype)
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        if name in sidecars:
+            write_sidecar(path, audio.numpy(), sample_rate)
+        saved[name] = str(path.absolute())
+
+    return saved
+
+
+def decode_audio(input_path, sample_rate, audio_channels):
+    """
+    Decodifica o arquivo para um array numpy [canais, amostras] na taxa do modelo.
+    """
+    wav, _ = load_audio(input_path, sample_rate, audio_channels)
+    return wav
+
+
+def separate_stems(input_file, output_dir, outputs=("vocals", "instrumental"),
+                   model_name=None, device=None, model_bundle=None,
+                   shifts=None, overlap=None, segment=None, use_cache=True, cache=None,
+                   max_window=None, crossfade=DEFAULT_CROSSFADE,
+                   runtime=DEFAULT_RUNTIME, threads=None, interop_threads=None, tier=None,
+                   progressive=None, sidecars=None):
+    """
+    Separa um arquivo de áudio com uma única execução do Demucs.
+
+    Args:
+        input_file (str): Caminho para o arquivo de áudio de entrada
+        output_dir (str): Diretório onde salvar os arquivos de saída
+        outputs: Saídas a gravar (lista de nomes ou dicionário {nome: caminho})
+        model_name (str): Nome do modelo Demucs a usar (padrão: o do nível)
+        device (str): Dispositivo a usar ('cuda' ou 'cpu'); None detecta automaticamente
+        model_bundle: Resultado de load_model() para reaproveitar um modelo já carregado
+                      (precisa ser do mesmo modelo do nível)
+        shifts, overlap, segment: Parâmetros repassados ao apply_model do Demucs (padrão: os do nível)
+        use_cache (bool): Consultar/preencher o cache de separação
+        cache: Instância de SeparationCache (padrão: cache configurado por variáveis de ambiente)
+        max_window (float): Separa em janelas de até N segundos com memória limitada
+                            (padrão: SEPARATION_MAX_WINDOW; None processa o arquivo inteiro)
+        crossfade (float): Sobreposição entre janelas em segundos
+        runtime (str): 'torch' (fp32), 'int8' ou 'onnx' (ver cpu_inference.py)
+        threads, interop_threads (int): threads do PyTorch/ONNX Runtime (None mantém o padrão)
+        tier (str): Nível de qualidade/velocidade: 'fast', 'balanced' (padrão) ou 'best'
+        progressive (float): Separa primeiro os N segundos iniciais e vai acrescentando o resto
+                             aos WAVs (sempre tocáveis), informando "Pronto até Xs"
+        sidecars: Saídas que ganham o sidecar .f32 (padrão: SEPARATION_SIDECARS ou vocals)
+
+    Returns:
+        dict: {nome da saída: caminho absoluto do arquivo gravado}
+    """
+    settings = resolve_tier(tier, model_name, shifts, overlap, segment)
+    print(f"🎚️  Nível: {settings['tier']} (modelo {settings['model']}, shifts {settings['shifts']}, "
+          f"overlap {settings['overlap']})")
+
+    if sidecars is None:
+        sidecars = default_sidecars()
+
+    # Registro no manifesto da pasta (audio-io/manifest.py): "running" até os stems ficarem prontos
+    output_paths = resolve_outputs(outputs, output_dir)
+    with StepRecord("separate", [input_file], output_paths.values(), params={**settings, "runtime": runtime}):
+        saved = _separate_stems(input_file, output_dir, output_paths, settings["model"], device, model_bundle,
+                                settings["shifts"], settings["overlap"], settings["segment"], use_cache, cache,
+                                max_window, crossfade, runtime, threads, interop_threads, progressive, sidecars)
+        write_sidecars(saved, sidecars)
+        write_separation_info(output_dir, settings, saved, runtime)
+    return saved
+
+
+def _separate_stems(input_file, output_dir, outputs, model_name, device, model_bundle,
+                    shifts, overlap, segment, use_cache, cache, max_window, crossfade,
+                    runtime, threads, interop_threads, progressive=None, sidecars=()):
+    """
+    Separação com as configurações já resolvidas (ver separate_stems).
+    """
+    input_path = Path(input_file)
+    if not input_path.exists():
+        raise FileNotFoundError(f"Arquivo não encontrado: {input_file}")
+
+    print(f"📁 Arquivo de entrada: {input_path}")
+    if threads or interop_threads:
+        configure_threads(threads, interop_threads)
+    output_paths = resolve_outputs(outputs, output_dir)
+    print(f"📂 Saídas: {', '.join(output_paths)}")
+
+    # Todos os modelos Demucs v4 usam 44.1 kHz estéreo; com um modelo já carregado, usar os dele
+    if model_bundle is not None:
+        _, _, sample_rate, audio_channels = model_bundle
+    else:
+        sample_rate, audio_channels = MODEL_SAMPLE_RATE, MODEL_AUDIO_CHANNELS
+
+    if max_window is None:
+        max_window = default_max_window()
+    if progressive and not max_window:
+        max_window = PROGRESSIVE_MAX_WINDOW
+    if max_window:
+        return separate_stems_chunked(input_path, output_paths, sample_rate, audio_channels,
+                                      model_name=model_name, device=device, model_bundle=model_bundle,
+                                      shifts=shifts, overlap=overlap, segment=segment,
+                                      use_cache=use_cache, cache=cache,
+                                      max_window=max_window, crossfade=crossfade,
+                                      runtime=runtime, threads=threads, first_window=progressive,
+                                      sidecars=sidecars)
+
+    print(f"🎵 Carregando arquivo de áudio...")
+    wav_np = decode_audio(input_path, sample_rate, audio_channels)
+
+    # Consultar o cache antes de carregar o modelo
+    key = None
+    settings = separation_settings(model_name, shifts, overlap, segment, runtime)
+    if use_cache:
+        if cache is None:
+            cache = SeparationCache()
+        key = cache_key(wav_np, sample_rate, settings)
+        restored = cache.restore(key, output_paths)
+        if restored is not None:
+            print(f"⚡ Resultado encontrado no cache ({key[:12]}), separação dispensada")
+            return restored
+
+    if model_bundle is None:
+        model_bundle = load_model(model_name, device, runtime, threads)
+    model, device, model_sample_rate, model_channels = model_bundle
+    if (model_sample_rate, model_channels) != (sample_rate, audio_channels):
+        sample_rate, audio_channels = model_sample_rate, model_channels
+        wav_np = decode_audio(input_path, sample_rate, audio_channels)
+
+    print(f"   Taxa de amostragem: {sample_rate} Hz")
+    print(f"   Canais: {audio_channels}")
+    print(f"   Duração: {wav_np.shape[-1] / sample_rate:.2f} segundos")
+
+    # Uma única execução do modelo para todas as saídas
+    print(f"🎤 Separando stems de áudio (isso pode levar alguns minutos)...")
+    sources, ref = run_model(model, device, wav_np, shifts=shifts, overlap=overlap, segment=segment)
+
+    saved = write_outputs(sources, ref, sample_rate, output_paths, sidecars)
+    print(f"✅ Separação concluída! ({len(saved)} arquivo(s))")
+
+    if key is not None:
+        store_in_cache(cache, key, saved, settings, input_path)
+
+    return saved
+
+
+def separation_settings(model_name, shifts, overlap, segment, runtime=DEFAULT_RUNTIME, **extra):
+    """
+    Configurações que entram na chave de cache. O runtime só é incluído quando
+    não é o padrão, para manter válidas as entradas já existentes.
+    """
+    settings = {"model": model_name, "shifts": shifts, "overlap": overlap, "segment": segment, **extra}
+    if runtime != DEFAULT_RUNTIME:
+        settings["runtime"] = runtime
+    return settings
+
+
+def run_model(model, device, wav_np, shifts=1, overlap=0.25, segment=None, progress=True):
+    """
+    Normaliza o áudio [canais, amostras] e executa o modelo uma vez.
+
+    Returns:
+        tuple: (fontes [stems, canais, amostras] na escala normalizada, sinal mono de referência)
+    """
+    ref = wav_np.mean(0)
+    wav_np = (wav_np - ref.mean()) / ref.std()
+
+    wav_tensor = torch.from_numpy(wav_np).float()
+    if len(wav_tensor.shape) == 1:
+        wav_tensor = wav_tensor.unsqueeze(0)
+    wav_tensor = wav_tensor.unsqueeze(0).to(device)
+
+    with torch.no_grad():
+        sources = apply_model(model, wav_tensor, shifts=shifts, split=True, overlap=overlap,
+                              segment=segment, progress=progress)
+    return sources[0].cpu(), ref
+
+
+def store_in_cache(cache, key, saved, settings, input_path):
+    """
+    Guarda o resultado no cache sem interromper a separação em caso de erro.
+    """
+    try:
+        cache.store(key, saved, settings, source=input_path.name)
+        print(f"🗄️  Resultado guardado no cache ({key[:12]})")
+    except OSError as e:
+        print(f"⚠️  Não foi possível guardar no cache: {e}")
+
+
+def separate_stems_chunked(input_path, output_paths, sample_rate, audio_channels,
+                           model_name="htdemucs", device=None, model_bundle=None,
+                           shifts=1, overlap=0.25, segment=None, use_cache=True, cache=None,
+                           max_window=60.0, crossfade=DEFAULT_CROSSFADE,
+                           runtime=DEFAULT_RUNTIME, threads=None, first_window=None, sidecars=()):
+    """
+    Separa em janelas sobrepostas, gravando as saídas aos poucos.
+
+    Duas passadas de decodificação: a primeira calcula a normalização (e a
+    chave de cache), a segunda roda o modelo janela a janela. A memória é
+    limitada pelo tamanho da janela. Com first_window (modo progressivo) a
+    primeira janela é menor e os WAVs ficam tocáveis após cada janela.
+    """
+    # A primeira janela muda os limites das janelas, e portanto o resultado
+    extra = {"first_window": first_window} if first_window else {}
+    settings = separation_settings(model_name, shifts, overlap, segment, runtime,
+                                   max_window=max_window, crossfade=crossfade, **extra)
+
+    print(f"🎵 Lendo arquivo de áudio (1ª passada: normalização)...")
+    key_builder = CacheKeyBuilder() if use_cache else None
+    stats = scan_input(input_path, sample_rate, audio_channels, key_builder)
+
+    # Consultar o cache antes de carregar o modelo
+    key = None
+    if use_cache:
+        if cache is None:
+            cache = SeparationCache()
+        key = key_builder.hexdigest(sample_rate, settings)
+        restored = cache.restore(key, output_paths)
+        if restored is not None:
+            print(f"⚡ Resultado encontrado no cache ({key[:12]}), separação dispensada")
+            return restored
+
+    if model_bundle is None:
+        model_bundle = load_model(model_name, device, runtime, threads)
+    model, device, model_sample_rate, model_channels = model_bundle
+    if (model_sample_rate, model_channels) != (sample_rate, audio_channels):
+        sample_rate, audio_channels = model_sample_rate, model_channels
+        stats = scan_input(input_path, sample_rate, audio_channels)
+
+    print(f"   Taxa de amostragem: {sample_rate} Hz")
+    print(f"   Canais: {audio_channels}")
+    print(f"   Duração: {stats[0] / sample_rate:.2f} segundos")
+
+    print(f"🎤 Separando stems de áudio em janelas (isso pode levar alguns minutos)...")
+    preview_peak = (stats[3] or 1.0) if first_window else None
+    writer = StemWriter(output_paths, RAW_STEMS, sample_rate, audio_channels, preview_peak, sidecars)
+    try:
+        separate_windows(model, device, input_path, sample_rate, audio_channels, stats, writer,
+                         max_window, crossfade=crossfade, shifts=shifts, overlap=overlap, segment=segment,
+                         first_window=first_window)
+    except BaseException:
+        writer.abort()
+        raise
+    saved = writer.close()
+    print(f"✅ Separação concluída! ({len(saved)} arquivo(s))")
+
+    if key is not None:
+        store_in_cache(cache, key, saved, settings, input_path)
+
+    return saved
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(
+        description="Separa vocais, instrumental e stems com uma única execução do Demucs",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos:
+  python separate.py musica.mp3 --output music/minha-musica
+  python separate.py musica.mp3 -o saida --stems vocals
+  python separate.py musica.wav -o saida --stems vocals instrumental drums bass other
+  python separate.py show_ao_vivo.mp3 -o saida --max-window 60
+  python separate.py musica.mp3 -o saida --runtime int8 --threads 8
+  python separate.py musica.mp3 -o saida --tier fast
+  python separate.py musica.mp3 -o saida --progressive 20
+        """
+    )
+
+    parser.add_argument(
+        "input_file",
+        type=str,
+        help="Arquivo de áudio de entrada (mp3, wav, m4a, etc.)"
+    )
+
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=str,
+        default="output",
+        help="Diretório de saída (padrão: output/)"
+    )
+
+    parser.add_argument(
+        "--stems",
+        "-s",
+        nargs="+",
+        choices=AVAILABLE_OUTPUTS,
+        default=["vocals", "instrumental"],
+        help="Saídas a gravar (padrão: vocals instrumental)"
+    )
+
+    parser.add_argument(
+        "--model",
+        "-m",
+        type=str,
+        default=None,
+        choices=["htdemucs", "htdemucs_ft", "mdx_extra"],
+        help="Modelo Demucs a usar (padrão: o do nível)"
+    )
+
+    parser.add_argument(
+        "--tier",
+        "-t",
+        type=str,
+        choices=list(TIERS),
+        default=None,
+        help="Nível de qualidade/velocidade: fast (modo festa), balanced (padrão) ou best "
+             "(htdemucs_ft com mais shifts)"
+    )
+
+    parser.add_argument(
+        "--device",
+        "-d",
+        type=str,
+        choices=["cuda", "cpu"],
+        default=None,
+        help="Dispositivo a usar. Se não especificado, usa GPU se disponível."
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Não consultar nem preencher o cache de separação"
+    )
+
+    parser.add_argument(
+        "--max-window",
+        type=float,
+        default=None,
+        help="Separa em janelas de até N segundos com memória limitada, para arquivos longos "
+             "(padrão: SEPARATION_MAX_WINDOW ou o arquivo inteiro)"
+    )
+
+    parser.add_argument(
+        "--progressive",
+        type=float,
+        nargs="?",
+        const=DEFAULT_PROGRESSIVE_WINDOW,
+        default=None,
+        help="Separa primeiro os N segundos iniciais (padrão: 20) e acrescenta o resto aos WAVs, "
+             "que ficam tocáveis durante a separação"
+    )
+
+    parser.add_argument(
+        "--crossfade",
+        type=float,
+        default=DEFAULT_CROSSFADE,
+        help=f"Sobreposição entre janelas em segundos (padrão: {DEFAULT_CROSSFADE})"
+    )
+
+    parser.add_argument(
+        "--runtime",
+        type=str,
+        choices=RUNTIMES,
+        default=DEFAULT_RUNTIME,
+        help="Runtime de inferência: torch (fp32), int8 (quantização dinâmica) ou onnx (ONNX Runtime). "
+             "int8 e onnx rodam só em CPU (padrão: torch)"
+    )
+
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Threads intra-op do PyTorch/ONNX Runtime (padrão: definido pelo PyTorch)"
+    )
+
+    parser.add_argument(
+        "--interop-threads",
+        type=int,
+        default=None,
+        help="Threads inter-op do PyTorch (padrão: definido pelo PyTorch)"
+    )
+
+    parser.add_argument(
+        "--sidecars",
+        nargs="*",
+        choices=AVAILABLE_OUTPUTS,
+        default=None,
+        help="Saídas que ganham o sidecar .f32 para as etapas seguintes (padrão: SEPARATION_SIDECARS "
+             "ou vocals; sem valores desativa)"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        saved = separate_stems(
+            input_file=args.input_file,
+            output_dir=args.output,
+            outputs=args.stems,
+            model_name=args.model,
+            device=args.device,
+            use_cache=not args.no_cache,
+            max_window=args.max_window,
+            progressive=args.progressive,
+            crossfade=args.crossfade,
+            runtime=args.runtime,
+            threads=args.threads,
+            interop_threads=args.interop_threads,
+            tier=args.tier,
+            sidecars=args.sidecars
+        )
+
+        print("\n" + "="*50)
+        print("🎉 Processamento concluído com sucesso!")
+        for name, path in saved.items():
+            print(f"   {name}: {path}")
+        print("="*50)
+
+    except Exception as e:
+        print(f"\n❌ Erro durante o processamento: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
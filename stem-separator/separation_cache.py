@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de resultados de separação endereçado por conteúdo.
+
+A chave é o hash do PCM decodificado mais as configurações do modelo (nome,
+shifts, overlap, segment). Cada entrada guarda os stems já gerados; um acerto
+devolve os arquivos por hardlink (ou cópia, se o sistema de arquivos não
+permitir) sem rodar o Demucs. O tamanho total é limitado com remoção LRU.
+
+Uso:
+  python separation_cache.py stats
+  python separation_cache.py list
+  python separation_cache.py prune --max-size 10G
+  python separation_cache.py clear
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+import io
+
+import numpy as np
+
+# parse_size e a base do cache LRU ficam em audio-io/disk_cache.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'audio-io'))
+
+from disk_cache import DiskCache, format_size, parse_size
+
+
+# Incrementar quando o formato das saídas mudar, para invalidar entradas antigas
+CACHE_VERSION = 1
+
+# Pasta padrão: cache/separation/ na raiz do projeto (pode ser trocada por SEPARATION_CACHE_DIR)
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / "cache" / "separation"
+
+# Tamanho máximo padrão: 20 GB (pode ser trocado por SEPARATION_CACHE_MAX_GB)
+DEFAULT_MAX_GB = 20
+
+
+def cache_key(wav, sample_rate, settings):
+    """
+    Calcula a chave de cache a partir do PCM decodificado e das configurações.
+
+    Args:
+        wav: array [canais, amostras] do áudio decodificado (antes da normalização)
+        sample_rate: taxa de amostragem do PCM
+        settings: dicionário com model, shifts, overlap e segment
+    """
+    pcm = np.ascontiguousarray(wav, dtype=np.float32)
+    header = {
+        "version": CACHE_VERSION,
+        "sample_rate": int(sample_rate),
+        "shape": list(pcm.shape),
+        **settings,
+    }
+    digest = hashlib.sha256()
+    digest.update(json.dumps(header, sort_keys=True).encode("utf-8"))
+    digest.update(memoryview(pcm).cast("B"))
+    return digest.hexdigest()
+
+
+class CacheKeyBuilder:
+    """
+    Chave de cache calculada bloco a bloco, para entradas lidas em streaming.
+
+    Usa o número de amostras no cabeçalho, que só é conhecido no fim, por isso
+    a chave é o hash do cabeçalho mais o hash do PCM (não é igual à de
+    cache_key(), o que não importa: as configurações do modo em janelas já
+    são diferentes).
+    """
+
+    def __init__(self):
+        self._pcm = hashlib.sha256()
+        self.channels = None
+        self.num_samples = 0
+
+    def update(self, block):
+        """
+        Adiciona um bloco [canais, amostras] do áudio decodificado.
+        """
+        # Hash na ordem amostra a amostra (intercalada), independente do tamanho dos blocos
+        pcm = np.ascontiguousarray(np.asarray(block, dtype=np.float32).T)
+        self.channels = pcm.shape[1]
+        self.num_samples += pcm.shape[0]
+        self._pcm.update(memoryview(pcm).cast("B"))
+
+    def hexdigest(self, sample_rate, settings):
+        header = {
+            "version": CACHE_VERSION,
+            "sample_rate": int(sample_rate),
+            "shape": [self.channels, self.num_samples],
+            "streaming": True,
+            **settings,
+        }
+        digest = hashlib.sha256()
+        digest.update(json.dumps(header, sort_keys=True).encode("utf-8"))
+        digest.update(self._pcm.digest())
+        return digest.hexdigest()
+
+
+def link_or_copy(src, dst):
+    """
+    Cria dst como hardlink de src; copia se o hardlink não for possível
+    (outro disco, sistema de arquivos sem suporte etc.).
+    """
+    dst = Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    if tmp.exists():
+        tmp.unlink()
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+class SeparationCache(DiskCache):
+    """
+    Cache de stems separados em disco, com limite de tamanho e remoção LRU.
+    """
+
+    DATA_PATTERN = "*.wav"
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        if cache_dir is None:
+            cache_dir = os.environ.get("SEPARATION_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("SEPARATION_CACHE_MAX_GB", DEFAULT_MAX_GB)) * 1024 ** 3)
+        super().__init__(cache_dir, max_bytes)
+
+    def restore(self, key, outputs):
+        """
+        Tenta atender as saídas pedidas a partir do cache.
+
+        Args:
+            key: chave calculada por cache_key()
+            outputs: dicionário {nome do stem: caminho de destino}
+
+        Returns:
+            dict {nome: caminho} se todas as saídas estavam no cache, senão None
+        """
+        entry_dir = self.entry_dir(key)
+        meta = self._read_meta(entry_dir)
+        if meta is None:
+            return None
+
+        stems = meta.get("stems", {})
+        if not all(name in stems and (entry_dir / f"{name}.wav").exists() for name in outputs):
+            return None
+
+        restored = {}
+        for name, dst in outputs.items():
+            link_or_copy(entry_dir / f"{name}.wav", dst)
+            restored[name] = str(Path(dst).absolute())
+
+        meta["last_used"] = time.time()
+        meta["hits"] = meta.get("hits", 0) + 1
+        self._write_meta(entry_dir, meta)
+        return restored
+
+    def store(self, key, saved, settings, source=None):
+        """
+        Guarda no cache os stems recém-gravados e aplica o limite de tamanho.
+
+        Args:
+            key: chave calculada por cache_key()
+            saved: dicionário {nome do stem: caminho do arquivo gravado}
+            settings: configurações usadas na separação
+            source: nome do arquivo de origem (apenas informativo)
+        """
+        entry_dir = self.entry_dir(key)
+        entry_dir.mkdir(parents=True, exist_ok=True)
+
+        meta = self._read_meta(entry_dir) or {
+            "key": key,
+            "settings": settings,
+            "source": source,
+            "created": time.time(),
+            "hits": 0,
+            "stems": {},
+        }
+        for name, path in saved.items():
+            link_or_copy(path, entry_dir / f"{name}.wav")
+            meta["stems"][name] = os.path.getsize(path)
+        meta["last_used"] = time.time()
+        self._write_meta(entry_dir, meta)
+
+        self.prune()
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(
+        description="Inspeciona e limpa o cache de separação de stems"
+    )
+    parser.add_argument(
+        "command",
+        choices=["stats", "list", "prune", "clear"],
+        help="stats: resumo | list: entradas | prune: aplica o limite | clear: remove tudo"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help=f"Pasta do cache (padrão: SEPARATION_CACHE_DIR ou {DEFAULT_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--max-size",
+        type=str,
+        default=None,
+        help=f"Limite de tamanho para prune, ex.: 500M, 10G (padrão: SEPARATION_CACHE_MAX_GB ou {DEFAULT_MAX_GB}G)"
+    )
+    args = parser.parse_args()
+
+    max_bytes = parse_size(args.max_size) if args.max_size else None
+    cache = SeparationCache(args.cache_dir, max_bytes)
+
+    if args.command == "stats":
+        entries = cache.entries()
+        total = sum(e["size"] for e in entries)
+        print(f"📂 Cache: {cache.cache_dir}")
+        print(f"   Entradas: {len(entries)}")
+        print(f"   Tamanho: {format_size(total)} de {format_size(cache.max_bytes)}")
+        print(f"   Acertos: {sum(e.get('hits', 0) for e in entries)}")
+    elif args.command == "list":
+        for e in cache.entries():
+            last_used = time.strftime("%Y-%m-%d %H:%M", time.localtime(e.get("last_used", 0)))
+            settings = e.get("settings", {})
+            print(f"{e['key'][:16]}  {format_size(e['size']):>10}  {last_used}  "
+                  f"hits={e.get('hits', 0)}  {settings.get('model', '?')}  "
+                  f"{','.join(e.get('stems', {}))}  {e.get('source') or ''}")
+    elif args.command == "prune":
+        removed = cache.prune()
+        print(f"🗑️  {len(removed)} entrada(s) removida(s) ({format_size(sum(e['size'] for e in removed))})")
+    elif args.command == "clear":
+        removed = cache.clear()
+        print(f"🗑️  Cache limpo: {len(removed)} entrada(s) removida(s)")
+
+
+if __name__ == "__main__":
+    main()
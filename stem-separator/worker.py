@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Worker persistente de separação de stems.
+
+Mantém os modelos Demucs carregados em memória e processa jobs recebidos pelo
+stdin, um JSON por linha. Os eventos de cada job (progresso, resultado, erro)
+são enviados pelo stdout, também um JSON por linha. Logs e barras de progresso
+do Demucs vão para o stderr.
+
+Job:
+  {"id": "abc", "input": "musica.mp3", "output_dir": "music/abc",
+   "stems": ["vocals", "instrumental"], "model": "htdemucs", "device": "cpu",
+   "cache": true, "max_window": 60, "progressive": 20, "tier": "balanced",
+   "runtime": "int8", "threads": 8, "interop_threads": 2}
+
+Com --batch-size N, jobs compatíveis que já estão na fila (mesmo nível,
+modelo, dispositivo, runtime e saídas, sem "progressive" nem "max_window") são
+separados juntos por batch.py, até N músicas por chamada do modelo.
+
+Comandos:
+  {"id": "1", "op": "ping"}       -> {"id": "1", "event": "pong", ...}
+  {"id": "2", "op": "shutdown"}   -> encerra após os jobs da fila
+
+Eventos:
+  {"id": "abc", "event": "queued", "position": 0}
+  {"id": "abc", "event": "progress", "progress": 10, "stage": "separating"}
+  {"id": "abc", "event": "done", "outputs": {...}, "elapsed": 12.3}
+  {"id": "abc", "event": "error", "error": "..."}
+"""
+
+import sys
+import json
+import time
+import queue
+import threading
+import argparse
+import contextlib
+import io
+
+from separate import separate_stems, load_model, resolve_tier
+from batch import SongJob, separate_batch
+from cpu_inference import DEFAULT_RUNTIME, RUNTIMES, configure_threads
+
+
+# Canal de protocolo: o stdout original. Tudo que os módulos imprimem vai para o stderr.
+_protocol_out = sys.stdout
+_protocol_lock = threading.Lock()
+
+
+def emit(job_id, event, **fields):
+    """
+    Envia um evento JSON (uma linha) para o processo cliente.
+    """
+    message = {"id": job_id, "event": event, **fields}
+    with _protocol_lock:
+        _protocol_out.write(json.dumps(message, ensure_ascii=False) + "\n")
+        _protocol_out.flush()
+
+
+class ModelCache:
+    """
+    Modelos carregados, indexados por (nome do modelo, dispositivo, runtime).
+
+    As threads do ONNX Runtime são fixadas quando a sessão é criada, com o
+    valor do primeiro job que carregou o modelo.
+    """
+
+    def __init__(self):
+        self._models = {}
+
+    def get(self, model_name, device, runtime=DEFAULT_RUNTIME, threads=None):
+        key = (model_name, device, runtime)
+        if key not in self._models:
+            self._models[key] = load_model(model_name, device, runtime, threads)
+        return self._models[key]
+
+    def loaded(self):
+        return [f"{name}@{device or 'auto'}/{runtime}" for name, device, runtime in self._models]
+
+
+def run_job(job, models):
+    """
+    Executa um job de separação com o modelo em cache.
+    """
+    job_id = job.get("id")
+    start = time.time()
+
+    # O nível define modelo, shifts e overlap; campos explícitos do job têm prioridade
+    settings = resolve_tier(job.get("tier"), job.get("model"), job.get("shifts"), job.get("overlap"))
+    model_name = settings["model"]
+    device = job.get("device")
+    runtime = job.get("runtime", DEFAULT_RUNTIME)
+    threads = job.get("threads")
+
+    emit(job_id, "progress", progress=0, stage="loading")
+    # Threads antes de carregar: inter-op só pode ser definido antes do primeiro trabalho paralelo
+    if threads or job.get("interop_threads"):
+        configure_threads(threads, job.get("interop_threads"))
+    bundle = models.get(model_name, device, runtime, threads)
+
+    emit(job_id, "progress", progress=10, stage="separating")
+    outputs = separate_stems(
+        input_file=job["input"],
+        output_dir=job["output_dir"],
+        outputs=job.get("stems", ["vocals", "instrumental"]),
+        model_name=model_name,
+        model_bundle=bundle,
+        shifts=settings["shifts"],
+        overlap=settings["overlap"],
+        segment=settings["segment"],
+        tier=settings["tier"],
+        use_cache=job.get("cache", True),
+        max_window=job.get("max_window"),
+        progressive=job.get("progressive"),
+        runtime=runtime
+    )
+
+    emit(job_id, "done", outputs=outputs, elapsed=round(time.time() - start, 3))
+
+
+def batch_key(job):
+    """
+    Chave de compatibilidade para separar jobs juntos; None se o job não pode
+    entrar em lote (modo progressivo ou janela própria).
+    """
+    if job.get("progressive") or job.get("max_window"):
+        return None
+    settings = resolve_tier(job.get("tier"), job.get("model"), job.get("shifts"), job.get("overlap"))
+    stems = job.get("stems", ["vocals", "instrumental"])
+    if isinstance(stems, dict):
+        return None
+    return (tuple(sorted(settings.items())), job.get("device"), job.get("runtime", DEFAULT_RUNTIME),
+            tuple(stems), job.get("cache", True))
+
+
+def run_batch_jobs(group, models):
+    """
+    Separa vários jobs compatíveis de uma vez com o runner em lote.
+    """
+    start = time.time()
+    first = group[0]
+    settings = resolve_tier(first.get("tier"), first.get("model"), first.get("shifts"), first.get("overlap"))
+    runtime = first.get("runtime", DEFAULT_RUNTIME)
+    threads = first.get("threads")
+
+    for job in group:
+        emit(job.get("id"), "progress", progress=0, stage="loading")
+    if threads:
+        configure_threads(threads)
+    bundle = models.get(settings["model"], first.get("device"), runtime, threads)
+
+    for job in group:
+        emit(job.get("id"), "progress", progress=10, stage="separating", batch=len(group))
+    songs = [SongJob(job["input"], job["output_dir"], job.get("id")) for job in group]
+    result = separate_batch(
+        songs,
+        outputs=first.get("stems", ["vocals", "instrumental"]),
+        batch_size=len(group),
+        model_name=settings["model"],
+        model_bundle=bundle,
+        shifts=settings["shifts"],
+        overlap=settings["overlap"],
+        segment=settings["segment"],
+        tier=settings["tier"],
+        use_cache=first.get("cache", True),
+        runtime=runtime
+    )
+
+    elapsed = round(time.time() - start, 3)
+    for job, song in zip(group, songs):
+        if song.error is not None:
+            emit(job.get("id"), "error", error=song.error)
+        else:
+            emit(job.get("id"), "done", outputs=song.saved, elapsed=elapsed,
+                 throughput=result["throughput"])
+
+
+def collect_batch(job, jobs, carry, batch_size, device=None, runtime=DEFAULT_RUNTIME):
+    """
+    Junta ao job os jobs compatíveis que já estão na fila (sem esperar).
+    Jobs incompatíveis vão para `carry` e são processados em seguida, na ordem.
+
+    Returns:
+        tuple: (lista de jobs, fim da fila encontrado)
+    """
+    key = batch_key(job)
+    group = [job]
+    if key is None:
+        return group, False
+
+    finished = False
+    while len(group) < batch_size:
+        try:
+            other = jobs.get_nowait()
+        except queue.Empty:
+            break
+        if other is None:
+            finished = True
+            break
+        apply_defaults(other, device, runtime)
+        if batch_key(other) == key:
+            group.append(other)
+        else:
+            carry.append(other)
+    return group, finished
+
+
+def read_jobs(jobs):
+    """
+    Lê jobs do stdin (thread separada) para que a fila seja confirmada enquanto
+    o job atual ainda está rodando.
+    """
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as e:
+            emit(None, "error", error=f"JSON inválido: {e}")
+            continue
+
+        op = job.get("op", "separate")
+        if op == "ping":
+            emit(job.get("id"), "pong", queued=jobs.qsize())
+            continue
+        if op == "shutdown":
+            break
+        if "input" not in job or "output_dir" not in job:
+            emit(job.get("id"), "error", error="Job precisa de 'input' e 'output_dir'")
+            continue
+
+        emit(job.get("id"), "queued", position=jobs.qsize())
+        jobs.put(job)
+
+    # Fim do stdin ou shutdown: sinalizar para o loop principal terminar
+    jobs.put(None)
+
+
+def serve(preload=None, device=None, runtime=DEFAULT_RUNTIME, threads=None, interop_threads=None,
+          batch_size=1):
+    """
+    Loop principal do worker: processa a fila de jobs em ordem.
+    """
+    models = ModelCache()
+
+    with contextlib.redirect_stdout(sys.stderr):
+        if threads or interop_threads:
+            configure_threads(threads, interop_threads)
+        for model_name in preload or []:
+            models.get(model_name, device, runtime, threads)
+
+    emit(None, "ready", models=models.loaded())
+
+    jobs = queue.Queue()
+    reader = threading.Thread(target=read_jobs, args=(jobs,), daemon=True)
+    reader.start()
+
+    carry = []
+    finished = False
+    while carry or not finished:
+        job = carry.pop(0) if carry else jobs.get()
+        if job is None:
+            break
+        apply_defaults(job, device, runtime)
+        group = [job]
+        if batch_size > 1 and not finished:
+            group, finished = collect_batch(job, jobs, carry, batch_size, device, runtime)
+        try:
+            # Mensagens dos scripts de separação não podem poluir o protocolo
+            with contextlib.redirect_stdout(sys.stderr):
+                if len(group) > 1:
+                    run_batch_jobs(group, models)
+                else:
+                    run_job(job, models)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            for failed in group:
+                emit(failed.get("id"), "error", error=str(e))
+
+
+def apply_defaults(job, device, runtime):
+    """
+    Completa o job com o dispositivo e o runtime padrão do worker.
+    """
+    if device is not None and "device" not in job:
+        job["device"] = device
+    if "runtime" not in job:
+        job["runtime"] = runtime
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    # O protocolo usa o stdout já configurado
+    global _protocol_out
+    _protocol_out = sys.stdout
+
+    parser = argparse.ArgumentParser(
+        description="Worker persistente de separação (jobs JSON por linha no stdin)"
+    )
+
+    parser.add_argument(
+        "--preload",
+        nargs="*",
+        default=["htdemucs"],
+        help="Modelos a carregar antes do primeiro job (padrão: htdemucs)"
+    )
+
+    parser.add_argument(
+        "--device",
+        "-d",
+        type=str,
+        choices=["cuda", "cpu"],
+        default=None,
+        help="Dispositivo padrão para os jobs. Se não especificado, usa GPU se disponível."
+    )
+
+    parser.add_argument(
+        "--runtime",
+        type=str,
+        choices=RUNTIMES,
+        default=DEFAULT_RUNTIME,
+        help="Runtime padrão para os jobs: torch, int8 ou onnx (padrão: torch)"
+    )
+
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Threads intra-op padrão do PyTorch/ONNX Runtime"
+    )
+
+    parser.add_argument(
+        "--interop-threads",
+        type=int,
+        default=None,
+        help="Threads inter-op do PyTorch (definidas uma vez, antes do primeiro job)"
+    )
+
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Separa juntos até N jobs compatíveis que estejam na fila (padrão: 1, um job por vez)"
+    )
+
+    args = parser.parse_args()
+    serve(preload=args.preload, device=args.device, runtime=args.runtime,
+          threads=args.threads, interop_threads=args.interop_threads, batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
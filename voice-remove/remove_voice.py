@@ -2,6 +2,9 @@
 # -*- coding: utf-8 -*-
 """
 Script para remover voz de arquivos de áudio usando demucs
+
+É um modo do separador de passada única (stem-separator/separate.py), que gera
+apenas o instrumental.
 """
 
 import os
@@ -9,30 +12,20 @@ import sys
 from pathlib import Path
 import io
 
-# Configurar encoding UTF-8 para Windows
-if sys.platform == 'win32':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
-import torch
-import torchaudio
-from demucs.pretrained import get_model
-from demucs.apply import apply_model
-from demucs.audio import convert_audio
-# Verificar disponibilidade de pydub
+# O separador de passada única fica em stem-separator/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'stem-separator'))
+
+from separate import separate_stems
+
+# Verificar disponibilidade de pydub (usado apenas para saída em MP3)
 try:
     from pydub import AudioSegment
     PYDUB_AVAILABLE = True
 except ImportError:
     PYDUB_AVAILABLE = False
 
-# Verificar disponibilidade de soundfile (sempre verificar, independente de pydub)
-try:
-    import soundfile as sf
-    SOUNDFILE_AVAILABLE = True
-except ImportError:
-    SOUNDFILE_AVAILABLE = False
-
-def remove_voice(input_file, output_file=None, output_dir=None, use_new_structure=True):
+def remove_voice(input_file, output_file=None, output_dir=None, use_new_structure=True, max_window=None,
+                 tier=None):
     """
     Remove a voz de um arquivo de áudio usando demucs
     
@@ -40,6 +33,10 @@ def remove_voice(input_file, output_file=None, output_dir=None, use_new_structur
         input_file: Caminho para o arquivo de áudio de entrada
         output_file: Caminho para o arquivo de saída (opcional)
         output_dir: Pasta onde salvar o arquivo processado (opcional, padrão: "output")
+        max_window: Separa em janelas de até N segundos com memória limitada
+                    (opcional, padrão: variável SEPARATION_MAX_WINDOW)
+        tier: Nível de qualidade/velocidade: 'fast', 'balanced' ou 'best'
+              (opcional, padrão: variável SEPARATION_TIER ou 'balanced')
     """
     # Verificar se o arquivo existe
     if not os.path.exists(input_file):
@@ -96,160 +93,45 @@ def remove_voice(input_file, output_file=None, output_dir=None, use_new_structur
         output_dir.mkdir(parents=True, exist_ok=True)
         output_file = output_dir / f"{input_path.stem}_no_vocals.wav"
     
-    print(f"Carregando modelo demucs...")
-    # Carregar o modelo pré-treinado (htdemucs é um dos melhores)
-    model = get_model('htdemucs')
-    model.eval()
-    
-    # Obter sample rate e número de canais do modelo
-    # Se for BagOfModels, pegar do primeiro modelo
-    if hasattr(model, 'samplerate'):
-        model_sr = model.samplerate
-        model_channels = model.chin if hasattr(model, 'chin') else 2
-    elif hasattr(model, 'models') and len(model.models) > 0:
-        # Tentar acessar o modelo interno
-        inner_model = model.models[0]
-        model_sr = getattr(inner_model, 'sample_rate', getattr(inner_model, 'samplerate', 44100))
-        model_channels = getattr(inner_model, 'chin', 2)
-    else:
-        # Valores padrão do htdemucs
-        model_sr = 44100
-        model_channels = 2
-    
     print(f"Processando arquivo: {input_file}")
     print("Isso pode levar alguns minutos...")
     
-    # Carregar o áudio - tentar diferentes métodos
-    wav = None
-    sr = None
-    
-    # Método 1: Tentar com pydub (melhor para MP3)
-    if PYDUB_AVAILABLE:
-        try:
-            print("Carregando áudio com pydub...")
-            audio = AudioSegment.from_file(input_file)
-            sr = audio.frame_rate
-            # Converter para numpy array e depois para tensor
-            import numpy as np
-            samples = np.array(audio.get_array_of_samples())
-            if audio.channels == 2:
-                samples = samples.reshape((-1, 2)).T
-            else:
-                samples = samples.reshape((1, -1))
-            wav = torch.from_numpy(samples).float() / 32768.0
-        except Exception as e:
-            print(f"Erro com pydub: {e}")
-    
-    # Método 2: Tentar com soundfile
-    if wav is None and SOUNDFILE_AVAILABLE:
-        try:
-            print("Carregando áudio com soundfile...")
-            import soundfile as sf
-            data, sr = sf.read(input_file)
-            if len(data.shape) == 1:
-                wav = torch.from_numpy(data).unsqueeze(0).float()
-            else:
-                wav = torch.from_numpy(data).T.float()
-        except Exception as e:
-            print(f"Erro com soundfile: {e}")
-    
-    # Método 3: Tentar com torchaudio (pode precisar de torchcodec)
-    if wav is None:
-        try:
-            print("Carregando áudio com torchaudio...")
-            wav, sr = torchaudio.load(input_file, backend="soundfile")
-        except Exception as e:
-            print(f"Erro com torchaudio: {e}")
-            # Última tentativa: converter MP3 para WAV temporariamente
-            if input_file.lower().endswith('.mp3'):
-                print("Tentando converter MP3 para WAV temporariamente...")
-                try:
-                    if PYDUB_AVAILABLE:
-                        audio = AudioSegment.from_mp3(input_file)
-                        temp_wav = str(Path(input_file).with_suffix('.temp.wav'))
-                        audio.export(temp_wav, format="wav")
-                        wav, sr = torchaudio.load(temp_wav, backend="soundfile")
-                        os.remove(temp_wav)
-                    else:
-                        raise ImportError("pydub não está disponível")
-                except Exception as e2:
-                    print(f"Erro na conversão: {e2}")
-                    raise
-    
-    if wav is None:
-        raise RuntimeError("Não foi possível carregar o arquivo de áudio. Tente instalar: pip install pydub soundfile")
-    
-    # Converter para o formato esperado pelo demucs
-    # O demucs espera: [channels, samples] com sample rate correto
-    wav = convert_audio(wav, sr, model_sr, model_channels)
-    
-    # Aplicar o modelo para separar as fontes
-    # O demucs separa em: drums, bass, other, vocals
-    with torch.no_grad():
-        sources = apply_model(model, wav[None], device='cpu', split=True, overlap=0.25, shifts=1)
-    
-    # sources tem formato [batch, sources, channels, samples]
-    # Fontes: [drums, bass, other, vocals]
-    drums = sources[0, 0]  # bateria
-    bass = sources[0, 1]    # baixo
-    other = sources[0, 2]   # outros instrumentos
-    vocals = sources[0, 3]  # vocais
-    
-    # Combinar tudo exceto os vocais para criar a versão instrumental
-    instrumental = drums + bass + other
-    
-    # Normalizar para evitar clipping
-    max_val = instrumental.abs().max()
-    if max_val > 0:
-        instrumental = instrumental / max_val * 0.95
-    
-    # Salvar o resultado
-    print(f"Salvando resultado em: {output_file}")
-    
-    # Converter para numpy para salvar
-    import numpy as np
-    audio_data = instrumental.cpu().numpy()
-    
-    # Se for MP3, salvar como WAV primeiro ou usar pydub
-    if str(output_file).lower().endswith('.mp3'):
-        if PYDUB_AVAILABLE:
-            # Converter tensor para formato do pydub
-            if audio_data.shape[0] == 1:
-                # Mono
-                samples = (audio_data[0] * 32768.0).astype(np.int16)
-            else:
-                # Stereo
-                samples = (audio_data.T * 32768.0).astype(np.int16)
-            
-            audio_segment = AudioSegment(
-                samples.tobytes(),
-                frame_rate=int(model_sr),
-                channels=instrumental.shape[0],
-                sample_width=2
-            )
-            audio_segment.export(str(output_file), format="mp3", bitrate="192k")
-        else:
-            # Salvar como WAV se pydub não estiver disponível
-            wav_output = str(output_file).replace('.mp3', '.wav')
-            if SOUNDFILE_AVAILABLE:
-                import soundfile as sf
-                sf.write(wav_output, audio_data.T, int(model_sr))
-                print(f"Arquivo salvo como WAV (pydub necessário para MP3): {wav_output}")
-            else:
-                torchaudio.save(wav_output, instrumental, int(model_sr), backend="soundfile")
-                print(f"Arquivo salvo como WAV (pydub necessário para MP3): {wav_output}")
+    # Separar com o separador de passada única (apenas o instrumental)
+    # O separador grava WAV; para MP3 gerar um WAV temporário e converter com pydub
+    output_file = Path(output_file)
+    is_mp3 = output_file.suffix.lower() == '.mp3'
+    if is_mp3:
+        wav_output = output_file.with_suffix('.temp.wav' if PYDUB_AVAILABLE else '.wav')
     else:
-        # Salvar como WAV ou outro formato suportado
-        if SOUNDFILE_AVAILABLE:
-            import soundfile as sf
-            sf.write(str(output_file), audio_data.T, int(model_sr))
+        wav_output = output_file
+    
+    separate_stems(
+        input_file=str(input_path),
+        output_dir=str(output_file.parent),
+        outputs={"instrumental": wav_output},
+        device='cpu',
+        max_window=max_window,
+        tier=tier
+    )
+    
+    if is_mp3:
+        if PYDUB_AVAILABLE:
+            print(f"Salvando resultado em: {output_file}")
+            AudioSegment.from_wav(str(wav_output)).export(str(output_file), format="mp3", bitrate="192k")
+            os.remove(wav_output)
         else:
-            torchaudio.save(str(output_file), instrumental, int(model_sr), backend="soundfile")
+            output_file = wav_output
+            print(f"Arquivo salvo como WAV (pydub necessário para MP3): {wav_output}")
     
     print(f"✓ Concluído! Arquivo salvo em: {output_file}")
     return True
 
 if __name__ == "__main__":
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
     input_file = r"C:\Users\iago_\Desktop\Projects\Karaoke\v4\voice-remove\AlceuValenca.mp3"
     output_file = None
     output_dir = None
@@ -0,0 +1,182 @@
+"""
+Índice de atividade vocal (vocal_activity.json), gerado junto com a waveform
+a partir do stem de vocais.
+
+Guarda os trechos cantados ([início, fim] em segundos, detectados pelo VAD de
+audio-io/vad.py) e a energia RMS a cada 100 ms. Os trechos ficam ordenados e
+sem sobreposição, então o backend responde "há voz no tempo t" com uma busca
+binária, sem ler a waveform.
+
+Formato:
+{
+  "version": 1,
+  "source": "vocals.wav",
+  "sample_rate": 44100,
+  "duration": 215.4,
+  "threshold_db": -38.2,
+  "hop": 0.1,
+  "segments": [[12.3, 40.1], [45.0, 80.7], ...],
+  "rms": [0.0, 0.0012, 0.084, ...]
+}
+
+Uso (para músicas já processadas):
+  python vocal_activity.py ../music/<id>/vocals.wav
+"""
+
+import numpy as np
+import json
+import os
+import sys
+import io
+
+# A leitura de áudio e o VAD compartilhados ficam em audio-io/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'audio-io'))
+
+from audio_io import probe, read_pcm_blocks
+from vad import FRAME_SECONDS, frame_rms, segments_from_db, to_db, voice_threshold
+from waveform_format import temp_path_for
+
+VOCAL_ACTIVITY_FILE = 'vocal_activity.json'
+FORMAT_VERSION = 1
+
+# Resolução da energia gravada (segundos); múltiplo do quadro do VAD (20 ms)
+ENERGY_HOP = 0.1
+
+
+def vocal_activity_path_for(data_path):
+    """
+    Caminho do índice de atividade vocal: mesma pasta do arquivo de dados da waveform.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(data_path)), VOCAL_ACTIVITY_FILE)
+
+
+class FrameEnergyAccumulator:
+    """
+    RMS por quadro do VAD calculado bloco a bloco (modo streaming). As amostras
+    que não completam um quadro ficam guardadas para o bloco seguinte, então o
+    resultado é igual ao de frame_rms no áudio inteiro.
+    """
+
+    def __init__(self, sample_rate, frame_seconds=FRAME_SECONDS):
+        self.frame = max(int(round(frame_seconds * sample_rate)), 1)
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.parts = []
+
+    def add(self, block):
+        if len(block) == 0:
+            return
+        data = np.concatenate((self.pending, np.asarray(block, dtype=np.float32)))
+        count = len(data) // self.frame
+        if count:
+            frames = data[:count * self.frame].reshape(count, self.frame)
+            self.parts.append(np.sqrt(np.einsum('ij,ij->i', frames, frames) / self.frame).astype(np.float32))
+        self.pending = data[count * self.frame:]
+
+    def result(self):
+        if not self.parts:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(self.parts)
+
+
+def hop_rms(rms, frame_seconds=FRAME_SECONDS, hop=ENERGY_HOP):
+    """
+    Agrupa o RMS dos quadros do VAD em janelas de `hop` segundos (média da
+    energia dos quadros; a última janela pode ser incompleta).
+    """
+    per_hop = max(int(round(hop / frame_seconds)), 1)
+    count = -(-len(rms) // per_hop)
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    power = np.zeros(count * per_hop, dtype=np.float64)
+    power[:len(rms)] = np.square(rms, dtype=np.float64)
+    filled = np.full(count, per_hop, dtype=np.float64)
+    filled[-1] = len(rms) - (count - 1) * per_hop
+    return np.sqrt(power.reshape(count, per_hop).sum(axis=1) / filled).astype(np.float32)
+
+
+def build_vocal_activity(rms, sample_rate, num_samples, source=None, frame_seconds=FRAME_SECONDS,
+                         hop=ENERGY_HOP):
+    """
+    Monta o índice a partir do RMS por quadro do VAD (frame_rms ou FrameEnergyAccumulator).
+
+    Returns:
+        dict: conteúdo do vocal_activity.json
+    """
+    duration = num_samples / sample_rate
+    db = to_db(rms)
+    threshold_db = voice_threshold(db)
+    segments = segments_from_db(db, duration, frame_seconds, threshold_db)
+    return {
+        "version": FORMAT_VERSION,
+        "source": source,
+        "sample_rate": int(sample_rate),
+        "duration": round(duration, 3),
+        "threshold_db": round(float(threshold_db), 2),
+        "hop": hop,
+        "segments": [[start, end] for start, end in segments],
+        "rms": [round(value, 5) for value in hop_rms(rms, frame_seconds, hop).tolist()],
+    }
+
+
+def vocal_activity_from_audio(audio_data, sample_rate, source=None):
+    """
+    Índice de um sinal mono já carregado na memória.
+    """
+    return build_vocal_activity(frame_rms(audio_data, sample_rate), sample_rate, len(audio_data), source)
+
+
+def write_vocal_activity(path, activity):
+    """
+    Grava o índice em JSON compacto.
+
+    Returns:
+        int: tamanho do arquivo em bytes
+    """
+    tmp = temp_path_for(path)
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(activity, f, separators=(',', ':'))
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def describe(activity):
+    """
+    Resumo de uma linha para os logs.
+    """
+    voiced = sum(end - start for start, end in activity["segments"])
+    duration = max(activity["duration"], 1e-9)
+    return (f"{len(activity['segments'])} trecho(s) com voz, {voiced:.1f}s de {activity['duration']:.1f}s "
+            f"({voiced / duration:.0%})")
+
+
+def extract_vocal_activity(audio_file, output_path=None, block_size=65536):
+    """
+    Gera o índice lendo o áudio em blocos (memória constante).
+
+    Returns:
+        dict: o índice gravado
+    """
+    sample_rate = probe(audio_file)["sample_rate"]
+    accumulator = FrameEnergyAccumulator(sample_rate)
+    num_samples = 0
+    for block in read_pcm_blocks(audio_file, sample_rate, 1, block_size):
+        accumulator.add(block[0])
+        num_samples += block.shape[1]
+
+    activity = build_vocal_activity(accumulator.result(), sample_rate, num_samples, os.path.basename(audio_file))
+    output_path = output_path or vocal_activity_path_for(audio_file)
+    size = write_vocal_activity(output_path, activity)
+    print(f"Atividade vocal salva em: {output_path} ({size / 1024:.1f} KB - {describe(activity)})")
+    return activity
+
+
+if __name__ == "__main__":
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    if len(sys.argv) < 2:
+        print("Uso: python vocal_activity.py <vocals.wav> [saida.json]")
+        sys.exit(1)
+    extract_vocal_activity(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
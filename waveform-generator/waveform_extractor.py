@@ -1,35 +1,66 @@
 """
 Script para extrair waveform de arquivo de áudio de voz
-Gera arquivo JSON com valores e imagem PNG com visualização
+Gera arquivo binário com picos em múltiplas resoluções (waveform.bin) e imagem PNG
+com visualização. O JSON antigo com todas as amostras continua disponível com --json.
+
+Com --stream o áudio é lido em blocos (duas passadas: estatísticas e depois
+picos/imagem), com uso de memória constante independente da duração.
+
+O áudio é decodificado pelo módulo compartilhado audio-io/audio_io.py. Quando
+existe o sidecar .f32 gravado pelo separador (ex.: vocals.f32 ao lado de
+vocals.wav), as amostras são lidas dele por memory map, sem decodificar.
+
+Junto com os dados é gravado o índice de atividade vocal (vocal_activity.json,
+ver vocal_activity.py) na mesma pasta.
+
+Cada arquivo é gravado com nome temporário e renomeado no fim, e a execução
+fica registrada no manifesto da pasta (etapa "waveform", ver
+audio-io/manifest.py).
 """
 
-import librosa
 import numpy as np
-import matplotlib.pyplot as plt
 import json
 import os
 import sys
 import io
 
-# Configurar encoding UTF-8 para Windows
-if sys.platform == 'win32':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+# A leitura de áudio compartilhada fica em audio-io/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'audio-io'))
 
+from audio_io import load_audio, open_sidecar, probe, read_pcm_blocks
+from manifest import StepRecord
+from waveform_format import (DEFAULT_LEVELS, PREVIEW_LENGTHS, WaveformBinWriter, build_pyramid,
+                             preview_path_for, temp_path_for, write_previews, write_waveform_bin)
+from waveform_render import PLOT_WIDTH, column_starts, write_png
+from vocal_activity import (FrameEnergyAccumulator, build_vocal_activity, describe, vocal_activity_from_audio,
+                            vocal_activity_path_for, write_vocal_activity)
 
-def extract_waveform(audio_file='voz.wav', output_json='waveform.json', output_image='waveform.png', 
-                     json_folder=None, image_folder=None, use_new_structure=True):
+# Amostras por bloco no modo streaming
+DEFAULT_BLOCK_SIZE = 65536
+
+
+def extract_waveform(audio_file='voz.wav', output_json='waveform.bin', output_image='waveform.png', 
+                     json_folder=None, image_folder=None, use_new_structure=True, output_format='bin',
+                     stream=False, block_size=DEFAULT_BLOCK_SIZE):
     """
-    Extrai a waveform de um arquivo de áudio e gera JSON e imagem
+    Extrai a waveform de um arquivo de áudio e gera os dados e a imagem
     
     Args:
         audio_file: Caminho do arquivo de áudio de entrada (padrão: voz.wav)
-        output_json: Nome do arquivo JSON de saída (padrão: waveform.json)
+        output_json: Nome do arquivo de dados de saída (padrão: waveform.bin)
         output_image: Nome do arquivo PNG de saída (padrão: waveform.png)
-        json_folder: Pasta para salvar arquivos JSON (padrão: json)
+        json_folder: Pasta para salvar os arquivos de dados (padrão: json)
         image_folder: Pasta para salvar arquivos PNG (padrão: images)
+        output_format: 'bin' (picos em múltiplas resoluções) ou 'json' (todas as amostras, formato antigo)
+        stream: lê o áudio em blocos com memória constante
+        block_size: amostras por bloco no modo streaming
     """
     
+    # Nome fixo do arquivo de dados na nova estrutura, conforme o formato
+    data_filename = 'waveform.json' if output_format == 'json' else 'waveform.bin'
+    # Ajustar a extensão do nome pedido ao formato escolhido
+    output_json = os.path.splitext(output_json)[0] + os.path.splitext(data_filename)[1]
+    
     # Verifica se o arquivo de áudio existe
     if not os.path.exists(audio_file):
         print(f"Erro: Arquivo '{audio_file}' não encontrado!")
@@ -43,7 +74,7 @@ def extract_waveform(audio_file='voz.wav', output_json='waveform.json', output_i
             json_folder = image_folder
         if image_folder is None:
             image_folder = json_folder
-        output_json = 'waveform.json'
+        output_json = data_filename
         output_image = 'waveform.png'
     elif use_new_structure:
         # Se use_new_structure está ativo e nenhum diretório foi fornecido, tentar detectar automaticamente
@@ -73,7 +104,7 @@ def extract_waveform(audio_file='voz.wav', output_json='waveform.json', output_i
             # Sempre sobrescrever para usar o diretório correto quando detectado
             json_folder = target_dir
             image_folder = target_dir
-            output_json = 'waveform.json'  # Nome fixo na nova estrutura
+            output_json = data_filename  # Nome fixo na nova estrutura
             output_image = 'waveform.png'  # Nome fixo na nova estrutura
         else:
             # Fallback: usar nome do arquivo
@@ -97,7 +128,7 @@ def extract_waveform(audio_file='voz.wav', output_json='waveform.json', output_i
                 json_folder = target_dir
             if image_folder is None:
                 image_folder = target_dir
-            output_json = 'waveform.json'
+            output_json = data_filename
             output_image = 'waveform.png'
     
     # Garantir valores padrão se ainda forem None (fallback para estrutura antiga)
@@ -111,12 +142,87 @@ def extract_waveform(audio_file='voz.wav', output_json='waveform.json', output_i
     os.makedirs(image_folder, exist_ok=True)
     print(f"Pastas criadas/verificadas: '{json_folder}' e '{image_folder}'")
     
+    json_path = os.path.join(json_folder, output_json)
+    image_path = os.path.join(image_folder, output_image)
+    
+    outputs = [json_path, image_path, preview_path_for(json_path), vocal_activity_path_for(json_path)]
+    with StepRecord('waveform', [audio_file], outputs, params={"format": output_format, "stream": stream}):
+        if stream:
+            total_values = extract_streaming(audio_file, json_path, image_path, output_format, block_size)
+        else:
+            total_values = extract_in_memory(audio_file, json_path, image_path, output_format)
+    
+    # Resumo final
+    print("\n" + "="*60)
+    print("Extração concluída com sucesso!")
+    print("="*60)
+    print(f"Arquivo de dados: {json_path}")
+    print(f"Arquivo PNG: {image_path}")
+    print(f"Total de valores na waveform: {total_values}")
+    rss = peak_rss_bytes()
+    if rss is not None:
+        print(f"Pico de memória (RSS): {rss / (1024 * 1024):.1f} MB")
+    print("="*60)
+
+
+def peak_rss_bytes():
+    """
+    Retorna o pico de memória residente (RSS) do processo em bytes, ou None
+    se não for possível medir nesta plataforma.
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa em KB, macOS em bytes
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss)
+    except ImportError:
+        return None
+
+
+def save_previews(json_path, mins, maxs, sample_rate, num_samples):
+    """
+    Grava os previews de tamanho fixo ao lado do arquivo de dados.
+    """
+    preview_path = preview_path_for(json_path)
+    counts = write_previews(preview_path, mins, maxs, sample_rate, num_samples)
+    print(f"Previews salvos em: {preview_path} ({', '.join(str(n) for n in counts.values())} pontos)")
+
+
+def save_vocal_activity(json_path, activity):
+    """
+    Grava o índice de atividade vocal ao lado do arquivo de dados.
+    """
+    activity_path = vocal_activity_path_for(json_path)
+    size = write_vocal_activity(activity_path, activity)
+    print(f"Atividade vocal salva em: {activity_path} ({size / 1024:.1f} KB - {describe(activity)})")
+
+
+def extract_in_memory(audio_file, json_path, image_path, output_format):
+    """
+    Carrega o áudio inteiro na memória e gera os dados e a imagem.
+    
+    Returns:
+        int: total de valores gravados
+    """
     print(f"Carregando áudio: {audio_file}")
     
-    # Carrega o áudio no formato mono usando librosa
-    # sr=None mantém a taxa de amostragem original
-    # mono=True converte para mono (canal único)
-    audio_data, sample_rate = librosa.load(audio_file, sr=None, mono=True)
+    sidecar = open_sidecar(audio_file)
+    if sidecar is not None:
+        # Sidecar do separador: memory map [amostras, canais], sem decodificar
+        print(f"Usando sidecar PCM: {sidecar.path}")
+        data = sidecar.data
+        audio_data = data.mean(axis=1, dtype=np.float32) if sidecar.channels > 1 else data[:, 0]
+        sample_rate = sidecar.sample_rate
+    else:
+        # Carrega o áudio em mono (média dos canais) na taxa de amostragem original
+        audio, sample_rate = load_audio(audio_file, channels=1)
+        audio_data = audio[0]
     
     print(f"Taxa de amostragem: {sample_rate} Hz")
     print(f"Duração: {len(audio_data) / sample_rate:.2f} segundos")
@@ -139,124 +245,264 @@ def extract_waveform(audio_file='voz.wav', output_json='waveform.json', output_i
     max_val = np.max(normalized_waveform)
     print(f"Valores normalizados - Min: {min_val:.6f}, Max: {max_val:.6f}")
     
-    # Converte para lista Python para serialização JSON
-    # Usa float32 para reduzir tamanho do arquivo mantendo precisão
-    waveform_list = normalized_waveform.astype(np.float32).tolist()
-    
-    # Prepara dados para JSON
-    waveform_data = {
-        "sample_rate": int(sample_rate),
-        "duration": float(len(normalized_waveform) / sample_rate),
-        "num_samples": len(normalized_waveform),
-        "waveform": waveform_list
-    }
-    
-    # Monta o caminho completo do arquivo JSON na pasta específica
-    json_path = os.path.join(json_folder, output_json)
-    
-    # Salva o arquivo JSON
-    print(f"\nSalvando waveform em: {json_path}")
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(waveform_data, f, indent=2)
-    
-    print(f"Arquivo JSON criado com sucesso! ({len(waveform_list)} valores)")
-    
-    # Monta o caminho completo do arquivo PNG na pasta específica
-    image_path = os.path.join(image_folder, output_image)
+    if output_format == 'json':
+        # Formato antigo: todas as amostras como lista Python
+        # Usa float32 para reduzir tamanho do arquivo mantendo precisão
+        waveform_list = normalized_waveform.astype(np.float32).tolist()
+        
+        # Prepara dados para JSON
+        waveform_data = {
+            "sample_rate": int(sample_rate),
+            "duration": float(len(normalized_waveform) / sample_rate),
+            "num_samples": len(normalized_waveform),
+            "waveform": waveform_list
+        }
+        
+        # Salva o arquivo JSON
+        print(f"\nSalvando waveform em: {json_path}")
+        tmp = temp_path_for(json_path)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(waveform_data, f, indent=2)
+        os.replace(tmp, json_path)
+        
+        print(f"Arquivo JSON criado com sucesso! ({len(waveform_list)} valores)")
+        total_values = len(waveform_list)
+    else:
+        # Formato binário: pirâmide de picos min/max em int16
+        pyramid = build_pyramid(normalized_waveform, DEFAULT_LEVELS)
+        
+        print(f"\nSalvando waveform em: {json_path}")
+        file_size = write_waveform_bin(json_path, pyramid, sample_rate, len(normalized_waveform),
+                                       peak=float(max_value))
+        
+        levels_info = ", ".join(f"{spb} amostras/bin: {len(mins)} bins" for spb, mins, _ in pyramid)
+        print(f"Arquivo binário criado com sucesso! ({file_size / 1024:.1f} KB - {levels_info})")
+        total_values = sum(len(mins) * 2 for _, mins, _ in pyramid)
     
     # Gera a visualização da waveform
     print(f"\nGerando imagem: {image_path}")
     
-    # Para áudios muito longos, faz downsampling para visualização
-    # Mantém no máximo 100.000 pontos para renderização eficiente
-    max_points = 100000
-    if len(normalized_waveform) > max_points:
-        # Calcula o fator de downsampling
-        downsample_factor = len(normalized_waveform) // max_points
-        # Faz downsampling mantendo a forma geral da onda
-        waveform_plot = normalized_waveform[::downsample_factor]
-        time_axis_plot = np.linspace(0, len(normalized_waveform) / sample_rate, len(waveform_plot))
-        print(f"Downsampling aplicado para visualização: {len(normalized_waveform)} -> {len(waveform_plot)} pontos")
-    else:
-        # Usa todos os pontos se o áudio for curto
-        waveform_plot = normalized_waveform
-        time_axis_plot = np.linspace(0, len(normalized_waveform) / sample_rate, len(normalized_waveform))
-    
-    # Cria a figura com tamanho adequado
-    plt.figure(figsize=(14, 6))
-    
-    # Plota a waveform
-    plt.plot(time_axis_plot, waveform_plot, linewidth=0.5, color='#2E86AB')
-    plt.fill_between(time_axis_plot, waveform_plot, 0, alpha=0.3, color='#2E86AB')
+    # Previews pré-calculados para o backend (picos por bucket)
+    save_previews(json_path, normalized_waveform, normalized_waveform, sample_rate, len(normalized_waveform))
     
-    # Configurações do gráfico
-    plt.title('Waveform do Áudio de Voz', fontsize=16, fontweight='bold', pad=20)
-    plt.xlabel('Tempo (segundos)', fontsize=12)
-    plt.ylabel('Amplitude (normalizada)', fontsize=12)
-    plt.grid(True, alpha=0.3, linestyle='--')
-    plt.xlim(0, time_axis_plot[-1])
-    plt.ylim(-1.1, 1.1)
+    # Trechos com voz e energia a cada 100 ms (níveis do sinal original, sem normalizar)
+    save_vocal_activity(json_path, vocal_activity_from_audio(audio_data, sample_rate, os.path.basename(audio_file)))
     
-    # Adiciona informações no gráfico
-    info_text = f"Taxa de amostragem: {sample_rate} Hz | Duração: {time_axis_plot[-1]:.2f}s | Amostras: {len(normalized_waveform)}"
-    plt.figtext(0.5, 0.02, info_text, ha='center', fontsize=9, style='italic')
+    # Envelope min/max por coluna de pixels (mantém os picos, sem descartar amostras)
+    size = write_png(image_path, normalized_waveform, normalized_waveform,
+                     len(normalized_waveform) / sample_rate)
+    print(f"Imagem PNG criada com sucesso! ({size / 1024:.1f} KB)")
     
-    # Ajusta layout para evitar cortes
-    plt.tight_layout()
-    
-    # Salva a imagem
-    plt.savefig(image_path, dpi=150, bbox_inches='tight')
-    plt.close()
-    
-    print(f"Imagem PNG criada com sucesso!")
+    return total_values
+
+
+def read_mono_blocks(audio_file, sample_rate, block_size):
+    """
+    Lê o áudio em blocos mono float32 (média dos canais).
+    """
+    for block in read_pcm_blocks(audio_file, sample_rate, 1, block_size):
+        yield block[0]
+
+
+class EnvelopeAccumulator:
+    """
+    Envelope min/max com um número fixo de colunas, preenchido bloco a bloco
+    (previews e imagem do modo streaming).
+
+    Por padrão a amostra i vai para a coluna i * columns // num_samples, o
+    critério do reduce_peaks dos previews. Com pixel_columns=True as colunas
+    seguem o column_envelope da imagem, então o PNG sai igual ao do modo em
+    memória.
+    """
+
+    def __init__(self, num_samples, columns, pixel_columns=False):
+        self.num_samples = max(int(num_samples), 1)
+        if pixel_columns:
+            self.starts, self.inverse = column_starts(self.num_samples, columns)
+        else:
+            columns = max(min(columns, self.num_samples), 1)
+            # Primeira amostra de cada coluna: ceil(c * num_samples / columns)
+            self.starts = (np.arange(columns, dtype=np.int64) * self.num_samples + columns - 1) // columns
+            self.inverse = None
+        self.mins = np.full(len(self.starts), np.inf, dtype=np.float32)
+        self.maxs = np.full(len(self.starts), -np.inf, dtype=np.float32)
+        self.position = 0
+
+    def add(self, block):
+        if len(block) == 0:
+            return
+        # As colunas são contíguas: reduzir o trecho de cada uma dentro do bloco de uma vez
+        first = np.searchsorted(self.starts, self.position, side='right') - 1
+        last = np.searchsorted(self.starts, self.position + len(block) - 1, side='right') - 1
+        targets = np.arange(first, last + 1)
+        offsets = np.maximum(self.starts[targets] - self.position, 0)
+        self.mins[targets] = np.minimum(self.mins[targets], np.minimum.reduceat(block, offsets))
+        self.maxs[targets] = np.maximum(self.maxs[targets], np.maximum.reduceat(block, offsets))
+        self.position += len(block)
+
+    def result(self):
+        mins = np.where(np.isfinite(self.mins), self.mins, 0.0)
+        maxs = np.where(np.isfinite(self.maxs), self.maxs, 0.0)
+        if self.inverse is not None:
+            return mins[self.inverse], maxs[self.inverse]
+        return mins, maxs
+
+
+def extract_streaming(audio_file, json_path, image_path, output_format, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Extrai a waveform lendo o áudio em blocos, com memória constante.
+
+    1ª passada: conta as amostras, encontra o pico absoluto (normalização) e
+    calcula a energia usada no índice de atividade vocal.
+    2ª passada: normaliza cada bloco e grava os picos e o envelope da imagem.
+
+    Returns:
+        int: total de valores gravados
+    """
+    print(f"Carregando áudio em blocos de {block_size} amostras: {audio_file}")
+
+    sample_rate = probe(audio_file)["sample_rate"]
+
+    # 1ª passada: estatísticas
+    num_samples = 0
+    max_value = 0.0
+    energy = FrameEnergyAccumulator(sample_rate)
+    for block in read_mono_blocks(audio_file, sample_rate, block_size):
+        num_samples += len(block)
+        energy.add(block)
+        if len(block):
+            max_value = max(max_value, float(np.max(np.abs(block))))
+
+    duration = num_samples / sample_rate
+    print(f"Taxa de amostragem: {sample_rate} Hz")
+    print(f"Duração: {duration:.2f} segundos")
+    print(f"Número de amostras: {num_samples}")
+
+    # Mesma divisão do modo em memória, para valores idênticos
+    divisor = np.float32(max_value if max_value > 0 else 1.0)
+    if max_value <= 0:
+        print("Aviso: Áudio parece estar silencioso (valores próximos de zero)")
+
+    # 2ª passada: picos/amostras normalizados e envelope da imagem
+    # Mesmo critério de colunas da imagem do modo em memória (column_envelope)
+    envelope = EnvelopeAccumulator(num_samples, PLOT_WIDTH, pixel_columns=True)
+    # Os previews menores são derivados do maior
+    preview_envelope = EnvelopeAccumulator(num_samples, max(PREVIEW_LENGTHS))
+    print(f"\nSalvando waveform em: {json_path}")
+
+    if output_format == 'json':
+        tmp = temp_path_for(json_path)
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                # Mesmo layout do json.dump(..., indent=2) do modo em memória
+                f.write('{\n')
+                f.write(f'  "sample_rate": {int(sample_rate)},\n')
+                f.write(f'  "duration": {json.dumps(float(duration))},\n')
+                f.write(f'  "num_samples": {num_samples},\n')
+                f.write('  "waveform": [')
+                first = True
+                for block in read_mono_blocks(audio_file, sample_rate, block_size):
+                    normalized = block / divisor
+                    envelope.add(normalized)
+                    preview_envelope.add(normalized)
+                    if len(normalized) == 0:
+                        continue
+                    values = ',\n    '.join(map(repr, normalized.tolist()))
+                    f.write(('\n    ' if first else ',\n    ') + values)
+                    first = False
+                f.write('\n  ]\n}' if not first else ']\n}')
+        except BaseException:
+            # Não deixa o temporário para trás (como o WaveformBinWriter)
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        os.replace(tmp, json_path)
+
+        print(f"Arquivo JSON criado com sucesso! ({num_samples} valores)")
+        total_values = num_samples
+    else:
+        with WaveformBinWriter(json_path, sample_rate, num_samples, peak=max_value) as writer:
+            for block in read_mono_blocks(audio_file, sample_rate, block_size):
+                normalized = block / divisor
+                envelope.add(normalized)
+                preview_envelope.add(normalized)
+                writer.add(normalized)
+
+        levels_info = ", ".join(f"{spb} amostras/bin: {bins} bins"
+                                for spb, bins in zip(writer.levels, writer.num_bins))
+        print(f"Arquivo binário criado com sucesso! ({writer.size / 1024:.1f} KB - {levels_info})")
+        total_values = sum(bins * 2 for bins in writer.num_bins)
+
+    preview_mins, preview_maxs = preview_envelope.result()
+    save_previews(json_path, preview_mins, preview_maxs, sample_rate, num_samples)
+    save_vocal_activity(json_path, build_vocal_activity(energy.result(), sample_rate, num_samples,
+                                                        os.path.basename(audio_file)))
     
-    # Resumo final
-    print("\n" + "="*60)
-    print("Extração concluída com sucesso!")
-    print("="*60)
-    print(f"Arquivo JSON: {json_path}")
-    print(f"Arquivo PNG: {image_path}")
-    print(f"Total de valores na waveform: {len(waveform_list)}")
-    print("="*60)
+    # Gera a visualização da waveform a partir do envelope
+    print(f"\nGerando imagem: {image_path}")
+    mins, maxs = envelope.result()
+    size = write_png(image_path, mins, maxs, duration)
+    print(f"Imagem PNG criada com sucesso! ({size / 1024:.1f} KB)")
+
+    return total_values
 
 
 if __name__ == "__main__":
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    # Flags opcionais (podem aparecer em qualquer posição):
+    #   --json            grava o JSON antigo com todas as amostras em vez do waveform.bin
+    #   --stream          lê o áudio em blocos, com memória constante
+    #   --block-size=N    amostras por bloco no modo streaming
+    output_format = 'json' if '--json' in sys.argv else 'bin'
+    stream = '--stream' in sys.argv
+    block_size = DEFAULT_BLOCK_SIZE
+    for arg in sys.argv[1:]:
+        if arg.startswith('--block-size='):
+            block_size = int(arg.split('=', 1)[1])
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    data_extension = '.json' if output_format == 'json' else '.bin'
+    
     # Permite passar o arquivo de áudio como argumento da linha de comando
-    if len(sys.argv) > 1:
-        audio_file = sys.argv[1]
+    if len(args) > 0:
+        audio_file = args[0]
     else:
         audio_file = 'voz.wav'
     
     # Extrai o nome base do arquivo de áudio (sem extensão) para usar nos arquivos de saída
     audio_basename = os.path.splitext(os.path.basename(audio_file))[0]
     
-    # Permite passar o nome do arquivo JSON como segundo argumento
+    # Permite passar o nome do arquivo de dados como segundo argumento
     # Se não for especificado, usa o nome do áudio
-    if len(sys.argv) > 2:
-        output_json = sys.argv[2]
+    if len(args) > 1:
+        output_json = args[1]
     else:
-        output_json = f'{audio_basename}.json'
+        output_json = f'{audio_basename}{data_extension}'
     
     # Permite passar o nome do arquivo PNG como terceiro argumento
     # Se não for especificado, usa o nome do áudio
-    if len(sys.argv) > 3:
-        output_image = sys.argv[3]
+    if len(args) > 2:
+        output_image = args[2]
     else:
         output_image = f'{audio_basename}.png'
     
-    # Permite passar a pasta JSON como quarto argumento
+    # Permite passar a pasta de dados como quarto argumento
     # Se não for passado, deixar None para detecção automática
-    if len(sys.argv) > 4:
-        json_folder = sys.argv[4]
+    if len(args) > 3:
+        json_folder = args[3]
     else:
         json_folder = None  # Será determinado automaticamente pela função
     
     # Permite passar a pasta de imagens como quinto argumento
-    if len(sys.argv) > 5:
-        image_folder = sys.argv[5]
+    if len(args) > 4:
+        image_folder = args[4]
     else:
         image_folder = None  # Será determinado automaticamente pela função
     
     # Executa a extração
-    extract_waveform(audio_file, output_json, output_image, json_folder, image_folder, use_new_structure=True)
-
+    extract_waveform(audio_file, output_json, output_image, json_folder, image_folder,
+                     use_new_structure=True, output_format=output_format,
+                     stream=stream, block_size=block_size)
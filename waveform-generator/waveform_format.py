@@ -0,0 +1,370 @@
+"""
+Formato binário de waveform com múltiplas resoluções (waveform.bin)
+
+Guarda uma pirâmide de picos min/max (por padrão 256, 1024 e 4096 amostras por
+bin) em int16, para que qualquer trecho possa ser lido por offset de bytes sem
+carregar o arquivo inteiro.
+
+Layout (little-endian):
+  Cabeçalho (32 bytes)
+    4s   magic "KWAV"
+    u16  versão (1)
+    u16  número de níveis
+    u32  taxa de amostragem
+    u64  número de amostras do áudio original
+    f64  duração em segundos
+    f32  pico absoluto usado na normalização
+  Tabela de níveis (16 bytes por nível)
+    u32  amostras por bin
+    u32  número de bins
+    u64  offset dos dados do nível (a partir do início do arquivo)
+  Dados de cada nível
+    int16 intercalado [min0, max0, min1, max1, ...], escala -32767..32767 = -1..1
+"""
+
+import os
+import json
+import struct
+
+import numpy as np
+
+
+MAGIC = b'KWAV'
+VERSION = 1
+DEFAULT_LEVELS = (256, 1024, 4096)
+
+HEADER = struct.Struct('<4sHHIQdf')
+LEVEL = struct.Struct('<IIQ')
+
+INT16_SCALE = 32767
+
+
+def compute_peaks(samples, samples_per_bin):
+    """
+    Calcula os picos min/max por bin de forma vetorizada.
+
+    O último bin pode ser parcial (não é preenchido com zeros).
+
+    Returns:
+        tuple: (mins, maxs) como arrays float32
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    full_bins = len(samples) // samples_per_bin
+    body = samples[:full_bins * samples_per_bin].reshape(full_bins, samples_per_bin)
+    mins = body.min(axis=1)
+    maxs = body.max(axis=1)
+
+    tail = samples[full_bins * samples_per_bin:]
+    if len(tail) > 0:
+        mins = np.append(mins, tail.min())
+        maxs = np.append(maxs, tail.max())
+
+    return mins.astype(np.float32), maxs.astype(np.float32)
+
+
+def merge_peaks(mins, maxs, factor):
+    """
+    Agrupa picos de um nível mais fino em bins `factor` vezes maiores.
+    """
+    full_bins = len(mins) // factor
+    merged_min = mins[:full_bins * factor].reshape(full_bins, factor).min(axis=1)
+    merged_max = maxs[:full_bins * factor].reshape(full_bins, factor).max(axis=1)
+    if len(mins) % factor:
+        merged_min = np.append(merged_min, mins[full_bins * factor:].min())
+        merged_max = np.append(merged_max, maxs[full_bins * factor:].max())
+    return merged_min, merged_max
+
+
+def build_pyramid(samples, levels=DEFAULT_LEVELS):
+    """
+    Calcula todos os níveis da pirâmide. Níveis múltiplos do anterior são
+    derivados dele em vez de percorrer as amostras de novo.
+
+    Returns:
+        list: [(amostras por bin, mins, maxs), ...] em ordem crescente
+    """
+    pyramid = []
+    for samples_per_bin in sorted(levels):
+        previous = pyramid[-1] if pyramid else None
+        if previous is not None and samples_per_bin % previous[0] == 0:
+            mins, maxs = merge_peaks(previous[1], previous[2], samples_per_bin // previous[0])
+        else:
+            mins, maxs = compute_peaks(samples, samples_per_bin)
+        pyramid.append((samples_per_bin, mins, maxs))
+    return pyramid
+
+
+def quantize(mins, maxs):
+    """
+    Converte picos float (-1..1) para int16 intercalado [min, max, ...].
+    """
+    interleaved = np.empty(len(mins) * 2, dtype=np.float32)
+    interleaved[0::2] = mins
+    interleaved[1::2] = maxs
+    return np.clip(np.round(interleaved * INT16_SCALE), -INT16_SCALE, INT16_SCALE).astype('<i2')
+
+
+def temp_path_for(path):
+    """
+    Arquivo temporário ao lado de `path`: as saídas são gravadas nele e
+    renomeadas no fim, então o arquivo com o nome final está sempre completo.
+    """
+    directory, name = os.path.split(str(path))
+    return os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+
+
+def write_waveform_bin(path, pyramid, sample_rate, num_samples, peak=1.0):
+    """
+    Grava a pirâmide de picos no formato waveform.bin.
+
+    Args:
+        path: arquivo de saída
+        pyramid: resultado de build_pyramid() (picos já normalizados em -1..1)
+        sample_rate: taxa de amostragem do áudio original
+        num_samples: número de amostras do áudio original
+        peak: pico absoluto usado na normalização
+    """
+    data_offset = HEADER.size + LEVEL.size * len(pyramid)
+    table = []
+    blocks = []
+    for samples_per_bin, mins, maxs in pyramid:
+        block = quantize(mins, maxs)
+        table.append(LEVEL.pack(samples_per_bin, len(mins), data_offset))
+        blocks.append(block)
+        data_offset += block.nbytes
+
+    duration = num_samples / sample_rate if sample_rate else 0.0
+    tmp = temp_path_for(path)
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(pyramid), int(sample_rate), int(num_samples),
+                            float(duration), float(peak)))
+        for entry in table:
+            f.write(entry)
+        for block in blocks:
+            f.write(block.tobytes())
+    os.replace(tmp, path)
+
+    return data_offset
+
+
+def read_header(path):
+    """
+    Lê apenas o cabeçalho e a tabela de níveis.
+
+    Returns:
+        dict com sample_rate, num_samples, duration, peak e levels
+        (lista de dicts com samples_per_bin, num_bins e offset)
+    """
+    with open(path, 'rb') as f:
+        magic, version, num_levels, sample_rate, num_samples, duration, peak = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"Arquivo não é um waveform.bin: {path}")
+        if version != VERSION:
+            raise ValueError(f"Versão de waveform.bin não suportada: {version}")
+        levels = []
+        for _ in range(num_levels):
+            samples_per_bin, num_bins, offset = LEVEL.unpack(f.read(LEVEL.size))
+            levels.append({"samples_per_bin": samples_per_bin, "num_bins": num_bins, "offset": offset})
+
+    return {
+        "sample_rate": sample_rate,
+        "num_samples": num_samples,
+        "duration": duration,
+        "peak": peak,
+        "levels": levels,
+    }
+
+
+def read_level(path, samples_per_bin=None, header=None):
+    """
+    Abre um nível com np.memmap (sem ler o arquivo inteiro).
+
+    Args:
+        samples_per_bin: nível desejado; None usa o mais fino
+
+    Returns:
+        tuple: (mins, maxs) como arrays float32 em -1..1
+    """
+    if header is None:
+        header = read_header(path)
+    levels = header["levels"]
+    level = levels[0] if samples_per_bin is None else next(
+        (l for l in levels if l["samples_per_bin"] == samples_per_bin), None)
+    if level is None:
+        raise ValueError(f"Nível {samples_per_bin} não existe em {path}")
+
+    data = np.memmap(path, dtype='<i2', mode='r', offset=level["offset"], shape=(level["num_bins"] * 2,))
+    mins = data[0::2].astype(np.float32) / INT16_SCALE
+    maxs = data[1::2].astype(np.float32) / INT16_SCALE
+    return mins, maxs
+
+
+class WaveformBinWriter:
+    """
+    Grava um waveform.bin de forma incremental, bloco a bloco.
+
+    Como o número de amostras é conhecido de antemão, o layout de todos os
+    níveis é calculado na abertura e os picos de cada bloco são gravados
+    direto na posição final. A memória usada não depende da duração do áudio.
+    O arquivo é gravado com nome temporário e só aparece como `path` no close().
+
+    Uso:
+        with WaveformBinWriter(path, sample_rate, num_samples, peak) as writer:
+            for block in blocos_normalizados:
+                writer.add(block)
+    """
+
+    def __init__(self, path, sample_rate, num_samples, peak=1.0, levels=DEFAULT_LEVELS):
+        self.path = path
+        self.levels = sorted(levels)
+        self.num_bins = [-(-int(num_samples) // spb) for spb in self.levels]
+
+        self.offsets = []
+        data_offset = HEADER.size + LEVEL.size * len(self.levels)
+        for bins in self.num_bins:
+            self.offsets.append(data_offset)
+            data_offset += bins * 2 * 2
+        self.size = data_offset
+
+        # Amostras que ainda não completaram um bin, por nível
+        self._carry = [np.empty(0, dtype=np.float32) for _ in self.levels]
+        self._written = [0] * len(self.levels)
+
+        duration = num_samples / sample_rate if sample_rate else 0.0
+        self.tmp = temp_path_for(path)
+        self._file = open(self.tmp, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, len(self.levels), int(sample_rate), int(num_samples),
+                                     float(duration), float(peak)))
+        for samples_per_bin, bins, offset in zip(self.levels, self.num_bins, self.offsets):
+            self._file.write(LEVEL.pack(samples_per_bin, bins, offset))
+
+    def _write_bins(self, index, mins, maxs):
+        block = quantize(mins, maxs)
+        self._file.seek(self.offsets[index] + self._written[index] * 4)
+        self._file.write(block.tobytes())
+        self._written[index] += len(mins)
+
+    def add(self, samples):
+        """
+        Adiciona amostras (já normalizadas em -1..1) na sequência.
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        for index, samples_per_bin in enumerate(self.levels):
+            pending = np.concatenate((self._carry[index], samples)) if len(self._carry[index]) else samples
+            full = (len(pending) // samples_per_bin) * samples_per_bin
+            if full:
+                mins, maxs = compute_peaks(pending[:full], samples_per_bin)
+                self._write_bins(index, mins, maxs)
+            self._carry[index] = pending[full:].copy()
+
+    def close(self):
+        """
+        Grava os bins parciais do final e fecha o arquivo.
+
+        Returns:
+            int: tamanho do arquivo em bytes
+        """
+        if self._file.closed:
+            return self.size
+        for index, samples_per_bin in enumerate(self.levels):
+            if len(self._carry[index]):
+                mins, maxs = compute_peaks(self._carry[index], samples_per_bin)
+                self._write_bins(index, mins, maxs)
+                self._carry[index] = np.empty(0, dtype=np.float32)
+        self._file.close()
+        os.replace(self.tmp, self.path)
+        return self.size
+
+    def abort(self):
+        """
+        Fecha e remove o arquivo temporário após um erro.
+        """
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+# Tamanhos fixos dos previews pré-calculados (cada um divide o maior)
+PREVIEW_LENGTHS = (500, 1000, 2000, 4000, 8000, 16000)
+PREVIEW_VERSION = 1
+
+
+def reduce_peaks(mins, maxs, length):
+    """
+    Reduz picos min/max (ou amostras, com mins = maxs) para exatamente
+    `length` buckets, mantendo o mínimo e o máximo de cada um, sem descartar
+    transientes como o [::fator].
+
+    Quando o tamanho é múltiplo de `length` usa reshape + min/max; senão,
+    buckets de tamanho quase igual com reduceat. Se já houver `length`
+    valores ou menos, retorna os arrays sem mudança.
+    """
+    mins = np.asarray(mins, dtype=np.float32)
+    maxs = np.asarray(maxs, dtype=np.float32)
+    if len(mins) <= length:
+        return mins, maxs
+
+    if len(mins) % length == 0:
+        per_bucket = len(mins) // length
+        return (mins.reshape(length, per_bucket).min(axis=1),
+                maxs.reshape(length, per_bucket).max(axis=1))
+
+    # Amostra i vai para o bucket i * length // n (o mesmo critério do modo streaming)
+    starts = (np.arange(length, dtype=np.int64) * len(mins) + length - 1) // length
+    return np.minimum.reduceat(mins, starts), np.maximum.reduceat(maxs, starts)
+
+
+def signed_peaks(mins, maxs):
+    """
+    Um valor por bucket: o pico (com sinal) de maior magnitude.
+    """
+    return np.where(np.abs(maxs) >= np.abs(mins), maxs, mins)
+
+
+def write_previews(path, mins, maxs, sample_rate, num_samples, lengths=PREVIEW_LENGTHS):
+    """
+    Grava previews pré-calculados (pico com sinal por bucket) em JSON, um
+    array por tamanho. Cada tamanho é derivado do maior, que é derivado da
+    entrada, para não percorrer o áudio várias vezes.
+
+    Returns:
+        dict: {tamanho: número de pontos gravados}
+    """
+    previews = {}
+    current_min, current_max = np.asarray(mins), np.asarray(maxs)
+    for length in sorted(lengths, reverse=True):
+        current_min, current_max = reduce_peaks(current_min, current_max, length)
+        values = np.round(signed_peaks(current_min, current_max).astype(np.float64), 4)
+        previews[str(length)] = values.tolist()
+
+    data = {
+        "version": PREVIEW_VERSION,
+        "sample_rate": int(sample_rate),
+        "duration": float(num_samples / sample_rate) if sample_rate else 0.0,
+        "num_samples": int(num_samples),
+        "previews": dict(sorted(previews.items(), key=lambda item: int(item[0]))),
+    }
+    tmp = temp_path_for(path)
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+    return {int(length): len(values) for length, values in data["previews"].items()}
+
+
+def preview_path_for(data_path):
+    """
+    Caminho do arquivo de previews ao lado do arquivo de dados
+    (waveform.bin -> waveform_preview.json).
+    """
+    return os.path.splitext(str(data_path))[0] + '_preview.json'
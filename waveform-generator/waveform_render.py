@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Renderizador rápido da imagem da waveform (waveform.png), sem matplotlib.
+
+O envelope min/max de cada coluna de pixels é rasterizado direto em um buffer
+RGBA do NumPy, que é codificado em PNG com zlib. A imagem tem as mesmas
+dimensões da gerada antes pelo matplotlib (figura 14x6 a 150 DPI, recortada),
+com moldura, grade e a forma de onda na mesma cor; os textos (título, eixos)
+não são desenhados.
+
+Uso:
+  python waveform_render.py waveform.bin waveform.png
+  python waveform_render.py --batch                     # todas as músicas do music/database.json
+  python waveform_render.py --batch --database caminho/database.json
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import zlib
+import struct
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from waveform_format import read_header, read_level, temp_path_for
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DATABASE = PROJECT_ROOT / 'music' / 'database.json'
+
+# Dimensões da imagem gerada pelo matplotlib (figsize=(14, 6), dpi=150, bbox_inches='tight')
+WIDTH = 2082
+HEIGHT = 895
+# Área do gráfico dentro da imagem (esquerda, topo, direita, base)
+PLOT_BOX = (126, 82, 2066, 801)
+PLOT_WIDTH = PLOT_BOX[2] - PLOT_BOX[0]
+# Faixa do eixo Y (plt.ylim(-1.1, 1.1))
+Y_LIMIT = 1.1
+
+BACKGROUND = (255, 255, 255, 255)
+WAVE_COLOR = (0x2E, 0x86, 0xAB, 255)
+GRID_COLOR = (0xE6, 0xE6, 0xE6, 255)
+FRAME_COLOR = (0, 0, 0, 255)
+
+
+def column_starts(length, columns):
+    """
+    Início de cada coluna num array de `length` valores (colunas vazias
+    repetem o valor anterior).
+
+    Returns:
+        tuple: (inícios distintos, índice do início de cada coluna)
+    """
+    starts = (np.arange(columns, dtype=np.int64) * length) // columns
+    starts = np.minimum(starts, length - 1)
+    return np.unique(starts, return_inverse=True)
+
+
+def column_envelope(mins, maxs, columns):
+    """
+    Reduz picos min/max (ou amostras, com mins = maxs) para `columns` colunas,
+    mantendo o mínimo e o máximo de cada coluna.
+    """
+    mins = np.asarray(mins, dtype=np.float32)
+    maxs = np.asarray(maxs, dtype=np.float32)
+    if len(mins) == 0:
+        return np.zeros(columns, dtype=np.float32), np.zeros(columns, dtype=np.float32)
+
+    unique_starts, inverse = column_starts(len(mins), columns)
+    col_min = np.minimum.reduceat(mins, unique_starts)[inverse]
+    col_max = np.maximum.reduceat(maxs, unique_starts)[inverse]
+    return col_min, col_max
+
+
+def _nice_step(duration, target_ticks=7):
+    """
+    Passo "redondo" entre marcas do eixo de tempo (1, 2, 5 x 10^n segundos).
+    """
+    if duration <= 0:
+        return 1.0
+    raw = duration / target_ticks
+    magnitude = 10 ** np.floor(np.log10(raw))
+    for factor in (1, 2, 2.5, 5, 10):
+        if raw <= factor * magnitude:
+            return factor * magnitude
+    return 10 * magnitude
+
+
+def render_envelope(mins, maxs, duration=0.0, width=WIDTH, height=HEIGHT, box=PLOT_BOX):
+    """
+    Rasteriza o envelope min/max em um buffer RGBA (altura x largura x 4).
+
+    Args:
+        mins, maxs: picos normalizados em -1..1 (qualquer tamanho)
+        duration: duração em segundos (usada para a grade vertical)
+    """
+    left, top, right, bottom = box
+    plot_width = right - left
+    plot_height = bottom - top
+
+    image = np.empty((height, width, 4), dtype=np.uint8)
+    image[:] = BACKGROUND
+
+    def value_to_row(values):
+        rows = top + (Y_LIMIT - np.asarray(values)) / (2 * Y_LIMIT) * (plot_height - 1)
+        return np.clip(np.round(rows), top, bottom - 1).astype(np.int64)
+
+    # Grade tracejada: linhas horizontais a cada 0,25 e verticais a cada passo de tempo
+    dash = (np.arange(width) // 6) % 2 == 0
+    for value in np.arange(-1.0, 1.0001, 0.25):
+        row = value_to_row(value)
+        cols = np.arange(left, right)
+        image[row, cols[dash[left:right]]] = GRID_COLOR
+    if duration > 0:
+        step = _nice_step(duration)
+        vertical_dash = (np.arange(height) // 6) % 2 == 0
+        for second in np.arange(step, duration, step):
+            col = left + int(round(second / duration * (plot_width - 1)))
+            rows = np.arange(top, bottom)
+            image[rows[vertical_dash[top:bottom]], col] = GRID_COLOR
+
+    # Envelope: cada coluna é preenchida entre o pixel do máximo e o do mínimo
+    col_min, col_max = column_envelope(mins, maxs, plot_width)
+    upper = value_to_row(col_max)
+    lower = value_to_row(col_min)
+    rows = np.arange(top, bottom)[:, None]
+    mask = (rows >= upper[None, :]) & (rows <= lower[None, :])
+    region = image[top:bottom, left:right]
+    region[mask] = WAVE_COLOR
+
+    # Moldura dos eixos
+    image[top, left:right + 1] = FRAME_COLOR
+    image[bottom, left:right + 1] = FRAME_COLOR
+    image[top:bottom + 1, left] = FRAME_COLOR
+    image[top:bottom + 1, right] = FRAME_COLOR
+
+    return image
+
+
+def encode_png(rgba):
+    """
+    Codifica um buffer RGBA (altura x largura x 4, uint8) em bytes PNG.
+    """
+    height, width, _ = rgba.shape
+
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    # Cada linha começa com o byte do filtro (0 = nenhum)
+    raw = np.empty((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 0] = 0
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), 6))
+            + chunk(b'IEND', b''))
+
+
+def write_png(path, mins, maxs, duration=0.0):
+    """
+    Renderiza o envelope e grava o PNG.
+    """
+    data = encode_png(render_envelope(mins, maxs, duration))
+    tmp = temp_path_for(path)
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+def load_envelope(waveform_path):
+    """
+    Lê picos de um waveform.bin (nível mais grosso que ainda tenha pelo menos
+    uma coluna por bin) ou de um waveform.json antigo.
+
+    Returns:
+        tuple: (mins, maxs, duração em segundos)
+    """
+    if str(waveform_path).lower().endswith('.bin'):
+        header = read_header(waveform_path)
+        candidates = [l for l in header["levels"] if l["num_bins"] >= PLOT_WIDTH]
+        level = candidates[-1] if candidates else header["levels"][0]
+        mins, maxs = read_level(waveform_path, level["samples_per_bin"], header)
+        return mins, maxs, header["duration"]
+
+    with open(waveform_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    samples = np.asarray(data.get("waveform", []), dtype=np.float32)
+    return samples, samples, float(data.get("duration", 0.0))
+
+
+def render_file(waveform_path, image_path):
+    """
+    Gera a imagem a partir de um arquivo de waveform.
+    """
+    mins, maxs, duration = load_envelope(waveform_path)
+    return write_png(image_path, mins, maxs, duration)
+
+
+def render_library(database_path=DEFAULT_DATABASE):
+    """
+    Regenera o waveform.png de todas as músicas do banco.
+
+    Returns:
+        tuple: (geradas, ignoradas, com erro)
+    """
+    database_path = Path(database_path)
+    with open(database_path, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+
+    music_root = database_path.parent
+    done = skipped = failed = 0
+    start = time.time()
+
+    for song in database.get("songs", []):
+        song_id = song.get("id")
+        waveform_file = (song.get("files") or {}).get("waveform")
+        song_dir = music_root / song_id
+        if not waveform_file or not (song_dir / waveform_file).is_file():
+            print(f"⏭️  {song_id}: sem arquivo de waveform, pulando")
+            skipped += 1
+            continue
+        try:
+            song_start = time.time()
+            size = render_file(song_dir / waveform_file, song_dir / 'waveform.png')
+            print(f"✅ {song_id}: waveform.png ({size / 1024:.1f} KB, {time.time() - song_start:.2f}s)")
+            done += 1
+        except Exception as e:
+            print(f"❌ {song_id}: {e}")
+            failed += 1
+
+    print(f"\n{done} imagens geradas, {skipped} ignoradas, {failed} com erro em {time.time() - start:.1f}s")
+    return done, skipped, failed
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Renderiza waveform.png sem matplotlib")
+    parser.add_argument("waveform", nargs="?", help="Arquivo waveform.bin ou waveform.json")
+    parser.add_argument("image", nargs="?", help="PNG de saída (padrão: waveform.png na mesma pasta)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Regenera as imagens de todas as músicas do banco")
+    parser.add_argument("--database", default=str(DEFAULT_DATABASE),
+                        help=f"Banco de músicas (padrão: {DEFAULT_DATABASE})")
+    args = parser.parse_args()
+
+    if args.batch:
+        _, _, failed = render_library(args.database)
+        sys.exit(1 if failed else 0)
+
+    if not args.waveform:
+        parser.error("informe o arquivo de waveform ou use --batch")
+    if not os.path.exists(args.waveform):
+        print(f"Erro: Arquivo '{args.waveform}' não encontrado!")
+        sys.exit(1)
+
+    image = args.image or os.path.join(os.path.dirname(os.path.abspath(args.waveform)), 'waveform.png')
+    start = time.time()
+    size = render_file(args.waveform, image)
+    print(f"Imagem PNG criada: {image} ({size / 1024:.1f} KB, {time.time() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,11 @@
 """
 Script para converter arquivo de áudio para MP3 com qualidade reduzida.
 Usado para reduzir o tamanho do arquivo antes de enviar para APIs.
+
+Com bitrate "auto" o bitrate é calculado a partir da duração para o arquivo
+caber em 25 MB, sem conversões repetidas (ver transcode.py).
 """
 import sys
-import subprocess
 import os
 import io
 
@@ -13,6 +15,8 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
+from transcode import capped_output, mp3_output, probe_duration, transcode
+
 def convert_to_mp3(input_path, output_path, bitrate='128k', sample_rate=22050, channels=1):
     """
     Converte arquivo de áudio para MP3 com qualidade reduzida.
@@ -20,7 +24,7 @@ def convert_to_mp3(input_path, output_path, bitrate='128k', sample_rate=22050, c
     Args:
         input_path: Caminho para o arquivo de áudio de entrada
         output_path: Caminho onde salvar o MP3
-        bitrate: Bitrate do MP3 (padrão: 128k)
+        bitrate: Bitrate do MP3 (padrão: 128k; "auto" calcula pela duração para caber em 25 MB)
         sample_rate: Taxa de amostragem (padrão: 22050 Hz)
         channels: Número de canais (1 = mono, 2 = estéreo, padrão: 1)
     """
@@ -30,29 +34,19 @@ def convert_to_mp3(input_path, output_path, bitrate='128k', sample_rate=22050, c
             print(f"Erro: Arquivo de entrada não encontrado: {input_path}", file=sys.stderr)
             sys.exit(1)
         
-        # Comando FFmpeg para converter para MP3
-        cmd = [
-            'ffmpeg',
-            '-i', input_path,
-            '-acodec', 'libmp3lame',
-            '-b:a', bitrate,
-            '-ar', str(sample_rate),
-            '-ac', str(channels),
-            output_path,
-            '-y'
-        ]
+        duration = probe_duration(input_path)
+        if bitrate == 'auto':
+            output = capped_output(output_path, duration)
+        else:
+            output = mp3_output(output_path, bitrate, sample_rate, channels)
         
         print(f"Convertendo áudio: {input_path}", file=sys.stderr)
         print(f"Salvando como MP3: {output_path}", file=sys.stderr)
-        print(f"Configuração: {bitrate}, {sample_rate}Hz, {channels} canal(is)", file=sys.stderr)
+        print(f"Configuração: {output['bitrate']}k, {output['sample_rate']}Hz, {output['channels']} canal(is)",
+              file=sys.stderr)
         
         # Executar FFmpeg
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        transcode(input_path, [output], duration)
         
         # Verificar se o arquivo foi criado
         if not os.path.exists(output_path):
@@ -74,16 +68,10 @@ def convert_to_mp3(input_path, output_path, bitrate='128k', sample_rate=22050, c
         
         return True
         
-    except subprocess.CalledProcessError as e:
+    except RuntimeError as e:
         print(f"Erro ao executar FFmpeg: {e}", file=sys.stderr)
-        if e.stderr:
-            print(f"FFmpeg stderr: {e.stderr}", file=sys.stderr)
-        if e.stdout:
-            print(f"FFmpeg stdout: {e.stdout}", file=sys.stderr)
-        sys.exit(1)
-    except FileNotFoundError:
-        print("Erro: FFmpeg não está instalado ou não está no PATH", file=sys.stderr)
-        print("Instale FFmpeg: https://ffmpeg.org/download.html", file=sys.stderr)
+        if "não está instalado" in str(e):
+            print("Instale FFmpeg: https://ffmpeg.org/download.html", file=sys.stderr)
         sys.exit(1)
     except Exception as e:
         print(f"Erro inesperado: {e}", file=sys.stderr)
@@ -95,6 +83,7 @@ if __name__ == '__main__':
     if len(sys.argv) < 3:
         print("Uso: python convert_audio_to_mp3.py <input_path> <output_path> [bitrate] [sample_rate] [channels]", file=sys.stderr)
         print("Exemplo: python convert_audio_to_mp3.py audio.wav audio.mp3 128k 22050 1", file=sys.stderr)
+        print("         python convert_audio_to_mp3.py audio.wav audio.mp3 auto", file=sys.stderr)
         sys.exit(1)
     
     input_path = sys.argv[1]
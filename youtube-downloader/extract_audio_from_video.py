@@ -2,9 +2,11 @@
 # -*- coding: utf-8 -*-
 """
 Script para extrair áudio de um arquivo de vídeo usando FFmpeg.
+
+O vídeo é decodificado uma vez (transcode.py): o WAV para a separação e,
+opcionalmente, o MP3 para a transcrição saem da mesma execução do ffmpeg.
 """
 import sys
-import subprocess
 import os
 import io
 
@@ -12,13 +14,17 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
-def extract_audio(video_path, audio_path):
+from transcode import DEFAULT_MAX_BYTES, capped_output, probe_duration, transcode, wav_output
+
+def extract_audio(video_path, audio_path, transcription_path=None, max_bytes=DEFAULT_MAX_BYTES):
     """
     Extrai áudio de um arquivo de vídeo usando FFmpeg.
     
     Args:
         video_path: Caminho para o arquivo de vídeo
-        audio_path: Caminho onde salvar o áudio extraído
+        audio_path: Caminho onde salvar o áudio extraído (WAV 44.1kHz estéreo)
+        transcription_path: Caminho opcional do MP3 mono para a transcrição,
+                            com bitrate calculado para caber em max_bytes
     """
     try:
         # Verificar se o vídeo existe
@@ -26,45 +32,16 @@ def extract_audio(video_path, audio_path):
             print(f"Erro: Arquivo de vídeo não encontrado: {video_path}", file=sys.stderr)
             sys.exit(1)
         
-        # Comando FFmpeg para extrair áudio
-        # -i: arquivo de entrada
-        # -vn: não incluir vídeo
-        # -acodec pcm_s16le: codec de áudio PCM 16-bit little-endian
-        # -ar 44100: taxa de amostragem 44.1kHz
-        # -ac 2: 2 canais (estéreo)
-        # -y: sobrescrever arquivo de saída se existir
-        cmd = [
-            'ffmpeg',
-            '-i', video_path,
-            '-vn',
-            '-acodec', 'pcm_s16le',
-            '-ar', '44100',
-            '-ac', '2',
-            audio_path,
-            '-y'
-        ]
-        
         print(f"Extraindo áudio de: {video_path}", file=sys.stderr)
         print(f"Salvando em: {audio_path}", file=sys.stderr)
         
-        # Executar FFmpeg
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        duration = probe_duration(video_path)
+        outputs = [wav_output(audio_path)]
+        if transcription_path:
+            outputs.append(capped_output(transcription_path, duration, max_bytes))
         
-        print(f"Extraindo áudio de: {video_path}", file=sys.stderr)
-        print(f"Salvando em: {audio_path}", file=sys.stderr)
-        
-        # Executar FFmpeg
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        # Executar FFmpeg (uma única vez para todas as saídas)
+        transcode(video_path, outputs, duration)
         
         # Verificar se o arquivo foi criado
         if not os.path.exists(audio_path):
@@ -77,18 +54,15 @@ def extract_audio(video_path, audio_path):
             sys.exit(1)
         
         print(f"Áudio extraído com sucesso! ({file_size / (1024*1024):.2f} MB)", file=sys.stderr)
+        if transcription_path:
+            print(f"MP3 para transcrição: {transcription_path} "
+                  f"({os.path.getsize(transcription_path) / (1024*1024):.2f} MB)", file=sys.stderr)
         return True
         
-    except subprocess.CalledProcessError as e:
+    except RuntimeError as e:
         print(f"Erro ao executar FFmpeg: {e}", file=sys.stderr)
-        if e.stderr:
-            print(f"FFmpeg stderr: {e.stderr}", file=sys.stderr)
-        if e.stdout:
-            print(f"FFmpeg stdout: {e.stdout}", file=sys.stderr)
-        sys.exit(1)
-    except FileNotFoundError:
-        print("Erro: FFmpeg não está instalado ou não está no PATH", file=sys.stderr)
-        print("Instale FFmpeg: https://ffmpeg.org/download.html", file=sys.stderr)
+        if "não está instalado" in str(e):
+            print("Instale FFmpeg: https://ffmpeg.org/download.html", file=sys.stderr)
         sys.exit(1)
     except Exception as e:
         print(f"Erro inesperado: {e}", file=sys.stderr)
@@ -98,9 +72,10 @@ def extract_audio(video_path, audio_path):
 
 if __name__ == '__main__':
     if len(sys.argv) < 3:
-        print("Uso: python extract_audio_from_video.py <video_path> <audio_path>", file=sys.stderr)
+        print("Uso: python extract_audio_from_video.py <video_path> <audio_path> [transcription_mp3_path]", file=sys.stderr)
         sys.exit(1)
     
     video_path = sys.argv[1]
     audio_path = sys.argv[2]
-    extract_audio(video_path, audio_path)
+    transcription_path = sys.argv[3] if len(sys.argv) > 3 else None
+    extract_audio(video_path, audio_path, transcription_path)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Transcodificação em uma única passada do FFmpeg.
+
+Decodifica a entrada (áudio ou vídeo) uma vez e grava todas as saídas pedidas
+na mesma execução do ffmpeg (várias saídas com -map):
+  --wav     WAV 44.1 kHz estéreo PCM 16-bit, para a separação
+  --mp3     MP3 22.05 kHz mono 128k, para a transcrição
+  --capped  MP3 mono que cabe no limite de tamanho (padrão: 25 MB, o da API
+            OpenAI); o bitrate é calculado a partir da duração, sem tentativas
+
+O ffmpeg grava cada saída num arquivo temporário ao lado do destino, renomeado
+só depois de terminar sem erro: um arquivo com o nome final está sempre inteiro
+(o backend reaproveita temp_audio_lrc.mp3 pela data e tamanho).
+
+Uso:
+  python transcode.py video.mp4 --wav temp_audio.wav --capped temp_audio_lrc.mp3
+  python transcode.py musica.wav --mp3 musica.mp3 --capped pequeno.mp3 --max-size 25M --json
+"""
+import sys
+import json
+import os
+import argparse
+import subprocess
+from pathlib import Path
+import io
+
+# parse_size fica em audio-io/disk_cache.py (só biblioteca padrão)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'audio-io'))
+
+from disk_cache import parse_size
+
+# Limite padrão do arquivo para transcrição: 25 MB (limite da API OpenAI)
+DEFAULT_MAX_BYTES = 25 * 1024 * 1024
+
+# Bitrates de MP3 válidos a 16/22.05 kHz (MPEG-2 layer III), em kbps
+MP3_BITRATES = (160, 144, 128, 112, 96, 80, 64, 56, 48, 40, 32, 24, 16, 8)
+
+# MP3 para transcrição: 128k, 22.05 kHz, mono
+TRANSCRIPTION_BITRATE = 128
+TRANSCRIPTION_SAMPLE_RATE = 22050
+
+# Abaixo deste bitrate a versão com limite de tamanho usa 16 kHz
+LOW_BITRATE = 48
+LOW_SAMPLE_RATE = 16000
+
+# Margem para cabeçalhos/tags e variação do tamanho dos frames do MP3
+SIZE_MARGIN = 0.97
+
+# Bitrate usado quando a duração não pode ser lida
+FALLBACK_BITRATE = 64
+
+
+def wav_output(path, sample_rate=44100, channels=2):
+    """
+    Saída WAV PCM 16-bit (padrão: 44.1 kHz estéreo, usada na separação).
+    """
+    return {"name": "wav", "path": path, "codec": "pcm_s16le", "bitrate": None,
+            "sample_rate": sample_rate, "channels": channels}
+
+
+def mp3_output(path, bitrate=TRANSCRIPTION_BITRATE, sample_rate=TRANSCRIPTION_SAMPLE_RATE, channels=1,
+               name="mp3"):
+    """
+    Saída MP3 CBR (padrão: 128k, 22.05 kHz, mono, usada na transcrição).
+    """
+    bitrate = int(str(bitrate).lower().rstrip('k'))
+    return {"name": name, "path": path, "codec": "libmp3lame", "bitrate": bitrate,
+            "sample_rate": sample_rate, "channels": channels}
+
+
+def capped_bitrate(duration, max_bytes=DEFAULT_MAX_BYTES, max_bitrate=TRANSCRIPTION_BITRATE):
+    """
+    Maior bitrate de MP3 (kbps, até max_bitrate) cujo arquivo CBR com a
+    duração dada cabe em max_bytes.
+    """
+    if not duration or duration <= 0:
+        return min(FALLBACK_BITRATE, max_bitrate)
+    budget = max_bytes * 8 * SIZE_MARGIN / duration / 1000
+    for bitrate in MP3_BITRATES:
+        if bitrate <= max_bitrate and bitrate <= budget:
+            return bitrate
+    return MP3_BITRATES[-1]
+
+
+def capped_output(path, duration, max_bytes=DEFAULT_MAX_BYTES, max_bitrate=TRANSCRIPTION_BITRATE):
+    """
+    Saída MP3 mono que cabe em max_bytes, com o bitrate calculado pela duração.
+    """
+    bitrate = capped_bitrate(duration, max_bytes, max_bitrate)
+    sample_rate = TRANSCRIPTION_SAMPLE_RATE if bitrate >= LOW_BITRATE else LOW_SAMPLE_RATE
+    return mp3_output(path, bitrate, sample_rate, 1, name="capped")
+
+
+def probe_duration(input_path):
+    """
+    Duração da entrada em segundos (ffprobe), ou None se não puder ser lida.
+    """
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1',
+        input_path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        return float(result.stdout.strip())
+    except FileNotFoundError:
+        raise RuntimeError("FFmpeg não está instalado ou não está no PATH")
+    except (subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def partial_path_for(path):
+    """
+    Arquivo temporário ao lado de `path`, com a mesma extensão (o ffmpeg
+    escolhe o formato pela extensão).
+    """
+    directory, name = os.path.split(path)
+    stem, extension = os.path.splitext(name)
+    return os.path.join(directory, f".{stem}.{os.getpid()}.partial{extension}")
+
+
+def build_command(input_path, outputs):
+    """
+    Comando do ffmpeg: uma entrada decodificada uma vez, uma saída por item.
+    """
+    cmd = ['ffmpeg', '-v', 'error', '-nostdin', '-y', '-i', input_path, '-progress', 'pipe:1', '-nostats']
+    for output in outputs:
+        cmd += ['-map', '0:a:0', '-vn', '-acodec', output["codec"]]
+        if output["bitrate"]:
+            cmd += ['-b:a', f'{output["bitrate"]}k']
+        cmd += ['-ar', str(output["sample_rate"]), '-ac', str(output["channels"]), output["path"]]
+    return cmd
+
+
+def transcode(input_path, outputs, duration=None):
+    """
+    Grava todas as saídas com uma única execução do ffmpeg.
+
+    Args:
+        input_path: arquivo de áudio ou vídeo de entrada
+        outputs: lista de saídas (wav_output, mp3_output, capped_output)
+        duration: duração conhecida em segundos (só para o progresso)
+
+    Returns:
+        dict: {nome: {"path", "size", "bitrate", "sample_rate", "channels"}}
+    """
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Arquivo de entrada não encontrado: {input_path}")
+    if not outputs:
+        raise ValueError("Nenhuma saída pedida")
+
+    for output in outputs:
+        directory = os.path.dirname(os.path.abspath(output["path"]))
+        os.makedirs(directory, exist_ok=True)
+        details = f"{output['bitrate']}k, " if output["bitrate"] else ""
+        print(f"Saída {output['name']}: {output['path']} ({details}{output['sample_rate']}Hz, "
+              f"{output['channels']} canal(is))", file=sys.stderr)
+
+    partials = [partial_path_for(output["path"]) for output in outputs]
+    cmd = build_command(input_path, [{**output, "path": partial} for output, partial in zip(outputs, partials)])
+    try:
+        try:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                       encoding='utf-8', errors='replace')
+        except FileNotFoundError:
+            raise RuntimeError("FFmpeg não está instalado ou não está no PATH")
+
+        # -progress escreve "chave=valor" no stdout; out_time_us dá a posição atual
+        last_percent = -1
+        for line in process.stdout:
+            key, _, value = line.strip().partition('=')
+            if key == 'out_time_us' and duration and value.isdigit():
+                percent = min(int(int(value) / 1e6 / duration * 100), 100)
+                if percent >= last_percent + 5:
+                    last_percent = percent
+                    print(f"Transcodificando... {percent}%", file=sys.stderr, flush=True)
+        errors = process.stderr.read().strip()
+        return_code = process.wait()
+
+        if return_code != 0:
+            raise RuntimeError(f"FFmpeg falhou ({return_code}): {errors}")
+        for output, partial in zip(outputs, partials):
+            if not os.path.exists(partial):
+                raise RuntimeError(f"Arquivo não foi criado: {output['path']}")
+        for output, partial in zip(outputs, partials):
+            os.replace(partial, output["path"])
+    finally:
+        # Saídas de uma execução que falhou nunca chegam ao nome final
+        for partial in partials:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    results = {}
+    for output in outputs:
+        results[output["name"]] = {
+            "path": output["path"],
+            "size": os.path.getsize(output["path"]),
+            "bitrate": output["bitrate"],
+            "sample_rate": output["sample_rate"],
+            "channels": output["channels"],
+        }
+    return results
+
+
+def main():
+    """
+    Função principal do script.
+    """
+    # Configurar encoding UTF-8 para Windows (aqui, e não no import, pois o módulo é importado por outros scripts)
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description="Transcodifica a entrada em várias saídas com um único ffmpeg")
+    parser.add_argument("input_path", help="Arquivo de áudio ou vídeo de entrada")
+    parser.add_argument("--wav", default=None, help="WAV 44.1 kHz estéreo para a separação")
+    parser.add_argument("--mp3", default=None, help="MP3 22.05 kHz mono 128k para a transcrição")
+    parser.add_argument("--capped", default=None, help="MP3 mono que cabe em --max-size")
+    parser.add_argument("--max-size", default="25M", help="Limite da saída --capped (padrão: 25M)")
+    parser.add_argument("--json", action="store_true", help="Imprime as saídas em JSON no stdout")
+    args = parser.parse_args()
+
+    if not (args.wav or args.mp3 or args.capped):
+        parser.error("informe ao menos uma saída (--wav, --mp3 ou --capped)")
+
+    try:
+        duration = probe_duration(args.input_path) if os.path.exists(args.input_path) else None
+        if duration:
+            print(f"Duração: {duration:.2f}s", file=sys.stderr)
+        elif args.capped:
+            print(f"AVISO: duração desconhecida, usando {FALLBACK_BITRATE}k na saída com limite",
+                  file=sys.stderr)
+
+        outputs = []
+        if args.wav:
+            outputs.append(wav_output(args.wav))
+        if args.mp3:
+            outputs.append(mp3_output(args.mp3))
+        if args.capped:
+            outputs.append(capped_output(args.capped, duration, parse_size(args.max_size)))
+
+        print(f"Transcodificando: {args.input_path}", file=sys.stderr)
+        results = transcode(args.input_path, outputs, duration)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for name, result in results.items():
+        print(f"✅ {name}: {result['path']} ({result['size'] / (1024 * 1024):.2f} MB)", file=sys.stderr)
+    if args.json:
+        print(json.dumps({"duration": duration, "outputs": results}, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()